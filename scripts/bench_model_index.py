@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-call cost of resolving a model's provider gate in the WS daemon.
+
+Compares the previous lookup (two get_available_model_names() scans) with the cached
+model -> provider index used now, plus get_provider_for_model().
+
+Usage:
+  python scripts/bench_model_index.py [--model kimi-k2-0711-preview] [--iterations 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+# Dummy keys are enough: providers are constructed but no network call is made
+os.environ.setdefault("KIMI_API_KEY", "bench-kimi")
+os.environ.setdefault("GLM_API_KEY", "bench-glm")
+
+from src.providers.base import ProviderType  # noqa: E402
+from src.providers.glm import GLMModelProvider  # noqa: E402
+from src.providers.kimi import KimiModelProvider  # noqa: E402
+from src.providers.registry import ModelProviderRegistry as R  # noqa: E402
+
+
+def scan_gate(model: str) -> str:
+    if model in set(R.get_available_model_names(provider_type=ProviderType.KIMI)):
+        return "KIMI"
+    if model in set(R.get_available_model_names(provider_type=ProviderType.GLM)):
+        return "GLM"
+    return ""
+
+
+def index_gate(model: str) -> str:
+    ptype = R.get_provider_type_for_model(model)
+    return "KIMI" if ptype == ProviderType.KIMI else "GLM" if ptype == ProviderType.GLM else ""
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--model", default="kimi-k2-0711-preview")
+    ap.add_argument("--iterations", type=int, default=2000)
+    args = ap.parse_args()
+
+    R.register_provider(ProviderType.KIMI, KimiModelProvider)
+    R.register_provider(ProviderType.GLM, GLMModelProvider)
+    assert scan_gate(args.model) == index_gate(args.model), "index disagrees with scan"
+
+    rows = [
+        ("scan (get_available_model_names x2)", lambda: scan_gate(args.model)),
+        ("index (get_provider_type_for_model)", lambda: index_gate(args.model)),
+        ("get_provider_for_model", lambda: R.get_provider_for_model(args.model)),
+    ]
+    n = args.iterations
+    print(f"model={args.model} gate={index_gate(args.model) or '-'} iterations={n}")
+    for label, fn in rows:
+        best = min(timeit.repeat(fn, number=n, repeat=3)) / n
+        print(f"  {label:<40} {best * 1e6:10.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
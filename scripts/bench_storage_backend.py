@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: conversation storage backends.
+
+Runs the operations the conversation memory performs (thread header setex/get, turn append,
+reading a thread's turns, batched chain reads) against the in-memory store and the SQLite
+store, and reports operations per second. --processes N also runs N concurrent SQLite writer
+processes appending turns to a shared file.
+
+Usage:
+  python scripts/bench_storage_backend.py [--threads 200] [--turns 10] [--turn-bytes 2000]
+                                          [--path /tmp/bench.sqlite3] [--processes 4]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from utils.storage_backend import InMemoryStorage, SQLiteStorage  # noqa: E402
+
+TTL = 3600
+
+
+def run(storage, threads: int, turns: int, turn_bytes: int) -> list[tuple[str, int, float]]:
+    header = "h" * 500
+    turn = "t" * turn_bytes
+    ids = [f"bench-{i}" for i in range(threads)]
+    rows = []
+
+    def timed(label: str, count: int, fn) -> None:
+        start = time.perf_counter()
+        fn()
+        rows.append((label, count, time.perf_counter() - start))
+
+    timed("setex header", threads, lambda: [storage.setex(f"thread:{t}", TTL, header) for t in ids])
+    timed(
+        "append turn",
+        threads * turns,
+        lambda: [storage.append_with_ttl(f"thread:{t}:turns", TTL, turn) for _ in range(turns) for t in ids],
+    )
+    timed("get header", threads, lambda: [storage.get(f"thread:{t}") for t in ids])
+    timed("get_list (whole thread)", threads, lambda: [storage.get_list(f"thread:{t}:turns") for t in ids])
+    chains = [ids[i : i + 10] for i in range(0, threads, 10)]
+    timed(
+        "chain of 10 (get_many + get_lists)",
+        len(chains),
+        lambda: [
+            (storage.get_many([f"thread:{t}" for t in c]), storage.get_lists([f"thread:{t}:turns" for t in c]))
+            for c in chains
+        ],
+    )
+    return rows
+
+
+def run_processes(path: str, processes: int, turns: int, turn_bytes: int) -> tuple[int, float]:
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {PROJECT_DIR!r})\n"
+        "from utils.storage_backend import SQLiteStorage\n"
+        f"s = SQLiteStorage({path!r})\n"
+        f"for i in range({turns}):\n"
+        f"    s.append_with_ttl('proc:' + sys.argv[1], {TTL}, 't' * {turn_bytes})\n"
+    )
+    SQLiteStorage(path).shutdown()
+    start = time.perf_counter()
+    procs = [subprocess.Popen([sys.executable, "-c", script, str(n)]) for n in range(processes)]
+    for p in procs:
+        p.wait()
+    return processes * turns, time.perf_counter() - start
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--threads", type=int, default=200)
+    ap.add_argument("--turns", type=int, default=10)
+    ap.add_argument("--turn-bytes", type=int, default=2000)
+    ap.add_argument("--path", default=None, help="SQLite file (default: a temporary file)")
+    ap.add_argument("--processes", type=int, default=4)
+    args = ap.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    path = args.path or os.path.join(tmp.name, "bench.sqlite3")
+    backends = [("memory", InMemoryStorage()), ("sqlite", SQLiteStorage(path))]
+    print(f"threads={args.threads} turns/thread={args.turns} turn_bytes={args.turn_bytes}")
+    for name, storage in backends:
+        print(f"  {name}")
+        for label, count, elapsed in run(storage, args.threads, args.turns, args.turn_bytes):
+            print(f"    {label:<36} {count / elapsed:12,.0f} ops/s  ({elapsed * 1000:8.1f} ms)")
+        storage.shutdown()
+    if args.processes > 1:
+        count, elapsed = run_processes(path, args.processes, args.turns * 50, args.turn_bytes)
+        print(f"  sqlite, {args.processes} writer processes")
+        print(f"    {'append turn':<36} {count / elapsed:12,.0f} ops/s  ({elapsed * 1000:8.1f} ms, incl. startup)")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ import logging
 import os
 import sys
 import uuid
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from pathlib import Path
 # Ensure repository root is on sys.path
@@ -131,18 +131,30 @@ async def _ensure_ws():
         raise RuntimeError(f"Failed to connect to WS daemon at {uri} within {EXAI_WS_CONNECT_TIMEOUT}s: {last_err}")
 
 
+# Last tool list from the daemon and its schema version; reused while the daemon reports not_modified
+_tools_cache: Optional[tuple[str, List[Tool]]] = None
+
+
 @server.list_tools()
 async def handle_list_tools() -> List[Tool]:
+    global _tools_cache
     ws = await _ensure_ws()
-    await ws.send(json.dumps({"op": "list_tools"}))
+    req: Dict[str, Any] = {"op": "list_tools"}
+    if _tools_cache is not None:
+        req["version"] = _tools_cache[0]
+    await ws.send(json.dumps(req))
     raw = await ws.recv()
     msg = json.loads(raw)
     if msg.get("op") != "list_tools_res":
         raise RuntimeError(f"Unexpected reply from daemon: {msg}")
+    if msg.get("not_modified") and _tools_cache is not None:
+        return list(_tools_cache[1])
     tools = []
     for t in msg.get("tools", []):
         tools.append(Tool(name=t.get("name"), description=t.get("description"), inputSchema=t.get("inputSchema") or {"type": "object"}))
-    return tools
+    if msg.get("version"):
+        _tools_cache = (msg["version"], tools)
+    return list(tools)
 
 
 @server.call_tool()
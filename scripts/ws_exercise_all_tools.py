@@ -5,6 +5,7 @@ Exercise all EX AI MCP tools via the running WS daemon.
 - Lists tools and calls each with safe, minimal arguments
 - Skips tools that likely require external provider API keys unless ALLOW_PROVIDER_TESTS=1
 - Prints a summary at the end; exits 0 if most tools succeeded, 1 otherwise
+- Calls run in the daemon's batch lane (EXAI_WS_EXERCISE_PRIORITY) so they never delay interactive use
 """
 import asyncio
 import json
@@ -22,6 +23,7 @@ PORT = int(os.getenv("EXAI_WS_PORT", "8765"))
 TOKEN = os.getenv("EXAI_WS_TOKEN", "")
 ALLOW_PROVIDER = os.getenv("ALLOW_PROVIDER_TESTS", "0") in ("1", "true", "TRUE")
 REPO_ROOT = Path(__file__).resolve().parents[1]
+PRIORITY = os.getenv("EXAI_WS_EXERCISE_PRIORITY", "batch")
 
 SKIP_TOOLS = set()
 # Skip provider-dependent tools unless user allows
@@ -31,7 +33,9 @@ if not ALLOW_PROVIDER:
 
 async def call_tool(ws, name: str, args: dict, timeout: float = 30.0) -> tuple[bool, str]:
     req_id = uuid.uuid4().hex
-    await ws.send(json.dumps({"op": "call_tool", "request_id": req_id, "name": name, "arguments": args}))
+    await ws.send(json.dumps({
+        "op": "call_tool", "request_id": req_id, "name": name, "arguments": args, "priority": PRIORITY,
+    }))
     t0 = time.time()
     while True:
         raw = await asyncio.wait_for(ws.recv(), timeout=timeout)
@@ -37,6 +37,12 @@ def _env_true(key: str, default: str = "false") -> bool:
         return False
 
 _stderr_breadcrumbs = lambda: _env_true("STDERR_BREADCRUMBS", "false")
+
+# Startup profile: phase marks are always recorded; per-module import timing is opt-in
+from utils import import_profile as _import_profile  # noqa: E402
+
+if _env_true("EXAI_IMPORT_PROFILE", "false"):
+    _import_profile.enable()
 if _stderr_breadcrumbs():
     print("[ex-mcp] bootstrap starting (pid=%s, py=%s)" % (os.getpid(), sys.executable), file=sys.stderr)
 
@@ -74,18 +80,40 @@ except ImportError:
     # dotenv not available - environment variables can still be passed directly
     pass
 
-# Lightweight per-call env hot-reload (opt-in via EX_HOTRELOAD_ENV=true)
-# Re-reads ENV_FILE or the default .env and updates os.environ in-place.
-# Safe to call frequently; dotenv is fast on small files.
+# Hot-path settings come from an immutable snapshot (utils.runtime_config) instead of
+# per-call os.getenv parsing. With EX_HOTRELOAD_ENV=true a background watcher re-reads
+# ENV_FILE or the default .env when the file changes and swaps the snapshot.
+from utils.runtime_config import get_config, on_config_change, reload_config, start_env_watcher  # noqa: E402
+
+
+def _env_file_path() -> str:
+    try:
+        return str(explicit_env if (explicit_env and os.path.exists(explicit_env)) else default_env)
+    except NameError:
+        # dotenv missing: ENV_FILE/default path were never resolved
+        return os.getenv("ENV_FILE") or str(Path(__file__).parent / ".env")
+
+
+@on_config_change
+def _invalidate_env_caches(_old, _new, _changed) -> None:
+    # Provider keys/URLs may have changed; rebuild the model -> provider index lazily
+    from src.providers.registry import ModelProviderRegistry as _R
+
+    _R.invalidate_model_index()
+
+
 def _hot_reload_env() -> None:
+    """Re-read the env file now (the watcher does this when the file changes)."""
     try:
-        from dotenv import load_dotenv as _ld
-        path = explicit_env if (explicit_env and os.path.exists(explicit_env)) else default_env
-        _ld(dotenv_path=path, override=True)
+        reload_config(_env_file_path())
     except Exception:
         # Never let hot-reload break a tool call
         pass
 
+
+if get_config().hotreload_env:
+    start_env_watcher(_env_file_path())
+
 # Import MCP SDK with protective logging so missing deps are obvious in stderr
 try:
     from mcp.server import Server  # noqa: E402
@@ -119,25 +147,9 @@ from config import (  # noqa: E402
     THINK_ROUTING_ENABLED,
     __version__,
 )
-from tools import (  # noqa: E402
-    AnalyzeTool,
-    ChallengeTool,
-    ChatTool,
-    CodeReviewTool,
-    ConsensusTool,
-    DebugIssueTool,
-    DocgenTool,
-    ListModelsTool,
-    PlannerTool,
-    PrecommitTool,
-    RefactorTool,
-    SecauditTool,
-    TestGenTool,
-    ThinkDeepTool,
-    TracerTool,
-    VersionTool,
-)
+from tools.lazy import tool_class_name  # noqa: E402
 from tools.models import ToolOutput  # noqa: E402
+from tools.schema_cache import get_schema_cache  # noqa: E402
 # Progress helper
 from utils.progress import set_mcp_notifier, send_progress, start_progress_capture, get_progress_log  # noqa: E402
 # Auggie configuration and wrappers (optional)
@@ -292,6 +304,15 @@ try:
 except Exception as e:
     print(f"Warning: Could not set up file logging: {e}", file=sys.stderr)
 
+# Move stderr/file I/O off the event loop: handlers above are drained by a listener thread,
+# and heartbeat/payload loggers are sampled and rate limited (EX_LOG_ASYNC, EX_LOG_RATE_LIMITS)
+try:
+    from utils.log_pipeline import install_async_logging
+
+    install_async_logging()
+except Exception as e:
+    print(f"Warning: Could not start async logging: {e}", file=sys.stderr)
+
 logger = logging.getLogger(__name__)
 
 
@@ -393,29 +414,55 @@ def filter_disabled_tools(all_tools: dict[str, Any]) -> dict[str, Any]:
 # Initialize the tool registry with all available AI-powered tools
 # Each tool provides specialized functionality for different development tasks
 # Tools are instantiated once and reused across requests (stateless design)
-TOOLS = {
-    "chat": ChatTool(),  # Interactive development chat and brainstorming
-    "thinkdeep": ThinkDeepTool(),  # Step-by-step deep thinking workflow with expert analysis
-    "planner": PlannerTool(),  # Interactive sequential planner using workflow architecture
-    "consensus": ConsensusTool(),  # Step-by-step consensus workflow with multi-model analysis
-    "codereview": CodeReviewTool(),  # Comprehensive step-by-step code review workflow with expert analysis
-    "precommit": PrecommitTool(),  # Step-by-step pre-commit validation workflow
-
-    "debug": DebugIssueTool(),  # Root cause analysis and debugging assistance
-    "secaudit": SecauditTool(),  # Comprehensive security audit with OWASP Top 10 and compliance coverage
-    "docgen": DocgenTool(),  # Step-by-step documentation generation with complexity analysis
-    "analyze": AnalyzeTool(),  # General-purpose file and code analysis
-    "refactor": RefactorTool(),  # Step-by-step refactoring analysis workflow with expert validation
-    "tracer": TracerTool(),  # Static call path prediction and control flow analysis
-    "testgen": TestGenTool(),  # Step-by-step test generation workflow with expert validation
-    "challenge": ChallengeTool(),  # Critical challenge prompt wrapper to avoid automatic agreement
-    "listmodels": ListModelsTool(),  # List all available AI models by provider
-    "version": VersionTool(),  # Display server version and system information
-}
+# TOOLS is filled by the lean registry below (lazily loaded tools); the static set is only
+# constructed when the registry is unavailable.
+TOOLS: dict[str, Any] = {}
+
+
+def _static_tools() -> dict[str, Any]:
+    from tools import (
+        AnalyzeTool,
+        ChallengeTool,
+        ChatTool,
+        CodeReviewTool,
+        ConsensusTool,
+        DebugIssueTool,
+        DocgenTool,
+        ListModelsTool,
+        PlannerTool,
+        PrecommitTool,
+        RefactorTool,
+        SecauditTool,
+        TestGenTool,
+        ThinkDeepTool,
+        TracerTool,
+        VersionTool,
+    )
+
+    return {
+        "chat": ChatTool(),  # Interactive development chat and brainstorming
+        "thinkdeep": ThinkDeepTool(),  # Step-by-step deep thinking workflow with expert analysis
+        "planner": PlannerTool(),  # Interactive sequential planner using workflow architecture
+        "consensus": ConsensusTool(),  # Step-by-step consensus workflow with multi-model analysis
+        "codereview": CodeReviewTool(),  # Comprehensive step-by-step code review workflow with expert analysis
+        "precommit": PrecommitTool(),  # Step-by-step pre-commit validation workflow
+
+        "debug": DebugIssueTool(),  # Root cause analysis and debugging assistance
+        "secaudit": SecauditTool(),  # Comprehensive security audit with OWASP Top 10 and compliance coverage
+        "docgen": DocgenTool(),  # Step-by-step documentation generation with complexity analysis
+        "analyze": AnalyzeTool(),  # General-purpose file and code analysis
+        "refactor": RefactorTool(),  # Step-by-step refactoring analysis workflow with expert validation
+        "tracer": TracerTool(),  # Static call path prediction and control flow analysis
+        "testgen": TestGenTool(),  # Step-by-step test generation workflow with expert validation
+        "challenge": ChallengeTool(),  # Critical challenge prompt wrapper to avoid automatic agreement
+        "listmodels": ListModelsTool(),  # List all available AI models by provider
+        "version": VersionTool(),  # Display server version and system information
+    }
 
 # Optionally register Auggie-optimized tools (aug_*) in addition to originals
 if (AUGGIE_ACTIVE or detect_auggie_cli()) and AUGGIE_WRAPPERS_AVAILABLE:
     logger.info("Registering Auggie-optimized tools (aug_*) alongside originals")
+    from tools import ChatTool, ConsensusTool, ThinkDeepTool
 
     class AugChatTool(ChatTool):
         def get_name(self) -> str: return "aug_chat"
@@ -460,6 +507,8 @@ try:
 
 except Exception as e:
     logger.warning(f"Lean tool registry unavailable, falling back to static tool set: {e}")
+    TOOLS.update(_static_tools())
+_import_profile.mark("tools_registered")
 
 # Re-register Auggie wrappers after lean registry build if applicable
 try:
@@ -808,6 +857,52 @@ def configure_providers():
             )
 
 
+def _build_tool_list(allowlist: set, denylist: set, slim: bool, no_annotations: bool) -> list[Tool]:
+    """MCP tool descriptors for TOOLS under one client profile (see handle_list_tools)."""
+    tools = []
+    for tool in TOOLS.values():
+        try:
+            nm = tool.name.lower()
+        except RuntimeError as e:
+            # Lazily loaded tool whose module failed to import/construct: leave it out like the
+            # eager registry did (calling it still reports the load error)
+            logger.warning(str(e))
+            continue
+        # Apply optional allow/deny lists generically
+        if allowlist and nm not in allowlist:
+            continue
+        if denylist and nm in denylist:
+            continue
+
+        # Get optional annotations from the tool (env-gated)
+        annotations = tool.get_annotations()
+        tool_annotations = ToolAnnotations(**annotations) if (annotations and MCP_HAS_TOOL_ANNOTATIONS) else None
+        if no_annotations:
+            tool_annotations = None
+
+        # Build input schema (optionally slim for heavy tools when explicitly enabled)
+        schema = tool.get_input_schema()
+        try:
+            if slim:
+                if tool.name in {"thinkdeep", "analyze", "consensus"}:
+                    schema = {"type": "object", "properties": {}, "additionalProperties": True}
+        except Exception:
+            pass
+
+        kwargs = dict(
+            name=tool.name,
+            description=tool.description,
+            inputSchema=schema,
+        )
+        # Only pass annotations if supported by current MCP SDK
+        if tool_annotations is not None:
+            kwargs["annotations"] = tool_annotations
+
+        tools.append(Tool(**kwargs))
+
+    return tools
+
+
 @server.list_tools()
 async def handle_list_tools() -> list[Tool]:
     """
@@ -844,7 +939,6 @@ async def handle_list_tools() -> list[Tool]:
                 pass
     except Exception as e:
         logger.debug(f"Could not log client info during list_tools: {e}")
-    tools = []
 
     # Client-aware allow/deny filtering (generic profile with legacy CLAUDE_* fallback)
     try:
@@ -861,40 +955,15 @@ async def handle_list_tools() -> list[Tool]:
         allowlist = set()
         denylist = set()
 
-    # Add all registered AI-powered tools from the TOOLS registry
-    for tool in TOOLS.values():
-        # Apply optional allow/deny lists generically
-        nm = tool.name.lower()
-        if allowlist and nm not in allowlist:
-            continue
-        if denylist and nm in denylist:
-            continue
-
-        # Get optional annotations from the tool (env-gated)
-        annotations = tool.get_annotations()
-        tool_annotations = ToolAnnotations(**annotations) if (annotations and MCP_HAS_TOOL_ANNOTATIONS) else None
-        if _env_true("DISABLE_TOOL_ANNOTATIONS", "false"):
-            tool_annotations = None
-
-        # Build input schema (optionally slim for heavy tools when explicitly enabled)
-        schema = tool.get_input_schema()
-        try:
-            if _env_true("SLIM_SCHEMAS", "false"):
-                if tool.name in {"thinkdeep", "analyze", "consensus"}:
-                    schema = {"type": "object", "properties": {}, "additionalProperties": True}
-        except Exception:
-            pass
-
-        kwargs = dict(
-            name=tool.name,
-            description=tool.description,
-            inputSchema=schema,
-        )
-        # Only pass annotations if supported by current MCP SDK
-        if tool_annotations is not None:
-            kwargs["annotations"] = tool_annotations
-
-        tools.append(Tool(**kwargs))
+    # Schemas only change with the tool set, provider configuration, restriction policy and
+    # this client profile, so the built list is cached per combination (tools/schema_cache.py)
+    slim = _env_true("SLIM_SCHEMAS", "false")
+    no_annotations = _env_true("DISABLE_TOOL_ANNOTATIONS", "false")
+    profile = (tuple(sorted(allowlist)), tuple(sorted(denylist)), slim, no_annotations)
+    cached = get_schema_cache().get(
+        TOOLS, profile, lambda _version: _build_tool_list(allowlist, denylist, slim, no_annotations)
+    )
+    tools = list(cached.value)
 
     # Log cache efficiency info
     if os.getenv("OPENROUTER_API_KEY") and os.getenv("OPENROUTER_API_KEY") != "your_openrouter_api_key_here":
@@ -1018,15 +1087,17 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
     try:
         mcp_activity_logger = logging.getLogger("mcp_activity")
         # Dynamically re-enable if env now permits (ensure TOOL_CALL visibility)
-        if getattr(mcp_activity_logger, "disabled", False) and _env_true("ACTIVITY_LOG", "true"):
+        if getattr(mcp_activity_logger, "disabled", False) and get_config().activity_log:
             mcp_activity_logger.disabled = False
         mcp_activity_logger.info(f"TOOL_CALL: {name} with {len(arguments)} arguments req_id={req_id}")
     except Exception:
         pass
+    # One consistent config snapshot for the whole call
+    _cfg = get_config()
     # Initialize JSONL event (boundary start) and monitoring helpers
     try:
         from utils.tool_events import ToolCallEvent as __Evt, ToolEventSink as __Sink
-        _ex_mirror = _env_true("EX_MIRROR_ACTIVITY_TO_JSONL", "false")
+        _ex_mirror = _cfg.mirror_activity_jsonl
         _evt = __Evt(provider="boundary", tool_name=name, args={"arg_count": len(arguments), "req_id": req_id})
         _sink = __Sink()
     except Exception:
@@ -1037,18 +1108,17 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
     # Watchdog and timeout configuration
     import asyncio as _asyncio
     import time as _time
-    try:
-        _tool_timeout_s = float(os.getenv("EX_TOOL_TIMEOUT_SECONDS", "120"))
-        _hb_every_s = float(os.getenv("EX_HEARTBEAT_SECONDS", "10"))
-        _warn_after_s = float(os.getenv("EX_WATCHDOG_WARN_SECONDS", "30"))
-        _err_after_s = float(os.getenv("EX_WATCHDOG_ERROR_SECONDS", "90"))
-    except Exception:
-        _tool_timeout_s, _hb_every_s, _warn_after_s, _err_after_s = 120.0, 10.0, 30.0, 90.0
+    _tool_timeout_s = _cfg.tool_timeout_s
+    _hb_every_s = _cfg.heartbeat_s
+    _warn_after_s = _cfg.watchdog_warn_s
+    _err_after_s = _cfg.watchdog_error_s
 
     async def _execute_with_monitor(_coro_factory):
         start = _time.time()
         # background heartbeat
         mcp_logger = logging.getLogger("mcp_activity")
+        # Child logger: rate limited, still written to the activity log via propagation
+        hb_logger = logging.getLogger("mcp_activity.heartbeat")
         _stop = False
         async def _heartbeat():
             last_warned = False
@@ -1060,8 +1130,8 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
                     elif elapsed >= _warn_after_s and not last_warned:
                         mcp_logger.warning(f"[WATCHDOG] tool={name} req_id={req_id} elapsed={elapsed:.1f}s — still running")
                         last_warned = True
-                    else:
-                        mcp_logger.info(f"[PROGRESS] tool={name} req_id={req_id} elapsed={elapsed:.1f}s — heartbeat")
+                    elif not mcp_logger.disabled:
+                        hb_logger.info("[PROGRESS] tool=%s req_id=%s elapsed=%.1fs — heartbeat", name, req_id, elapsed)
                 except Exception:
                     pass
                 try:
@@ -1168,32 +1238,20 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         try:
             if name == "consensus":
                 models_arg = arguments.get("models")
-                if not models_arg and os.getenv("ENABLE_CONSENSUS_AUTOMODE", "true").strip().lower() == "true":
+                if not models_arg and _cfg.consensus_automode:
                     from src.providers.registry import ModelProviderRegistry
                     from src.providers.base import ProviderType
 
-                    def _int_env(k: str, d: int) -> int:
-                        try:
-                            return int(os.getenv(k, str(d)))
-                        except Exception:
-                            return d
-
-                    min_needed = _int_env("MIN_CONSENSUS_MODELS", 2)
-                    max_needed = max(_int_env("MAX_CONSENSUS_MODELS", 3), min_needed)
+                    min_needed = _cfg.min_consensus_models
+                    max_needed = max(_cfg.max_consensus_models, min_needed)
 
                     available_map = ModelProviderRegistry.get_available_models(respect_restrictions=True)
                     available = set(available_map.keys())
 
                     # Preferred quality-tier from env
-                    prefs = [
-                        os.getenv("GLM_QUALITY_MODEL"),
-                        os.getenv("KIMI_QUALITY_MODEL"),
-                    ]
+                    prefs = [_cfg.glm_quality_model, _cfg.kimi_quality_model]
                     # Speed-tier complements
-                    speed_prefs = [
-                        os.getenv("GLM_SPEED_MODEL"),
-                        os.getenv("KIMI_SPEED_MODEL"),
-                    ]
+                    speed_prefs = [_cfg.glm_speed_model, _cfg.kimi_speed_model]
 
                     chosen: list[str] = []
                     for m in prefs:
@@ -1248,12 +1306,6 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
     if name in TOOLS:
         logger.info(f"Executing tool '{name}' with {len(arguments)} parameter(s)")
         tool = TOOLS[name]
-        # Optional: hot-reload env on every call so EX_ACTIVITY_* toggles are live
-        try:
-            if _env_true("EX_HOTRELOAD_ENV", "false"):
-                _hot_reload_env()
-        except Exception:
-            pass
         # Begin per-call progress capture buffer (in addition to logs)
         try:
             start_progress_capture()
@@ -1272,11 +1324,11 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
                 # Route Kimi-specific tools to Kimi by default
                 kimi_tools = {"kimi_chat_with_tools", "kimi_upload_and_extract"}
                 if tool_name in kimi_tools:
-                    return os.getenv("KIMI_DEFAULT_MODEL", "kimi-k2-0711-preview")
+                    return _cfg.kimi_default_model
 
                 simple_tools = {"chat","status","provider_capabilities","listmodels","activity","version"}
                 if tool_name in simple_tools:
-                    return os.getenv("GLM_FLASH_MODEL", "glm-4.5-flash")
+                    return _cfg.glm_flash_model
 
                 # Step-aware heuristics for workflows (Option B)
                 step_number = args.get("step_number")
@@ -1285,30 +1337,30 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
 
                 # thinkdeep: always deep
                 if tool_name == "thinkdeep":
-                    return os.getenv("KIMI_THINKING_MODEL", "kimi-thinking-preview")
+                    return _cfg.kimi_thinking_model
 
                 # analyze
                 if tool_name == "analyze":
                     if (step_number == 1 and (next_step_required is True)):
-                        return os.getenv("GLM_FLASH_MODEL", "glm-4.5-flash")
+                        return _cfg.glm_flash_model
                     # final step or unknown -> deep by default
-                    return os.getenv("KIMI_THINKING_MODEL", "kimi-thinking-preview")
+                    return _cfg.kimi_thinking_model
 
                 # codereview/refactor/debug/testgen/planner
                 if tool_name in {"codereview","refactor","debug","testgen","planner"}:
                     if depth == "deep" or (next_step_required is False):
-                        return os.getenv("KIMI_THINKING_MODEL", "kimi-thinking-preview")
+                        return _cfg.kimi_thinking_model
                     if step_number == 1:
-                        return os.getenv("GLM_FLASH_MODEL", "glm-4.5-flash")
+                        return _cfg.glm_flash_model
                     # Default lean toward flash unless final/deep
-                    return os.getenv("GLM_FLASH_MODEL", "glm-4.5-flash")
+                    return _cfg.glm_flash_model
 
                 # consensus/docgen/secaudit: deep
                 if tool_name in {"consensus","docgen","secaudit"}:
-                    return os.getenv("KIMI_THINKING_MODEL", "kimi-thinking-preview")
+                    return _cfg.kimi_thinking_model
 
                 # Default: prefer GLM flash
-                return os.getenv("DEFAULT_AUTO_MODEL", "glm-4.5-flash")
+                return _cfg.default_auto_model
             except Exception:
                 return requested
 
@@ -1347,7 +1399,7 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
             sentinels_early = {s.strip().lower() for s in os.getenv("ROUTER_SENTINEL_MODELS", "glm-4.5-flash,auto").split(",") if s.strip()}
             logging.getLogger("server").info(
                 f"EVENT boundary_model_resolution_attempt input_model={model_name} "
-                f"tool={getattr(tool, '__class__', type(tool)).__name__} "
+                f"tool={tool_class_name(tool)} "
                 f"sentinel_match={str(model_name).strip().lower() in sentinels_early} "
                 f"hidden_router={hidden_enabled_early}"
             )
@@ -1359,17 +1411,17 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         try:
             if THINK_ROUTING_ENABLED and name == "thinkdeep":
                 explicit_model = "model" in arguments and str(arguments.get("model") or "").strip().lower() not in {"", "auto"}
-                override_explicit = _os.getenv("THINKDEEP_OVERRIDE_EXPLICIT", "true").strip().lower() == "true"
+                override_explicit = _cfg.thinkdeep_override_explicit
                 want_expert = bool(arguments.get("use_assistant_model", False))
                 if (not explicit_model) or (override_explicit and want_expert):
                     # Choose fast expert model for thinkdeep to avoid long waits/timeouts (or Kimi thinking if disabled)
                     requested_input = arguments.get("model")
-                    fast = (_os.getenv("THINKDEEP_FAST_EXPERT", "true").strip().lower() == "true")
+                    fast = _cfg.thinkdeep_fast_expert
                     if fast:
-                        model_name = _os.getenv("GLM_FLASH_MODEL", "glm-4.5-flash")
+                        model_name = _cfg.glm_flash_model
                         reason = "forced_glm_flash_fast"
                     else:
-                        model_name = _os.getenv("KIMI_THINKING_MODEL", "kimi-thinking-preview")
+                        model_name = _cfg.kimi_thinking_model
                         reason = "forced_kimi_thinking"
                     arguments["model"] = model_name
                     logger.info(f"THINKING MODEL (router): requested='{requested_input}' chosen='{model_name}' reason='{reason}'")
@@ -1438,24 +1490,24 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
 
             # Intelligent selection by tool category (env-gated)
             try:
-                if os.getenv("ENABLE_INTELLIGENT_SELECTION", "true").strip().lower() == "true":
+                if _cfg.intelligent_selection:
                     cat_obj = tool_obj.get_model_category() if hasattr(tool_obj, "get_model_category") else None
                     cat_name = getattr(cat_obj, "name", None)
                     if cat_name:
                         # Choose quality-tier for extended reasoning; speed-tier for fast/balanced
                         if cat_name == "EXTENDED_REASONING":
                             if (locale.startswith("zh") or _has_cjk(prompt)) and has_kimi:
-                                chosen = os.getenv("KIMI_QUALITY_MODEL", os.getenv("KIMI_DEFAULT_MODEL", "kimi-k2-0711-preview"))
+                                chosen = _cfg.kimi_quality_model or _cfg.kimi_default_model
                                 reason = "intelligent_ext_reasoning_kimi"
                             elif has_glm:
-                                chosen = os.getenv("GLM_QUALITY_MODEL", "glm-4.5")
+                                chosen = _cfg.glm_quality_model or "glm-4.5"
                                 reason = "intelligent_ext_reasoning_glm"
                         elif cat_name in ("BALANCED", "FAST_RESPONSE"):
                             if has_glm:
-                                chosen = os.getenv("GLM_SPEED_MODEL", "glm-4.5-flash")
+                                chosen = _cfg.glm_speed_model or "glm-4.5-flash"
                                 reason = "intelligent_speed_glm"
                             elif has_kimi:
-                                chosen = os.getenv("KIMI_SPEED_MODEL", "kimi-k2-turbo-preview")
+                                chosen = _cfg.kimi_speed_model or "kimi-k2-turbo-preview"
                                 reason = "intelligent_speed_kimi"
                     # If still not chosen, fall through to legacy logic below
             except Exception:
@@ -1463,11 +1515,11 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
 
             # 1) Locale or content indicates CJK â†’ prefer Kimi
             if (locale.startswith("zh") or _has_cjk(prompt)) and has_kimi:
-                chosen = os.getenv("KIMI_DEFAULT_MODEL", "kimi-k2-0711-preview")
+                chosen = _cfg.kimi_default_model
                 reason = "cjk_locale_or_content"
             # 2) Local-only tasks â†’ prefer Custom
             elif local_only and has_custom:
-                chosen = os.getenv("CUSTOM_MODEL_NAME", "llama3.2")
+                chosen = _cfg.custom_model_name
                 reason = "local_only"
             # 3) Default GLM fast model if present
             elif has_glm:
@@ -1483,7 +1535,7 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
             try:
                 sel_log = {
                     "event": "auto_model_selected",
-                    "tool": getattr(tool_obj, "__class__", type(tool_obj)).__name__,
+                    "tool": tool_class_name(tool_obj),
                     "model": chosen,
                     "reason": reason,
                     "locale": locale,
@@ -1507,7 +1559,7 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
                 "event": "boundary_model_resolution_attempt",
                 "req_id": req_id,
                 "input_model": model_name,
-                "tool": getattr(tool, "__class__", type(tool)).__name__,
+                "tool": tool_class_name(tool),
                 "sentinel_match": model_name.strip().lower() in sentinels,
                 "hidden_router": hidden_enabled,
             })
@@ -1528,14 +1580,14 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
                         "req_id": req_id,
                         "input_model": model_name,
                         "resolved_model": selected,
-                        "tool": getattr(tool, "__class__", type(tool)).__name__,
+                        "tool": tool_class_name(tool),
                         "sentinel_match": model_name.strip().lower() in sentinels,
                         "hidden_router": hidden_enabled,
                     })
                     # Flat string log for simple grepping and EX-AI parsing
                     logger_server.info(
                         f"EVENT boundary_model_resolved input_model={model_name} resolved_model={selected} "
-                        f"tool={getattr(tool, '__class__', type(tool)).__name__} req_id={req_id}"
+                        f"tool={tool_class_name(tool)} req_id={req_id}"
                     )
                 except Exception:
                     pass
@@ -1637,12 +1689,11 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
             from utils.client_info import get_client_info_from_context
             ci = get_client_info_from_context(server) or {}
             # Generic env first, then legacy Claude-specific variables
-            if _env_true("CLIENT_DEFAULTS_USE_WEBSEARCH", os.getenv("CLAUDE_DEFAULTS_USE_WEBSEARCH","false")):
+            if _cfg.client_defaults_use_websearch:
                 if "use_websearch" not in arguments:
                     arguments["use_websearch"] = True
             if name == "thinkdeep" and "thinking_mode" not in arguments:
-                default_thinking = (os.getenv("CLIENT_DEFAULT_THINKING_MODE") or os.getenv("CLAUDE_DEFAULT_THINKING_MODE","medium")).strip().lower()
-                arguments["thinking_mode"] = default_thinking
+                arguments["thinking_mode"] = _cfg.client_default_thinking_mode
         except Exception:
             pass
 
@@ -1665,16 +1716,12 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         try:
             import json as _json
             from mcp.types import TextContent as _TextContent
-            auto_en = _env_true("EX_AUTOCONTINUE_WORKFLOWS", "false")
-            only_think = _env_true("EX_AUTOCONTINUE_ONLY_THINKDEEP", "true")
-            max_steps = int(os.getenv("EX_AUTOCONTINUE_MAX_STEPS", "3"))
+            auto_en = _cfg.autocontinue_workflows
+            only_think = _cfg.autocontinue_only_thinkdeep
+            max_steps = _cfg.autocontinue_max_steps
             # Apply optional per-client workflow step cap (generic with legacy fallback)
-            try:
-                cap = int((os.getenv("CLIENT_MAX_WORKFLOW_STEPS") or os.getenv("CLAUDE_MAX_WORKFLOW_STEPS","0") or "0"))
-                if cap > 0:
-                    max_steps = min(max_steps, cap)
-            except Exception:
-                pass
+            if _cfg.client_max_workflow_steps > 0:
+                max_steps = min(max_steps, _cfg.client_max_workflow_steps)
             steps = 0
             if auto_en and isinstance(result, list) and result:
                 while steps < max_steps:
@@ -1879,7 +1926,7 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         try:
             mcp_activity_logger = logging.getLogger("mcp_activity")
             # Dynamically re-enable if env now permits
-            if getattr(mcp_activity_logger, "disabled", False) and _env_true("ACTIVITY_LOG", "true"):
+            if getattr(mcp_activity_logger, "disabled", False) and get_config().activity_log:
                 mcp_activity_logger.disabled = False
             mcp_activity_logger.info(f"TOOL_COMPLETED: {name} req_id={req_id}")
             # Emit TOOL_SUMMARY with lightweight fields for UI watchers
@@ -2589,6 +2636,9 @@ async def main():
         )
 
 
+_import_profile.mark("server_imported")
+
+
 def run():
     """Console script entry point for ex-mcp-server."""
     try:
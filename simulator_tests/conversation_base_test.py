@@ -67,8 +67,7 @@ class ConversationBaseTest(BaseSimulatorTest):
 
             storage = get_storage_backend()
             # Clear all stored conversation threads
-            with storage._lock:
-                storage._store.clear()
+            storage.clear()
             self.logger.debug("Cleared conversation memory for test isolation")
         except Exception as e:
             self.logger.warning(f"Could not clear conversation memory: {e}")
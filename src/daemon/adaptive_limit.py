@@ -0,0 +1,171 @@
+"""
+Adaptive (AIMD) concurrency limits for the WS daemon.
+
+Static per-provider caps are only a starting point. Each provider, and each model under
+it, gets a limit that moves with what the upstream actually sustains:
+- Additive increase: every successful call while the limit is being used widens it by
+  increase/limit, i.e. roughly +increase per limit-full of calls
+- Multiplicative decrease: a 429 / concurrency rejection, or a short-term latency average
+  inflated past tolerance x the long-term baseline, multiplies the limit by backoff
+- Decreases are rate-limited by a cooldown so one burst of 429s counts once
+
+Latency samples are provider request latencies (time to response headers for streams)
+reported through utils.rate_limit, so tool-side work does not skew the baseline.
+Like the admission controller, limiters are only touched from the event loop thread.
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+class AIMDLimit:
+    """One adaptive concurrency limit."""
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        backoff: float = 0.5,
+        tolerance: float = 2.0,
+        cooldown_s: float = 5.0,
+        warmup: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(self.max_limit, max(self.min_limit, int(initial))))
+        self.initial = int(self.limit)
+        self.increase = max(0.0, float(increase))
+        self.backoff = min(1.0, max(0.05, float(backoff)))
+        self.tolerance = max(1.0, float(tolerance))
+        self.cooldown_s = max(0.0, float(cooldown_s))
+        self.warmup = max(1, int(warmup))
+        self._clock = clock
+        self._last_decrease: Optional[float] = None
+
+        # Long-term baseline and short-term latency averages (seconds)
+        self.baseline_s: Optional[float] = None
+        self.recent_s: Optional[float] = None
+        self.samples = 0
+
+        self.increases = 0
+        self.decreases = 0
+        self.rate_limited = 0
+        self.latency_backoffs = 0
+
+    @property
+    def current(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def _decrease(self) -> bool:
+        now = self._clock()
+        if self._last_decrease is not None and now - self._last_decrease < self.cooldown_s:
+            return False
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        self.decreases += 1
+        return True
+
+    def on_rate_limited(self) -> None:
+        self.rate_limited += 1
+        self._decrease()
+
+    def on_success(self, latency_s: Optional[float], inflight: int) -> None:
+        """Account one successful call; latency_s is None when the provider reported none."""
+        if latency_s is not None and latency_s >= 0:
+            self.samples += 1
+            if self.baseline_s is None:
+                self.baseline_s = self.recent_s = float(latency_s)
+            else:
+                self.recent_s = self.recent_s + 0.3 * (latency_s - self.recent_s)  # type: ignore[operator]
+                self.baseline_s = self.baseline_s + 0.05 * (latency_s - self.baseline_s)
+            if self.samples > self.warmup and self.recent_s > self.tolerance * self.baseline_s:
+                if self._decrease():
+                    self.latency_backoffs += 1
+                    # Start the next window from the baseline instead of re-triggering on old samples
+                    self.recent_s = self.baseline_s
+                return
+        # Only widen while the limit is actually exercised; idle limits must not drift upward
+        if inflight * 2 >= self.current and self.limit < self.max_limit:
+            before = self.current
+            self.limit = min(float(self.max_limit), self.limit + self.increase / max(1.0, self.limit))
+            if self.current > before:
+                self.increases += 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.current,
+            "initial": self.initial,
+            "min": self.min_limit,
+            "max": self.max_limit,
+            "latency_baseline_ms": None if self.baseline_s is None else round(self.baseline_s * 1000.0, 1),
+            "latency_recent_ms": None if self.recent_s is None else round(self.recent_s * 1000.0, 1),
+            "samples": self.samples,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "rate_limited": self.rate_limited,
+            "latency_backoffs": self.latency_backoffs,
+        }
+
+
+class AdaptiveLimits:
+    """AIMD limits per provider and per (provider, model); providers without a seed stay unlimited."""
+
+    def __init__(self, initial: Dict[str, int], max_models: int = 256, **params) -> None:
+        self._params = params
+        self._providers: Dict[str, AIMDLimit] = {p: AIMDLimit(n, **params) for p, n in initial.items()}
+        self._models: Dict[Tuple[str, str], AIMDLimit] = {}
+        self.max_models = max(1, int(max_models))
+
+    def _model(self, provider: str, model: str, create: bool) -> Optional[AIMDLimit]:
+        lim = self._models.get((provider, model))
+        if lim is None and create and provider in self._providers and len(self._models) < self.max_models:
+            # Models start from the provider's configured seed, not from its current (possibly reduced) limit
+            lim = AIMDLimit(self._providers[provider].initial, **self._params)
+            self._models[(provider, model)] = lim
+        return lim
+
+    def limit(self, provider: str, model: Optional[str] = None) -> Optional[int]:
+        if model is None:
+            lim = self._providers.get(provider)
+        else:
+            lim = self._model(provider, model, create=False)
+        return None if lim is None else lim.current
+
+    def record(
+        self,
+        provider: str,
+        model: Optional[str],
+        latencies_s: Iterable[float],
+        rate_limited: bool,
+        provider_inflight: int,
+        model_inflight: int,
+    ) -> None:
+        """Feed the outcome of one call (its provider latency samples and any rate limiting)."""
+        prov = self._providers.get(provider)
+        if prov is None:
+            return
+        targets = [(prov, provider_inflight)]
+        mod = self._model(provider, model, create=True) if model else None
+        if mod is not None:
+            targets.append((mod, model_inflight))
+        samples = list(latencies_s)
+        for lim, inflight in targets:
+            if rate_limited:
+                lim.on_rate_limited()
+            elif samples:
+                for s in samples:
+                    lim.on_success(s, inflight)
+            else:
+                lim.on_success(None, inflight)
+
+    def snapshot(self) -> dict:
+        out: dict = {}
+        for name, lim in sorted(self._providers.items()):
+            entry = lim.stats()
+            entry["models"] = {m: lim.stats() for (p, m), lim in sorted(self._models.items()) if p == name}
+            out[name] = entry
+        return out
@@ -0,0 +1,380 @@
+"""
+Queued, fair admission control for the WS daemon.
+
+Calls that cannot start immediately wait in a bounded per-provider queue instead of
+being rejected the moment a global, provider or session slot is busy. When a slot
+frees up the next waiter is chosen by start-time fair queuing across sessions: each
+session carries a virtual clock that advances by 1/weight per admitted call, and the
+eligible session with the smallest clock goes first. A chatty session therefore
+cannot starve quieter ones, and heavier-weighted sessions get proportionally more.
+
+Calls also carry a priority lane (interactive, background, batch). Higher lanes are
+dispatched first, each lane can have its own cap, and a lane's reserved slots (globally
+and per provider) can only be used by that lane or higher ones while they are idle, so
+long workflows and batch sweeps soak up leftover capacity without delaying quick calls.
+
+Provider (and per-model) limits can be adaptive: when an AdaptiveLimits instance is
+supplied, its current limits replace the static provider caps (see adaptive_limit.py).
+
+All state is mutated from the event loop thread only; no locks are needed because
+no critical section awaits.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .adaptive_limit import AdaptiveLimits
+
+DEFAULT_PROVIDER = "DEFAULT"
+# Priority lanes, highest first
+LANES = ("interactive", "background", "batch")
+DEFAULT_LANE = "interactive"
+_LANE_RANK = {lane: i for i, lane in enumerate(LANES)}
+
+
+class QueueFullError(Exception):
+    """Raised when a provider's wait queue is already at its configured depth."""
+
+
+@dataclass
+class Ticket:
+    session_id: str
+    provider: str
+    model: Optional[str] = None
+    lane: str = DEFAULT_LANE
+    enqueued_at: float = field(default_factory=time.time)
+    granted_at: Optional[float] = None
+    released: bool = False
+
+    @property
+    def waited_s(self) -> float:
+        if self.granted_at is None:
+            return 0.0
+        return max(0.0, self.granted_at - self.enqueued_at)
+
+
+@dataclass
+class _Waiter:
+    ticket: Ticket
+    future: asyncio.Future
+
+
+class AdmissionController:
+    """Global/provider/session slot accounting with weighted fair wait queues."""
+
+    def __init__(
+        self,
+        global_limit: int,
+        provider_limits: Dict[str, int],
+        session_limit: int,
+        max_queue: int = 64,
+        max_wait_s: float = 60.0,
+        limits: Optional["AdaptiveLimits"] = None,
+        lane_reserved: Optional[Dict[str, int]] = None,
+        lane_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.global_limit = max(1, int(global_limit))
+        self.provider_limits = {k: max(1, int(v)) for k, v in provider_limits.items()}
+        self.session_limit = max(1, int(session_limit))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait_s = max(0.0, float(max_wait_s))
+        self.limits = limits
+        self.lane_reserved = {k: max(0, int(v)) for k, v in (lane_reserved or {}).items() if k in _LANE_RANK}
+        self.lane_limits = {k: max(1, int(v)) for k, v in (lane_limits or {}).items() if k in _LANE_RANK}
+
+        self._global_inflight = 0
+        self._provider_inflight: Dict[str, int] = {}
+        self._model_inflight: Dict[Tuple[str, str], int] = {}
+        self._session_inflight: Dict[str, int] = {}
+        self._lane_inflight: Dict[str, int] = {}
+        self._lane_provider_inflight: Dict[Tuple[str, str], int] = {}
+        self._session_weight: Dict[str, float] = {}
+        self._session_limit: Dict[str, int] = {}
+        # Per-session finish tag and the global virtual clock (start tag of the last admitted call)
+        self._vtime: Dict[str, float] = {}
+        self._vclock = 0.0
+        # provider -> (session, lane) -> FIFO of waiters (dicts keep arrival order for tie-breaks)
+        self._queues: Dict[str, Dict[Tuple[str, str], Deque[_Waiter]]] = {}
+        self._queued: Dict[str, int] = {}
+
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    # Sessions -----------------------------------------------------------------
+
+    def register_session(self, session_id: str, weight: float = 1.0, max_inflight: Optional[int] = None) -> None:
+        self._session_weight[session_id] = max(0.01, float(weight or 1.0))
+        if max_inflight:
+            self._session_limit[session_id] = max(1, int(max_inflight))
+
+    def forget_session(self, session_id: str) -> None:
+        """Drop per-session bookkeeping once the session has nothing running or queued."""
+        if self._session_inflight.get(session_id, 0) > 0:
+            return
+        for queues in self._queues.values():
+            if any(dq for (sid, _lane), dq in queues.items() if sid == session_id):
+                return
+        self._session_weight.pop(session_id, None)
+        self._session_limit.pop(session_id, None)
+        self._session_inflight.pop(session_id, None)
+        self._vtime.pop(session_id, None)
+
+    # Capacity checks -------------------------------------------------------------
+
+    def provider_limit(self, provider: str) -> Optional[int]:
+        """Current cap for a provider: the adaptive limit when available, else the static one."""
+        if self.limits is not None:
+            limit = self.limits.limit(provider)
+            if limit is not None:
+                return limit
+        return self.provider_limits.get(provider)
+
+    def inflight(self, provider: str, model: Optional[str] = None) -> int:
+        if model is None:
+            return self._provider_inflight.get(provider, 0)
+        return self._model_inflight.get((provider, model), 0)
+
+    def _provider_has_room(self, provider: str) -> bool:
+        limit = self.provider_limit(provider)
+        return limit is None or self._provider_inflight.get(provider, 0) < limit
+
+    def _lane_has_room(self, lane: str, provider: str) -> bool:
+        """Lane cap, plus capacity still reserved for idle higher lanes (globally and per provider)."""
+        cap = self.lane_limits.get(lane)
+        if cap is not None and self._lane_inflight.get(lane, 0) >= cap:
+            return False
+        higher = LANES[: _LANE_RANK[lane]]
+        if not higher or not self.lane_reserved:
+            return True
+        held = sum(max(0, self.lane_reserved.get(h, 0) - self._lane_inflight.get(h, 0)) for h in higher)
+        if self._global_inflight + held >= self.global_limit:
+            return False
+        plimit = self.provider_limit(provider)
+        if plimit is None:
+            return True
+        # Never reserve a provider's last slot, so lower lanes cannot be starved outright
+        held = sum(
+            max(0, min(self.lane_reserved.get(h, 0), plimit - 1) - self._lane_provider_inflight.get((h, provider), 0))
+            for h in higher
+        )
+        return self._provider_inflight.get(provider, 0) + held < plimit
+
+    def _model_has_room(self, ticket: Ticket) -> bool:
+        if self.limits is None or ticket.model is None:
+            return True
+        limit = self.limits.limit(ticket.provider, ticket.model)
+        return limit is None or self._model_inflight.get((ticket.provider, ticket.model), 0) < limit
+
+    def _session_has_room(self, session_id: str) -> bool:
+        limit = self._session_limit.get(session_id, self.session_limit)
+        return self._session_inflight.get(session_id, 0) < limit
+
+    def _start_tag(self, session_id: str) -> float:
+        return max(self._vtime.get(session_id, 0.0), self._vclock)
+
+    # Queue maintenance ----------------------------------------------------------
+
+    def _enqueue(self, w: _Waiter) -> None:
+        prov = w.ticket.provider
+        qkey = (w.ticket.session_id, w.ticket.lane)
+        self._queues.setdefault(prov, {}).setdefault(qkey, deque()).append(w)
+        self._queued[prov] = self._queued.get(prov, 0) + 1
+
+    def _remove(self, w: _Waiter) -> None:
+        prov, qkey = w.ticket.provider, (w.ticket.session_id, w.ticket.lane)
+        dq = self._queues.get(prov, {}).get(qkey)
+        if not dq:
+            return
+        try:
+            dq.remove(w)
+        except ValueError:
+            return
+        self._queued[prov] = max(0, self._queued.get(prov, 0) - 1)
+        if not dq:
+            self._queues[prov].pop(qkey, None)
+
+    def _grant(self, w: _Waiter) -> None:
+        t = w.ticket
+        start = self._start_tag(t.session_id)
+        self._vclock = start
+        self._vtime[t.session_id] = start + 1.0 / self._session_weight.get(t.session_id, 1.0)
+        self._global_inflight += 1
+        self._provider_inflight[t.provider] = self._provider_inflight.get(t.provider, 0) + 1
+        self._session_inflight[t.session_id] = self._session_inflight.get(t.session_id, 0) + 1
+        if t.model is not None:
+            mkey = (t.provider, t.model)
+            self._model_inflight[mkey] = self._model_inflight.get(mkey, 0) + 1
+        self._lane_inflight[t.lane] = self._lane_inflight.get(t.lane, 0) + 1
+        lkey = (t.lane, t.provider)
+        self._lane_provider_inflight[lkey] = self._lane_provider_inflight.get(lkey, 0) + 1
+        t.granted_at = time.time()
+        self.admitted += 1
+        w.future.set_result(True)
+
+    def _dispatch(self) -> None:
+        """Admit eligible waiters (highest lane first, fair within a lane) until capacity is exhausted."""
+        while self._global_inflight < self.global_limit:
+            best: Optional[_Waiter] = None
+            best_key: tuple[float, float, float] = (math.inf, math.inf, math.inf)
+            for prov, queues in self._queues.items():
+                if not self._provider_has_room(prov):
+                    continue
+                for (sid, lane), dq in list(queues.items()):
+                    while dq and dq[0].future.done():
+                        # Defensive: a waiter resolved elsewhere must not hold a queue slot
+                        self._remove(dq[0])
+                    if (
+                        not dq
+                        or not self._session_has_room(sid)
+                        or not self._lane_has_room(lane, prov)
+                        or not self._model_has_room(dq[0].ticket)
+                    ):
+                        continue
+                    key = (_LANE_RANK[lane], self._start_tag(sid), dq[0].ticket.enqueued_at)
+                    if key < best_key:
+                        best, best_key = dq[0], key
+            if best is None:
+                return
+            self._remove(best)
+            self._grant(best)
+
+    def position(self, w: _Waiter) -> int:
+        """Estimate the 1-based position of a waiter in its provider queue under lane + fair ordering."""
+        prov, sid, lane = w.ticket.provider, w.ticket.session_id, w.ticket.lane
+        queues = self._queues.get(prov, {})
+        own = queues.get((sid, lane))
+        if not own or w not in own:
+            return 0
+        k = own.index(w)
+        my_tag = self._start_tag(sid) + k / self._session_weight.get(sid, 1.0)
+        ahead = k
+        for (other, other_lane), dq in queues.items():
+            if (other, other_lane) == (sid, lane) or not dq:
+                continue
+            if _LANE_RANK[other_lane] != _LANE_RANK[lane]:
+                # Higher lanes always go first; lower lanes never do
+                ahead += len(dq) if _LANE_RANK[other_lane] < _LANE_RANK[lane] else 0
+                continue
+            if other == sid:
+                continue
+            gap = my_tag - self._start_tag(other)
+            if gap < 0:
+                continue
+            ahead += min(len(dq), int(math.floor(gap * self._session_weight.get(other, 1.0))) + 1)
+        return ahead + 1
+
+    # Public API -------------------------------------------------------------------
+
+    async def acquire(
+        self,
+        provider: str,
+        session_id: str,
+        on_wait: Optional[Callable[[int], Awaitable[None]]] = None,
+        progress_interval: float = 8.0,
+        model: Optional[str] = None,
+        lane: str = DEFAULT_LANE,
+    ) -> Ticket:
+        """Wait for a global+provider+session slot (plus a per-model slot under adaptive limits).
+
+        Raises QueueFullError when the provider queue is full and asyncio.TimeoutError when
+        no slot frees up within max_wait_s. ``on_wait`` is awaited with the current queue
+        position right after queuing and then every ``progress_interval`` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        ticket = Ticket(
+            session_id=session_id,
+            provider=provider or DEFAULT_PROVIDER,
+            model=model,
+            lane=lane if lane in _LANE_RANK else DEFAULT_LANE,
+        )
+        w = _Waiter(ticket, loop.create_future())
+        self._enqueue(w)
+        self._dispatch()
+        if w.future.done():
+            return w.ticket
+        prov = w.ticket.provider
+        if self._queued.get(prov, 0) > self.max_queue:
+            self._remove(w)
+            self.rejected += 1
+            raise QueueFullError(f"{prov} wait queue is full ({self.max_queue} waiting)")
+
+        self.queued_total += 1
+        deadline = loop.time() + self.max_wait_s
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.timed_out += 1
+                    raise asyncio.TimeoutError()
+                if on_wait is not None:
+                    await on_wait(self.position(w))
+                    if w.future.done():
+                        return w.ticket
+                try:
+                    await asyncio.wait_for(asyncio.shield(w.future), timeout=min(progress_interval, remaining))
+                    return w.ticket
+                except asyncio.TimeoutError:
+                    continue
+        except BaseException:
+            if w.future.done() and not w.future.cancelled():
+                # Granted while we were giving up: hand the slot straight back
+                self.release(w.ticket)
+            else:
+                self._remove(w)
+            raise
+
+    def release(self, ticket: Ticket) -> None:
+        if ticket.released or ticket.granted_at is None:
+            return
+        ticket.released = True
+        self._global_inflight = max(0, self._global_inflight - 1)
+        self._provider_inflight[ticket.provider] = max(0, self._provider_inflight.get(ticket.provider, 0) - 1)
+        self._session_inflight[ticket.session_id] = max(0, self._session_inflight.get(ticket.session_id, 0) - 1)
+        if ticket.model is not None:
+            mkey = (ticket.provider, ticket.model)
+            left = self._model_inflight.get(mkey, 0) - 1
+            if left > 0:
+                self._model_inflight[mkey] = left
+            else:
+                self._model_inflight.pop(mkey, None)
+        self._lane_inflight[ticket.lane] = max(0, self._lane_inflight.get(ticket.lane, 0) - 1)
+        lkey = (ticket.lane, ticket.provider)
+        self._lane_provider_inflight[lkey] = max(0, self._lane_provider_inflight.get(lkey, 0) - 1)
+        self._dispatch()
+
+    def snapshot(self) -> dict:
+        providers = {}
+        for prov in sorted(set(self.provider_limits) | set(self._queues) | set(self._provider_inflight)):
+            providers[prov] = {
+                "inflight": self._provider_inflight.get(prov, 0),
+                "capacity": self.provider_limit(prov),
+                "queued": self._queued.get(prov, 0),
+            }
+        lanes = {}
+        for lane in LANES:
+            lanes[lane] = {
+                "inflight": self._lane_inflight.get(lane, 0),
+                "queued": sum(len(dq) for q in self._queues.values() for (_s, ln), dq in q.items() if ln == lane),
+                "reserved": self.lane_reserved.get(lane, 0),
+                "capacity": self.lane_limits.get(lane),
+            }
+        return {
+            "global_inflight": self._global_inflight,
+            "global_capacity": self.global_limit,
+            "queue_max": self.max_queue,
+            "queue_max_wait_s": self.max_wait_s,
+            "providers": providers,
+            "lanes": lanes,
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -0,0 +1,133 @@
+"""
+Non-blocking JSONL metrics writer for the WS daemon.
+
+- record() appends to a bounded in-memory ring buffer and never touches the disk
+- A background task drains the buffer in batches and writes each batch in a worker
+  thread, so disk latency spikes stay off the request path
+- When the buffer is full the oldest record is overwritten and counted as dropped
+- The file is rotated by size (metrics.jsonl -> metrics.jsonl.1 -> ...), keeping N backups
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from pathlib import Path
+from typing import Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsWriter:
+    def __init__(
+        self,
+        path: Path,
+        capacity: int = 4096,
+        batch_max: int = 512,
+        flush_interval_s: float = 1.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        backups: int = 3,
+    ) -> None:
+        self.path = Path(path)
+        self.capacity = max(1, int(capacity))
+        self.batch_max = max(1, int(batch_max))
+        self.flush_interval_s = max(0.01, float(flush_interval_s))
+        self.max_bytes = max(0, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self._buf: Deque[dict] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.write_errors = 0
+
+    def record(self, event: dict) -> None:
+        """Queue one metrics record; O(1) and safe to call from the event loop hot path."""
+        if len(self._buf) >= self.capacity:
+            self._buf.popleft()
+            self.dropped += 1
+        self._buf.append(event)
+        self.recorded += 1
+        if self._wakeup is not None and len(self._buf) >= self.batch_max:
+            self._wakeup.set()
+
+    def _take_batch(self) -> list[dict]:
+        n = min(len(self._buf), self.batch_max)
+        return [self._buf.popleft() for _ in range(n)]
+
+    def _rotate(self) -> None:
+        if self.backups <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+    def _write_lines(self, data: str) -> None:
+        """Blocking append (runs in a worker thread); rotates first if the batch would overflow."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.max_bytes:
+            try:
+                size = self.path.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size and size + len(data.encode("utf-8")) > self.max_bytes:
+                self._rotate()
+                self.rotations += 1
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(data)
+
+    async def flush(self) -> None:
+        """Write everything currently buffered, batch by batch."""
+        while self._buf:
+            batch = self._take_batch()
+            lines = []
+            for rec in batch:
+                try:
+                    lines.append(json.dumps(rec, default=str))
+                except Exception:
+                    self.write_errors += 1
+            if not lines:
+                continue
+            try:
+                await asyncio.to_thread(self._write_lines, "\n".join(lines) + "\n")
+                self.written += len(lines)
+                self.batches += 1
+            except Exception as e:
+                self.write_errors += 1
+                logger.debug("metrics write failed: %s", e)
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Drain the buffer every flush interval (or sooner once a full batch is waiting)."""
+        self._wakeup = asyncio.Event()
+        stop_wait = asyncio.ensure_future(stop_event.wait())
+        try:
+            while not stop_event.is_set():
+                wake_wait = asyncio.ensure_future(self._wakeup.wait())
+                await asyncio.wait({wake_wait, stop_wait}, timeout=self.flush_interval_s, return_when=asyncio.FIRST_COMPLETED)
+                wake_wait.cancel()
+                self._wakeup.clear()
+                await self.flush()
+        finally:
+            stop_wait.cancel()
+            self._wakeup = None
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buf),
+            "capacity": self.capacity,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "write_errors": self.write_errors,
+        }
@@ -0,0 +1,147 @@
+"""
+Bounded result cache for the WS daemon.
+
+- Entry-count and byte-size limits; least-recently-used entries are evicted first
+- Expiry via a min-heap of deadlines, so each store/lookup only touches entries that
+  are actually due instead of scanning the whole cache
+- hit/miss/eviction/expiry counters for the health op
+
+Values are sized by their compact JSON encoding, which is what the daemon sends on a hit.
+Like the rest of the daemon state, a cache is only touched from the event loop thread.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float
+    seq: int
+
+
+def _json_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"))
+    except Exception:
+        return len(str(value).encode("utf-8", errors="ignore"))
+
+
+class ResultCache:
+    """LRU cache with per-entry TTL and entry/byte limits."""
+
+    def __init__(
+        self,
+        ttl_s: float,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        sizeof: Callable[[Any], int] = _json_size,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._sizeof = sizeof
+        self._clock = clock
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+        # (expires_at, seq, key); entries replaced or evicted since are skipped lazily
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _count=False) is not None
+
+    def _drop(self, key: str) -> Optional[_Entry]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+        return entry
+
+    def _expire(self, now: float) -> None:
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, seq, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            if entry is not None and entry.seq == seq:
+                self._drop(key)
+                self.expirations += 1
+        # Overwrites leave stale heap records behind; rebuild once they dominate
+        if len(heap) > 2 * len(self._data) + 64:
+            self._heap = [(e.expires_at, e.seq, k) for k, e in self._data.items()]
+            heapq.heapify(self._heap)
+
+    def get(self, key: str, _count: bool = True) -> Any:
+        now = self._clock()
+        self._expire(now)
+        entry = self._data.get(key)
+        if entry is None:
+            if _count:
+                self.misses += 1
+            return None
+        if _count:
+            self.hits += 1
+            self._data.move_to_end(key)
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl_s: Optional[float] = None) -> bool:
+        """Store value; returns False if it alone exceeds max_bytes and was not cached."""
+        now = self._clock()
+        self._drop(key)
+        self._expire(now)
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            self.rejected += 1
+            return False
+        seq = next(self._seq)
+        expires_at = now + (self.ttl_s if ttl_s is None else float(ttl_s))
+        self._data[key] = _Entry(value=value, size=size, expires_at=expires_at, seq=seq)
+        self.bytes += size
+        heapq.heappush(self._heap, (expires_at, seq, key))
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self.evictions += 1
+        return True
+
+    def pop(self, key: str) -> Any:
+        entry = self._drop(key)
+        return entry.value if entry is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._heap.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejected": self.rejected,
+        }
@@ -7,6 +7,8 @@ from typing import Dict, Optional
 
 
 DEFAULT_MAX_INFLIGHT = int(os.getenv("EXAI_WS_SESSION_MAX_INFLIGHT", "8"))
+# Upper bound for the fair-scheduling weight a client may request in its hello frame
+MAX_SESSION_WEIGHT = float(os.getenv("EXAI_WS_MAX_SESSION_WEIGHT", "4.0"))
 
 
 @dataclass
@@ -16,17 +18,18 @@ class Session:
     inflight: int = 0
     closed: bool = False
     max_inflight: int = DEFAULT_MAX_INFLIGHT
-    sem: asyncio.BoundedSemaphore = field(default_factory=lambda: asyncio.BoundedSemaphore(DEFAULT_MAX_INFLIGHT))
+    # Relative share of capacity when calls are queued (see admission.AdmissionController)
+    weight: float = 1.0
 
 
 class SessionManager:
-    """Session tracker with per-session inflight quota enforcement."""
+    """Session tracker; per-session inflight quotas are enforced by the admission controller."""
 
     def __init__(self) -> None:
         self._sessions: Dict[str, Session] = {}
         self._lock = asyncio.Lock()
 
-    async def ensure(self, session_id: Optional[str]) -> Session:
+    async def ensure(self, session_id: Optional[str], weight: Optional[float] = None) -> Session:
         if not session_id:
             session_id = str(uuid.uuid4())
         async with self._lock:
@@ -34,6 +37,11 @@ class SessionManager:
             if not sess:
                 sess = Session(session_id=session_id)
                 self._sessions[session_id] = sess
+            if weight is not None:
+                try:
+                    sess.weight = min(MAX_SESSION_WEIGHT, max(0.1, float(weight)))
+                except (TypeError, ValueError):
+                    pass
             return sess
 
     async def get(self, session_id: str) -> Optional[Session]:
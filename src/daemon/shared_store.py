@@ -0,0 +1,207 @@
+"""
+Cross-process state for multi-worker WS daemon mode.
+
+When several worker processes accept connections on the same port, the state that used to
+live in module-level dicts must be visible to all of them. This store keeps it in one local
+SQLite database (WAL mode, so readers never block the writer):
+
+- results:  replayable results by request_id ("req") and by semantic call key ("key")
+- inflight: single-flight leases; the owner runs the call, other workers wait for its outcome
+- outcomes: the leader's final outcome, kept briefly so remote followers can pick it up
+- slots:    concurrency leases enforcing the global and per-provider caps across workers
+
+Every row carries an expiry, so a crashed worker cannot hold leases forever; the supervisor
+also purges a dead worker's rows by owner prefix. All methods are blocking and thread-safe;
+the daemon calls them through asyncio.to_thread.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS inflight (
+    key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    key TEXT NOT NULL, owner TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL,
+    PRIMARY KEY (key, owner)
+);
+CREATE TABLE IF NOT EXISTS slots (
+    lease_id TEXT PRIMARY KEY, provider TEXT NOT NULL, expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_expiry ON results (expires_at);
+CREATE INDEX IF NOT EXISTS slots_provider ON slots (provider, expires_at);
+"""
+
+
+class SharedStore:
+    def __init__(self, path: Path | str, busy_timeout_s: float = 5.0) -> None:
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=busy_timeout_s, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._last_purge = 0.0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, fn):
+        """Run fn(conn) inside one IMMEDIATE transaction (serialized across processes)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return out
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Results --------------------------------------------------------------------
+
+    def get_result(self, kind: str, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE kind=? AND key=? AND expires_at>?", (kind, key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_result(self, kind: str, key: str, value: Any, ttl_s: float) -> None:
+        now = time.time()
+        data = json.dumps(value, separators=(",", ":"), default=str)
+
+        def _put(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO results (kind, key, value, expires_at) VALUES (?,?,?,?)",
+                (kind, key, data, now + ttl_s),
+            )
+            # Amortized cleanup; the expiry index keeps this cheap
+            if now - self._last_purge > 30.0:
+                self._last_purge = now
+                conn.execute("DELETE FROM results WHERE expires_at<=?", (now,))
+                conn.execute("DELETE FROM outcomes WHERE expires_at<=?", (now,))
+
+        self._write(_put)
+
+    # Single-flight -----------------------------------------------------------------
+
+    def claim_inflight(self, key: str, owner: str, ttl_s: float) -> Optional[str]:
+        """Become leader for key. Returns None on success, else the current owner."""
+        now = time.time()
+
+        def _claim(conn):
+            row = conn.execute("SELECT owner, expires_at FROM inflight WHERE key=?", (key,)).fetchone()
+            if row and row[1] > now and row[0] != owner:
+                return row[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO inflight (key, owner, expires_at) VALUES (?,?,?)", (key, owner, now + ttl_s)
+            )
+            return None
+
+        return self._write(_claim)
+
+    def inflight_owner(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner FROM inflight WHERE key=? AND expires_at>?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def finish_inflight(self, key: str, owner: str, outcome: dict, linger_s: float = 60.0) -> None:
+        """Drop the lease (if still ours) and publish the outcome for remote followers."""
+        data = json.dumps(outcome, separators=(",", ":"), default=str)
+        now = time.time()
+
+        def _finish(conn):
+            conn.execute("DELETE FROM inflight WHERE key=? AND owner=?", (key, owner))
+            conn.execute(
+                "INSERT OR REPLACE INTO outcomes (key, owner, value, expires_at) VALUES (?,?,?,?)",
+                (key, owner, data, now + linger_s),
+            )
+
+        self._write(_finish)
+
+    def get_outcome(self, key: str, owner: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM outcomes WHERE key=? AND owner=?", (key, owner)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Concurrency slots --------------------------------------------------------------
+
+    def try_acquire_slot(
+        self, lease_id: str, provider: str, global_limit: int, provider_limit: Optional[int], ttl_s: float
+    ) -> bool:
+        now = time.time()
+
+        def _acquire(conn):
+            conn.execute("DELETE FROM slots WHERE expires_at<=?", (now,))
+            total = conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+            if total >= global_limit:
+                return False
+            if provider_limit is not None:
+                used = conn.execute("SELECT COUNT(*) FROM slots WHERE provider=?", (provider,)).fetchone()[0]
+                if used >= provider_limit:
+                    return False
+            conn.execute(
+                "INSERT OR REPLACE INTO slots (lease_id, provider, expires_at) VALUES (?,?,?)",
+                (lease_id, provider, now + ttl_s),
+            )
+            return True
+
+        return self._write(_acquire)
+
+    def release_slot(self, lease_id: str) -> None:
+        self._write(lambda conn: conn.execute("DELETE FROM slots WHERE lease_id=?", (lease_id,)))
+
+    # Maintenance ------------------------------------------------------------------
+
+    def purge_owner(self, prefix: str) -> None:
+        """Drop leases held by a worker (owners/lease ids start with its worker id)."""
+        like = prefix.replace("%", r"\%").replace("_", r"\_") + "%"
+
+        def _purge(conn):
+            conn.execute("DELETE FROM inflight WHERE owner LIKE ? ESCAPE '\\'", (like,))
+            conn.execute("DELETE FROM slots WHERE lease_id LIKE ? ESCAPE '\\'", (like,))
+
+        self._write(_purge)
+
+    def reset_leases(self) -> None:
+        """Clear all volatile lease state (supervisor start: no worker is running yet)."""
+
+        def _reset(conn):
+            conn.execute("DELETE FROM inflight")
+            conn.execute("DELETE FROM slots")
+            conn.execute("DELETE FROM outcomes")
+
+        self._write(_reset)
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            results = self._conn.execute("SELECT COUNT(*) FROM results WHERE expires_at>?", (now,)).fetchone()[0]
+            inflight = self._conn.execute("SELECT COUNT(*) FROM inflight WHERE expires_at>?", (now,)).fetchone()[0]
+            slots = self._conn.execute(
+                "SELECT provider, COUNT(*) FROM slots WHERE expires_at>? GROUP BY provider", (now,)
+            ).fetchall()
+        return {
+            "path": self.path,
+            "results": results,
+            "inflight": inflight,
+            "slots": dict(slots),
+        }
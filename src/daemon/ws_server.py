@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+import multiprocessing
 import os
 import signal
 import time
@@ -18,10 +19,21 @@ from websockets.server import WebSocketServerProtocol
 from server import TOOLS as SERVER_TOOLS  # type: ignore
 from server import _ensure_providers_configured  # type: ignore
 from server import handle_call_tool as SERVER_HANDLE_CALL_TOOL  # type: ignore
+from tools.lazy import LazyTool  # type: ignore
+from tools.schema_cache import get_schema_cache  # type: ignore
 
 from src.providers.registry import ModelProviderRegistry  # type: ignore
 from src.providers.base import ProviderType  # type: ignore
-
+from utils.cancellation import CancelToken, current_cancel_token, reset_cancel_scope, start_cancel_scope
+from utils.log_pipeline import pipeline_stats
+from utils.rate_limit import CallFeedback, is_rate_limit_error, reset_call_feedback, start_call_feedback
+from utils.token_stream import TokenStream, reset_token_stream, start_token_stream
+
+from .adaptive_limit import AdaptiveLimits
+from .admission import DEFAULT_LANE, DEFAULT_PROVIDER, LANES, AdmissionController, QueueFullError
+from .metrics_writer import MetricsWriter
+from .result_cache import ResultCache
+from .shared_store import SharedStore
 from .session_manager import SessionManager
 
 LOG_DIR = Path(__file__).resolve().parents[2] / "logs"
@@ -39,16 +51,59 @@ CALL_TIMEOUT = int(os.getenv("EXAI_WS_CALL_TIMEOUT", "300"))  # default 5m to al
 HELLO_TIMEOUT = float(os.getenv("EXAI_WS_HELLO_TIMEOUT", "15"))  # allow slower clients to hello
 # Heartbeat cadence while tools run; keep <10s to satisfy clients with 10s idle cutoff
 PROGRESS_INTERVAL = float(os.getenv("EXAI_WS_PROGRESS_INTERVAL_SECS", "8.0"))
+# Max time to flush remaining call_tool_chunk frames before the final result is sent
+STREAM_FLUSH_SECS = float(os.getenv("EXAI_WS_STREAM_FLUSH_SECS", "5.0"))
 SESSION_MAX_INFLIGHT = int(os.getenv("EXAI_WS_SESSION_MAX_INFLIGHT", "8"))
 GLOBAL_MAX_INFLIGHT = int(os.getenv("EXAI_WS_GLOBAL_MAX_INFLIGHT", "24"))
 KIMI_MAX_INFLIGHT = int(os.getenv("EXAI_WS_KIMI_MAX_INFLIGHT", "6"))
 GLM_MAX_INFLIGHT = int(os.getenv("EXAI_WS_GLM_MAX_INFLIGHT", "4"))
+# Admission queue: calls wait (fairly, per session) for capacity instead of failing fast.
+# OVER_CAPACITY is only returned once a provider's wait queue holds QUEUE_MAX calls.
+QUEUE_MAX = int(os.getenv("EXAI_WS_QUEUE_MAX", "64"))
+QUEUE_MAX_WAIT_SECS = float(os.getenv("EXAI_WS_QUEUE_MAX_WAIT_SECS", "60"))
+# Priority lanes (interactive > background > batch). Calls pick a lane with "priority" on call_tool;
+# otherwise workflow tools run as background and everything else as interactive, unless overridden
+# per tool by EXAI_WS_TOOL_PRIORITIES ("thinkdeep=background,chat=interactive"). Idle reserved slots
+# of a higher lane cannot be taken by lower lanes; the lane caps bound how much they can soak up.
+TOOL_PRIORITIES = {
+    k.strip().lower(): v.strip().lower()
+    for k, _, v in (item.partition("=") for item in os.getenv("EXAI_WS_TOOL_PRIORITIES", "").split(","))
+    if k.strip() and v.strip().lower() in LANES
+}
+RESERVED_INTERACTIVE = int(os.getenv("EXAI_WS_RESERVED_INTERACTIVE", "2"))
+RESERVED_BACKGROUND = int(os.getenv("EXAI_WS_RESERVED_BACKGROUND", "0"))
+BACKGROUND_MAX_INFLIGHT = int(os.getenv("EXAI_WS_BACKGROUND_MAX_INFLIGHT", "0"))
+BATCH_MAX_INFLIGHT = int(os.getenv("EXAI_WS_BATCH_MAX_INFLIGHT", "4"))
+# Adaptive limits: the KIMI/GLM caps above become starting points that grow while provider latency
+# is stable and back off on 429s or latency inflation, per provider and per model (AIMD).
+ADAPTIVE_LIMITS = os.getenv("EXAI_WS_ADAPTIVE_LIMITS", "true").strip().lower() == "true"
+ADAPTIVE_MIN_INFLIGHT = int(os.getenv("EXAI_WS_ADAPTIVE_MIN_INFLIGHT", "1"))
+ADAPTIVE_MAX_INFLIGHT = int(os.getenv("EXAI_WS_ADAPTIVE_MAX_INFLIGHT", str(GLOBAL_MAX_INFLIGHT)))
+ADAPTIVE_BACKOFF = float(os.getenv("EXAI_WS_ADAPTIVE_BACKOFF", "0.5"))
+ADAPTIVE_LATENCY_TOLERANCE = float(os.getenv("EXAI_WS_ADAPTIVE_LATENCY_TOLERANCE", "2.0"))
+# Multi-worker mode: N processes accept on the same port (SO_REUSEPORT) under a supervisor and
+# share results, single-flight keys and concurrency caps through a local SQLite store.
+WORKERS = max(1, int(os.getenv("EXAI_WS_WORKERS", "1")))
+SHARED_STORE_PATH = Path(os.getenv("EXAI_WS_SHARED_STORE", str(LOG_DIR / "ws_daemon.shared.sqlite3")))
+SHARED_POLL_SECS = float(os.getenv("EXAI_WS_SHARED_POLL_SECS", "0.1"))
 
 _metrics_path = LOG_DIR / "ws_daemon.metrics.jsonl"
+# Per-call metrics are buffered in memory and written in batches by a background task
+_metrics = MetricsWriter(
+    _metrics_path,
+    capacity=int(os.getenv("EXAI_WS_METRICS_BUFFER", "4096")),
+    flush_interval_s=float(os.getenv("EXAI_WS_METRICS_FLUSH_SECS", "1.0")),
+    max_bytes=int(os.getenv("EXAI_WS_METRICS_MAX_BYTES", str(10 * 1024 * 1024))),
+    backups=int(os.getenv("EXAI_WS_METRICS_BACKUPS", "3")),
+)
 _health_path = LOG_DIR / "ws_daemon.health.json"
 
 PID_FILE = LOG_DIR / "ws_daemon.pid"
 STARTED_AT: float | None = None
+# Set only inside worker processes (see _worker_main)
+_worker_index: int | None = None
+_WORKER_ID = f"w0-{os.getpid()}"
+_shared: SharedStore | None = None
 
 
 def _create_pidfile() -> bool:
@@ -94,15 +149,36 @@ def _is_health_fresh(max_age_s: float = 20.0) -> bool:
         return False
 
 _sessions = SessionManager()
-_global_sem = asyncio.BoundedSemaphore(GLOBAL_MAX_INFLIGHT)
-_provider_sems: dict[str, asyncio.BoundedSemaphore] = {
-    "KIMI": asyncio.BoundedSemaphore(KIMI_MAX_INFLIGHT),
-    "GLM": asyncio.BoundedSemaphore(GLM_MAX_INFLIGHT),
-}
-# Track in-flight calls by semantic call key so duplicate calls can await the same result
-_inflight_by_key: dict[str, asyncio.Event] = {}
-# Track inflight request metadata for fast-fail duplicate responses and TTL cleanup
+_limits: AdaptiveLimits | None = None
+if ADAPTIVE_LIMITS:
+    _limits = AdaptiveLimits(
+        {"KIMI": KIMI_MAX_INFLIGHT, "GLM": GLM_MAX_INFLIGHT},
+        min_limit=ADAPTIVE_MIN_INFLIGHT,
+        max_limit=ADAPTIVE_MAX_INFLIGHT,
+        backoff=ADAPTIVE_BACKOFF,
+        tolerance=ADAPTIVE_LATENCY_TOLERANCE,
+    )
+_admission = AdmissionController(
+    global_limit=GLOBAL_MAX_INFLIGHT,
+    provider_limits={"KIMI": KIMI_MAX_INFLIGHT, "GLM": GLM_MAX_INFLIGHT},
+    session_limit=SESSION_MAX_INFLIGHT,
+    max_queue=QUEUE_MAX,
+    max_wait_s=QUEUE_MAX_WAIT_SECS,
+    limits=_limits,
+    lane_reserved={"interactive": RESERVED_INTERACTIVE, "background": RESERVED_BACKGROUND},
+    lane_limits={
+        lane: cap for lane, cap in (("background", BACKGROUND_MAX_INFLIGHT), ("batch", BATCH_MAX_INFLIGHT)) if cap > 0
+    },
+)
+# Track in-flight calls by semantic call key so duplicate calls can await the same result.
+# The future resolves to the leader's outcome: {"outputs": [...]} or {"error": {...}}.
+_inflight_by_key: dict[str, asyncio.Future] = {}
+# Track inflight request metadata (leader req_id, expiry) for coalescing and TTL cleanup
 _inflight_meta_by_key: dict[str, dict] = {}
+# Number of duplicate calls served by attaching to an in-flight leader
+_coalesced_total = 0
+# SharedStore errors while taking a cluster-wide lease (each counted as not acquired)
+_shared_slot_errors = 0
 
 _shutdown = asyncio.Event()
 RESULT_TTL_SECS = int(os.getenv("EXAI_WS_RESULT_TTL", "600"))
@@ -110,38 +186,57 @@ RESULT_TTL_SECS = int(os.getenv("EXAI_WS_RESULT_TTL", "600"))
 INFLIGHT_TTL_SECS = int(os.getenv("EXAI_WS_INFLIGHT_TTL_SECS", str(CALL_TIMEOUT)))
 # Retry-after hint for capacity responses (seconds)
 RETRY_AFTER_SECS = int(os.getenv("EXAI_WS_RETRY_AFTER_SECS", "1"))
-_results_cache: dict[str, dict] = {}
+# Result caches are bounded by entries and bytes; expiry is heap-driven (see result_cache.py)
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("EXAI_WS_RESULT_CACHE_MAX_ENTRIES", "1024"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("EXAI_WS_RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+_results_cache = ResultCache(RESULT_TTL_SECS, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_BYTES)
 # Cache by semantic call key (tool name + normalized arguments) to survive req_id changes across reconnects
-_results_cache_by_key: dict[str, dict] = {}
+_results_cache_by_key = ResultCache(RESULT_TTL_SECS, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_BYTES)
 _inflight_reqs: set[str] = set()
+# Running call_tool handlers by (session_id, request_id), for the cancel_tool op
+_running_calls: dict[tuple[str, str], dict] = {}
 
 
-def _gc_results_cache() -> None:
-    try:
-        now = time.time()
-        expired = [rid for rid, rec in _results_cache.items() if now - rec.get("t", 0) > RESULT_TTL_SECS]
-        for rid in expired:
-            _results_cache.pop(rid, None)
-        expired_keys = [k for k, rec in _results_cache_by_key.items() if now - rec.get("t", 0) > RESULT_TTL_SECS]
-        for k in expired_keys:
-            _results_cache_by_key.pop(k, None)
-    except Exception:
-        pass
+class _CallSink:
+    """The connection as one call_tool handler sees it; frames are dropped once its client detached."""
+
+    def __init__(self, ws: WebSocketServerProtocol) -> None:
+        self.ws = ws
+        self.detached = False
+
+    async def send(self, raw: str) -> None:
+        if not self.detached:
+            await self.ws.send(raw)
+
+
+def _abort_tool_task(task: asyncio.Task, reason: str) -> None:
+    """Fire the call's CancelToken (provider calls in threads stop too), then cancel the tool task."""
+    token = current_cancel_token()
+    if token is not None:
+        token.cancel(reason)
+    task.cancel()
+
+
+def _detach_leader(entry: dict) -> bool:
+    """Release the client of a coalesced leader while local duplicates still wait on its outcome.
+
+    The call keeps running for them with the cancelling client's frames dropped; it is cancelled
+    when the last waiter leaves (see _await_coalesced). Returns False if nobody else is waiting.
+    """
+    meta = _inflight_meta_by_key.get(entry.get("call_key") or "")
+    if not meta or meta.get("leader") is not entry or not meta.get("waiters"):
+        return False
+    entry["sink"].detached = True
+    meta["detached"] = True
+    return True
 
 
 def _store_result(req_id: str, payload: dict) -> None:
-    _results_cache[req_id] = {"t": time.time(), "payload": payload}
-    _gc_results_cache()
+    _results_cache.set(req_id, payload)
 
 
 def _get_cached_result(req_id: str) -> dict | None:
-    rec = _results_cache.get(req_id)
-    if not rec:
-        return None
-    if time.time() - rec.get("t", 0) > RESULT_TTL_SECS:
-        _results_cache.pop(req_id, None)
-        return None
-    return rec.get("payload")
+    return _results_cache.get(req_id)
 
 
 def _make_call_key(name: str, arguments: dict) -> str:
@@ -155,19 +250,229 @@ def _make_call_key(name: str, arguments: dict) -> str:
 
 
 def _store_result_by_key(call_key: str, outputs: list[dict]) -> None:
-    _results_cache_by_key[call_key] = {"t": time.time(), "outputs": outputs}
-    _gc_results_cache()
+    _results_cache_by_key.set(call_key, outputs)
 
 
 def _get_cached_by_key(call_key: str) -> list[dict] | None:
-    rec = _results_cache_by_key.get(call_key)
-    if not rec:
-        return None
-    if time.time() - rec.get("t", 0) > RESULT_TTL_SECS:
-        _results_cache_by_key.pop(call_key, None)
-        return None
-    return rec.get("outputs")
+    return _results_cache_by_key.get(call_key)
+
+
+
+_shared_tasks: set[asyncio.Task] = set()
+
+
+async def _shared_op(method: str, *args: Any, default: Any = None) -> Any:
+    """Run a SharedStore call off the event loop; returns default when not in worker mode or on error."""
+    if _shared is None:
+        return default
+    try:
+        return await asyncio.to_thread(getattr(_shared, method), *args)
+    except Exception as e:
+        logger.debug("shared store %s failed: %s", method, e)
+        return default
+
+
+def _shared_owner(req_id: str | None) -> str:
+    return f"{_WORKER_ID}:{req_id}"
+
+
+def _resolve_inflight(call_key: str, req_id: str | None, outcome: dict) -> None:
+    """Publish the leader's outcome to coalesced waiters and drop the in-flight marker.
+
+    Only the request that owns the marker may resolve it (req_id=None forces, for TTL cleanup),
+    so a late finisher never clobbers a newer leader for the same call_key.
+    """
+    try:
+        meta = _inflight_meta_by_key.get(call_key)
+        if req_id is not None and (not meta or meta.get("req_id") != req_id):
+            return
+        fut = _inflight_by_key.pop(call_key, None)
+        _inflight_meta_by_key.pop(call_key, None)
+        if fut is not None and not fut.done():
+            fut.set_result(outcome)
+        if meta and meta.get("shared"):
+            # Followers in other workers poll the store for this outcome
+            task = asyncio.get_running_loop().create_task(
+                _shared_op("finish_inflight", call_key, _shared_owner(meta.get("req_id")), outcome)
+            )
+            _shared_tasks.add(task)
+            task.add_done_callback(_shared_tasks.discard)
+    except Exception:
+        pass
+
+
+async def _await_coalesced(ws: WebSocketServerProtocol, req_id: str, name: str, fut: asyncio.Future, meta: dict) -> None:
+    """Attach a duplicate call to the in-flight leader and relay its outcome under our own request_id."""
+    global _coalesced_total
+    _coalesced_total += 1
+    orig_req_id = meta.get("req_id")
+    expires_at = float(meta.get("expires_at", 0))
+    meta["waiters"] = meta.get("waiters", 0) + 1
+    try:
+        await _safe_send(ws, {
+            "op": "call_tool_ack",
+            "request_id": req_id,
+            "accepted": True,
+            "timeout": max(1, int(expires_at - time.time())),
+            "name": name,
+            "coalesced": True,
+            "original_request_id": orig_req_id,
+        })
+        while True:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                outcome = {"error": {"code": "TIMEOUT", "message": "coalesced call exceeded in-flight TTL"}}
+                break
+            try:
+                outcome = await asyncio.wait_for(asyncio.shield(fut), timeout=min(PROGRESS_INTERVAL, remaining))
+                break
+            except asyncio.TimeoutError:
+                await _safe_send(ws, {
+                    "op": "progress",
+                    "request_id": req_id,
+                    "name": name,
+                    "t": time.time(),
+                    "note": f"coalesced with in-flight request {orig_req_id}",
+                })
+    finally:
+        meta["waiters"] -= 1
+        leader = meta.get("leader")
+        if meta.get("detached") and not meta["waiters"] and not fut.done() and leader is not None:
+            # The leader's own client cancelled earlier and the last duplicate is gone too
+            leader["token"].cancel("cancelled by client")
+            leader["task"].cancel()
+    await _relay_outcome(ws, req_id, orig_req_id, outcome)
+
+
+async def _relay_outcome(ws: WebSocketServerProtocol, req_id: str, orig_req_id: str | None, outcome: dict) -> None:
+    payload: dict = {"op": "call_tool_res", "request_id": req_id}
+    if outcome.get("error"):
+        payload["error"] = dict(outcome["error"], original_request_id=orig_req_id)
+        await _safe_send(ws, payload)
+        return
+    payload["outputs"] = outcome.get("outputs") or []
+    await _safe_send(ws, payload)
+    _store_result(req_id, payload)
+
 
+async def _await_remote_leader(ws: WebSocketServerProtocol, req_id: str, name: str, call_key: str, owner: str) -> dict | None:
+    """Wait for the worker process that owns call_key and return its outcome.
+
+    Returns None if the owner's lease disappears without an outcome (worker died or the lease
+    expired); the caller should then try to take over the call itself.
+    """
+    global _coalesced_total
+    orig_req_id = owner.split(":", 1)[-1]
+    deadline = time.time() + float(INFLIGHT_TTL_SECS)
+    next_beat = time.time() + PROGRESS_INTERVAL
+    delay = SHARED_POLL_SECS
+    acked = False
+    while time.time() < deadline:
+        outcome = await _shared_op("get_outcome", call_key, owner)
+        if outcome is None and await _shared_op("inflight_owner", call_key) != owner:
+            # Re-check: the owner may have finished between the two reads
+            outcome = await _shared_op("get_outcome", call_key, owner)
+            if outcome is None:
+                return None
+        if outcome is not None:
+            return outcome
+        if not acked:
+            acked = True
+            _coalesced_total += 1
+            await _safe_send(ws, {
+                "op": "call_tool_ack",
+                "request_id": req_id,
+                "accepted": True,
+                "timeout": max(1, int(deadline - time.time())),
+                "name": name,
+                "coalesced": True,
+                "original_request_id": orig_req_id,
+            })
+        if time.time() >= next_beat:
+            next_beat = time.time() + PROGRESS_INTERVAL
+            await _safe_send(ws, {
+                "op": "progress",
+                "request_id": req_id,
+                "name": name,
+                "t": time.time(),
+                "note": f"coalesced with in-flight request {orig_req_id} in another worker",
+            })
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 1.0)
+    return {"error": {"code": "TIMEOUT", "message": "coalesced call exceeded in-flight TTL"}}
+
+
+async def _acquire_shared_slot(lease_id: str, prov_key: str, on_wait) -> bool:
+    """Take a cluster-wide concurrency lease; False if none frees up within QUEUE_MAX_WAIT_SECS.
+
+    A store error counts as "not acquired" (the caps are never bypassed); the call keeps polling
+    until the deadline like any other wait.
+    """
+    global _shared_slot_errors
+    provider = prov_key or DEFAULT_PROVIDER
+    # This worker's view of the (possibly adaptive) provider limit
+    provider_limit = _admission.provider_limit(provider)
+    deadline = time.time() + QUEUE_MAX_WAIT_SECS
+    next_beat = time.time() + PROGRESS_INTERVAL
+    delay = SHARED_POLL_SECS
+    while True:
+        try:
+            ok = await asyncio.to_thread(
+                _shared.try_acquire_slot,
+                lease_id, provider, GLOBAL_MAX_INFLIGHT, provider_limit, float(CALL_TIMEOUT + 60),
+            )
+        except Exception as e:
+            _shared_slot_errors += 1
+            logger.warning("shared store try_acquire_slot failed (%s); lease %s not acquired", e, lease_id)
+            ok = False
+        if ok:
+            return True
+        if time.time() >= deadline:
+            return False
+        if time.time() >= next_beat:
+            next_beat = time.time() + PROGRESS_INTERVAL
+            await on_wait(None)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 1.0)
+
+
+def _call_lane(name: str, tool: Any, requested: Any) -> str:
+    """Priority lane for a call: explicit request, then per-tool override, then tool kind."""
+    if isinstance(requested, str) and requested.strip().lower() in LANES:
+        return requested.strip().lower()
+    lane = TOOL_PRIORITIES.get((name or "").lower())
+    if lane:
+        return lane
+    try:
+        # Lazy tools answer from the schema manifest without importing the tool module
+        is_workflow = getattr(type(tool), "is_workflow", None)
+        if is_workflow is not None:
+            return "background" if tool.is_workflow else DEFAULT_LANE
+        from tools.workflow.base import WorkflowTool  # type: ignore
+
+        if isinstance(tool, WorkflowTool):
+            return "background"
+    except Exception:
+        pass
+    return DEFAULT_LANE
+
+
+def _observe_limits(prov_key: str, model_name: str | None, feedback: CallFeedback, error: BaseException | None = None) -> None:
+    """Feed one finished call into the adaptive limits (provider latency samples and 429s)."""
+    if _limits is None or not prov_key:
+        return
+    try:
+        rate_limited = feedback.rate_limited > 0 or (error is not None and is_rate_limit_error(error))
+        _limits.record(
+            prov_key,
+            model_name,
+            feedback.latencies_s,
+            rate_limited,
+            _admission.inflight(prov_key),
+            _admission.inflight(prov_key, model_name) if model_name else 0,
+        )
+    except Exception as e:
+        logger.debug("adaptive limit update failed: %s", e)
 
 
 def _normalize_outputs(outputs: List[Any]) -> List[Dict[str, Any]]:
@@ -196,13 +501,14 @@ async def _safe_recv(ws: WebSocketServerProtocol, timeout: float):
         return None
 
 
-async def _safe_send(ws: WebSocketServerProtocol, payload: dict) -> bool:
+async def _safe_send(ws: WebSocketServerProtocol, payload: dict | str) -> bool:
     """Best-effort send that swallows disconnects and logs at debug level.
 
+    A str payload is an already serialized frame and is sent as-is.
     Returns False if the connection is closed or an error occurred, True on success.
     """
     try:
-        await ws.send(json.dumps(payload))
+        await ws.send(payload if isinstance(payload, str) else json.dumps(payload))
         return True
     except (
         websockets.exceptions.ConnectionClosedOK,
@@ -211,319 +517,445 @@ async def _safe_send(ws: WebSocketServerProtocol, payload: dict) -> bool:
         ConnectionResetError,
     ):
         # Normal disconnect during send; treat as benign
-        logger.debug("_safe_send: connection closed while sending %s", payload.get("op"))
+        logger.debug(
+            "_safe_send: connection closed while sending %s",
+            payload.get("op") if isinstance(payload, dict) else "pre-serialized frame",
+        )
         return False
     except Exception as e:
         logger.debug("_safe_send: unexpected send error: %s", e)
         return False
 
 
-async def _handle_message(ws: WebSocketServerProtocol, session_id: str, msg: Dict[str, Any]) -> None:
-    op = msg.get("op")
-    if op == "list_tools":
-        # Build a minimal tool descriptor set
-        tools = []
-        for name, tool in SERVER_TOOLS.items():
-            try:
-                tools.append({
-                    "name": tool.name,
-                    "description": tool.description,
-                    "inputSchema": tool.get_input_schema(),
-                })
-            except Exception:
-                tools.append({"name": name, "description": getattr(tool, "description", name), "inputSchema": {"type": "object"}})
-        await _safe_send(ws, {"op": "list_tools_res", "tools": tools})
+async def _handle_call_tool(ws: WebSocketServerProtocol, session_id: str, msg: Dict[str, Any]) -> None:
+    name = msg.get("name")
+    arguments = msg.get("arguments") or {}
+    req_id = msg.get("request_id")
+    # Client opt-in: forward provider deltas as call_tool_chunk frames while the call runs
+    want_stream = bool(msg.get("stream"))
+    try:
+        _ensure_providers_configured()
+    except Exception:
+        pass
+    tool = SERVER_TOOLS.get(name)
+    if not tool:
+        await _safe_send(ws, {
+            "op": "call_tool_res",
+            "request_id": req_id,
+            "error": {"code": "TOOL_NOT_FOUND", "message": f"Unknown tool: {name}"}
+        })
         return
 
-    if op == "call_tool":
-        name = msg.get("name")
-        arguments = msg.get("arguments") or {}
-        req_id = msg.get("request_id")
-        try:
-            _ensure_providers_configured()
-        except Exception:
-            pass
-        tool = SERVER_TOOLS.get(name)
-        if not tool:
-            await _safe_send(ws, {
-                "op": "call_tool_res",
-                "request_id": req_id,
-                "error": {"code": "TOOL_NOT_FOUND", "message": f"Unknown tool: {name}"}
-            })
-            return
+    lane = _call_lane(name, tool, msg.get("priority"))
 
-        # Determine provider gate based on requested model or defaults
+    # Determine provider gate based on requested model or defaults
+    prov_key = ""
+    model_name = None
+    try:
+        model_name = (arguments or {}).get("model")
+        if not model_name:
+            from config import DEFAULT_MODEL as _DEF_MODEL  # type: ignore
+            model_name = _DEF_MODEL
+        if model_name:
+            # Check which provider advertises this model (cached index, rebuilt on reconfiguration)
+            ptype = ModelProviderRegistry.get_provider_type_for_model(model_name)
+            if ptype == ProviderType.KIMI:
+                prov_key = "KIMI"
+            elif ptype == ProviderType.GLM:
+                prov_key = "GLM"
+    except Exception:
         prov_key = ""
-        try:
-            model_name = (arguments or {}).get("model")
-            if not model_name:
-                from config import DEFAULT_MODEL as _DEF_MODEL  # type: ignore
-                model_name = _DEF_MODEL
-            if model_name:
-                # Check which provider advertises this model
-                if model_name in set(ModelProviderRegistry.get_available_model_names(provider_type=ProviderType.KIMI)):
-                    prov_key = "KIMI"
-                elif model_name in set(ModelProviderRegistry.get_available_model_names(provider_type=ProviderType.GLM)):
-                    prov_key = "GLM"
-        except Exception:
-            prov_key = ""
 
-        # Backpressure: try acquire global, provider and per-session slots without waiting
-        # Fast-path duplicate handling: if client retries with same req_id, serve result or inform inflight
-        cached = _get_cached_result(req_id)
-        if cached:
-            await _safe_send(ws, cached)
-            return
-        # Semantic de-duplication: if client reconnects and reissues the same call with a new req_id, serve cached outputs
-        # Build a call_key that includes model and provider to reduce collisions across providers/models
-        try:
-            _args_for_key = dict(arguments)
-        except Exception:
-            _args_for_key = arguments or {}
-        # Include provider hint explicitly (may be empty if unknown)
-        if prov_key:
-            _args_for_key["__prov"] = prov_key
-        # Ensure model field is present for keying (if omitted by client, default model may be used)
-        if "model" not in _args_for_key and (arguments or {}).get("model"):
-            _args_for_key["model"] = arguments.get("model")
-        call_key = _make_call_key(name, _args_for_key)
-        # Optional: disable semantic coalescing per tool via env EXAI_WS_DISABLE_COALESCE_FOR_TOOLS
-        try:
-            _disable_set = {s.strip().lower() for s in os.getenv("EXAI_WS_DISABLE_COALESCE_FOR_TOOLS", "").split(",") if s.strip()}
-        except Exception:
-            _disable_set = set()
-        if name.lower() in _disable_set:
-            # Make call_key unique to avoid coalescing for this tool
-            call_key = f"{call_key}::{uuid.uuid4()}"
-        cached_outputs = _get_cached_by_key(call_key)
-        if cached_outputs is not None:
-            payload = {"op": "call_tool_res", "request_id": req_id, "outputs": cached_outputs}
-            await _safe_send(ws, payload)
-            _store_result(req_id, payload)
-            return
-        if req_id in _inflight_reqs:
-            await _safe_send(ws, {"op": "progress", "request_id": req_id, "name": name, "t": time.time(), "note": "duplicate request; still processing"})
-            return
+    # Backpressure is applied below via the admission queue (see _admission)
+    # Fast-path duplicate handling: if client retries with same req_id, serve result or inform inflight
+    cached = _get_cached_result(req_id)
+    if not cached and _shared is not None:
+        # The original call may have completed in another worker
+        cached = await _shared_op("get_result", "req", req_id)
+    if cached:
+        await _safe_send(ws, cached)
+        return
+    # Semantic de-duplication: if client reconnects and reissues the same call with a new req_id, serve cached outputs
+    # Build a call_key that includes model and provider to reduce collisions across providers/models
+    try:
+        _args_for_key = dict(arguments)
+    except Exception:
+        _args_for_key = arguments or {}
+    # Include provider hint explicitly (may be empty if unknown)
+    if prov_key:
+        _args_for_key["__prov"] = prov_key
+    # Ensure model field is present for keying (if omitted by client, default model may be used)
+    if "model" not in _args_for_key and (arguments or {}).get("model"):
+        _args_for_key["model"] = arguments.get("model")
+    call_key = _make_call_key(name, _args_for_key)
+    # Optional: disable semantic coalescing per tool via env EXAI_WS_DISABLE_COALESCE_FOR_TOOLS
+    try:
+        _disable_set = {s.strip().lower() for s in os.getenv("EXAI_WS_DISABLE_COALESCE_FOR_TOOLS", "").split(",") if s.strip()}
+    except Exception:
+        _disable_set = set()
+    if name.lower() in _disable_set:
+        # Make call_key unique to avoid coalescing for this tool
+        call_key = f"{call_key}::{uuid.uuid4()}"
+    cached_outputs = _get_cached_by_key(call_key)
+    if cached_outputs is None and _shared is not None:
+        cached_outputs = await _shared_op("get_result", "key", call_key)
+    if cached_outputs is not None:
+        payload = {"op": "call_tool_res", "request_id": req_id, "outputs": cached_outputs}
+        await _safe_send(ws, payload)
+        _store_result(req_id, payload)
+        return
+    if req_id in _inflight_reqs:
+        await _safe_send(ws, {"op": "progress", "request_id": req_id, "name": name, "t": time.time(), "note": "duplicate request; still processing"})
+        return
 
-        # Coalesce duplicate semantic calls across reconnects: if another call with the same call_key is in-flight,
-        # fast-fail duplicates immediately with a 409-style response including the original request_id.
-        now_ts = time.time()
-        try:
-            meta = _inflight_meta_by_key.get(call_key)
-            # TTL cleanup: drop stale inflight entries
-            if meta and float(meta.get("expires_at", 0)) <= now_ts:
-                _inflight_meta_by_key.pop(call_key, None)
-                _inflight_by_key.pop(call_key, None)
-                meta = None
-        except Exception:
+    # Single-flight: if another call with the same call_key is in-flight, attach to it and
+    # deliver its outputs under this request_id instead of calling the provider again.
+    now_ts = time.time()
+    try:
+        meta = _inflight_meta_by_key.get(call_key)
+        # TTL cleanup: drop stale inflight entries
+        if meta and float(meta.get("expires_at", 0)) <= now_ts:
+            _resolve_inflight(call_key, None, {"error": {"code": "TIMEOUT", "message": "in-flight call exceeded TTL"}})
             meta = None
-        if call_key in _inflight_by_key and meta:
-            await _safe_send(ws, {
-                "op": "call_tool_res",
-                "request_id": req_id,
-                "error": {"code": "DUPLICATE", "message": "duplicate call in flight", "original_request_id": meta.get("req_id")}
-            })
-            return
-        else:
-            _inflight_by_key[call_key] = asyncio.Event()
-            _inflight_meta_by_key[call_key] = {"req_id": req_id, "expires_at": now_ts + float(INFLIGHT_TTL_SECS)}
-
-
+    except Exception:
+        meta = None
+    inflight_fut = _inflight_by_key.get(call_key)
+    if inflight_fut is not None and meta:
+        await _await_coalesced(ws, req_id, name, inflight_fut, meta)
+        return
+    _inflight_by_key[call_key] = asyncio.get_running_loop().create_future()
+    # The leader's cancel_tool entry, so cancelling it can leave the call running for duplicates
+    leader = _running_calls.get((session_id, str(req_id)))
+    if leader is not None and leader["task"] is asyncio.current_task():
+        leader["call_key"] = call_key
+    else:
+        leader = None
+    _inflight_meta_by_key[call_key] = {
+        "req_id": req_id,
+        "expires_at": now_ts + float(INFLIGHT_TTL_SECS),
+        "waiters": 0,
+        "leader": leader,
+    }
+    if _shared is not None:
+        # Cross-worker single-flight. Local duplicates attach to our marker above; if another
+        # worker owns the key we relay its outcome to them as well.
         try:
-            await asyncio.wait_for(_global_sem.acquire(), timeout=0.001)
-        except asyncio.TimeoutError:
-            await _safe_send(ws, {
-                "op": "call_tool_res",
-                "request_id": req_id,
-                "error": {"code": "OVER_CAPACITY", "message": "Global concurrency limit reached; retry soon", "retry_after": RETRY_AFTER_SECS}
-            })
-            return
-        # Defer ACK until after provider+session capacity to ensure a single ACK per request
-        # Also emit an immediate progress breadcrumb so clients see activity right away
-        await _safe_send(ws, {
+            while True:
+                remote_owner = await _shared_op("claim_inflight", call_key, _shared_owner(req_id), float(INFLIGHT_TTL_SECS))
+                if remote_owner is None:
+                    _inflight_meta_by_key[call_key]["shared"] = True
+                    break
+                outcome = await _await_remote_leader(ws, req_id, name, call_key, remote_owner)
+                if outcome is not None:
+                    _resolve_inflight(call_key, req_id, outcome)
+                    await _relay_outcome(ws, req_id, remote_owner.split(":", 1)[-1], outcome)
+                    return
+        except BaseException:
+            _resolve_inflight(call_key, req_id, {"error": {"code": "EXEC_ERROR", "message": "original call aborted"}})
+            raise
+
+    # Admission: wait in the provider queue (fair across sessions) until global, provider and
+    # session capacity are all available. Queue position is reported via progress frames.
+    async def _on_queued(position: int | None) -> None:
+        frame = {
             "op": "progress",
             "request_id": req_id,
             "name": name,
             "t": time.time(),
-            "note": "accepted, awaiting provider/session capacity"
-        })
+            "note": "queued, awaiting capacity",
+        }
+        if position is not None:
+            frame["queue_position"] = position
+        await _safe_send(ws, frame)
 
-        prov_acquired = False
-        if prov_key and prov_key in _provider_sems:
-            try:
-                await asyncio.wait_for(_provider_sems[prov_key].acquire(), timeout=0.001)
-                prov_acquired = True
-            except asyncio.TimeoutError:
-                await _safe_send(ws, {
-                    "op": "call_tool_res",
-                    "request_id": req_id,
-                    "error": {"code": "OVER_CAPACITY", "message": f"{prov_key} concurrency limit reached; retry soon", "retry_after": RETRY_AFTER_SECS}
-                })
-                _global_sem.release()
+    try:
+        ticket = await _admission.acquire(
+            prov_key,
+            session_id,
+            on_wait=_on_queued,
+            progress_interval=PROGRESS_INTERVAL,
+            model=(model_name or None) if prov_key else None,
+            lane=lane,
+        )
+    except QueueFullError as e:
+        err = {"code": "OVER_CAPACITY", "message": f"{e}; retry soon", "retry_after": RETRY_AFTER_SECS}
+        _resolve_inflight(call_key, req_id, {"error": err})
+        await _safe_send(ws, {"op": "call_tool_res", "request_id": req_id, "error": err})
+        return
+    except asyncio.TimeoutError:
+        err = {
+            "code": "QUEUE_TIMEOUT",
+            "message": f"no capacity became available within {QUEUE_MAX_WAIT_SECS:g}s; retry soon",
+            "retry_after": RETRY_AFTER_SECS,
+        }
+        _resolve_inflight(call_key, req_id, {"error": err})
+        await _safe_send(ws, {"op": "call_tool_res", "request_id": req_id, "error": err})
+        return
+    except BaseException:
+        _resolve_inflight(call_key, req_id, {"error": {"code": "EXEC_ERROR", "message": "original call aborted"}})
+        raise
+
+    lease_id: str | None = None
+    try:
+        queued_s = ticket.waited_s
+        if _shared is not None:
+            # Global/provider caps are enforced across all workers via store leases
+            lease_id = f"{_WORKER_ID}:{uuid.uuid4().hex}"
+            t0 = time.time()
+            if not await _acquire_shared_slot(lease_id, prov_key, _on_queued):
+                lease_id = None
+                err = {
+                    "code": "QUEUE_TIMEOUT",
+                    "message": f"no capacity became available within {QUEUE_MAX_WAIT_SECS:g}s; retry soon",
+                    "retry_after": RETRY_AFTER_SECS,
+                }
+                _resolve_inflight(call_key, req_id, {"error": err})
+                await _safe_send(ws, {"op": "call_tool_res", "request_id": req_id, "error": err})
                 return
-            # Defer ACK; will send once after session acquisition to guarantee a single ACK
+            queued_s += time.time() - t0
+        start = time.time()
+        # Single ACK after global+provider+session admission
+        await _safe_send(ws, {
+            "op": "call_tool_ack",
+            "request_id": req_id,
+            "accepted": True,
+            "timeout": CALL_TIMEOUT,
+            "name": name,
+            "queued_s": round(queued_s, 3),
+            "stream": want_stream,
+            "priority": lane,
+        })
 
-        acquired_session = False
+        # Inject session and call_key into arguments for provider-side idempotency and context cache
         try:
-            try:
-                await asyncio.wait_for((await _sessions.get(session_id)).sem.acquire(), timeout=0.001)  # type: ignore
-                acquired_session = True
-            except asyncio.TimeoutError:
-                await _safe_send(ws, {
-                    "op": "call_tool_res",
-                    "request_id": req_id,
-                    "error": {"code": "OVER_CAPACITY", "message": "Session concurrency limit reached; retry soon", "retry_after": RETRY_AFTER_SECS}
-                })
-                try:
-                    _global_sem.release()
-                except Exception:
-                    pass
-                return
-            start = time.time()
-            # Single ACK after global+provider+session acquisition
-            await _safe_send(ws, {
-                "op": "call_tool_ack",
-                "request_id": req_id,
-                "accepted": True,
-                "timeout": CALL_TIMEOUT,
-                "name": name,
-            })
+            arguments = dict(arguments)
+            arguments.setdefault("_session_id", session_id)
+            arguments.setdefault("_call_key", call_key)
+        except Exception:
+            pass
 
-            # Inject session and call_key into arguments for provider-side idempotency and context cache
+        _inflight_reqs.add(req_id)
+        stream: TokenStream | None = None
+        pump_task: asyncio.Task | None = None
+        tool_task: asyncio.Task | None = None
+        feedback = CallFeedback()
+        try:
+            # Emit periodic progress while tool runs
+            # Compute a hard deadline for this tool invocation
+            tool_timeout = CALL_TIMEOUT
             try:
-                arguments = dict(arguments)
-                arguments.setdefault("_session_id", session_id)
-                arguments.setdefault("_call_key", call_key)
+                if name == "kimi_chat_with_tools":
+                    # Short timeout for normal chat; longer for web-enabled runs
+                    _kimitt = float(os.getenv("KIMI_CHAT_TOOL_TIMEOUT_SECS", "180"))
+                    _kimiweb = float(os.getenv("KIMI_CHAT_TOOL_TIMEOUT_WEB_SECS", "300"))
+                    # arguments is a dict we pass into the tool below; check websearch flag if present
+                    use_web = False
+                    try:
+                        use_web = bool(arguments.get("use_websearch"))
+                    except Exception:
+                        use_web = False
+                    if use_web:
+                        # For web-enabled calls, allow the higher web timeout explicitly
+                        tool_timeout = int(_kimiweb)
+                    else:
+                        tool_timeout = min(tool_timeout, int(_kimitt))
             except Exception:
                 pass
-
-            _inflight_reqs.add(req_id)
+            deadline = start + float(tool_timeout)
+
+            if want_stream:
+                stream = TokenStream()
+                chunk_seq = 0
+
+                async def _send_chunk(text: str) -> bool:
+                    nonlocal chunk_seq
+                    chunk_seq += 1
+                    return await _safe_send(ws, {
+                        "op": "call_tool_chunk",
+                        "request_id": req_id,
+                        "seq": chunk_seq,
+                        "delta": text,
+                    })
+
+                pump_task = asyncio.create_task(stream.pump(_send_chunk))
+            # The tool task copies the current context, so providers see the stream and feedback
+            feedback_token = start_call_feedback(feedback)
+            stream_token = start_token_stream(stream) if stream is not None else None
             try:
-                # Emit periodic progress while tool runs
-                # Compute a hard deadline for this tool invocation
-                tool_timeout = CALL_TIMEOUT
+                tool_task = asyncio.create_task(SERVER_HANDLE_CALL_TOOL(name, arguments))
+            finally:
+                if stream_token is not None:
+                    reset_token_stream(stream_token)
+                reset_call_feedback(feedback_token)
+            while True:
                 try:
-                    if name == "kimi_chat_with_tools":
-                        # Short timeout for normal chat; longer for web-enabled runs
-                        _kimitt = float(os.getenv("KIMI_CHAT_TOOL_TIMEOUT_SECS", "180"))
-                        _kimiweb = float(os.getenv("KIMI_CHAT_TOOL_TIMEOUT_WEB_SECS", "300"))
-                        # arguments is a dict we pass into the tool below; check websearch flag if present
-                        use_web = False
+                    # Shield so the heartbeat timeout does not cancel the tool itself
+                    outputs = await asyncio.wait_for(asyncio.shield(tool_task), timeout=PROGRESS_INTERVAL)
+                    break
+                except asyncio.TimeoutError:
+                    # Heartbeat progress to client
+                    await _safe_send(ws, {
+                        "op": "progress",
+                        "request_id": req_id,
+                        "name": name,
+                        "t": time.time(),
+                    })
+                    # Enforce hard deadline
+                    if time.time() >= deadline:
                         try:
-                            use_web = bool(arguments.get("use_websearch"))
+                            _abort_tool_task(tool_task, "timeout")
                         except Exception:
-                            use_web = False
-                        if use_web:
-                            # For web-enabled calls, allow the higher web timeout explicitly
-                            tool_timeout = int(_kimiweb)
-                        else:
-                            tool_timeout = min(tool_timeout, int(_kimitt))
-                except Exception:
-                    pass
-                deadline = start + float(tool_timeout)
-
-                tool_task = asyncio.create_task(SERVER_HANDLE_CALL_TOOL(name, arguments))
-                while True:
-                    try:
-                        outputs = await asyncio.wait_for(tool_task, timeout=PROGRESS_INTERVAL)
-                        break
-                    except asyncio.TimeoutError:
-                        # Heartbeat progress to client
-                        await _safe_send(ws, {
-                            "op": "progress",
-                            "request_id": req_id,
-                            "name": name,
-                            "t": time.time(),
-                        })
-                        # Enforce hard deadline
-                        if time.time() >= deadline:
-                            try:
-                                tool_task.cancel()
-                            except Exception:
-                                pass
-                            await _safe_send(ws, {
-                                "op": "call_tool_res",
-                                "request_id": req_id,
-                                "error": {"code": "TIMEOUT", "message": f"call_tool exceeded {tool_timeout}s"}
-                            })
-                            try:
-                                if call_key in _inflight_by_key:
-                                    _inflight_by_key[call_key].set()
-                                    _inflight_by_key.pop(call_key, None)
-                                _inflight_meta_by_key.pop(call_key, None)
-                            except Exception:
-                                pass
-                            return
-                latency = time.time() - start
+                            pass
+                        err = {"code": "TIMEOUT", "message": f"call_tool exceeded {tool_timeout}s"}
+                        _resolve_inflight(call_key, req_id, {"error": err})
+                        await _safe_send(ws, {"op": "call_tool_res", "request_id": req_id, "error": err})
+                        return
+            latency = time.time() - start
+            _observe_limits(prov_key, model_name, feedback)
+            _metrics.record({
+                "t": time.time(), "op": "call_tool", "lat": latency,
+                "sess": session_id, "name": name, "prov": prov_key or "", "prio": lane
+            })
+            outputs_norm = _normalize_outputs(outputs)
+            result_payload = {
+                "op": "call_tool_res",
+                "request_id": req_id,
+                "outputs": outputs_norm,
+            }
+            if stream is not None:
+                # Deliver every chunk before the final frame
+                stream.close()
                 try:
-                    with _metrics_path.open("a", encoding="utf-8") as f:
-                        f.write(json.dumps({
-                            "t": time.time(), "op": "call_tool", "lat": latency,
-                            "sess": session_id, "name": name, "prov": prov_key or ""
-                        }) + "\n")
-                except Exception:
-                    pass
-                outputs_norm = _normalize_outputs(outputs)
-                result_payload = {
-                    "op": "call_tool_res",
-                    "request_id": req_id,
-                    "outputs": outputs_norm,
+                    await asyncio.wait_for(pump_task, timeout=STREAM_FLUSH_SECS)
+                except asyncio.TimeoutError:
+                    logger.debug("stream flush timed out for %s", req_id)
+                result_payload["usage"] = stream.usage
+                result_payload["stream"] = {
+                    "frames": stream.frames_sent,
+                    "chars": stream.chars_emitted,
+                    "ttft_s": None if stream.ttft_s is None else round(stream.ttft_s, 3),
                 }
-                await _safe_send(ws, result_payload)
-                _store_result(req_id, result_payload)
-                # Store by semantic call key to allow delivery across reconnects with new req_id
-                try:
-                    _store_result_by_key(call_key, outputs_norm)
-                    # Signal any duplicate waiters on this call_key
-                    if call_key in _inflight_by_key:
-                        _inflight_by_key[call_key].set()
-                        _inflight_by_key.pop(call_key, None)
-                    _inflight_meta_by_key.pop(call_key, None)
-                except Exception:
-                    pass
-            except asyncio.TimeoutError:
-                await _safe_send(ws, {
-                    "op": "call_tool_res",
-                    "request_id": req_id,
-                    "error": {"code": "TIMEOUT", "message": f"call_tool exceeded {CALL_TIMEOUT}s"}
-                })
-                try:
-                    if call_key in _inflight_by_key:
-                        _inflight_by_key[call_key].set()
-                        _inflight_by_key.pop(call_key, None)
-                    _inflight_meta_by_key.pop(call_key, None)
-                except Exception:
-                    pass
-            except Exception as e:
-                await _safe_send(ws, {
-                    "op": "call_tool_res",
-                    "request_id": req_id,
-                    "error": {"code": "EXEC_ERROR", "message": str(e)}
-                })
-                try:
-                    if call_key in _inflight_by_key:
-                        _inflight_by_key[call_key].set()
-                        _inflight_by_key.pop(call_key, None)
-                    _inflight_meta_by_key.pop(call_key, None)
-                except Exception:
-                    pass
-        finally:
-            if acquired_session:
-                try:
-                    (await _sessions.get(session_id)).sem.release()  # type: ignore
-                except Exception:
-                    pass
-            if prov_acquired:
-                try:
-                    _provider_sems[prov_key].release()
-                except Exception:
-                    pass
+            # Store by semantic call key to allow delivery across reconnects with new req_id.
+            # Do this before releasing the in-flight marker so a late duplicate hits the cache.
             try:
-                _global_sem.release()
+                _store_result_by_key(call_key, outputs_norm)
             except Exception:
                 pass
+            if _shared is not None:
+                await _shared_op("put_result", "key", call_key, outputs_norm, float(RESULT_TTL_SECS))
+            # Hand the outputs to coalesced duplicates before our own send
+            _resolve_inflight(call_key, req_id, {"outputs": outputs_norm})
+            await _safe_send(ws, result_payload)
+            _store_result(req_id, result_payload)
+            if _shared is not None:
+                await _shared_op("put_result", "req", req_id, result_payload, float(RESULT_TTL_SECS))
+        except asyncio.TimeoutError:
+            if tool_task is not None and not tool_task.done():
+                _abort_tool_task(tool_task, "timeout")
+            err = {"code": "TIMEOUT", "message": f"call_tool exceeded {CALL_TIMEOUT}s"}
+            _resolve_inflight(call_key, req_id, {"error": err})
+            await _safe_send(ws, {"op": "call_tool_res", "request_id": req_id, "error": err})
+        except Exception as e:
+            _observe_limits(prov_key, model_name, feedback, e)
+            err = {"code": "EXEC_ERROR", "message": str(e)}
+            _resolve_inflight(call_key, req_id, {"error": err})
+            await _safe_send(ws, {"op": "call_tool_res", "request_id": req_id, "error": err})
+        finally:
+            _inflight_reqs.discard(req_id)
+            if tool_task is not None and not tool_task.done():
+                # The tool runs shielded from heartbeat timeouts; stop it when this handler exits early
+                _abort_tool_task(tool_task, "call aborted")
+            if pump_task is not None and not pump_task.done():
+                stream.close()  # type: ignore[union-attr]
+                pump_task.cancel()
+    finally:
+        _admission.release(ticket)
+        if lease_id is not None:
+            await _shared_op("release_slot", lease_id)
+        # Never leave coalesced waiters hanging if we exit abnormally (e.g. cancellation)
+        _resolve_inflight(call_key, req_id, {"error": {"code": "EXEC_ERROR", "message": "original call aborted"}})
+
+
+def _build_list_tools_frame(version: str) -> str:
+    """Serialized list_tools_res with a minimal descriptor per tool."""
+    tools = []
+    for name, tool in SERVER_TOOLS.items():
+        try:
+            tools.append({
+                "name": tool.name,
+                "description": tool.description,
+                "inputSchema": tool.get_input_schema(),
+            })
+        except Exception:
+            if isinstance(tool, LazyTool) and tool.error:
+                continue  # failed to import/construct; an eagerly built registry would not list it
+            tools.append({"name": name, "description": getattr(tool, "description", name), "inputSchema": {"type": "object"}})
+    return json.dumps({"op": "list_tools_res", "version": version, "tools": tools})
+
+
+async def _handle_message(ws: WebSocketServerProtocol, session_id: str, msg: Dict[str, Any]) -> None:
+    op = msg.get("op")
+    if op == "list_tools":
+        # Served from the versioned schema cache as a pre-serialized frame; a client that sends
+        # the version it already holds gets a short not_modified reply instead of every schema
+        cached = get_schema_cache().get(SERVER_TOOLS, "ws", _build_list_tools_frame)
+        if msg.get("version") == cached.version:
+            await _safe_send(ws, {"op": "list_tools_res", "version": cached.version, "not_modified": True})
+        else:
+            await _safe_send(ws, cached.value)
         return
 
+    if op == "call_tool":
+        req_id = msg.get("request_id")
+        run_key = (session_id, str(req_id))
+        cancel = CancelToken()
+        sink = _CallSink(ws)
+        # A retried request_id that is still running keeps the original registration
+        owns_entry = run_key not in _running_calls
+        if owns_entry:
+            _running_calls[run_key] = {
+                "task": asyncio.current_task(),
+                "token": cancel,
+                "name": msg.get("name"),
+                "sink": sink,
+            }
+        # Providers running under this call (threads included) observe the token via a ContextVar
+        cancel_scope = start_cancel_scope(cancel)
+        try:
+            await _handle_call_tool(sink, session_id, msg)
+        except asyncio.CancelledError:
+            if not cancel.cancelled:
+                raise
+            # Admission slots and shared leases were released by the handler's finally blocks
+            await _safe_send(sink, {
+                "op": "call_tool_res",
+                "request_id": req_id,
+                "error": {"code": "CANCELLED", "message": cancel.reason or "cancelled"},
+            })
+        finally:
+            reset_cancel_scope(cancel_scope)
+            if owns_entry:
+                _running_calls.pop(run_key, None)
+        return
+
+    if op == "cancel_tool":
+        req_id = msg.get("request_id")
+        entry = _running_calls.get((session_id, str(req_id)))
+        if entry is None or entry["sink"].detached:
+            await _safe_send(ws, {"op": "cancel_tool_res", "request_id": req_id, "ok": False, "error": "not_found"})
+            return
+        if _detach_leader(entry):
+            # Coalesced duplicates still wait on this call: only this client stops waiting for it
+            await _safe_send(ws, {
+                "op": "call_tool_res",
+                "request_id": req_id,
+                "error": {"code": "CANCELLED", "message": "cancelled by client"},
+            })
+        else:
+            entry["token"].cancel("cancelled by client")
+            entry["task"].cancel()
+        await _safe_send(ws, {"op": "cancel_tool_res", "request_id": req_id, "ok": True})
+        return
     if op == "rotate_token":
         old = msg.get("old") or ""
         new = msg.get("new") or ""
@@ -548,7 +980,20 @@ async def _handle_message(ws: WebSocketServerProtocol, session_id: str, msg: Dic
             "t": time.time(),
             "sessions": len(sess_ids),
             "global_capacity": GLOBAL_MAX_INFLIGHT,
+            "admission": _admission.snapshot(),
+            "adaptive_limits": _limits.snapshot() if _limits is not None else None,
+            "coalesced": _coalesced_total,
+            "result_cache": {"by_request": _results_cache.stats(), "by_key": _results_cache_by_key.stats()},
+            "schema_cache": get_schema_cache().stats(),
+            "metrics": _metrics.stats(),
+            "logging": pipeline_stats(),
+            "worker": {"index": _worker_index, "id": _WORKER_ID, "workers": WORKERS},
         }
+        if _shared is not None:
+            snapshot["shared_store"] = {
+                **(await _shared_op("stats", default={}) or {}),
+                "slot_errors": _shared_slot_errors,
+            }
         await _safe_send(ws, {"op": "health_res", "ok": True, "health": snapshot})
         return
 
@@ -609,7 +1054,8 @@ async def _serve_connection(ws: WebSocketServerProtocol) -> None:
 
     # Always assign a fresh daemon-side session id for isolation
     session_id = str(uuid.uuid4())
-    sess = await _sessions.ensure(session_id)
+    sess = await _sessions.ensure(session_id, weight=hello.get("weight"))
+    _admission.register_session(sess.session_id, weight=sess.weight, max_inflight=sess.max_inflight)
     try:
         ok = await _safe_send(ws, {"op": "hello_ack", "ok": True, "session_id": sess.session_id})
         if not ok:
@@ -618,6 +1064,18 @@ async def _serve_connection(ws: WebSocketServerProtocol) -> None:
         # Client closed during hello ack; just return
         return
 
+    # call_tool runs as its own task so the connection keeps reading (e.g. cancel_tool, health)
+    # while calls are in flight; other ops are handled inline.
+    calls: set[asyncio.Task] = set()
+
+    async def _run_call(msg: dict) -> None:
+        try:
+            await _handle_message(ws, sess.session_id, msg)
+        except (websockets.exceptions.ConnectionClosedError, ConnectionAbortedError, ConnectionResetError):
+            pass
+        except Exception as e:
+            logger.debug("call_tool handler failed: %s", e)
+
     try:
         async for raw in ws:
             try:
@@ -629,6 +1087,11 @@ async def _serve_connection(ws: WebSocketServerProtocol) -> None:
                 except Exception:
                     pass
                 continue
+            if msg.get("op") == "call_tool":
+                task = asyncio.create_task(_run_call(msg))
+                calls.add(task)
+                task.add_done_callback(calls.discard)
+                continue
             try:
                 await _handle_message(ws, sess.session_id, msg)
             except (websockets.exceptions.ConnectionClosedError, ConnectionAbortedError, ConnectionResetError):
@@ -638,10 +1101,14 @@ async def _serve_connection(ws: WebSocketServerProtocol) -> None:
         # Iterator may raise on abrupt close; treat as normal disconnect
         pass
     finally:
+        # A disconnect does not cancel running calls: their results stay replayable by request_id
+        if calls:
+            await asyncio.gather(*calls, return_exceptions=True)
         try:
             await _sessions.remove(sess.session_id)
         except Exception:
             pass
+        _admission.forget_session(sess.session_id)
 
 
 async def _health_writer(stop_event: asyncio.Event) -> None:
@@ -651,11 +1118,10 @@ async def _health_writer(stop_event: asyncio.Event) -> None:
         except Exception:
             sess_ids = []
 
-        # Approximate inflight via semaphore value
         try:
-            inflight_global = GLOBAL_MAX_INFLIGHT - _global_sem._value  # type: ignore[attr-defined]
+            admission = _admission.snapshot()
         except Exception:
-            inflight_global = None
+            admission = {}
         snapshot = {
             "t": time.time(),
             "pid": os.getpid(),
@@ -664,7 +1130,14 @@ async def _health_writer(stop_event: asyncio.Event) -> None:
             "started_at": STARTED_AT,
             "sessions": len(sess_ids),
             "global_capacity": GLOBAL_MAX_INFLIGHT,
-            "global_inflight": inflight_global,
+            "global_inflight": admission.get("global_inflight"),
+            "admission": admission,
+            "adaptive_limits": _limits.snapshot() if _limits is not None else None,
+            "result_cache": {"by_request": _results_cache.stats(), "by_key": _results_cache_by_key.stats()},
+            "schema_cache": get_schema_cache().stats(),
+            "metrics": _metrics.stats(),
+            "logging": pipeline_stats(),
+            "worker": {"index": _worker_index, "id": _WORKER_ID, "workers": WORKERS},
         }
         try:
             _health_path.write_text(json.dumps(snapshot), encoding="utf-8")
@@ -676,7 +1149,40 @@ async def _health_writer(stop_event: asyncio.Event) -> None:
             continue
 
 
-async def main_async() -> None:
+def _claim_pidfile() -> bool:
+    """Best-effort single-instance guard with stale lock auto-clear."""
+    if _create_pidfile():
+        return True
+    # If PID file exists but no one is listening OR health is stale, clear it
+    if (not _is_port_listening(EXAI_WS_HOST, EXAI_WS_PORT)) or (not _is_health_fresh()):
+        logger.warning("Stale PID file or no active listener detected; removing %s", PID_FILE)
+        _remove_pidfile()
+        if not _create_pidfile():
+            logger.error("Unable to recreate PID file after clearing stale lock. Exiting.")
+            return False
+        return True
+    logger.warning(
+        "PID file exists at %s - another WS daemon may already be running. If you recently crashed or rebooted, "
+        "verify with logs/ws_daemon.health.json or check port %s. Exiting.",
+        PID_FILE,
+        EXAI_WS_PORT,
+    )
+    return False
+
+
+def _init_worker(index: int) -> None:
+    """Per-process setup for multi-worker mode: identity, shared store, per-worker log files."""
+    global _worker_index, _WORKER_ID, _shared, _health_path
+    _worker_index = index
+    _WORKER_ID = f"w{index}-{os.getpid()}"
+    _shared = SharedStore(SHARED_STORE_PATH)
+    if index > 0:
+        # Worker 0 keeps the canonical health file used by the stale-lock check
+        _health_path = LOG_DIR / f"ws_daemon.health.w{index}.json"
+        _metrics.path = LOG_DIR / f"ws_daemon.metrics.w{index}.jsonl"
+
+
+async def main_async(worker_index: int | None = None) -> None:
     global STARTED_AT
     loop = asyncio.get_running_loop()
     stop_event = asyncio.Event()
@@ -691,27 +1197,21 @@ async def main_async() -> None:
             # Windows may not support signal handlers in some environments
             pass
 
-    # Best-effort single-instance guard with stale lock auto-clear
-    if not _create_pidfile():
-        # If PID file exists but no one is listening OR health is stale, clear it
-        if (not _is_port_listening(EXAI_WS_HOST, EXAI_WS_PORT)) or (not _is_health_fresh()):
-            logger.warning("Stale PID file or no active listener detected; removing %s", PID_FILE)
-            _remove_pidfile()
-            if not _create_pidfile():
-                logger.error("Unable to recreate PID file after clearing stale lock. Exiting.")
-                return
-        else:
-            logger.warning(
-                "PID file exists at %s - another WS daemon may already be running. If you recently crashed or rebooted, "
-                "verify with logs/ws_daemon.health.json or check port %s. Exiting.",
-                PID_FILE,
-                EXAI_WS_PORT,
-            )
+    serve_kwargs: dict = {}
+    if worker_index is None:
+        if not _claim_pidfile():
             return
+    else:
+        # The supervisor owns the PID file; workers share the port with SO_REUSEPORT
+        _init_worker(worker_index)
+        serve_kwargs["reuse_port"] = True
 
     STARTED_AT = time.time()
 
-    logger.info(f"Starting WS daemon on ws://{EXAI_WS_HOST}:{EXAI_WS_PORT}")
+    if worker_index is None:
+        logger.info(f"Starting WS daemon on ws://{EXAI_WS_HOST}:{EXAI_WS_PORT}")
+    else:
+        logger.info(f"Starting WS daemon worker {_WORKER_ID} on ws://{EXAI_WS_HOST}:{EXAI_WS_PORT}")
     try:
         async with websockets.serve(
             _serve_connection,
@@ -721,11 +1221,18 @@ async def main_async() -> None:
             ping_interval=PING_INTERVAL,
             ping_timeout=PING_TIMEOUT,
             close_timeout=1.0,
+            **serve_kwargs,
         ):
-            # Start health writer
+            # Start health writer and metrics flusher
             asyncio.create_task(_health_writer(stop_event))
+            metrics_task = asyncio.create_task(_metrics.run(stop_event))
             # Wait indefinitely until a signal or external shutdown sets the event
             await stop_event.wait()
+            # Let the metrics task write out whatever is still buffered
+            try:
+                await asyncio.wait_for(metrics_task, timeout=5.0)
+            except Exception:
+                pass
     except OSError as e:
         # Friendly message on address-in-use
         if getattr(e, "errno", None) in (98, 10048):  # 98=EADDRINUSE (POSIX), 10048=WSAEADDRINUSE (Windows)
@@ -738,10 +1245,71 @@ async def main_async() -> None:
             return
         raise
     finally:
+        if worker_index is None:
+            _remove_pidfile()
+
+
+def _worker_main(index: int) -> None:
+    asyncio.run(main_async(worker_index=index))
+
+
+def _run_supervisor() -> None:
+    """Run WORKERS daemon processes on one port, restarting any that exit unexpectedly."""
+    if not _claim_pidfile():
+        return
+    store = SharedStore(SHARED_STORE_PATH)
+    # No worker is running yet, so any lease left in the store is from a previous run
+    store.reset_leases()
+    ctx = multiprocessing.get_context("spawn")
+    procs: dict[int, Any] = {}
+    stopping = False
+
+    def _spawn(index: int) -> None:
+        proc = ctx.Process(target=_worker_main, args=(index,), name=f"exai-ws-worker-{index}")
+        proc.start()
+        procs[index] = proc
+
+    def _signal(*_args):
+        nonlocal stopping
+        stopping = True
+
+    for s in (signal.SIGINT, signal.SIGTERM):
+        try:
+            signal.signal(s, _signal)
+        except (ValueError, OSError):
+            pass
+
+    logger.info(f"Starting WS daemon supervisor with {WORKERS} workers on ws://{EXAI_WS_HOST}:{EXAI_WS_PORT}")
+    try:
+        for i in range(WORKERS):
+            _spawn(i)
+        while not stopping:
+            time.sleep(1.0)
+            for i, proc in list(procs.items()):
+                if stopping or proc.is_alive():
+                    continue
+                logger.warning("WS worker %s (pid %s) exited with code %s; restarting", i, proc.pid, proc.exitcode)
+                try:
+                    store.purge_owner(f"w{i}-{proc.pid}:")
+                except Exception:
+                    pass
+                _spawn(i)
+    finally:
+        for proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()
+        for proc in procs.values():
+            proc.join(timeout=10)
+        store.close()
         _remove_pidfile()
 
 
 def main() -> None:
+    if WORKERS > 1:
+        if hasattr(socket, "SO_REUSEPORT"):
+            _run_supervisor()
+            return
+        logger.warning("EXAI_WS_WORKERS=%s requires SO_REUSEPORT, which this platform lacks; running one process", WORKERS)
     asyncio.run(main_async())
 
 
@@ -3,12 +3,16 @@
 import json
 import logging
 import os
+import time
 from typing import Any, Optional
 from pathlib import Path
 import mimetypes
 
 from .base import ModelProvider, ModelCapabilities, ModelResponse, ProviderType
 from utils.http_client import HttpClient
+from utils.cancellation import CallCancelled, is_cancelled, on_cancel, raise_if_cancelled
+from utils.rate_limit import is_rate_limit_error, note_provider_latency, note_rate_limited
+from utils.token_stream import emit_token, get_token_stream, record_stream_usage
 
 logger = logging.getLogger(__name__)
 
@@ -173,9 +177,14 @@ class GLMModelProvider(ModelProvider):
         resolved = self._resolve_model_name(model_name)
         payload = self._build_payload(prompt, system_prompt, resolved, temperature, max_output_tokens, **kwargs)
 
+        raise_if_cancelled()
         try:
-            if getattr(self, "_use_sdk", False):
+            if getattr(self, "_use_sdk", False) and get_token_stream() is not None:
+                # A transport asked for token streaming (forward deltas as the SDK yields them)
+                raw, text, usage = self._stream_with_sdk(resolved, payload)
+            elif getattr(self, "_use_sdk", False):
                 # Use official SDK
+                t_request = time.perf_counter()
                 resp = self._sdk_client.chat.completions.create(
                     model=resolved,
                     messages=payload["messages"],
@@ -183,6 +192,7 @@ class GLMModelProvider(ModelProvider):
                     max_tokens=payload.get("max_tokens"),
                     stream=False,
                 )
+                note_provider_latency(time.perf_counter() - t_request)
                 # SDK returns an object; normalize to dict-like
                 raw = getattr(resp, "model_dump", lambda: resp)()
                 choice0 = (raw.get("choices") or [{}])[0]
@@ -190,7 +200,9 @@ class GLMModelProvider(ModelProvider):
                 usage = raw.get("usage", {})
             else:
                 # HTTP fallback
+                t_request = time.perf_counter()
                 raw = self.client.post_json("/chat/completions", payload)
+                note_provider_latency(time.perf_counter() - t_request)
                 text = raw.get("choices", [{}])[0].get("message", {}).get("content", "")
                 usage = raw.get("usage", {})
 
@@ -207,9 +219,52 @@ class GLMModelProvider(ModelProvider):
                 metadata={"raw": raw},
             )
         except Exception as e:
+            if is_rate_limit_error(e):
+                note_rate_limited()
             logger.error("GLM generate_content failed: %s", e)
             raise
 
+    def _stream_with_sdk(self, resolved: str, payload: dict) -> tuple[dict, str, dict]:
+        parts: list[str] = []
+        usage: dict = {}
+        last_id = None
+        t_request = time.perf_counter()
+        response = self._sdk_client.chat.completions.create(
+            model=resolved,
+            messages=payload["messages"],
+            temperature=payload.get("temperature"),
+            max_tokens=payload.get("max_tokens"),
+            stream=True,
+        )
+        note_provider_latency(time.perf_counter() - t_request)
+        close = getattr(response, "close", None)
+        try:
+            with on_cancel(close if callable(close) else (lambda: None)):
+                for chunk in response:
+                    if is_cancelled():
+                        break
+                    data = chunk.model_dump() if hasattr(chunk, "model_dump") else chunk
+                    last_id = data.get("id") or last_id
+                    if data.get("usage"):
+                        usage = data["usage"]
+                    for choice in data.get("choices") or []:
+                        piece = (choice.get("delta") or {}).get("content")
+                        if piece:
+                            parts.append(piece)
+                            emit_token(piece)
+        except Exception as e:
+            if is_cancelled():
+                raise CallCancelled("cancelled by client") from e
+            raise
+        raise_if_cancelled()
+        record_stream_usage({
+            "input_tokens": int(usage.get("prompt_tokens", 0)),
+            "output_tokens": int(usage.get("completion_tokens", 0)),
+            "total_tokens": int(usage.get("total_tokens", 0)),
+        } if usage else None)
+        raw = {"id": last_id, "model": resolved, "usage": usage, "stream": True}
+        return raw, "".join(parts), usage
+
     def upload_file(self, file_path: str, purpose: str = "agent") -> str:
         """Upload a file to GLM Files API and return its file id.
 
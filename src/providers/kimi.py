@@ -9,6 +9,7 @@ from typing import Any, Optional
 
 from .base import ModelProvider, ModelCapabilities, ModelResponse, ProviderType, create_temperature_constraint
 from .openai_compatible import OpenAICompatibleProvider
+from utils.token_stream import get_token_stream
 
 logger = logging.getLogger(__name__)
 
@@ -499,8 +500,9 @@ class KimiModelProvider(OpenAICompatibleProvider):
         **kwargs,
     ) -> ModelResponse:
         # Delegate to OpenAI-compatible base using Moonshot base_url
-        # Ensure non-streaming by default for MCP tools
-        kwargs.setdefault("stream", False)
+        # Ensure non-streaming by default for MCP tools, unless a caller installed a token stream
+        if get_token_stream() is None:
+            kwargs.setdefault("stream", False)
         return super().generate_content(
             prompt=prompt,
             model_name=self._resolve_model_name(model_name),
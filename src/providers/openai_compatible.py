@@ -4,13 +4,28 @@ import copy
 import ipaddress
 import logging
 import os
+import socket
+import threading
 import time
 from abc import abstractmethod
-from typing import Optional
+from contextlib import contextmanager
+from typing import Iterator, Optional
 from urllib.parse import urlparse
 
 from openai import OpenAI
 
+from utils.cancellation import (
+    CallCancelled,
+    cancellable_sleep,
+    current_cancel_token,
+    is_cancelled,
+    on_cancel,
+    raise_if_cancelled,
+)
+from utils.log_pipeline import PAYLOAD_LOGGER, LazyJson
+from utils.rate_limit import is_rate_limit_error, note_provider_latency, note_rate_limited
+from utils.token_stream import emit_token, get_token_stream, record_stream_usage
+
 from .base import (
     ModelCapabilities,
     ModelProvider,
@@ -19,6 +34,47 @@ from .base import (
 )
 
 
+class _AbortableClient:
+    """OpenAI client on a one-connection httpx client whose socket can be shut down mid-request.
+
+    Closing an httpx client does not wake a thread blocked reading a non-streamed response, but
+    shutting down the socket does. The socket is taken from httpcore's connect_tcp trace event.
+    """
+
+    def __init__(self, provider: "OpenAICompatibleProvider") -> None:
+        import httpx
+
+        self.aborted = False
+        self._sock: Optional[socket.socket] = None
+        self.http_client = provider._new_http_client(
+            limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+            event_hooks={"request": [self._trace_request]},
+        )
+        self.client = provider.client.with_options(http_client=self.http_client)
+
+    def _trace_request(self, request) -> None:
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self._sock = info["return_value"].get_extra_info("socket")
+
+    def abort(self) -> None:
+        self.aborted = True
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        try:
+            self.http_client.close()
+        except Exception:
+            pass
+
+
 class OpenAICompatibleProvider(ModelProvider):
     """Base class for any provider using an OpenAI-compatible API.
 
@@ -30,6 +86,8 @@ class OpenAICompatibleProvider(ModelProvider):
 
     DEFAULT_HEADERS = {}
     FRIENDLY_NAME = "OpenAI Compatible"
+    # Idle abortable clients kept for cancellable non-streamed calls (connections stay warm)
+    ABORTABLE_CLIENT_POOL_SIZE = 4
 
     def __init__(self, api_key: str, base_url: str = None, **kwargs):
         """Initialize the provider with API key and optional base URL.
@@ -41,6 +99,8 @@ class OpenAICompatibleProvider(ModelProvider):
         """
         super().__init__(api_key, **kwargs)
         self._client = None
+        self._abortable_clients: list[_AbortableClient] = []
+        self._abortable_lock = threading.Lock()
         self.base_url = base_url
         self.organization = kwargs.get("organization")
         self.allowed_models = self._parse_allowed_models()
@@ -273,6 +333,54 @@ class OpenAICompatibleProvider(ModelProvider):
 
         return self._client
 
+    def _new_http_client(self, **kwargs):
+        """httpx client configured like the one behind self.client (timeouts, test transport)."""
+        import httpx
+
+        timeout_config = (
+            self.timeout_config if hasattr(self, "timeout_config") and self.timeout_config else httpx.Timeout(30.0)
+        )
+        if hasattr(self, "_test_transport"):
+            kwargs["transport"] = self._test_transport
+        # Proxy variables are hidden from httpx here too (see client)
+        proxy_vars = ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy")
+        original_env = {var: os.environ.pop(var) for var in proxy_vars if var in os.environ}
+        try:
+            return httpx.Client(timeout=timeout_config, follow_redirects=True, **kwargs)
+        finally:
+            os.environ.update(original_env)
+
+    @contextmanager
+    def _abortable_call(self) -> Iterator[OpenAI]:
+        """Client for one non-streamed request that cancelling the current call aborts.
+
+        Yields self.client when no cancel token is installed or the client cannot be copied (test
+        doubles); such requests are only checked for cancellation between attempts.
+        """
+        if current_cancel_token() is None or not hasattr(self.client, "with_options"):
+            yield self.client
+            return
+        with self._abortable_lock:
+            handle = self._abortable_clients.pop() if self._abortable_clients else None
+        if handle is None:
+            handle = _AbortableClient(self)
+        try:
+            with on_cancel(handle.abort):
+                yield handle.client
+        except Exception as e:
+            if handle.aborted:
+                raise CallCancelled("cancelled by client") from e
+            raise
+        finally:
+            keep = False
+            if not handle.aborted:
+                with self._abortable_lock:
+                    keep = len(self._abortable_clients) < self.ABORTABLE_CLIENT_POOL_SIZE
+                    if keep:
+                        self._abortable_clients.append(handle)
+            if not keep:
+                handle.close()
+
     def _sanitize_for_logging(self, params: dict) -> dict:
         """Sanitize sensitive data from parameters before logging.
 
@@ -380,11 +488,9 @@ class OpenAICompatibleProvider(ModelProvider):
 
         for attempt in range(max_retries):
             try:  # Log sanitized payload for debugging
-                import json
-
-                sanitized_params = self._sanitize_for_logging(completion_params)
-                logging.info(
-                    f"o3-pro API request (sanitized): {json.dumps(sanitized_params, indent=2, ensure_ascii=False)}"
+                logging.getLogger(PAYLOAD_LOGGER).info(
+                    "o3-pro API request (sanitized): %s",
+                    LazyJson(completion_params, transform=self._sanitize_for_logging, indent=2),
                 )
 
                 # Use OpenAI client's responses endpoint
@@ -433,7 +539,7 @@ class OpenAICompatibleProvider(ModelProvider):
                     logging.warning(
                         f"Retryable error for o3-pro responses endpoint, attempt {actual_attempts}/{max_retries}: {str(e)}. Retrying in {delay}s..."
                     )
-                    time.sleep(delay)
+                    cancellable_sleep(delay)
                 else:
                     break
 
@@ -524,21 +630,21 @@ class OpenAICompatibleProvider(ModelProvider):
         except Exception:
             pass
 
-        # Log sanitized payload
+        # Log sanitized payload (serialized only if the sampled logger keeps the record)
         try:
-            import json as _json
-
-            def _san(v):
-                if isinstance(v, dict):
-                    return {k: _san(v) for k, v in v.items() if k.lower() not in {"api_key", "authorization"}}
-                if isinstance(v, list):
-                    return [_san(x) for x in v]
-                return v
-
-            logging.info(
-                "chat.completions.create payload (sanitized): %s",
-                _json.dumps(_san(completion_params), ensure_ascii=False),
-            )
+            payload_logger = logging.getLogger(PAYLOAD_LOGGER)
+            if payload_logger.isEnabledFor(logging.INFO):
+
+                def _san(v):
+                    if isinstance(v, dict):
+                        return {k: _san(v) for k, v in v.items() if k.lower() not in {"api_key", "authorization"}}
+                    if isinstance(v, list):
+                        return [_san(x) for x in v]
+                    return v
+
+                payload_logger.info(
+                    "chat.completions.create payload (sanitized): %s", LazyJson(completion_params, transform=_san)
+                )
         except Exception:
             pass
 
@@ -556,6 +662,12 @@ class OpenAICompatibleProvider(ModelProvider):
             completion_params["tool_choice"] = kwargs["tool_choice"]
         if "stream" in kwargs:
             completion_params["stream"] = kwargs["stream"]
+        elif get_token_stream() is not None and not kwargs.get("tools"):
+            # A transport asked for token streaming on this call (tool-call deltas are not forwarded)
+            completion_params["stream"] = True
+        if completion_params.get("stream") is True:
+            # Without this, OpenAI-style endpoints omit usage from streamed responses
+            completion_params["stream_options"] = kwargs.get("stream_options") or {"include_usage": True}
         if isinstance(kwargs.get("extra_headers"), dict):
             completion_params["extra_headers"] = kwargs["extra_headers"]
         if isinstance(kwargs.get("extra_body"), dict):
@@ -582,8 +694,11 @@ class OpenAICompatibleProvider(ModelProvider):
         last_exception = None
         actual_attempts = 0
 
+        streamed_any = False  # once deltas reached the client, a retry would duplicate them
+
         for attempt in range(max_retries):
             actual_attempts = attempt + 1
+            raise_if_cancelled()
             try:
                 # Attach idempotency per attempt as well via request_options if SDK supports it
                 req_opts = {}
@@ -593,7 +708,15 @@ class OpenAICompatibleProvider(ModelProvider):
                         req_opts["idempotency_key"] = str(call_key)
                 except Exception:
                     pass
-                response = self.client.chat.completions.create(**completion_params, **req_opts)
+                t_request = time.perf_counter()
+                if completion_params.get("stream") is True:
+                    response = self.client.chat.completions.create(**completion_params, **req_opts)
+                else:
+                    # Cancelling shuts down the connection this request is waiting on
+                    with self._abortable_call() as client:
+                        response = client.chat.completions.create(**completion_params, **req_opts)
+                # Time to response (headers for streams): the upstream queueing signal for adaptive limits
+                note_provider_latency(time.perf_counter() - t_request)
                 # Capture Kimi context-cache token from response headers if exposed via client
                 try:
                     # Some SDKs expose last response headers; fall back to provider-specific hooks otherwise
@@ -618,36 +741,60 @@ class OpenAICompatibleProvider(ModelProvider):
                     actual_model = None
                     response_id = None
                     created_ts = None
+                    stream_usage = {}
+                    finish_reason = None
+                    close = getattr(response, "close", None)
                     try:
-                        for event in response:
-                            try:
-                                choice = event.choices[0]
-                                delta = getattr(choice, "delta", None)
-                                if delta and getattr(delta, "content", None):
-                                    content_parts.append(delta.content)
-                                msg = getattr(choice, "message", None)
-                                if msg and getattr(msg, "content", None):
-                                    content_parts.append(msg.content)
-                                if actual_model is None and getattr(event, "model", None):
-                                    actual_model = event.model
-                                if response_id is None and getattr(event, "id", None):
-                                    response_id = event.id
-                                if created_ts is None and getattr(event, "created", None):
-                                    created_ts = event.created
-                            except Exception:
-                                continue
+                        with on_cancel(close if callable(close) else (lambda: None)):
+                            for event in response:
+                                if is_cancelled():
+                                    break
+                                try:
+                                    # Usage arrives on the final chunk (top-level or, for Moonshot, on the choice)
+                                    if getattr(event, "usage", None):
+                                        stream_usage = self._extract_usage(event) or stream_usage
+                                    # The usage-only chunk sent for include_usage has no choices
+                                    if not event.choices:
+                                        continue
+                                    choice = event.choices[0]
+                                    if getattr(choice, "finish_reason", None):
+                                        finish_reason = choice.finish_reason
+                                    if getattr(choice, "usage", None):
+                                        stream_usage = self._extract_usage(choice) or stream_usage
+                                    delta = getattr(choice, "delta", None)
+                                    if delta and getattr(delta, "content", None):
+                                        content_parts.append(delta.content)
+                                        if emit_token(delta.content):
+                                            streamed_any = True
+                                    msg = getattr(choice, "message", None)
+                                    if msg and getattr(msg, "content", None):
+                                        content_parts.append(msg.content)
+                                        if emit_token(msg.content):
+                                            streamed_any = True
+                                    if actual_model is None and getattr(event, "model", None):
+                                        actual_model = event.model
+                                    if response_id is None and getattr(event, "id", None):
+                                        response_id = event.id
+                                    if created_ts is None and getattr(event, "created", None):
+                                        created_ts = event.created
+                                except Exception:
+                                    continue
                     except Exception as stream_err:
+                        if is_cancelled():
+                            raise CallCancelled("cancelled by client") from stream_err
                         raise RuntimeError(f"Streaming failed: {stream_err}") from stream_err
+                    raise_if_cancelled()
 
                     content = "".join(content_parts)
+                    record_stream_usage(stream_usage)
                     return ModelResponse(
                         content=content,
-                        usage=None,
+                        usage=(stream_usage or {}),
                         model_name=model_name,
                         friendly_name=self.FRIENDLY_NAME,
                         provider=self.get_provider_type(),
                         metadata={
-                            "finish_reason": "stop",
+                            "finish_reason": finish_reason or "Unknown",
                             "model": actual_model or model_name,
                             "id": response_id,
                             "created": created_ts,
@@ -704,16 +851,20 @@ class OpenAICompatibleProvider(ModelProvider):
                         "created": getattr(response, "created", None),
                     },
                 )
+            except CallCancelled:
+                raise
             except Exception as e:
                 last_exception = e
-                is_retryable = self._is_error_retryable(e)
+                if is_rate_limit_error(e):
+                    note_rate_limited()
+                is_retryable = self._is_error_retryable(e) and not streamed_any and not is_cancelled()
                 if attempt == max_retries - 1 or not is_retryable:
                     break
                 delay = retry_delays[attempt]
                 logging.warning(
                     f"{self.FRIENDLY_NAME} error for model {model_name}, attempt {actual_attempts}/{max_retries}: {str(e)}. Retrying in {delay}s..."
                 )
-                time.sleep(delay)
+                cancellable_sleep(delay)
 
         error_msg = (
             f"{self.FRIENDLY_NAME} API error for model {model_name} after {actual_attempts} attempt"
@@ -3,6 +3,7 @@
 import logging
 import os
 import threading
+from collections import OrderedDict
 from typing import Any, Optional, TYPE_CHECKING
 
 # Ensure environment variables from project .env are available even when server.py
@@ -262,6 +263,11 @@ class ModelProviderRegistry:
         ProviderType.OPENROUTER,  # Catch-all for cloud models (optional)
     ]
 
+    _model_index_lock = threading.RLock()
+    # Names outside the index that validation resolved (aliases, unlisted models). Kept apart
+    # from the index so client-supplied names cannot grow it or change schema fingerprints.
+    _RESOLVED_MODELS_MAX = 256
+
     def __new__(cls):
         """Singleton pattern for registry."""
         if cls._instance is None:
@@ -270,6 +276,9 @@ class ModelProviderRegistry:
             # Initialize instance dictionaries on first creation
             cls._instance._providers = {}
             cls._instance._initialized_providers = {}
+            cls._instance._model_index = None
+            cls._instance._model_index_fp = None
+            cls._instance._resolved_models = OrderedDict()
             logging.debug(f"REGISTRY: Created instance {cls._instance}")
         return cls._instance
 
@@ -283,6 +292,7 @@ class ModelProviderRegistry:
         """
         instance = cls()
         instance._providers[provider_type] = provider_class
+        cls.invalidate_model_index()
 
     @classmethod
     def get_provider(cls, provider_type: ProviderType, force_new: bool = False) -> Optional[ModelProvider]:
@@ -388,6 +398,16 @@ class ModelProviderRegistry:
         """
         logging.debug(f"get_provider_for_model called with model_name='{model_name}'")
 
+        # Fast path: precomputed model -> provider index (see get_model_index)
+        index = cls.get_model_index()
+        indexed_type = index.get(model_name)
+        if indexed_type is None:
+            indexed_type = cls._resolved_model(model_name)
+        if indexed_type is not None and not cls._circuit_open(indexed_type):
+            provider = cls.get_provider(indexed_type)
+            if provider is not None:
+                return provider
+
         # Check providers in priority order
         instance = cls()
         logging.debug(f"Registry instance: {instance}")
@@ -398,16 +418,15 @@ class ModelProviderRegistry:
                 logging.debug(f"Found {provider_type} in registry")
 
                 # Health gating: skip if circuit is OPEN (only when enabled and not log-only)
-                if _health_enabled() and _cb_enabled():
-                    health = _get_health_manager().get(provider_type.value)
-                    if health.breaker.state == CircuitState.OPEN:
-                        logging.warning("Skipping provider %s due to OPEN circuit", provider_type)
-                        continue
+                if cls._circuit_open(provider_type):
+                    logging.warning("Skipping provider %s due to OPEN circuit", provider_type)
+                    continue
 
                 # Get or create provider instance
                 provider = cls.get_provider(provider_type)
                 if provider and provider.validate_model_name(model_name):
                     logging.debug(f"{provider_type} validates model {model_name}")
+                    cls._remember_resolved_model(model_name, provider_type)
                     return provider
                 else:
                     logging.debug(f"{provider_type} does not validate model {model_name}")
@@ -417,6 +436,100 @@ class ModelProviderRegistry:
         logging.debug(f"No provider found for model {model_name}")
         return None
 
+    @staticmethod
+    def _circuit_open(provider_type: ProviderType) -> bool:
+        if not (_health_enabled() and _cb_enabled()):
+            return False
+        return _get_health_manager().get(provider_type.value).breaker.state == CircuitState.OPEN
+
+    @staticmethod
+    def _model_index_fingerprint(instance) -> tuple:
+        """Everything the index depends on that can change without register_provider().
+
+        Kept to a few identity checks so validating the cache stays far cheaper than a rebuild:
+        provider classes/instances, the ALLOWED_PROVIDERS gate read by get_provider(), and the
+        restriction service singleton (*_ALLOWED_MODELS is read once when it is created).
+        """
+        import utils.model_restrictions as _mr
+
+        return (
+            tuple((p, id(c)) for p, c in instance._providers.items()),
+            tuple((p, id(c)) for p, c in instance._initialized_providers.items()),
+            os.getenv("ALLOWED_PROVIDERS", ""),
+            id(_mr._restriction_service),
+        )
+
+    @classmethod
+    def get_model_index(cls) -> dict[str, ProviderType]:
+        """Return the model name -> provider type index, rebuilding it when stale.
+
+        The index holds every model each provider lists (restrictions applied), with the first
+        provider in PROVIDER_PRIORITY_ORDER winning, so lookups match get_provider_for_model.
+        It is rebuilt after register_provider()/configure_providers(), on env hot-reload, or
+        when a provider instance, ALLOWED_PROVIDERS or the restriction service changes.
+        """
+        instance = cls()
+        index = instance._model_index
+        if index is not None and instance._model_index_fp == cls._model_index_fingerprint(instance):
+            return index
+        with cls._model_index_lock:
+            index = {}
+            for provider_type in cls.PROVIDER_PRIORITY_ORDER:
+                if provider_type not in instance._providers:
+                    continue
+                provider = cls.get_provider(provider_type)
+                if not provider:
+                    continue
+                try:
+                    names = provider.list_models(respect_restrictions=True)
+                except Exception as e:
+                    logging.debug("Model index: %s list_models failed: %s", provider_type, e)
+                    continue
+                for model_name in names:
+                    index.setdefault(model_name, provider_type)
+            instance._model_index = index
+            instance._resolved_models.clear()
+            # Fingerprint after building: get_provider() above may have initialized providers
+            instance._model_index_fp = cls._model_index_fingerprint(instance)
+        return index
+
+    @classmethod
+    def invalidate_model_index(cls) -> None:
+        instance = cls()
+        with cls._model_index_lock:
+            instance._model_index = None
+            instance._model_index_fp = None
+            instance._resolved_models.clear()
+
+    @classmethod
+    def _resolved_model(cls, model_name: str) -> Optional[ProviderType]:
+        instance = cls()
+        with cls._model_index_lock:
+            provider_type = instance._resolved_models.get(model_name)
+            if provider_type is not None:
+                instance._resolved_models.move_to_end(model_name)
+            return provider_type
+
+    @classmethod
+    def _remember_resolved_model(cls, model_name: str, provider_type: ProviderType) -> None:
+        """LRU-remember a name resolved by validation until the next index rebuild."""
+        instance = cls()
+        with cls._model_index_lock:
+            resolved = instance._resolved_models
+            resolved[model_name] = provider_type
+            resolved.move_to_end(model_name)
+            while len(resolved) > cls._RESOLVED_MODELS_MAX:
+                resolved.popitem(last=False)
+
+    @classmethod
+    def get_provider_type_for_model(cls, model_name: str) -> Optional[ProviderType]:
+        """Cheap provider-type lookup for hot paths (e.g. the WS daemon's provider gate)."""
+        provider_type = cls.get_model_index().get(model_name) or cls._resolved_model(model_name)
+        if provider_type is not None:
+            return provider_type
+        provider = cls.get_provider_for_model(model_name)
+        return provider.get_provider_type() if provider else None
+
     @classmethod
     def get_available_providers(cls) -> list[ProviderType]:
         """Get list of registered provider types."""
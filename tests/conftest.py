@@ -4,8 +4,10 @@ Pytest configuration for Zen MCP Server tests
 
 import asyncio
 import importlib
+import json
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 import pytest
@@ -16,6 +18,12 @@ if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
 
+# Runtime artifacts the tests would otherwise leave in logs/ go to a per-session temp dir
+_artifact_dir = Path(tempfile.mkdtemp(prefix="exai-tests-"))
+os.environ["EXAI_WS_SHARED_STORE"] = str(_artifact_dir / "ws_daemon.shared.sqlite3")
+os.environ["EXAI_TOOL_MANIFEST"] = str(_artifact_dir / "tool_manifest.json")
+
+
 # Set default model to a specific value for tests to avoid auto mode
 # Use a configured provider model available in this deployment
 os.environ["DEFAULT_MODEL"] = "glm-4.5-flash"
@@ -68,6 +76,25 @@ def project_path(tmp_path):
     return test_dir
 
 
+class _FakeWS:
+    """Stands in for a daemon client connection and records the frames sent to it."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, raw):
+        self.sent.append(json.loads(raw))
+
+    def final(self, req_id):
+        return [m for m in self.sent if m.get("op") == "call_tool_res" and m.get("request_id") == req_id][-1]
+
+
+@pytest.fixture
+def fake_ws():
+    """Factory for fake WS daemon connections (call it once per client)."""
+    return _FakeWS
+
+
 def _set_dummy_keys_if_missing():
     """Set dummy API keys only when they are completely absent."""
     for var in ("KIMI_API_KEY", "GLM_API_KEY"):
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from src.daemon.adaptive_limit import AdaptiveLimits, AIMDLimit
+from src.daemon.admission import AdmissionController
+from src.providers.base import ProviderType
+from utils.rate_limit import is_rate_limit_error, note_provider_latency, note_rate_limited
+
+ws_server = pytest.importorskip("src.daemon.ws_server")
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_additive_increase_only_while_limit_is_used():
+    lim = AIMDLimit(4, max_limit=8)
+    for _ in range(40):
+        lim.on_success(0.5, inflight=0)
+    assert lim.current == 4
+
+    for _ in range(40):
+        lim.on_success(0.5, inflight=lim.current)
+    assert lim.current == 8
+    assert lim.increases == 4
+
+
+def test_rate_limit_backs_off_once_per_cooldown():
+    clock = _Clock()
+    lim = AIMDLimit(8, cooldown_s=5.0, clock=clock)
+    for _ in range(3):
+        lim.on_rate_limited()
+    assert lim.current == 4
+    assert lim.rate_limited == 3 and lim.decreases == 1
+
+    clock.t = 6.0
+    lim.on_rate_limited()
+    assert lim.current == 2
+    for _ in range(5):
+        clock.t += 10.0
+        lim.on_rate_limited()
+    assert lim.current == 1
+
+
+def test_latency_inflation_backs_off():
+    lim = AIMDLimit(8, max_limit=8, warmup=5, tolerance=2.0, clock=_Clock())
+    for _ in range(20):
+        lim.on_success(1.0, inflight=8)
+    assert lim.current == 8
+    for _ in range(10):
+        lim.on_success(5.0, inflight=8)
+    # Halved once (cooldown), then probing upward again from 4
+    assert lim.latency_backoffs == 1
+    assert 4 <= lim.current < 8
+
+
+def test_rate_limit_detection_prefers_structure():
+    class RateLimitError(Exception):
+        pass
+
+    class StatusError(Exception):
+        def __init__(self, status_code):
+            super().__init__("Error code: 429 in the message but not the status")
+            self.status_code = status_code
+
+    assert is_rate_limit_error(RateLimitError("slow down"))
+    assert not is_rate_limit_error(StatusError(500))
+    assert is_rate_limit_error(StatusError(429))
+    try:
+        try:
+            raise StatusError(429)
+        except StatusError as inner:
+            raise RuntimeError("Kimi API error after 4 attempts") from inner
+    except RuntimeError as wrapped:
+        assert is_rate_limit_error(wrapped)
+    assert is_rate_limit_error(RuntimeError("ReachLimit: too many concurrent requests"))
+    assert not is_rate_limit_error(ValueError("bad prompt"))
+
+
+async def test_admission_enforces_per_model_limit():
+    limits = AdaptiveLimits({"KIMI": 4}, clock=_Clock())
+    ac = AdmissionController(global_limit=8, provider_limits={"KIMI": 4}, session_limit=8, limits=limits)
+    # A model that was rate limited drops to half the provider seed
+    limits.record("KIMI", "m1", [], True, 0, 0)
+    assert limits.limit("KIMI", "m1") == 2
+    assert limits.limit("KIMI") == 2
+
+    t1 = await ac.acquire("KIMI", "s", model="m1")
+    t2 = await ac.acquire("KIMI", "s", model="m1")
+    waiting = asyncio.create_task(ac.acquire("KIMI", "s", model="m2"))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()  # provider limit (2) is full
+    assert ac.snapshot()["providers"]["KIMI"]["capacity"] == 2
+
+    ac.release(t1)
+    t3 = await asyncio.wait_for(waiting, 1.0)
+    assert ac.inflight("KIMI", "m1") == 1 and ac.inflight("KIMI", "m2") == 1
+    for t in (t2, t3):
+        ac.release(t)
+    assert ac.inflight("KIMI") == 0
+
+
+async def test_daemon_feeds_provider_signals_into_health(monkeypatch, fake_ws):
+    limits = AdaptiveLimits({"KIMI": 6, "GLM": 4})
+    monkeypatch.setattr(ws_server, "_limits", limits)
+    monkeypatch.setattr(ws_server._admission, "limits", limits)
+    monkeypatch.setattr(ws_server, "_ensure_providers_configured", lambda: None)
+    monkeypatch.setattr(
+        ws_server.ModelProviderRegistry, "get_provider_type_for_model", staticmethod(lambda m: ProviderType.KIMI)
+    )
+
+    async def fake_handle_call_tool(name, arguments):
+        def provider_call():
+            note_provider_latency(0.2)
+            if arguments.get("prompt") == "throttled":
+                note_rate_limited()
+            return "ok"
+
+        return [{"type": "text", "text": await asyncio.to_thread(provider_call)}]
+
+    monkeypatch.setattr(ws_server, "SERVER_HANDLE_CALL_TOOL", fake_handle_call_tool)
+    ws_server._results_cache.clear()
+    ws_server._results_cache_by_key.clear()
+
+    ws = fake_ws()
+    for i, prompt in enumerate(("fine", "throttled")):
+        msg = {"op": "call_tool", "name": "chat", "request_id": f"al-{i}",
+               "arguments": {"prompt": prompt, "model": "kimi-adaptive-test"}}
+        await asyncio.wait_for(ws_server._handle_message(ws, "sess-al", msg), 5.0)
+    await ws_server._handle_message(ws, "sess-al", {"op": "health"})
+
+    health = ws.sent[-1]["health"]
+    kimi = health["adaptive_limits"]["KIMI"]
+    assert kimi["limit"] == 3 and kimi["rate_limited"] == 1 and kimi["samples"] == 1
+    assert kimi["models"]["kimi-adaptive-test"]["limit"] == 3
+    assert health["admission"]["providers"]["KIMI"]["capacity"] == 3
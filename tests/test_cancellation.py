@@ -0,0 +1,273 @@
+import asyncio
+import http.server
+import json
+import socketserver
+import threading
+import time
+
+import pytest
+from openai import OpenAI
+
+from src.providers.kimi import KimiModelProvider
+from utils.cancellation import (
+    CallCancelled,
+    CancelToken,
+    cancellable_sleep,
+    is_cancelled,
+    on_cancel,
+    raise_if_cancelled,
+    reset_cancel_scope,
+    start_cancel_scope,
+)
+from utils.token_stream import TokenStream, reset_token_stream, start_token_stream
+
+ws_server = pytest.importorskip("src.daemon.ws_server")
+
+
+def test_helpers_are_noops_without_token():
+    assert is_cancelled() is False
+    raise_if_cancelled()
+    with on_cancel(lambda: pytest.fail("must not run")):
+        pass
+
+
+def test_cancel_runs_callbacks_once_and_unblocks_sleep():
+    token = CancelToken()
+    closed = []
+    scope = start_cancel_scope(token)
+    try:
+        with on_cancel(lambda: closed.append(1)):
+            threading.Timer(0.05, token.cancel, args=("stop",)).start()
+            cancellable_sleep(5.0)
+        token.cancel("again")
+        assert closed == [1]
+        assert token.reason == "stop"
+        with pytest.raises(CallCancelled):
+            raise_if_cancelled()
+        # Registering after cancellation runs the callback immediately
+        with on_cancel(lambda: closed.append(2)):
+            pass
+        assert closed == [1, 2]
+    finally:
+        reset_cancel_scope(scope)
+    assert is_cancelled() is False
+
+
+async def test_cancel_closes_provider_stream_mid_response():
+    prov = KimiModelProvider(api_key="test-key")
+    state = {"closed": threading.Event(), "started": threading.Event()}
+
+    class Event:
+        def __init__(self, text):
+            self.choices = [type("Choice", (), {"delta": type("Delta", (), {"content": text})(), "message": None})()]
+            self.model = "kimi-k2-0711-preview"
+            self.id = "id"
+            self.created = 1
+            self.usage = None
+
+    class BlockingStream:
+        def __iter__(self):
+            yield Event("partial")
+            state["started"].set()
+            # Like an HTTP body read, this only returns once the connection is closed
+            state["closed"].wait(5.0)
+            raise ConnectionError("stream closed")
+
+        def close(self):
+            state["closed"].set()
+
+    class DummyClient:
+        class chat:
+            class completions:
+                @staticmethod
+                def create(**kwargs):
+                    state["stream"] = kwargs.get("stream")
+                    return BlockingStream()
+
+    prov._client = DummyClient()
+    token = CancelToken()
+    scope = start_cancel_scope(token)
+    stream_scope = start_token_stream(TokenStream())
+    try:
+        call = asyncio.create_task(
+            asyncio.to_thread(prov.generate_content, prompt="hi", model_name="kimi-k2-0711-preview")
+        )
+    finally:
+        reset_token_stream(stream_scope)
+        reset_cancel_scope(scope)
+    await asyncio.to_thread(state["started"].wait, 5.0)
+    token.cancel("cancelled by client")
+    with pytest.raises(CallCancelled):
+        await asyncio.wait_for(call, 5.0)
+    assert state["stream"] is True
+    assert state["closed"].is_set()
+
+
+async def test_streamed_call_keeps_finish_reason_and_usage():
+    prov = KimiModelProvider(api_key="test-key")
+    seen = {}
+
+    def chunk(text=None, finish_reason=None, usage=None):
+        delta = type("Delta", (), {"content": text})()
+        choices = [] if text is None else [
+            type("Choice", (), {"delta": delta, "message": None, "finish_reason": finish_reason})()
+        ]
+        return type("Chunk", (), {"choices": choices, "model": "kimi-k2-0711-preview", "id": "id", "created": 1,
+                                  "usage": usage})()
+
+    class DummyClient:
+        class chat:
+            class completions:
+                @staticmethod
+                def create(**kwargs):
+                    seen.update(kwargs)
+                    usage = type("U", (), {"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6})()
+                    return iter([chunk("trunc"), chunk("ated", finish_reason="length"), chunk(usage=usage)])
+
+    prov._client = DummyClient()
+    scope = start_cancel_scope(CancelToken())
+    stream_scope = start_token_stream(TokenStream())
+    try:
+        resp = prov.generate_content(prompt="hi", model_name="kimi-k2-0711-preview")
+    finally:
+        reset_token_stream(stream_scope)
+        reset_cancel_scope(scope)
+
+    assert seen["stream"] is True
+    assert seen["stream_options"] == {"include_usage": True}
+    assert resp.content == "truncated"
+    assert resp.metadata["finish_reason"] == "length"
+    assert resp.usage["input_tokens"] == 4 and resp.usage["output_tokens"] == 2
+
+
+@pytest.fixture
+def slow_completions():
+    """Local chat completions endpoint; a request with prompt "slow" waits until released."""
+    state = {"bodies": [], "connections": set(), "release": threading.Event()}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state["bodies"].append(body)
+            state["connections"].add(self.client_address)
+            if body["messages"][-1]["content"] == "slow":
+                state["release"].wait(10.0)
+            out = json.dumps({
+                "id": "c1", "object": "chat.completion", "created": 1, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    yield state
+    state["release"].set()
+    server.shutdown()
+    server.server_close()
+
+
+async def test_cancel_aborts_non_streamed_call_without_streaming(slow_completions):
+    prov = KimiModelProvider(api_key="test-key")
+    prov._client = OpenAI(api_key="test-key", base_url=slow_completions["url"], max_retries=0)
+    token = CancelToken()
+    scope = start_cancel_scope(token)
+    try:
+        # Cancellable calls keep the plain request shape and reuse a pooled connection
+        for _ in range(2):
+            resp = prov.generate_content(prompt="fast", model_name="kimi-k2-0711-preview")
+            assert resp.content == "ok" and resp.metadata["finish_reason"] == "stop"
+        call = asyncio.create_task(
+            asyncio.to_thread(prov.generate_content, prompt="slow", model_name="kimi-k2-0711-preview")
+        )
+    finally:
+        reset_cancel_scope(scope)
+    assert all(not b.get("stream") and "stream_options" not in b for b in slow_completions["bodies"])
+    assert len(slow_completions["connections"]) == 1
+
+    await asyncio.sleep(0.3)
+    t0 = time.monotonic()
+    token.cancel("cancelled by client")
+    with pytest.raises(CallCancelled):
+        await asyncio.wait_for(call, 5.0)
+    assert time.monotonic() - t0 < 2.0, "the blocked read must end on cancel, not when the server answers"
+    assert prov._abortable_clients == []
+
+
+async def test_cancel_tool_aborts_call_and_frees_slot(monkeypatch, fake_ws):
+    observed = {"started": threading.Event(), "released": threading.Event()}
+
+    async def fake_handle_call_tool(name, arguments):
+        def provider_call():
+            observed["started"].set()
+            # Blocks until the daemon cancels this call's token
+            cancellable_sleep(5.0)
+            observed["released"].set()
+            raise_if_cancelled()
+            return "finished"
+
+        return [{"type": "text", "text": await asyncio.to_thread(provider_call)}]
+
+    monkeypatch.setattr(ws_server, "SERVER_HANDLE_CALL_TOOL", fake_handle_call_tool)
+    monkeypatch.setattr(ws_server, "_ensure_providers_configured", lambda: None)
+    ws_server._results_cache.clear()
+    ws_server._results_cache_by_key.clear()
+
+    ws = fake_ws()
+    msg = {"op": "call_tool", "name": "version", "request_id": "c-1",
+           "arguments": {"prompt": "cancel-me", "model": "cancel-test-model"}}
+    call = asyncio.create_task(ws_server._handle_message(ws, "sess-c", msg))
+    await asyncio.to_thread(observed["started"].wait, 5.0)
+    assert ws_server._admission.snapshot()["global_inflight"] == 1
+
+    await ws_server._handle_message(ws, "sess-c", {"op": "cancel_tool", "request_id": "c-1"})
+    await asyncio.wait_for(call, 5.0)
+
+    final = [m for m in ws.sent if m["op"] == "call_tool_res"][-1]
+    assert final["error"]["code"] == "CANCELLED"
+    assert {"op": "cancel_tool_res", "request_id": "c-1", "ok": True} in ws.sent
+    assert ws_server._admission.snapshot()["global_inflight"] == 0
+    assert ("sess-c", "c-1") not in ws_server._running_calls
+    # The provider thread was released by the token, not left running until completion
+    assert await asyncio.to_thread(observed["released"].wait, 2.0)
+
+    await ws_server._handle_message(ws, "sess-c", {"op": "cancel_tool", "request_id": "c-1"})
+    assert ws.sent[-1] == {"op": "cancel_tool_res", "request_id": "c-1", "ok": False, "error": "not_found"}
+
+
+async def test_call_timeout_fires_the_token(monkeypatch, fake_ws):
+    released = threading.Event()
+
+    async def fake_handle_call_tool(name, arguments):
+        def provider_call():
+            cancellable_sleep(5.0)
+            released.set()
+            return "late"
+
+        return [{"type": "text", "text": await asyncio.to_thread(provider_call)}]
+
+    monkeypatch.setattr(ws_server, "SERVER_HANDLE_CALL_TOOL", fake_handle_call_tool)
+    monkeypatch.setattr(ws_server, "_ensure_providers_configured", lambda: None)
+    monkeypatch.setattr(ws_server, "CALL_TIMEOUT", 0.2)
+    monkeypatch.setattr(ws_server, "PROGRESS_INTERVAL", 0.05)
+    ws_server._results_cache_by_key.clear()
+
+    ws = fake_ws()
+    msg = {"op": "call_tool", "name": "version", "request_id": "t-1",
+           "arguments": {"prompt": "too-slow", "model": "cancel-test-model"}}
+    await asyncio.wait_for(ws_server._handle_message(ws, "sess-t", msg), 5.0)
+
+    assert [m for m in ws.sent if m["op"] == "call_tool_res"][-1]["error"]["code"] == "TIMEOUT"
+    # The provider thread stops at the deadline instead of running on unobserved
+    assert await asyncio.to_thread(released.wait, 2.0)
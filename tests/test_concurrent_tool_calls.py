@@ -0,0 +1,89 @@
+import asyncio
+import json
+import random
+from unittest.mock import patch
+
+from tools.codereview import CodeReviewTool
+from tools.shared.execution_context import call_scoped, run_in_call_context, step_scoped
+
+CONVERSATIONS = 10
+STEPS = 3
+
+
+class _Scoped:
+    scratch = call_scoped()
+    history = step_scoped(factory=list)
+
+    @run_in_call_context
+    async def run(self, tag):
+        self.scratch = tag
+        for i in range(3):
+            self.history.append(f"{tag}-{i}")
+            await asyncio.sleep(random.random() * 0.005)
+        return self.scratch, list(self.history)
+
+
+async def test_call_scoped_state_is_isolated_per_call():
+    obj = _Scoped()
+    results = await asyncio.gather(*(obj.run(f"t{i}") for i in range(20)))
+    for i, (scratch, history) in enumerate(results):
+        assert scratch == f"t{i}"
+        assert history == [f"t{i}-0", f"t{i}-1", f"t{i}-2"]
+
+
+def test_scoped_attributes_behave_like_instance_attributes_outside_calls():
+    obj = _Scoped()
+    assert getattr(obj, "scratch", "unset") == "unset"
+    obj.scratch = "direct"
+    obj.history.append("x")
+    assert obj.scratch == "direct" and obj.__dict__["history"] == ["x"]
+    # Step state of the last finished call is published to the instance
+    asyncio.run(obj.run("last"))
+    assert obj.history == ["last-0", "last-1", "last-2"]
+    assert obj.scratch == "direct"
+
+
+async def _observing_expert(self, arguments, request):
+    await asyncio.sleep(random.random() * 0.01)
+    return {
+        "status": "analysis_complete",
+        "seen": {
+            "initial_request": self.initial_request,
+            "steps": [s["step"] for s in self.work_history],
+            "findings": list(self.consolidated_findings.findings),
+            "current_step": self._current_arguments["step"],
+        },
+    }
+
+
+async def _review(tool, n):
+    continuation_id = None
+    for step in range(1, STEPS + 1):
+        args = {
+            "step": f"conv{n} step{step}",
+            "step_number": step,
+            "total_steps": STEPS,
+            "next_step_required": step < STEPS,
+            "findings": f"conv{n} finding{step}",
+            "relevant_files": [__file__],
+            "model": "glm-4.5-flash",
+        }
+        if continuation_id:
+            args["continuation_id"] = continuation_id
+        await asyncio.sleep(random.random() * 0.01)
+        data = json.loads((await tool.execute(args))[0].text)
+        continuation_id = data.get("continuation_id") or continuation_id
+    return data
+
+
+async def test_interleaved_workflows_on_one_tool_instance():
+    tool = CodeReviewTool()
+    with patch.object(CodeReviewTool, "_call_expert_analysis", _observing_expert):
+        results = await asyncio.gather(*(_review(tool, n) for n in range(CONVERSATIONS)))
+
+    for n, data in enumerate(results):
+        seen = data["expert_analysis"]["seen"]
+        assert seen["initial_request"] == f"conv{n} step1"
+        assert seen["steps"] == [f"conv{n} step{s}" for s in range(1, STEPS + 1)]
+        assert seen["findings"] == [f"Step {s}: conv{n} finding{s}" for s in range(1, STEPS + 1)]
+        assert seen["current_step"] == f"conv{n} step{STEPS}"
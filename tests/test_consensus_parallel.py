@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from tools.consensus import ConsensusTool
+from utils.cancellation import cancellable_sleep, is_cancelled
+
+DELAYS = {"fast-model": 0.2, "slow-model": 0.3, "stuck-model": 5.0}
+
+
+class _FakeProvider:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.aborted = []
+
+    def generate_content(self, prompt, model_name, **kwargs):
+        if model_name == "broken-model":
+            raise RuntimeError("upstream 500")
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            cancellable_sleep(DELAYS[model_name])
+            if is_cancelled():
+                self.aborted.append(model_name)
+                raise RuntimeError("cancelled")
+        finally:
+            with self.lock:
+                self.active -= 1
+        return SimpleNamespace(content=f"{model_name} saw {len(prompt)} chars")
+
+    def get_provider_type(self):
+        return SimpleNamespace(value="fake")
+
+
+def _args(models, **extra):
+    return {
+        "step": "Should we adopt the proposal?",
+        "step_number": 1,
+        "total_steps": len(models),
+        "next_step_required": True,
+        "findings": "My own analysis",
+        "models": [{"model": m, "stance": "neutral"} for m in models],
+        "parallel": True,
+        **extra,
+    }
+
+
+async def test_parallel_consensus_returns_all_responses_in_one_step():
+    tool = ConsensusTool()
+    provider = _FakeProvider()
+    with patch.object(ConsensusTool, "get_model_provider", return_value=provider):
+        started = time.monotonic()
+        out = await tool.execute_workflow(_args(["fast-model", "slow-model", "broken-model"]))
+        elapsed = time.monotonic() - started
+
+    data = json.loads(out[0].text)
+    assert elapsed < 0.45, "wall time should track the slowest model, not the sum"
+    assert provider.peak >= 2
+    assert data["status"] == "consensus_workflow_complete" and data["next_step_required"] is False
+    by_model = {r["model"]: r for r in data["model_responses"]}
+    assert by_model["fast-model"]["verdict"].startswith("fast-model saw")
+    assert by_model["broken-model"]["status"] == "error"
+    consensus = data["complete_consensus"]
+    assert consensus["models_consulted"] == ["fast-model:neutral", "slow-model:neutral"]
+    assert consensus["models_failed"] == ["broken-model:neutral"]
+    assert consensus["consensus_confidence"] == "partial"
+
+
+async def test_parallel_consensus_applies_per_model_deadline():
+    tool = ConsensusTool()
+    provider = _FakeProvider()
+    with patch.object(ConsensusTool, "get_model_provider", return_value=provider):
+        started = time.monotonic()
+        out = await tool.execute_workflow(_args(["fast-model", "stuck-model"], model_timeout_seconds=0.5))
+        assert time.monotonic() - started < 2.0
+
+    by_model = {r["model"]: r for r in json.loads(out[0].text)["model_responses"]}
+    assert by_model["fast-model"]["status"] == "success"
+    assert by_model["stuck-model"]["status"] == "timeout"
+    # The deadline cancels the provider call itself, not just the wait for it
+    for _ in range(50):
+        if provider.aborted:
+            break
+        time.sleep(0.01)
+    assert provider.aborted == ["stuck-model"]
+
+
+async def test_parallel_consensus_prepares_shared_files_once(tmp_path):
+    source = tmp_path / "proposal.py"
+    source.write_text("print('hello')\n")
+    tool = ConsensusTool()
+    prepare = tool._prepare_file_content_for_prompt
+    calls = []
+
+    def counting_prepare(*args, **kwargs):
+        calls.append(kwargs.get("model_context"))
+        return prepare(*args, **kwargs)
+
+    with patch.object(ConsensusTool, "get_model_provider", return_value=_FakeProvider()), patch.object(
+        tool, "_prepare_file_content_for_prompt", side_effect=counting_prepare
+    ):
+        out = await tool.execute_workflow(_args(["fast-model", "slow-model"], relevant_files=[str(source)]))
+
+    data = json.loads(out[0].text)
+    assert len(calls) == 1
+    verdicts = {r["model"]: r["verdict"] for r in data["model_responses"]}
+    assert verdicts["fast-model"].split(" saw ")[1] == verdicts["slow-model"].split(" saw ")[1]
@@ -0,0 +1,121 @@
+from unittest.mock import patch
+
+import pytest
+
+from utils import conversation_memory
+from utils.conversation_memory import (
+    MAX_CONVERSATION_TURNS,
+    ConversationTurn,
+    ThreadContext,
+    add_turn,
+    create_thread,
+    get_thread,
+    get_thread_chain,
+)
+from utils.storage_backend import InMemoryStorage
+
+
+@pytest.fixture
+def storage():
+    backend = InMemoryStorage()
+    with patch.object(conversation_memory, "get_storage", return_value=backend):
+        yield backend
+
+
+def test_turns_are_appended_without_rewriting_the_thread(storage):
+    thread_id = create_thread("chat", {"prompt": "start " + "x" * 10_000})
+    header = storage.get(f"thread:{thread_id}")
+
+    with patch.object(storage, "setex", wraps=storage.setex) as setex:
+        for i in range(3):
+            assert add_turn(thread_id, "user" if i % 2 == 0 else "assistant", f"turn {i}", files=[f"/f{i}.py"])
+    assert setex.call_count == 0
+    assert storage.get(f"thread:{thread_id}") == header
+    # Each stored record is one turn, independent of the thread's initial context
+    assert all(len(t) < 500 for t in storage.get_list(f"thread:{thread_id}:turns"))
+
+    context = get_thread(thread_id)
+    assert [t.content for t in context.turns] == ["turn 0", "turn 1", "turn 2"]
+    assert context.turns[2].files == ["/f2.py"]
+    assert context.last_updated_at == context.turns[-1].timestamp
+    assert context.initial_context["prompt"].startswith("start ")
+
+
+def test_threads_stored_whole_keep_their_turns_and_limit(storage):
+    thread_id = "12345678-1234-1234-1234-123456789012"
+    legacy = ThreadContext(
+        thread_id=thread_id,
+        created_at="2023-01-01T00:00:00Z",
+        last_updated_at="2023-01-01T00:01:00Z",
+        tool_name="chat",
+        turns=[
+            ConversationTurn(role="user", content=f"old {i}", timestamp="2023-01-01T00:00:00Z")
+            for i in range(MAX_CONVERSATION_TURNS - 1)
+        ],
+        initial_context={},
+    )
+    storage.setex(f"thread:{thread_id}", 3600, legacy.model_dump_json())
+
+    assert add_turn(thread_id, "assistant", "new")
+    assert not add_turn(thread_id, "user", "over the limit")
+    turns = get_thread(thread_id).turns
+    assert len(turns) == MAX_CONVERSATION_TURNS
+    assert (turns[0].content, turns[-1].content) == ("old 0", "new")
+    assert not add_turn("12345678-1234-1234-1234-000000000000", "user", "no such thread")
+
+
+def test_thread_chain_is_fetched_in_batches_at_any_depth(storage):
+    ids = [create_thread("chat", {"prompt": "root"})]
+    for depth in range(1, 8):
+        ids.append(create_thread("chat", {"prompt": f"child {depth}"}, parent_thread_id=ids[-1]))
+    for i, thread_id in enumerate(ids):
+        add_turn(thread_id, "user", f"turn in thread {i}")
+    assert get_thread(ids[-1]).ancestor_ids == list(reversed(ids[:-1]))
+
+    with patch.object(storage, "get", wraps=storage.get) as get, patch.object(
+        storage, "get_many", wraps=storage.get_many
+    ) as get_many, patch.object(storage, "get_lists", wraps=storage.get_lists) as get_lists:
+        chain = get_thread_chain(ids[-1])
+    assert [c.thread_id for c in chain] == ids
+    assert [c.turns[-1].content for c in chain] == [f"turn in thread {i}" for i in range(len(ids))]
+    # Leaf, then all ancestors: two header reads and two turn reads regardless of depth
+    assert (get.call_count, get_many.call_count, get_lists.call_count) == (0, 2, 2)
+
+    # Cached ancestors still pick up turns appended since the last read
+    add_turn(ids[2], "assistant", "late reply")
+    assert get_thread_chain(ids[-1])[2].turns[-1].content == "late reply"
+    assert [c.thread_id for c in get_thread_chain(ids[-1], max_depth=3)] == ids[-3:]
+
+
+def test_chain_follows_parent_links_past_recorded_ancestors(storage):
+    root_id = "12345678-1234-1234-1234-0000000000aa"
+    root = ThreadContext(
+        thread_id=root_id,
+        created_at="2023-01-01T00:00:00Z",
+        last_updated_at="2023-01-01T00:01:00Z",
+        tool_name="chat",
+        turns=[ConversationTurn(role="user", content="root turn", timestamp="2023-01-01T00:00:00Z")],
+        initial_context={},
+    )
+    middle = root.model_copy(update={"thread_id": "12345678-1234-1234-1234-0000000000bb", "parent_thread_id": root_id})
+    for context in (root, middle):
+        # Stored whole and without ancestor_ids, as earlier versions did
+        storage.setex(f"thread:{context.thread_id}", 3600, context.model_dump_json(exclude={"ancestor_ids"}))
+    leaf_id = create_thread("chat", {}, parent_thread_id=middle.thread_id)
+
+    chain = get_thread_chain(leaf_id)
+    assert [c.thread_id for c in chain] == [root_id, middle.thread_id, leaf_id]
+
+
+def test_cached_thread_reloads_a_turn_list_dropped_under_its_header(storage):
+    thread_id = create_thread("chat", {"prompt": "start"})
+    add_turn(thread_id, "user", "one")
+    add_turn(thread_id, "assistant", "two")
+    assert [t.content for t in get_thread(thread_id).turns] == ["one", "two"]
+
+    # Turn list evicted on its own (memory ceiling, expiry) while the header stays
+    storage.expire(f"thread:{thread_id}:turns", -1)
+    assert add_turn(thread_id, "user", "three")
+    assert [t.content for t in get_thread(thread_id).turns] == ["three"]
+    add_turn(thread_id, "assistant", "four")
+    assert [t.content for t in get_thread(thread_id).turns] == ["three", "four"]
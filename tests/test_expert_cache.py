@@ -0,0 +1,104 @@
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.providers.base import ProviderType
+from src.providers.registry import ModelProviderRegistry
+from tools.codereview import CodeReviewTool
+from utils import expert_cache
+from utils.expert_cache import ExpertResultCache, expert_cache_key
+
+
+class _FakeProvider:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, model_name, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(content=json.dumps({"status": "analysis_complete", "call": self.calls}))
+
+    def get_provider_type(self):
+        return ProviderType.GLM
+
+
+@pytest.fixture
+def provider(monkeypatch, tmp_path):
+    monkeypatch.setattr(expert_cache, "_cache", ExpertResultCache())
+    fake = _FakeProvider()
+    with patch.object(ModelProviderRegistry, "get_provider_for_model", return_value=fake):
+        yield fake
+
+
+def test_cache_bounds_ttl_and_sqlite_persistence(tmp_path):
+    cache = ExpertResultCache(max_entries=2, max_bytes=10_000)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"status": "analysis_complete", "key": key})
+    assert cache.get("a") is None and cache.get("c")[0]["key"] == "c"
+    cache.put("big", {"raw_analysis": "x" * 20_000})  # Larger than the whole cache: not stored
+    assert cache.get("big") is None
+
+    db = str(tmp_path / "expert.sqlite3")
+    ExpertResultCache(path=db).put("k", {"status": "analysis_complete"})
+    restarted = ExpertResultCache(path=db)
+    assert restarted.get("k")[0] == {"status": "analysis_complete"}
+    assert restarted.stats()["hits"] == 1
+    expired = ExpertResultCache(path=db, ttl_s=0.01)
+    time.sleep(0.02)
+    assert expired.get("k") is None
+
+
+
+def test_cache_bounds_count_utf8_bytes(tmp_path):
+    db = str(tmp_path / "expert.sqlite3")
+    cache = ExpertResultCache(max_bytes=3_000, path=db)
+    cache.put("wide", {"raw_analysis": "字" * 900})  # ~900 characters, ~2,700 bytes
+    assert cache.get("wide") is not None
+    cache.put("more", {"raw_analysis": "字" * 200})
+    assert cache.get("wide") is None, "the byte bound must evict the older entry"
+    cache.put("big", {"raw_analysis": "字" * 1_500})  # Fits in characters, not in bytes
+    assert cache.get("big") is None
+    size = cache._conn.execute("SELECT size FROM expert_results WHERE key='more'").fetchone()[0]
+    assert size == len(json.dumps({"raw_analysis": "字" * 200}, ensure_ascii=False).encode("utf-8"))
+
+def test_key_covers_prompt_model_and_parameters():
+    base = expert_cache_key("codereview", "sys", "prompt with file body", "glm-4.5", 0.2, "high", True)
+    assert base == expert_cache_key("codereview", "sys", "prompt with file body", "glm-4.5", 0.2, "high", True)
+    assert base != expert_cache_key("codereview", "sys", "prompt with edited body", "glm-4.5", 0.2, "high", True)
+    assert base != expert_cache_key("codereview", "sys", "prompt with file body", "kimi-k2", 0.2, "high", True)
+    assert base != expert_cache_key("codereview", "sys", "prompt with file body", "glm-4.5", 0.5, "high", True)
+
+
+async def _review(tool):
+    continuation_id = None
+    for step in (1, 2):
+        args = {
+            "step": f"review step {step}",
+            "step_number": step,
+            "total_steps": 2,
+            "next_step_required": step < 2,
+            "findings": f"finding {step}",
+            "relevant_files": [__file__],
+            "model": "glm-4.5-flash",
+        }
+        if continuation_id:
+            args["continuation_id"] = continuation_id
+        data = json.loads((await tool.execute(args))[0].text)
+        continuation_id = data.get("continuation_id") or continuation_id
+    return data
+
+
+async def test_repeated_review_is_served_from_cache(provider, monkeypatch):
+    first = await _review(CodeReviewTool())
+    second = await _review(CodeReviewTool())
+
+    assert provider.calls == 1
+    assert first["expert_analysis"] == second["expert_analysis"] == {"status": "analysis_complete", "call": 1}
+    assert first["metadata"]["expert_cache"]["hit"] is False
+    assert second["metadata"]["expert_cache"]["hit"] is True
+
+    monkeypatch.setenv("EXAI_EXPERT_CACHE_DISABLE_FOR_TOOLS", "precommit, codereview")
+    third = await _review(CodeReviewTool())
+    assert provider.calls == 2 and "expert_cache" not in third["metadata"]
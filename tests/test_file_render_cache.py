@@ -0,0 +1,33 @@
+import os
+
+from utils import file_utils
+from utils.file_utils import read_file_content
+
+
+def _write(path, text, mtime_offset=0):
+    path.write_text(text)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + mtime_offset))
+
+
+def test_render_cache_reuses_text_until_the_file_changes(tmp_path):
+    path = tmp_path / "module.py"
+    _write(path, "x = 1\n")
+    first = read_file_content(str(path))
+    hits = file_utils._render_cache.hits
+    assert read_file_content(str(path)) == first
+    assert file_utils._render_cache.hits == hits + 1
+
+    _write(path, "x = 2\n", mtime_offset=1_000_000)
+    assert "x = 2" in read_file_content(str(path))[0]
+
+
+def test_render_cache_limit_counts_utf8_bytes():
+    cache = file_utils._RenderCache(max_bytes=10)
+    cache.put("ascii", ("abcd", 1))
+    cache.put("wide", ("ééé", 1))  # 3 characters, 6 bytes
+    assert cache.get("ascii") is not None and cache.get("wide") is not None
+    cache.put("more", ("é", 1))
+    assert cache.get("ascii") is None, "the byte limit must evict the oldest entry"
+    cache.put("big", ("é" * 6, 1))
+    assert cache.get("big") is None
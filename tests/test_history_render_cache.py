@@ -0,0 +1,83 @@
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from utils import conversation_memory
+from utils.conversation_memory import ConversationTurn, ThreadContext, build_conversation_history
+from utils.history_render_cache import history_render_cache
+
+
+class _ModelContext:
+    model_name = "glm-4.5-flash"
+
+    def calculate_token_allocation(self):
+        return SimpleNamespace(file_tokens=0, history_tokens=100_000)
+
+    def estimate_tokens(self, text):
+        return len(text) // 4
+
+
+def _context(turns):
+    return ThreadContext(
+        thread_id="12345678-1234-1234-1234-12345678abcd",
+        created_at="2023-01-01T00:00:00Z",
+        last_updated_at="2023-01-01T00:01:00Z",
+        tool_name="chat",
+        turns=turns,
+        initial_context={},
+    )
+
+
+def _turn(i, files=None):
+    return ConversationTurn(
+        role="user" if i % 2 == 0 else "assistant",
+        content=f"turn {i} content",
+        timestamp="2023-01-01T00:00:00Z",
+        files=files,
+    )
+
+
+@pytest.fixture
+def format_calls():
+    history_render_cache.clear()
+    calls = []
+    original = conversation_memory._get_tool_formatted_content
+
+    def counting(turn):
+        calls.append(turn.content)
+        return original(turn)
+
+    with patch.object(conversation_memory, "_get_tool_formatted_content", counting):
+        yield calls
+    history_render_cache.clear()
+
+
+def test_continuation_formats_only_the_new_turn(format_calls):
+    turns = [_turn(i) for i in range(3)]
+    first, _ = build_conversation_history(_context(turns), model_context=_ModelContext())
+    assert len(format_calls) == 3
+
+    format_calls.clear()
+    again, _ = build_conversation_history(_context(turns), model_context=_ModelContext())
+    assert again == first and format_calls == []
+
+    turns.append(_turn(3))
+    extended, _ = build_conversation_history(_context(turns), model_context=_ModelContext())
+    assert format_calls == ["turn 3 content"]
+    history_render_cache.clear()
+    assert build_conversation_history(_context(turns), model_context=_ModelContext())[0] == extended
+
+
+def test_turn_is_reformatted_when_its_file_changes(format_calls, tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("x = 1\n")
+    turns = [_turn(0, files=[str(path)]), _turn(1)]
+    build_conversation_history(_context(turns), model_context=_ModelContext())
+
+    format_calls.clear()
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    build_conversation_history(_context(turns), model_context=_ModelContext())
+    assert format_calls == ["turn 0 content"]
@@ -0,0 +1,136 @@
+import json
+import sys
+import types
+
+import pytest
+
+from tools.lazy import LazyTool, ToolManifest, tool_class_name
+from tools.registry import ToolRegistry
+
+
+class _FakeTool:
+    instances = 0
+
+    def __init__(self):
+        type(self).instances += 1
+        self.name = "fake"
+        self.description = "A fake tool"
+
+    def get_input_schema(self):
+        return {"type": "object", "properties": {"prompt": {"type": "string"}}}
+
+    def get_annotations(self):
+        return {"readOnlyHint": True}
+
+    def ping(self):
+        return "pong"
+
+
+@pytest.fixture
+def fake_module(monkeypatch):
+    _FakeTool.instances = 0
+    module = types.ModuleType("fake_lazy_tool_mod")
+    module.FakeTool = _FakeTool
+    monkeypatch.setitem(sys.modules, "fake_lazy_tool_mod", module)
+    return module
+
+
+def test_lazy_tool_loads_on_first_use(fake_module):
+    tool = LazyTool("fake", "fake_lazy_tool_mod", "FakeTool")
+    assert tool_class_name(tool) == "FakeTool" and not isinstance(tool, _FakeTool)
+    assert not tool.loaded and _FakeTool.instances == 0
+    assert tool.ping() == "pong"
+    assert tool.loaded and _FakeTool.instances == 1
+    assert isinstance(tool.load(), _FakeTool)
+    tool.ping()
+    assert _FakeTool.instances == 1
+
+
+def test_manifest_serves_schema_without_loading(fake_module, tmp_path):
+    path = tmp_path / "manifest.json"
+    first = LazyTool("fake", "fake_lazy_tool_mod", "FakeTool", ToolManifest(path, expected={"fake"}))
+    assert first.get_input_schema()["properties"]["prompt"]["type"] == "string"
+    assert _FakeTool.instances == 1
+    assert json.loads(path.read_text())["tools"]["fake"]["description"] == "A fake tool"
+
+    # A fresh process (new manifest object) answers list_tools from the file
+    second = LazyTool("fake", "fake_lazy_tool_mod", "FakeTool", ToolManifest(path, expected={"fake"}))
+    assert second.name == "fake"
+    assert second.get_annotations() == {"readOnlyHint": True}
+    schema = second.get_input_schema()
+    schema["properties"].clear()
+    assert second.get_input_schema()["properties"], "callers must get a copy"
+    assert not second.loaded and _FakeTool.instances == 1
+
+
+def test_manifest_invalidated_by_schema_environment(fake_module, tmp_path, monkeypatch):
+    path = tmp_path / "manifest.json"
+    monkeypatch.setenv("DEFAULT_MODEL", "glm-4.5-flash")
+    LazyTool("fake", "fake_lazy_tool_mod", "FakeTool", ToolManifest(path, expected={"fake"})).get_input_schema()
+    monkeypatch.setenv("DEFAULT_MODEL", "kimi-k2-0711-preview")
+    manifest = ToolManifest(path, expected={"fake"})
+    assert manifest.get("fake") is None
+    tool = LazyTool("fake", "fake_lazy_tool_mod", "FakeTool", manifest)
+    tool.get_input_schema()
+    assert tool.loaded and _FakeTool.instances == 2
+
+
+def test_manifest_warm_start_after_providers_configured(fake_module, tmp_path, monkeypatch):
+    from src.providers.base import ProviderType
+    from src.providers.glm import GLMModelProvider
+    from src.providers.registry import ModelProviderRegistry
+
+    path = tmp_path / "manifest.json"
+    monkeypatch.setenv("GLM_API_KEY", "test-glm")
+    monkeypatch.setattr(ModelProviderRegistry, "_instance", None)
+
+    def start():
+        # Tools are registered (and the manifest consulted) before configure_providers()
+        ModelProviderRegistry._instance = None
+        manifest = ToolManifest(path, expected={"fake"})
+        assert manifest.get("fake") is None
+        ModelProviderRegistry.register_provider(ProviderType.GLM, GLMModelProvider)
+        return manifest
+
+    LazyTool("fake", "fake_lazy_tool_mod", "FakeTool", start()).get_input_schema()
+    assert _FakeTool.instances == 1
+
+    manifest = start()
+    tool = LazyTool("fake", "fake_lazy_tool_mod", "FakeTool", manifest)
+    assert tool.get_input_schema()["properties"]["prompt"]["type"] == "string"
+    assert not tool.loaded and _FakeTool.instances == 1
+    assert manifest.stats()["writes"] == 0
+
+
+def test_load_errors_are_sticky_and_remembered(tmp_path):
+    path = tmp_path / "manifest.json"
+    tool = LazyTool("ghost", "no_such_module_for_lazy_tools", "Ghost", ToolManifest(path, expected={"ghost"}))
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="Tool 'ghost' failed to load"):
+            tool.get_input_schema()
+    assert tool.error
+    assert "error" in json.loads(path.read_text())["tools"]["ghost"]
+    # Logging a failed tool names it without another load attempt
+    assert tool_class_name(tool) == "Ghost"
+
+
+def test_registry_registers_lazy_placeholders(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXAI_LAZY_TOOLS", "true")
+    monkeypatch.setenv("EXAI_TOOL_MANIFEST", str(tmp_path / "manifest.json"))
+    monkeypatch.setenv("LEAN_MODE", "true")
+    monkeypatch.setenv("LEAN_TOOLS", "version")
+    registry = ToolRegistry()
+    registry.build_tools()
+    tools = registry.list_tools()
+    assert set(tools) == {"version", "listmodels"}
+    assert all(isinstance(t, LazyTool) for t in tools.values())
+    assert registry.load_stats()["manifest"]["expected"] == 2
+
+
+async def test_version_reports_startup_profile():
+    from tools.version import VersionTool
+
+    out = await VersionTool().execute({})
+    startup = json.loads(out[0].text)["metadata"]["startup"]
+    assert startup["modules_loaded"] > 0
+    assert "uptime_ms" in startup and "slowest_imports" in startup
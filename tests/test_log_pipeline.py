@@ -0,0 +1,70 @@
+import logging
+import threading
+
+from utils.log_pipeline import AsyncLogPipeline, LazyJson, SamplingFilter
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self, gate=None):
+        super().__init__()
+        self.gate = gate
+        self.lines = []
+        self.threads = set()
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.threads.add(threading.get_ident())
+        self.lines.append(record.getMessage())
+
+
+def _record(msg="x", *args):
+    return logging.LogRecord("t", logging.INFO, __file__, 0, msg, args, None)
+
+
+def test_sampling_and_rate_limit():
+    sampled = SamplingFilter(sample_every=3)
+    assert [sampled.filter(_record()) for _ in range(6)] == [True, False, False, True, False, False]
+    limited = SamplingFilter(rate=2.0)
+    kept = sum(limited.filter(_record()) for _ in range(10))
+    assert kept == 2 and limited.suppressed == 8
+
+
+def test_lazy_json_serializes_only_when_formatted():
+    calls = []
+
+    def transform(obj):
+        calls.append(1)
+        return obj
+
+    params = {"model": "glm-4.5-flash", "messages": []}
+    payload = LazyJson(params, transform=transform)
+    params["temperature"] = 0.3  # Caller mutation after logging is not seen
+    assert not calls
+    assert _record("payload: %s", payload).getMessage() == 'payload: {"model": "glm-4.5-flash", "messages": []}'
+    assert len(calls) == 1
+
+
+def test_pipeline_formats_off_thread_and_counts_drops():
+    log = logging.getLogger("test_log_pipeline.queue")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    gate = threading.Event()
+    sink = _ListHandler(gate)
+    log.addHandler(sink)
+    pipeline = AsyncLogPipeline(capacity=2)
+    pipeline.attach(log)
+    pipeline.start()
+    try:
+        for i in range(10):
+            log.info("line %d", i)
+        assert sink.lines == [], "callers must not block on the handler"
+        gate.set()
+    finally:
+        pipeline.stop()
+    assert log.handlers == [sink]
+    assert pipeline.dropped >= 7 and pipeline.stats()["dropped_by_logger"]["test_log_pipeline.queue"] == pipeline.dropped
+    assert "line 0" in sink.lines
+    assert any(line.startswith("log queue full: dropped") for line in sink.lines)
+    assert threading.get_ident() not in sink.threads
+    log.removeHandler(sink)
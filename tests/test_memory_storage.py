@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+
+from tools.status import StatusTool
+from utils.storage_backend import InMemoryStorage
+
+
+def test_memory_ceiling_evicts_least_recently_used_by_size():
+    storage = InMemoryStorage(max_bytes=10_000, shards=1)
+    storage.setex("kept", 60, "k" * 1000)
+    for i in range(20):
+        storage.setex(f"bulk:{i}", 60, "x" * 1000)
+        storage.get("kept")  # Recently used: survives eviction
+
+    stats = storage.stats()
+    assert stats["bytes"] <= 10_000 and stats["evictions"] > 0
+    assert storage.get("kept") is not None and storage.get("bulk:0") is None and storage.get("bulk:19")
+
+    for _ in range(4):
+        storage.append_with_ttl("turns", 60, "t" * 2000)
+    # Appended items count too; the growing list pushes the older keys out
+    assert storage.stats()["bytes"] <= 10_000 and storage.list_length("turns") == 4
+    storage.shutdown()
+
+
+def test_expired_keys_are_removed_from_the_heap_without_access():
+    storage = InMemoryStorage(shards=4, expire_interval=0.02)
+    for i in range(50):
+        storage.setex(f"short:{i}", 0.05, "v")
+    storage.setex("refreshed", 0.05, "v")
+    storage.expire("refreshed", 60)
+    storage.append_with_ttl("list", 60, "item")
+    time.sleep(0.2)
+
+    stats = storage.stats()
+    assert stats["keys"] == 2 and stats["expirations"] == 50
+    assert storage.get("refreshed") == "v" and storage.get_list("list") == ["item"]
+    storage.shutdown()
+
+
+def test_concurrent_appends_across_shards():
+    storage = InMemoryStorage(shards=8)
+
+    def writer(n):
+        for i in range(200):
+            storage.append_with_ttl(f"thread:{n % 4}:turns", 60, f"{n}:{i}")
+
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert sum(storage.list_length(f"thread:{k}:turns") for k in range(4)) == 1600
+    storage.shutdown()
+
+
+async def test_status_reports_storage_stats():
+    out = json.loads((await StatusTool().execute({}))[0].text)
+    assert {"keys", "bytes", "evictions", "expirations"} <= set(out["storage"])
+
+
+def test_thread_header_and_turns_share_a_shard_and_are_evicted_together():
+    storage = InMemoryStorage(max_bytes=40_000, shards=4)
+    assert storage._shard("thread:a") is storage._shard("thread:a:turns")
+    for i in range(60):
+        storage.setex(f"thread:{i}", 60, "h" * 300)
+        storage.append_with_ttl(f"thread:{i}:turns", 60, "t" * 300)
+
+    assert storage.stats()["evictions"] > 0
+    for i in range(60):
+        # Either the whole thread is still there or none of it
+        assert (storage.get(f"thread:{i}") is None) == (storage.list_length(f"thread:{i}:turns") == 0)
+    assert storage.get("thread:59") and storage.get_list("thread:59:turns")
+    storage.shutdown()
+
+
+def test_memory_ceiling_counts_utf8_bytes():
+    storage = InMemoryStorage(max_bytes=10_000, shards=1)
+    storage.setex("wide", 60, "é" * 1000)  # 1000 characters, 2000 bytes
+    storage.append_with_ttl("turns", 60, "字" * 1000)  # 3000 bytes
+    assert storage.stats()["bytes"] >= 5000
+    for i in range(3):
+        storage.setex(f"wide:{i}", 60, "é" * 1000)
+    # 6,000 characters fit under the cap, but their 11,000 bytes do not
+    assert storage.stats()["bytes"] <= 10_000 and storage.stats()["evictions"] > 0
+    storage.shutdown()
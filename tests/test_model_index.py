@@ -0,0 +1,81 @@
+import pytest
+
+from src.providers.base import ProviderType
+from src.providers.glm import GLMModelProvider
+from src.providers.kimi import KimiModelProvider
+from src.providers.registry import ModelProviderRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    saved = ModelProviderRegistry._instance
+    ModelProviderRegistry._instance = None
+    monkeypatch.setenv("KIMI_API_KEY", "test-kimi")
+    monkeypatch.setenv("GLM_API_KEY", "test-glm")
+    ModelProviderRegistry.register_provider(ProviderType.KIMI, KimiModelProvider)
+    ModelProviderRegistry.register_provider(ProviderType.GLM, GLMModelProvider)
+    yield ModelProviderRegistry
+    ModelProviderRegistry._instance = saved
+
+
+def test_index_maps_models_and_is_reused(registry):
+    index = registry.get_model_index()
+    assert index["kimi-k2-0711-preview"] == ProviderType.KIMI
+    assert index["glm-4.5"] == ProviderType.GLM
+    assert registry.get_model_index() is index
+    assert registry.get_provider_type_for_model("glm-4.5") == ProviderType.GLM
+    assert registry.get_provider_for_model("kimi-k2-0711-preview").get_provider_type() == ProviderType.KIMI
+
+
+def test_index_matches_available_models(registry):
+    index = registry.get_model_index()
+    for name, ptype in registry.get_available_models(respect_restrictions=True).items():
+        assert index[name] == ptype
+
+
+def test_register_provider_invalidates(registry):
+    index = registry.get_model_index()
+    registry.register_provider(ProviderType.GLM, GLMModelProvider)
+    assert registry.get_model_index() is not index
+
+
+def test_allowed_providers_change_rebuilds(registry, monkeypatch):
+    index = registry.get_model_index()
+    monkeypatch.setenv("ALLOWED_PROVIDERS", "KIMI")
+    rebuilt = registry.get_model_index()
+    assert rebuilt is not index
+    assert set(rebuilt.values()) == {ProviderType.KIMI}
+
+
+def test_restriction_service_reset_rebuilds(registry, monkeypatch):
+    import utils.model_restrictions as mr
+
+    index = registry.get_model_index()
+    monkeypatch.setenv("GLM_ALLOWED_MODELS", "glm-4.5")
+    monkeypatch.setattr(mr, "_restriction_service", None)
+    rebuilt = registry.get_model_index()
+    assert rebuilt is not index
+    assert [m for m, p in rebuilt.items() if p == ProviderType.GLM] == ["glm-4.5"]
+
+
+def test_unknown_model_is_not_indexed(registry):
+    assert registry.get_provider_type_for_model("definitely-not-a-model") is None
+    assert "definitely-not-a-model" not in registry.get_model_index()
+
+
+def test_resolved_aliases_leave_index_and_schema_fingerprint_alone(registry, monkeypatch):
+    from tools.schema_cache import schema_fingerprint
+
+    index = registry.get_model_index()
+    before = dict(index)
+    fp = schema_fingerprint({})
+    assert "GLM-4.5-FLASH" not in index
+    assert registry.get_provider_for_model("GLM-4.5-FLASH").get_provider_type() == ProviderType.GLM
+    assert registry.get_model_index() == before
+    assert schema_fingerprint({}) == fp
+    assert registry.get_provider_type_for_model("GLM-4.5-FLASH") == ProviderType.GLM
+
+    monkeypatch.setattr(registry, "_RESOLVED_MODELS_MAX", 2)
+    for name in ("GLM-4.5", "KIMI-K2-0711-PREVIEW", "GLM-4.5-AIR"):
+        assert registry.get_provider_for_model(name) is not None
+    assert list(registry()._resolved_models) == ["KIMI-K2-0711-PREVIEW", "GLM-4.5-AIR"]
@@ -0,0 +1,73 @@
+import dataclasses
+import time
+
+import pytest
+
+from utils import runtime_config
+from utils.runtime_config import EnvFileWatcher, RuntimeConfig, get_config, on_config_change, reload_config
+
+
+@pytest.fixture
+def clean_config(monkeypatch):
+    # setenv records the original value (or its absence), so whatever load_dotenv writes is undone
+    for key in ("EX_TOOL_TIMEOUT_SECONDS", "GLM_FLASH_MODEL", "EXAI_TEST_UNRELATED"):
+        monkeypatch.setenv(key, "")
+        monkeypatch.delenv(key)
+    monkeypatch.setattr(runtime_config, "_hooks", [])
+    monkeypatch.setattr(runtime_config, "_current", None)
+
+
+def test_snapshot_parses_and_is_immutable():
+    cfg = RuntimeConfig.from_env(
+        {"EX_TOOL_TIMEOUT_SECONDS": "7.5", "MAX_CONSENSUS_MODELS": "oops", "CLAUDE_MAX_WORKFLOW_STEPS": "2"}
+    )
+    assert cfg.tool_timeout_s == 7.5
+    assert cfg.max_consensus_models == 3  # Unparseable values fall back to the default
+    assert cfg.client_max_workflow_steps == 2  # Legacy variable still honoured
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.tool_timeout_s = 1.0  # type: ignore[misc]
+
+
+def test_reload_swaps_snapshot_and_notifies_hooks(clean_config, tmp_path):
+    first = get_config()
+    assert get_config() is first
+    seen = []
+    on_config_change(lambda old, new, changed: seen.append((old, new, changed)))
+
+    env_file = tmp_path / ".env"
+    env_file.write_text("EX_TOOL_TIMEOUT_SECONDS=12\nGLM_FLASH_MODEL=glm-test\n")
+    assert reload_config(str(env_file))
+    current = get_config()
+    assert current is not first and current.version == first.version + 1
+    assert (current.tool_timeout_s, current.glm_flash_model) == (12.0, "glm-test")
+    assert first.tool_timeout_s == 120.0, "readers holding the old snapshot keep a consistent view"
+    (old, new, changed), = seen
+    assert old is first and new is current
+    assert changed == {"EX_TOOL_TIMEOUT_SECONDS", "GLM_FLASH_MODEL"}
+
+    # Unchanged file: no hooks, same snapshot
+    assert not reload_config(str(env_file))
+    assert len(seen) == 1 and get_config() is current
+
+    # Variables outside the snapshot still notify hooks but keep the version
+    env_file.write_text(env_file.read_text() + "EXAI_TEST_UNRELATED=1\n")
+    assert reload_config(str(env_file))
+    assert seen[-1][2] == {"EXAI_TEST_UNRELATED"} and get_config() is current
+
+
+def test_watcher_reloads_only_when_file_changes(clean_config, tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("EX_TOOL_TIMEOUT_SECONDS=5\n")
+    watcher = EnvFileWatcher(str(env_file), interval_s=0.05)
+    assert not watcher.check()
+
+    env_file.write_text("EX_TOOL_TIMEOUT_SECONDS=15\n")
+    watcher.start()
+    try:
+        deadline = time.time() + 5
+        while get_config().tool_timeout_s != 15.0 and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        watcher.stop()
+    assert get_config().tool_timeout_s == 15.0
+    assert watcher.reloads == 1
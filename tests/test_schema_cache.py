@@ -0,0 +1,64 @@
+
+import pytest
+
+from tools.schema_cache import SchemaCache
+
+ws_server = pytest.importorskip("src.daemon.ws_server")
+
+
+class _CountingTool:
+    name = "counting"
+    description = "Counts schema builds"
+
+    def __init__(self):
+        self.schema_calls = 0
+
+    def get_input_schema(self):
+        self.schema_calls += 1
+        return {"type": "object"}
+
+
+def test_cache_rebuilds_only_when_inputs_change(monkeypatch):
+    cache = SchemaCache()
+    tools = {"counting": _CountingTool()}
+    builds = []
+
+    def build(version):
+        builds.append(version)
+        return [t.get_input_schema() for t in tools.values()]
+
+    monkeypatch.setenv("DEFAULT_MODEL", "glm-4.5-flash")
+    first = cache.get(tools, "profile-a", build)
+    assert cache.get(tools, "profile-a", build) is first
+    assert len(builds) == 1
+
+    # Client profile and provider configuration are both part of the key
+    other = cache.get(tools, "profile-b", build)
+    assert other.version != first.version
+    monkeypatch.setenv("DEFAULT_MODEL", "kimi-k2-0711-preview")
+    changed = cache.get(tools, "profile-a", build)
+    assert changed.version != first.version
+    assert len(builds) == 3
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_is_bounded():
+    cache = SchemaCache(max_entries=2)
+    for profile in range(4):
+        cache.get({}, profile, lambda version: version)
+    assert cache.stats()["entries"] == 2
+
+
+async def test_ws_list_tools_is_versioned(monkeypatch, fake_ws):
+    tool = _CountingTool()
+    monkeypatch.setattr(ws_server, "SERVER_TOOLS", {"counting": tool})
+    ws = fake_ws()
+    await ws_server._handle_message(ws, "s1", {"op": "list_tools"})
+    await ws_server._handle_message(ws, "s2", {"op": "list_tools"})
+    first, second = ws.sent
+    assert first == second
+    assert first["tools"] == [{"name": "counting", "description": "Counts schema builds", "inputSchema": {"type": "object"}}]
+    assert tool.schema_calls == 1
+
+    await ws_server._handle_message(ws, "s3", {"op": "list_tools", "version": first["version"]})
+    assert ws.sent[-1] == {"op": "list_tools_res", "version": first["version"], "not_modified": True}
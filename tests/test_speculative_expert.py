@@ -0,0 +1,163 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from tools.codereview import CodeReviewTool
+from tools.workflow.speculation import get_speculation_slots
+from utils import runtime_config
+from utils.cancellation import CancelToken, current_cancel_token, reset_cancel_scope, start_cancel_scope
+from utils.runtime_config import RuntimeConfig
+
+
+class _Expert:
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.seen = []
+        self.tokens = []
+        self.cancelled = 0
+
+    async def __call__(self, tool, arguments, request):
+        self.seen.append(list(tool.consolidated_findings.findings))
+        self.tokens.append(current_cancel_token())
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"status": "analysis_complete", "steps_seen": len(self.seen[-1])}
+
+
+@pytest.fixture
+def speculative(monkeypatch):
+    monkeypatch.setattr(runtime_config, "_current", RuntimeConfig(speculative_expert=True))
+
+
+def _step(n, total, confidence, continuation_id=None, **extra):
+    args = {
+        "step": f"review step {n}",
+        "step_number": n,
+        "total_steps": total,
+        "next_step_required": n < total,
+        "findings": f"finding {n}",
+        "relevant_files": [__file__],
+        "confidence": confidence,
+        "model": "glm-4.5-flash",
+        **extra,
+    }
+    if continuation_id:
+        args["continuation_id"] = continuation_id
+    return args
+
+
+async def _run(tool, steps):
+    continuation_id = None
+    for args in steps:
+        if continuation_id:
+            args["continuation_id"] = continuation_id
+        data = json.loads((await tool.execute(args))[0].text)
+        continuation_id = data.get("continuation_id") or continuation_id
+        await asyncio.sleep(0.05)  # the client thinking between steps
+    return data
+
+
+async def test_confident_step_starts_expert_early_and_final_step_reuses_it(speculative):
+    tool = CodeReviewTool()
+    expert = _Expert()
+    with patch.object(CodeReviewTool, "_call_expert_analysis", lambda self, a, r: expert(self, a, r)):
+        # The final step confirms the findings of step 2 without adding any
+        final = _step(3, 3, "very_high", findings="finding 2")
+        data = await _run(tool, [_step(1, 3, "medium"), _step(2, 3, "high"), final])
+
+    assert len(expert.seen) == 1, "the final step must not call the expert again"
+    assert expert.seen[0] == ["Step 1: finding 1", "Step 2: finding 2"]
+    assert data["expert_analysis"] == {"status": "analysis_complete", "steps_seen": 2}
+    assert data["metadata"]["expert_speculation"]["outcome"] == "reused"
+    assert data["metadata"]["expert_speculation"]["head_start_s"] > 0
+    assert len(tool._speculations) == 0
+
+
+async def test_changed_findings_cancel_the_speculative_call(speculative):
+    tool = CodeReviewTool()
+    expert = _Expert(delay=5.0)
+    issue = {"severity": "high", "description": "SQL built from user input"}
+    with patch.object(CodeReviewTool, "_call_expert_analysis", lambda self, a, r: expert(self, a, r)):
+        first = json.loads((await tool.execute(_step(1, 2, "high")))[0].text)
+        await asyncio.sleep(0.05)
+        expert.delay = 0.01  # Only the speculative call is slow
+        final = _step(2, 2, "very_high", first["continuation_id"], issues_found=[issue])
+        data = json.loads((await tool.execute(final))[0].text)
+
+    assert len(expert.seen) == 2
+    assert expert.cancelled == 1 and expert.tokens[0].cancelled
+    assert data["metadata"]["expert_speculation"]["outcome"] == "discarded"
+    assert data["expert_analysis"]["steps_seen"] == 2
+
+
+async def test_new_findings_in_the_final_step_reach_the_expert(speculative):
+    tool = CodeReviewTool()
+    expert = _Expert(delay=0.01)
+    with patch.object(CodeReviewTool, "_call_expert_analysis", lambda self, a, r: expert(self, a, r)):
+        data = await _run(tool, [_step(1, 2, "high"), _step(2, 2, "very_high")])
+
+    assert expert.seen[-1] == ["Step 1: finding 1", "Step 2: finding 2"]
+    assert data["metadata"]["expert_speculation"]["outcome"] == "discarded"
+
+
+async def test_speculation_is_opt_in(monkeypatch):
+    monkeypatch.setattr(runtime_config, "_current", RuntimeConfig())
+    tool = CodeReviewTool()
+    expert = _Expert(delay=0.01)
+    with patch.object(CodeReviewTool, "_call_expert_analysis", lambda self, a, r: expert(self, a, r)):
+        data = await _run(tool, [_step(1, 2, "almost_certain"), _step(2, 2, "almost_certain")])
+
+    assert len(expert.seen) == 1 and expert.seen[0][-1] == "Step 2: finding 2"
+    assert "expert_speculation" not in data.get("metadata", {})
+
+
+async def test_speculative_calls_are_capped_per_provider(monkeypatch):
+    monkeypatch.setattr(
+        runtime_config, "_current", RuntimeConfig(speculative_expert=True, speculative_expert_max_inflight=1)
+    )
+    tool = CodeReviewTool()
+    expert = _Expert(delay=5.0)
+    with patch.object(CodeReviewTool, "_call_expert_analysis", lambda self, a, r: expert(self, a, r)):
+        first = json.loads((await tool.execute(_step(1, 2, "high")))[0].text)
+        second = json.loads((await tool.execute(_step(1, 2, "high")))[0].text)
+        await asyncio.sleep(0.05)
+        assert len(expert.seen) == 1, "the second conversation must not speculate past the cap"
+        assert sum(get_speculation_slots().snapshot().values()) == 1
+
+        tool._speculations.discard(first["continuation_id"], "test")
+        assert get_speculation_slots().snapshot() == {}
+    assert tool._speculations.get(second["continuation_id"]) is None
+
+
+async def test_cancelling_the_step_cancels_its_speculative_call(speculative):
+    tool = CodeReviewTool()
+    expert = _Expert(delay=5.0)
+    token = CancelToken()
+    scope = start_cancel_scope(token)
+    try:
+        with patch.object(CodeReviewTool, "_call_expert_analysis", lambda self, a, r: expert(self, a, r)):
+            first = json.loads((await tool.execute(_step(1, 2, "high")))[0].text)
+            await asyncio.sleep(0.05)
+            token.cancel("cancelled by client")
+            await asyncio.sleep(0.05)
+    finally:
+        reset_cancel_scope(scope)
+
+    assert expert.cancelled == 1
+    assert tool._speculations.get(first["continuation_id"]) is None
+    assert get_speculation_slots().snapshot() == {}
+
+
+def test_hypotheses_mirroring_findings_are_not_fingerprinted():
+    from types import SimpleNamespace
+
+    from tools.debug import DebugIssueTool
+
+    request = SimpleNamespace(model="glm-4.5-flash")
+    assert "hypotheses" not in CodeReviewTool().get_expert_fingerprint_parts(request)
+    assert "hypotheses" in DebugIssueTool().get_expert_fingerprint_parts(request)
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils import conversation_memory
+from utils.conversation_memory import add_turn, create_thread, get_thread, get_thread_chain
+from utils.storage_backend import SQLiteStorage
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "conversations.sqlite3")
+
+
+def test_values_lists_and_ttl_are_shared_through_the_file(db):
+    writer, reader = SQLiteStorage(db), SQLiteStorage(db)
+    writer.setex("k", 60, "v")
+    assert reader.get("k") == "v" and reader.get_many(["k", "missing"]) == ["v", None]
+
+    assert [writer.append_with_ttl("l", 60, f"item {i}") for i in range(3)] == [1, 2, 3]
+    assert reader.get_list("l") == ["item 0", "item 1", "item 2"]
+    assert reader.get_lists(["l", "missing"], [2, 0]) == [["item 2"], []]
+    assert reader.list_length("l") == 3 and reader.get("l") is None
+
+    writer.setex("short", 0.05, "gone soon")
+    writer.append_with_ttl("short-list", 0.05, "x")
+    time.sleep(0.1)
+    assert reader.get("short") is None and reader.list_length("short-list") == 0
+    reader._cleanup_expired()
+    conn = reader._conn()
+    assert conn.execute("SELECT COUNT(*) FROM kv WHERE key LIKE 'short%'").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM list_items WHERE key='short-list'").fetchone()[0] == 0
+    for storage in (writer, reader):
+        storage.shutdown()
+
+
+def test_concurrent_appends_from_several_processes(db):
+    script = textwrap.dedent(
+        f"""
+        import sys
+        from utils.storage_backend import SQLiteStorage
+        storage = SQLiteStorage({db!r})
+        for i in range(40):
+            storage.append_with_ttl("turns", 600, f"{{sys.argv[1]}}:{{i}}")
+        """
+    )
+    SQLiteStorage(db).shutdown()  # Create the schema before the writers race
+    procs = [subprocess.Popen([sys.executable, "-c", script, str(n)], cwd=PROJECT_ROOT) for n in range(4)]
+    assert all(p.wait(timeout=60) == 0 for p in procs)
+
+    items = SQLiteStorage(db).get_list("turns")
+    assert len(items) == 160 and len(set(items)) == 160
+    for n in range(4):
+        mine = [item for item in items if item.startswith(f"{n}:")]
+        assert mine == [f"{n}:{i}" for i in range(40)]
+
+
+def test_conversations_survive_a_restart(db):
+    first = SQLiteStorage(db)
+    with patch.object(conversation_memory, "get_storage", return_value=first):
+        parent = create_thread("chat", {"prompt": "parent"})
+        add_turn(parent, "user", "question")
+        child = create_thread("chat", {"prompt": "child"}, parent_thread_id=parent)
+        add_turn(child, "assistant", "answer")
+    first.shutdown()
+
+    conversation_memory._thread_cache.clear()
+    restarted = SQLiteStorage(db)
+    with patch.object(conversation_memory, "get_storage", return_value=restarted):
+        assert [t.content for t in get_thread(child).turns] == ["answer"]
+        assert [c.turns[0].content for c in get_thread_chain(child)] == ["question", "answer"]
+    restarted.shutdown()
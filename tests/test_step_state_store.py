@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+from tools.codereview import CodeReviewTool
+from tools.shared.step_state_store import StepStateStore, apply, diff
+from utils.conversation_memory import get_storage
+
+
+def test_delta_roundtrip():
+    old = {"history": [1, 2, 3], "files": ["a.py", "b.py"], "config": {"x": 1, "gone": 2}, "name": "n"}
+    cases = [
+        {"history": [1, 2, 3, 4], "files": ["a.py", "b.py"], "config": {"x": 1, "gone": 2}, "name": "n"},
+        {"history": [1, 9], "files": ["a.py", "b.py", "c.py"], "config": {"x": 2, "new": [1]}, "name": None},
+    ]
+    for new in cases:
+        assert apply(old, diff(old, new)) == new
+    assert diff(old, old) is None
+    # Only what changed is stored: an appended step, not the whole history
+    assert diff(old, cases[0]) == {"d": {"history": {"a": [4]}}}
+
+
+async def _observing_expert(self, arguments, request):
+    return {"status": "analysis_complete", "findings": list(self.consolidated_findings.findings)}
+
+
+def _args(step, continuation_id=None):
+    args = {
+        "step": f"review step {step}",
+        "step_number": step,
+        "total_steps": 3,
+        "next_step_required": step < 3,
+        "findings": f"finding {step}",
+        "relevant_files": [__file__],
+        "issues_found": [{"severity": "low", "description": f"issue {step}"}],
+        "model": "glm-4.5-flash",
+    }
+    if continuation_id:
+        args["continuation_id"] = continuation_id
+    return args
+
+
+async def test_steps_resume_on_another_instance_from_storage():
+    # Separate instances stand in for separate worker processes (no shared in-process cache)
+    worker_a, worker_b = CodeReviewTool(), CodeReviewTool()
+    with patch.object(CodeReviewTool, "_call_expert_analysis", _observing_expert):
+        first = json.loads((await worker_a.execute(_args(1)))[0].text)
+        cid = first["continuation_id"]
+        await worker_b.execute(_args(2, cid))
+        final = json.loads((await worker_a.execute(_args(3, cid)))[0].text)
+        restarted = CodeReviewTool()
+        assert restarted._step_store.load(cid)["consolidated_findings"].findings[-1] == "Step 3: finding 3"
+
+    assert final["expert_analysis"]["findings"] == ["Step 1: finding 1", "Step 2: finding 2", "Step 3: finding 3"]
+    assert final["complete_code_review"]["steps_taken"] == 3
+    assert len(final["complete_code_review"]["issues_found"]) == 3
+
+    storage = get_storage()
+    head = json.loads(storage.get(f"workflow_state:codereview:{cid}"))
+    assert (head["seq"], head["snap"]) == (3, 1)
+    snapshot = storage.get(f"workflow_state:codereview:{cid}:snap")
+    delta = storage.get(f"workflow_state:codereview:{cid}:d:3")
+    assert "finding 3" in delta and "finding 2" not in delta
+    assert len(delta) < len(snapshot) * 2
+
+
+async def test_interleaved_conversations_across_instances():
+    workers = [CodeReviewTool(), CodeReviewTool()]
+
+    async def conversation(n):
+        cid = None
+        for step in (1, 2, 3):
+            args = _args(step, cid)
+            args["findings"] = f"conv{n} finding {step}"
+            data = json.loads((await workers[(n + step) % 2].execute(args))[0].text)
+            cid = cid or data["continuation_id"]
+            await asyncio.sleep(0)
+        return data
+
+    with patch.object(CodeReviewTool, "_call_expert_analysis", _observing_expert):
+        results = await asyncio.gather(*(conversation(n) for n in range(6)))
+    for n, data in enumerate(results):
+        assert data["expert_analysis"]["findings"] == [f"Step {s}: conv{n} finding {s}" for s in (1, 2, 3)]
+
+
+async def test_state_is_loaded_and_saved_off_the_event_loop():
+    loop_thread = threading.current_thread()
+    threads = []
+    original_load, original_save = StepStateStore.load, StepStateStore.save
+
+    def load(self, *args):
+        threads.append(("load", threading.current_thread()))
+        return original_load(self, *args)
+
+    def save(self, *args):
+        threads.append(("save", threading.current_thread()))
+        return original_save(self, *args)
+
+    tool = CodeReviewTool()
+    with patch.object(CodeReviewTool, "_call_expert_analysis", _observing_expert), patch.object(
+        StepStateStore, "load", load
+    ), patch.object(StepStateStore, "save", save):
+        cid = json.loads((await tool.execute(_args(1)))[0].text)["continuation_id"]
+        await tool.execute(_args(2, cid))
+
+    assert [op for op, _ in threads] == ["save", "load", "save"]
+    # The save finished before execute() returned: another instance sees step 2
+    assert CodeReviewTool()._step_store.load(cid)["consolidated_findings"].findings[-1] == "Step 2: finding 2"
+    assert all(thread is not loop_thread for _, thread in threads)
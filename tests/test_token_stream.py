@@ -0,0 +1,123 @@
+import asyncio
+
+from src.providers.kimi import KimiModelProvider
+from utils.token_stream import (
+    TokenStream,
+    emit_token,
+    get_token_stream,
+    reset_token_stream,
+    start_token_stream,
+)
+
+
+def test_emit_without_stream_is_noop():
+    assert get_token_stream() is None
+    assert emit_token("hello") is False
+
+
+async def test_pump_forwards_deltas_from_worker_thread_in_order():
+    stream = TokenStream()
+    frames = []
+
+    async def send(text):
+        frames.append(text)
+        return True
+
+    pump = asyncio.create_task(stream.pump(send))
+
+    def produce():
+        for piece in ("a", "b", "c"):
+            stream.emit(piece)
+
+    await asyncio.to_thread(produce)
+    stream.set_usage({"output_tokens": 3})
+    stream.close()
+    await asyncio.wait_for(pump, 1.0)
+    assert "".join(frames) == "abc"
+    assert stream.usage == {"output_tokens": 3}
+    assert stream.ttft_s is not None
+
+
+async def test_slow_sender_coalesces_instead_of_queueing():
+    stream = TokenStream()
+    frames = []
+    gate = asyncio.Event()
+
+    async def send(text):
+        frames.append(text)
+        if len(frames) == 1:
+            await gate.wait()
+        return True
+
+    pump = asyncio.create_task(stream.pump(send))
+    stream.emit("first")
+    await asyncio.sleep(0)
+    for i in range(50):
+        stream.emit(str(i % 10))
+    gate.set()
+    stream.close()
+    await asyncio.wait_for(pump, 1.0)
+    assert frames[0] == "first"
+    assert len(frames) <= 3
+    assert "".join(frames[1:]) == "".join(str(i % 10) for i in range(50))
+
+
+async def test_failed_send_stops_forwarding():
+    stream = TokenStream()
+    calls = []
+
+    async def send(text):
+        calls.append(text)
+        return False
+
+    pump = asyncio.create_task(stream.pump(send))
+    stream.emit("x")
+    await asyncio.sleep(0.01)
+    stream.emit("y")
+    stream.close()
+    await asyncio.wait_for(pump, 1.0)
+    assert calls == ["x"]
+
+
+async def test_context_reaches_provider_thread_and_provider_streams():
+    prov = KimiModelProvider(api_key="test-key")
+    seen = {}
+
+    class Event:
+        def __init__(self, text, usage=None):
+            self.choices = [type("Choice", (), {"delta": type("Delta", (), {"content": text})(), "message": None})()]
+            self.model = "kimi-k2-0711-preview"
+            self.id = "id"
+            self.created = 1
+            self.usage = usage
+
+    class DummyClient:
+        class chat:
+            class completions:
+                @staticmethod
+                def create(**kwargs):
+                    seen["stream"] = kwargs.get("stream")
+                    usage = type("U", (), {"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6})()
+                    return iter([Event("he"), Event("llo", usage=usage)])
+
+    prov._client = DummyClient()
+    stream = TokenStream()
+    frames = []
+
+    async def send(text):
+        frames.append(text)
+        return True
+
+    pump = asyncio.create_task(stream.pump(send))
+    token = start_token_stream(stream)
+    try:
+        resp = await asyncio.to_thread(prov.generate_content, prompt="hi", model_name="kimi-k2-0711-preview")
+    finally:
+        reset_token_stream(token)
+    stream.close()
+    await asyncio.wait_for(pump, 1.0)
+
+    assert seen["stream"] is True
+    assert resp.content == "hello"
+    assert "".join(frames) == "hello"
+    assert stream.usage == {"input_tokens": 4, "output_tokens": 2, "total_tokens": 6}
@@ -192,9 +192,10 @@ class TestWorkflowFileEmbedding:
             max_tokens=100000,
             reserve_tokens=1000,
             include_line_numbers=True,
+            expand=False,
         )
 
-        # Verify it expanded paths to get individual files
+        # Verify it expanded paths once, before reading
         mock_expand_paths.assert_called_once_with(self.test_files)
 
         # Verify return values
@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+from src.daemon.admission import AdmissionController, QueueFullError
+
+
+def _controller(**kw):
+    params = {"global_limit": 1, "provider_limits": {"KIMI": 1}, "session_limit": 4, "max_queue": 8, "max_wait_s": 5.0}
+    params.update(kw)
+    return AdmissionController(**params)
+
+
+async def test_fast_path_admits_without_queueing():
+    ctl = _controller()
+    ticket = await ctl.acquire("KIMI", "s1")
+    assert ticket.granted_at is not None
+    assert ctl.snapshot()["global_inflight"] == 1
+    ctl.release(ticket)
+    assert ctl.snapshot()["global_inflight"] == 0
+    assert ctl.queued_total == 0
+
+
+async def test_waiter_is_admitted_when_slot_frees():
+    ctl = _controller()
+    first = await ctl.acquire("KIMI", "s1")
+    positions = []
+
+    async def on_wait(pos):
+        positions.append(pos)
+
+    waiter = asyncio.create_task(ctl.acquire("KIMI", "s2", on_wait=on_wait, progress_interval=0.05))
+    await asyncio.sleep(0.02)
+    assert not waiter.done()
+    assert positions and positions[0] == 1
+    ctl.release(first)
+    second = await asyncio.wait_for(waiter, 1.0)
+    assert second.session_id == "s2"
+    ctl.release(second)
+
+
+async def test_fair_order_across_sessions():
+    ctl = _controller()
+    blocker = await ctl.acquire("KIMI", "s0")
+    order = []
+
+    async def run(sid):
+        t = await ctl.acquire("KIMI", sid)
+        order.append(sid)
+        await asyncio.sleep(0)
+        ctl.release(t)
+
+    # Session A floods the queue before B arrives; B must not wait behind all of A's calls
+    tasks = [asyncio.create_task(run("A")) for _ in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(run("B")))
+    await asyncio.sleep(0)
+    ctl.release(blocker)
+    await asyncio.wait_for(asyncio.gather(*tasks), 1.0)
+    assert order.index("B") <= 1
+
+
+async def test_queue_full_raises():
+    ctl = _controller(max_queue=1)
+    held = await ctl.acquire("KIMI", "s1")
+    waiter = asyncio.create_task(ctl.acquire("KIMI", "s2"))
+    await asyncio.sleep(0)
+    with pytest.raises(QueueFullError):
+        await ctl.acquire("KIMI", "s3")
+    assert ctl.rejected == 1
+    ctl.release(held)
+    ctl.release(await waiter)
+
+
+async def test_max_wait_times_out_and_frees_queue_slot():
+    ctl = _controller(max_wait_s=0.05)
+    held = await ctl.acquire("KIMI", "s1")
+    with pytest.raises(asyncio.TimeoutError):
+        await ctl.acquire("KIMI", "s2", progress_interval=0.01)
+    assert ctl.snapshot()["providers"]["KIMI"]["queued"] == 0
+    assert ctl.timed_out == 1
+    ctl.release(held)
+
+
+async def test_cancelled_waiter_leaves_queue():
+    ctl = _controller()
+    held = await ctl.acquire("KIMI", "s1")
+    waiter = asyncio.create_task(ctl.acquire("KIMI", "s2"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    ctl.release(held)
+    snap = ctl.snapshot()
+    assert snap["providers"]["KIMI"]["queued"] == 0
+    assert snap["global_inflight"] == 0
+
+
+async def test_provider_limit_does_not_block_other_providers():
+    ctl = _controller(global_limit=2)
+    kimi = await ctl.acquire("KIMI", "s1")
+    other = await asyncio.wait_for(ctl.acquire("", "s1"), 0.5)
+    assert other.provider == "DEFAULT"
+    ctl.release(kimi)
+    ctl.release(other)
+
+
+async def test_higher_lane_preempts_queue_order():
+    ctl = _controller()
+    blocker = await ctl.acquire("KIMI", "s0")
+    order = []
+
+    async def run(sid, lane):
+        t = await ctl.acquire("KIMI", sid, lane=lane)
+        order.append(lane)
+        await asyncio.sleep(0)
+        ctl.release(t)
+
+    tasks = [asyncio.create_task(run("A", "batch")), asyncio.create_task(run("B", "background"))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(run("C", "interactive")))
+    await asyncio.sleep(0)
+    ctl.release(blocker)
+    await asyncio.wait_for(asyncio.gather(*tasks), 1.0)
+    assert order == ["interactive", "background", "batch"]
+
+
+async def test_reserved_slots_stay_free_for_interactive_calls():
+    ctl = _controller(global_limit=3, provider_limits={"KIMI": 3}, lane_reserved={"interactive": 1})
+    bg = [await ctl.acquire("KIMI", "bg", lane="background") for _ in range(2)]
+    blocked = asyncio.create_task(ctl.acquire("KIMI", "bg", lane="background"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    quick = await asyncio.wait_for(ctl.acquire("KIMI", "ui", lane="interactive"), 0.5)
+    lanes = ctl.snapshot()["lanes"]
+    assert lanes["interactive"]["inflight"] == 1 and lanes["background"]["queued"] == 1
+    ctl.release(quick)
+    ctl.release(bg[0])
+    ctl.release(await asyncio.wait_for(blocked, 1.0))
+    ctl.release(bg[1])
+
+
+async def test_lane_cap_and_provider_last_slot():
+    ctl = _controller(global_limit=4, provider_limits={"KIMI": 1}, lane_reserved={"interactive": 2},
+                      lane_limits={"batch": 1})
+    # A provider's last slot is never reserved, so lower lanes are not starved outright
+    t1 = await asyncio.wait_for(ctl.acquire("KIMI", "s1", lane="batch"), 0.5)
+    t2 = await asyncio.wait_for(ctl.acquire("GLM", "s1", lane="background"), 0.5)
+    capped = asyncio.create_task(ctl.acquire("GLM", "s2", lane="batch"))
+    await asyncio.sleep(0.01)
+    assert not capped.done()
+    ctl.release(t1)
+    t3 = await asyncio.wait_for(capped, 1.0)
+    for t in (t2, t3):
+        ctl.release(t)
+    assert ctl.snapshot()["global_inflight"] == 0
+
+
+def test_call_lane_resolution(monkeypatch):
+    ws_server = pytest.importorskip("src.daemon.ws_server")
+    monkeypatch.setattr(ws_server, "TOOL_PRIORITIES", {"chat": "batch"})
+    assert ws_server._call_lane("chat", object(), None) == "batch"
+    assert ws_server._call_lane("chat", object(), "Interactive") == "interactive"
+    assert ws_server._call_lane("thinkdeep", ws_server.SERVER_TOOLS["thinkdeep"], None) == "background"
+    assert ws_server._call_lane("version", ws_server.SERVER_TOOLS["version"], "urgent") == "interactive"
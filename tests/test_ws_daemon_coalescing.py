@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+ws_server = pytest.importorskip("src.daemon.ws_server")
+
+
+@pytest.fixture
+def slow_tool(monkeypatch):
+    calls = []
+
+    async def fake_handle_call_tool(name, arguments):
+        calls.append(arguments)
+        await asyncio.sleep(0.2)
+        return [{"type": "text", "text": "done"}]
+
+    monkeypatch.setattr(ws_server, "SERVER_HANDLE_CALL_TOOL", fake_handle_call_tool)
+    monkeypatch.setattr(ws_server, "_ensure_providers_configured", lambda: None)
+    monkeypatch.setattr(ws_server, "PROGRESS_INTERVAL", 0.05)
+    monkeypatch.setenv("EXAI_WS_DISABLE_COALESCE_FOR_TOOLS", "")
+    ws_server._results_cache.clear()
+    ws_server._results_cache_by_key.clear()
+    return calls
+
+
+async def test_duplicate_calls_share_one_execution(slow_tool, fake_ws):
+    leader, follower = fake_ws(), fake_ws()
+    args = {"prompt": "coalesce-me", "model": "coalesce-test-model"}
+    msg = {"op": "call_tool", "name": "version", "arguments": args}
+
+    first = asyncio.create_task(ws_server._handle_message(leader, "sess-a", dict(msg, request_id="req-1")))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(ws_server._handle_message(follower, "sess-b", dict(msg, request_id="req-2")))
+    await asyncio.wait_for(asyncio.gather(first, second), 5.0)
+
+    assert len(slow_tool) == 1
+    assert leader.final("req-1")["outputs"] == [{"type": "text", "text": "done"}]
+    assert follower.final("req-2")["outputs"] == [{"type": "text", "text": "done"}]
+    ack = [m for m in follower.sent if m.get("op") == "call_tool_ack"][0]
+    assert ack["coalesced"] is True and ack["original_request_id"] == "req-1"
+    # The follower gets its own heartbeats while attached
+    assert any(m.get("op") == "progress" and m.get("request_id") == "req-2" for m in follower.sent)
+    assert not ws_server._inflight_by_key
+
+
+async def test_follower_receives_leader_error(slow_tool, monkeypatch, fake_ws):
+    async def failing(name, arguments):
+        await asyncio.sleep(0.1)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(ws_server, "SERVER_HANDLE_CALL_TOOL", failing)
+    leader, follower = fake_ws(), fake_ws()
+    msg = {"op": "call_tool", "name": "version", "arguments": {"prompt": "fail-me", "model": "coalesce-test-model"}}
+
+    first = asyncio.create_task(ws_server._handle_message(leader, "sess-a", dict(msg, request_id="req-3")))
+    await asyncio.sleep(0.02)
+    second = asyncio.create_task(ws_server._handle_message(follower, "sess-b", dict(msg, request_id="req-4")))
+    await asyncio.wait_for(asyncio.gather(first, second), 5.0)
+
+    err = follower.final("req-4")["error"]
+    assert err["code"] == "EXEC_ERROR" and err["original_request_id"] == "req-3"
+    assert not ws_server._inflight_by_key
+
+
+async def test_cancelling_the_leader_keeps_the_call_for_followers(slow_tool, fake_ws):
+    leader, follower, late = fake_ws(), fake_ws(), fake_ws()
+    msg = {"op": "call_tool", "name": "version", "arguments": {"prompt": "shared", "model": "coalesce-test-model"}}
+
+    first = asyncio.create_task(ws_server._handle_message(leader, "sess-a", dict(msg, request_id="req-5")))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(ws_server._handle_message(follower, "sess-b", dict(msg, request_id="req-6")))
+    await asyncio.sleep(0.02)
+    await ws_server._handle_message(leader, "sess-a", {"op": "cancel_tool", "request_id": "req-5"})
+    await asyncio.wait_for(asyncio.gather(first, second), 5.0)
+
+    assert len(slow_tool) == 1
+    assert follower.final("req-6")["outputs"] == [{"type": "text", "text": "done"}]
+    # The cancelling client gets one CANCELLED result and nothing from the call afterwards
+    results = [m for m in leader.sent if m.get("op") == "call_tool_res"]
+    assert [r["error"]["code"] for r in results] == ["CANCELLED"]
+    assert leader.sent[-1] == {"op": "cancel_tool_res", "request_id": "req-5", "ok": True}
+
+    # Once the last follower leaves too, the shared call is cancelled
+    ws_server._results_cache_by_key.clear()
+    msg["arguments"] = {"prompt": "abandoned", "model": "coalesce-test-model"}
+    first = asyncio.create_task(ws_server._handle_message(leader, "sess-a", dict(msg, request_id="req-7")))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(ws_server._handle_message(late, "sess-c", dict(msg, request_id="req-8")))
+    await asyncio.sleep(0.02)
+    await ws_server._handle_message(leader, "sess-a", {"op": "cancel_tool", "request_id": "req-7"})
+    await ws_server._handle_message(late, "sess-c", {"op": "cancel_tool", "request_id": "req-8"})
+    await asyncio.wait_for(asyncio.gather(first, second), 5.0)
+
+    assert late.final("req-8")["error"]["code"] == "CANCELLED"
+    assert not [m for m in leader.sent if m.get("request_id") == "req-7" and m.get("outputs")]
+    assert not ws_server._inflight_by_key and not ws_server._running_calls
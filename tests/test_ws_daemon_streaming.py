@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from utils.token_stream import emit_token, record_stream_usage
+
+ws_server = pytest.importorskip("src.daemon.ws_server")
+
+
+@pytest.fixture
+def streaming_tool(monkeypatch):
+    async def fake_handle_call_tool(name, arguments):
+        def provider_call():
+            for piece in ("Hel", "lo, ", "world"):
+                emit_token(piece)
+            record_stream_usage({"input_tokens": 3, "output_tokens": 3, "total_tokens": 6})
+            return "Hello, world"
+
+        text = await asyncio.to_thread(provider_call)
+        return [{"type": "text", "text": text}]
+
+    monkeypatch.setattr(ws_server, "SERVER_HANDLE_CALL_TOOL", fake_handle_call_tool)
+    monkeypatch.setattr(ws_server, "_ensure_providers_configured", lambda: None)
+    ws_server._results_cache.clear()
+    ws_server._results_cache_by_key.clear()
+
+
+async def test_stream_opt_in_sends_chunks_before_final_result(streaming_tool, fake_ws):
+    ws = fake_ws()
+    msg = {"op": "call_tool", "name": "version", "request_id": "s-1", "stream": True,
+           "arguments": {"prompt": "stream-me", "model": "stream-test-model"}}
+    await asyncio.wait_for(ws_server._handle_message(ws, "sess-s", msg), 5.0)
+
+    ops = [m["op"] for m in ws.sent]
+    chunks = [m for m in ws.sent if m["op"] == "call_tool_chunk"]
+    final = [m for m in ws.sent if m["op"] == "call_tool_res"][-1]
+    assert chunks and ops.index("call_tool_chunk") < ops.index("call_tool_res")
+    assert "".join(c["delta"] for c in chunks) == "Hello, world"
+    assert [c["seq"] for c in chunks] == list(range(1, len(chunks) + 1))
+    assert final["outputs"] == [{"type": "text", "text": "Hello, world"}]
+    assert final["usage"]["total_tokens"] == 6
+    assert final["stream"]["chars"] == len("Hello, world")
+
+
+async def test_without_opt_in_no_chunks_are_sent(streaming_tool, fake_ws):
+    ws = fake_ws()
+    msg = {"op": "call_tool", "name": "version", "request_id": "s-2",
+           "arguments": {"prompt": "no-stream", "model": "stream-test-model"}}
+    await asyncio.wait_for(ws_server._handle_message(ws, "sess-s", msg), 5.0)
+
+    assert not [m for m in ws.sent if m["op"] == "call_tool_chunk"]
+    final = [m for m in ws.sent if m["op"] == "call_tool_res"][-1]
+    assert "stream" not in final
@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+from src.daemon.metrics_writer import MetricsWriter
+
+
+def test_record_overflow_drops_oldest():
+    w = MetricsWriter("unused.jsonl", capacity=3)
+    for i in range(5):
+        w.record({"i": i})
+    assert [r["i"] for r in w._buf] == [2, 3, 4]
+    assert w.stats()["dropped"] == 2
+
+
+async def test_flush_writes_batches_off_loop(tmp_path):
+    path = tmp_path / "m.jsonl"
+    w = MetricsWriter(path, batch_max=2)
+    for i in range(5):
+        w.record({"i": i})
+    await w.flush()
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["i"] for r in rows] == list(range(5))
+    assert w.stats()["batches"] == 3 and w.stats()["written"] == 5
+
+
+async def test_rotation_keeps_backups(tmp_path):
+    path = tmp_path / "m.jsonl"
+    w = MetricsWriter(path, batch_max=1, max_bytes=40, backups=2)
+    for i in range(6):
+        w.record({"payload": "x" * 10, "i": i})
+        await w.flush()
+    assert w.rotations >= 2
+    assert path.exists() and (tmp_path / "m.jsonl.1").exists() and (tmp_path / "m.jsonl.2").exists()
+    assert not (tmp_path / "m.jsonl.3").exists()
+    assert path.stat().st_size <= 40
+
+
+async def test_run_drains_on_stop(tmp_path):
+    path = tmp_path / "m.jsonl"
+    w = MetricsWriter(path, flush_interval_s=30.0)
+    stop = asyncio.Event()
+    task = asyncio.create_task(w.run(stop))
+    await asyncio.sleep(0)
+    w.record({"op": "call_tool"})
+    stop.set()
+    await asyncio.wait_for(task, 2.0)
+    assert json.loads(path.read_text())["op"] == "call_tool"
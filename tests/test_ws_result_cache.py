@@ -0,0 +1,76 @@
+from src.daemon.result_cache import ResultCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(**kw):
+    clock = _Clock()
+    params = {"ttl_s": 10.0, "max_entries": 100, "max_bytes": 10_000, "clock": clock}
+    params.update(kw)
+    return ResultCache(**params), clock
+
+
+def test_hit_miss_counters():
+    cache, _ = _cache()
+    cache.set("a", {"x": 1})
+    assert cache.get("a") == {"x": 1}
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache, clock = _cache()
+    cache.set("a", "one")
+    clock.now += 5
+    cache.set("b", "two")
+    clock.now += 6
+    assert cache.get("a") is None
+    assert cache.get("b") == "two"
+    assert cache.stats()["expirations"] == 1
+    assert cache.bytes == len('"two"')
+
+
+def test_overwrite_resets_expiry():
+    cache, clock = _cache()
+    cache.set("a", "old")
+    clock.now += 8
+    cache.set("a", "new")
+    clock.now += 8
+    assert cache.get("a") == "new"
+    assert len(cache) == 1
+
+
+def test_entry_limit_evicts_least_recently_used():
+    cache, _ = _cache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_limit_evicts_and_rejects_oversize():
+    cache, _ = _cache(max_bytes=20)
+    cache.set("a", "x" * 8)  # 10 bytes encoded
+    cache.set("b", "y" * 8)
+    cache.set("c", "z" * 8)
+    assert len(cache) == 2 and cache.bytes <= 20
+    assert cache.get("a") is None
+    assert cache.set("big", "q" * 50) is False
+    assert cache.stats()["rejected"] == 1
+
+
+def test_stale_heap_records_are_compacted():
+    cache, _ = _cache()
+    for i in range(500):
+        cache.set("same", i)
+    assert len(cache._heap) <= 2 * len(cache) + 65
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from src.daemon.shared_store import SharedStore
+
+ws_server = pytest.importorskip("src.daemon.ws_server")
+
+
+@pytest.fixture
+def stores(tmp_path):
+    # Two connections to one file stand in for two worker processes
+    a, b = SharedStore(tmp_path / "shared.sqlite3"), SharedStore(tmp_path / "shared.sqlite3")
+    yield a, b
+    a.close()
+    b.close()
+
+
+def test_results_are_visible_across_connections(stores):
+    a, b = stores
+    a.put_result("key", "k1", [{"type": "text", "text": "hi"}], ttl_s=60)
+    assert b.get_result("key", "k1") == [{"type": "text", "text": "hi"}]
+    a.put_result("key", "k2", "gone", ttl_s=-1)
+    assert b.get_result("key", "k2") is None
+
+
+def test_single_flight_claim_and_outcome(stores):
+    a, b = stores
+    assert a.claim_inflight("k", "w0-1:req-1", ttl_s=60) is None
+    assert b.claim_inflight("k", "w1-2:req-2", ttl_s=60) == "w0-1:req-1"
+    a.finish_inflight("k", "w0-1:req-1", {"outputs": [{"type": "text", "text": "done"}]})
+    assert b.inflight_owner("k") is None
+    assert b.get_outcome("k", "w0-1:req-1")["outputs"][0]["text"] == "done"
+    assert b.claim_inflight("k", "w1-2:req-3", ttl_s=60) is None
+
+
+def test_slots_enforce_global_and_provider_caps(stores):
+    a, b = stores
+    assert a.try_acquire_slot("w0:1", "KIMI", 3, 1, ttl_s=60)
+    assert not b.try_acquire_slot("w1:1", "KIMI", 3, 1, ttl_s=60)
+    assert b.try_acquire_slot("w1:2", "GLM", 3, 2, ttl_s=60)
+    assert b.try_acquire_slot("w1:3", "DEFAULT", 3, None, ttl_s=60)
+    assert not a.try_acquire_slot("w0:2", "GLM", 3, 2, ttl_s=60)
+    a.release_slot("w0:1")
+    assert b.try_acquire_slot("w1:1", "KIMI", 3, 1, ttl_s=60)
+
+
+def test_purge_owner_frees_dead_worker_leases(stores):
+    a, b = stores
+    a.claim_inflight("k", "w0-11:req", ttl_s=60)
+    a.try_acquire_slot("w0-11:lease", "KIMI", 2, 2, ttl_s=60)
+    a.try_acquire_slot("w0-111:lease", "KIMI", 2, 2, ttl_s=60)
+    b.purge_owner("w0-11:")
+    assert b.inflight_owner("k") is None
+    assert b.stats()["slots"] == {"KIMI": 1}
+
+
+async def test_daemon_relays_outcome_from_other_worker(stores, monkeypatch, fake_ws):
+    local, remote = stores
+    calls = []
+
+    async def fake_handle_call_tool(name, arguments):
+        calls.append(arguments)
+        return [{"type": "text", "text": "local"}]
+
+    monkeypatch.setattr(ws_server, "SERVER_HANDLE_CALL_TOOL", fake_handle_call_tool)
+    monkeypatch.setattr(ws_server, "_ensure_providers_configured", lambda: None)
+    monkeypatch.setattr(ws_server, "_shared", local)
+    monkeypatch.setattr(ws_server, "SHARED_POLL_SECS", 0.01)
+    monkeypatch.setenv("EXAI_WS_DISABLE_COALESCE_FOR_TOOLS", "")
+    ws_server._results_cache.clear()
+    ws_server._results_cache_by_key.clear()
+
+    args = {"prompt": "cross-worker", "model": "shared-test-model"}
+    call_key = ws_server._make_call_key("version", dict(args))
+    remote.claim_inflight(call_key, "w9-99:req-remote", ttl_s=60)
+
+    ws = fake_ws()
+    msg = {"op": "call_tool", "name": "version", "request_id": "req-local", "arguments": args}
+    task = asyncio.create_task(ws_server._handle_message(ws, "sess-x", msg))
+    await asyncio.sleep(0.1)
+    remote.finish_inflight(call_key, "w9-99:req-remote", {"outputs": [{"type": "text", "text": "remote"}]})
+    await asyncio.wait_for(task, 5.0)
+
+    assert not calls
+    final = [m for m in ws.sent if m["op"] == "call_tool_res"][-1]
+    assert final["outputs"] == [{"type": "text", "text": "remote"}]
+    ack = [m for m in ws.sent if m["op"] == "call_tool_ack"][0]
+    assert ack["coalesced"] is True and ack["original_request_id"] == "req-remote"
+    assert not ws_server._inflight_by_key
+
+
+async def test_shared_slot_store_error_is_not_acquired(monkeypatch):
+    class _BrokenStore:
+        def try_acquire_slot(self, *args):
+            raise OSError("database is locked")
+
+    async def on_wait(_pos):
+        pass
+
+    monkeypatch.setattr(ws_server, "_shared", _BrokenStore())
+    monkeypatch.setattr(ws_server, "SHARED_POLL_SECS", 0.01)
+    monkeypatch.setattr(ws_server, "QUEUE_MAX_WAIT_SECS", 0.05)
+    monkeypatch.setattr(ws_server, "_shared_slot_errors", 0)
+
+    assert await ws_server._acquire_shared_slot("w0:lease", "KIMI", on_wait) is False
+    assert ws_server._shared_slot_errors >= 2
@@ -1,24 +1,46 @@
 """
 Tool implementations for EXAI MCP Server
+
+Tool classes are exported lazily: ``from tools import ChatTool`` imports only tools.chat,
+so importing this package (e.g. for tools.registry) does not pull in every tool module.
 """
 
-from .analyze import AnalyzeTool
-from .challenge import ChallengeTool
-from .chat import ChatTool
-from .codereview import CodeReviewTool
-from .consensus import ConsensusTool
-from .debug import DebugIssueTool
-from .docgen import DocgenTool
-from .listmodels import ListModelsTool
-from .planner import PlannerTool
-from .precommit import PrecommitTool
-from .refactor import RefactorTool
-from .secaudit import SecauditTool
-from .testgen import TestGenTool
-from .thinkdeep import ThinkDeepTool
-from .tracer import TracerTool
-from .version import VersionTool
-from .selfcheck import SelfCheckTool
+import importlib
+from typing import Any
+
+_EXPORTS = {
+    "AnalyzeTool": ".analyze",
+    "ChallengeTool": ".challenge",
+    "ChatTool": ".chat",
+    "CodeReviewTool": ".codereview",
+    "ConsensusTool": ".consensus",
+    "DebugIssueTool": ".debug",
+    "DocgenTool": ".docgen",
+    "ListModelsTool": ".listmodels",
+    "PlannerTool": ".planner",
+    "PrecommitTool": ".precommit",
+    "RefactorTool": ".refactor",
+    "SecauditTool": ".secaudit",
+    "TestGenTool": ".testgen",
+    "ThinkDeepTool": ".thinkdeep",
+    "TracerTool": ".tracer",
+    "VersionTool": ".version",
+    "SelfCheckTool": ".selfcheck",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_path = _EXPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 __all__ = [
     "ThinkDeepTool",
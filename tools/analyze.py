@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import ANALYZE_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import step_scoped
 
 from .workflow.base import WorkflowTool
 
@@ -217,6 +218,9 @@ class AnalyzeTool(WorkflowTool):
     including architectural review, performance analysis, security assessment, and maintainability evaluation.
     """
 
+    analysis_config = step_scoped(factory=dict)
+    expert_fingerprint_hypotheses = False
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
@@ -384,6 +388,10 @@ class AnalyzeTool(WorkflowTool):
                 "Confirm the analysis provides clear guidance for strategic decisions",
             ]
 
+    def supports_speculative_expert_analysis(self) -> bool:
+        """The final analyze step usually summarizes the assessment rather than adding files or findings."""
+        return True
+
     def should_call_expert_analysis(self, consolidated_findings, request=None) -> bool:
         """
         Always call expert analysis for comprehensive validation.
@@ -319,6 +319,10 @@ class DebugIssueTool(WorkflowTool):
                 "Look for patterns that confirm or refute your theory",
             ]
 
+    def supports_speculative_expert_analysis(self) -> bool:
+        """Once the root-cause hypothesis is confident, the final step usually only confirms it."""
+        return True
+
     def should_call_expert_analysis(self, consolidated_findings, request=None) -> bool:
         """
         Decide when to call external model based on investigation completeness.
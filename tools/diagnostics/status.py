@@ -38,6 +38,9 @@ class StatusTool(BaseTool):
     def requires_model(self) -> bool:
         return False
 
+    async def prepare_prompt(self, request):  # pragma: no cover - not used
+        return ""
+
     async def execute(self, arguments: Dict[str, Any]) -> list[TextContent]:
         tail = int(arguments.get("tail_lines", 30))
         include_tools = bool(arguments.get("include_tools", False))
@@ -75,6 +78,13 @@ class StatusTool(BaseTool):
             "next_steps": guidance,
         }
 
+        # Conversation storage: keys, bytes, evictions and expirations
+        try:
+            from utils.storage_backend import get_storage_stats
+            out["storage"] = get_storage_stats()
+        except Exception:
+            out["storage"] = {}
+
         # Optional doctor mode: perform fast probes and add guidance
         if bool(arguments.get("doctor", False)):
             doctor = {"probes": {}, "advice": []}
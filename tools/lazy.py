@@ -0,0 +1,271 @@
+"""
+Lazy tool proxies and the on-disk tool schema manifest.
+
+- LazyTool stands in for a tool instance in TOOLS. The tool module is imported and the
+  tool constructed on first real use (a call, or any attribute the manifest cannot answer)
+- ToolManifest stores each tool's name, description, input schema and annotations in a
+  JSON file. While its fingerprint matches (tool sources, package version and the
+  environment that shapes schemas, e.g. DEFAULT_MODEL and the available models),
+  list_tools is answered without importing any tool module
+- The manifest is rewritten once every registered tool has been described again
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from tools.schema_cache import schema_environment
+from utils.import_profile import record_tool_load
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _source_signature() -> list:
+    """(path, mtime_ns, size) for tool sources and config.py; any edit invalidates the manifest."""
+    sig = []
+    for base in (_ROOT / "tools",):
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            for fn in sorted(filenames):
+                if fn.endswith(".py"):
+                    p = os.path.join(dirpath, fn)
+                    try:
+                        st = os.stat(p)
+                        sig.append((os.path.relpath(p, _ROOT), st.st_mtime_ns, st.st_size))
+                    except OSError:
+                        continue
+    try:
+        st = os.stat(_ROOT / "config.py")
+        sig.append(("config.py", st.st_mtime_ns, st.st_size))
+    except OSError:
+        pass
+    return sig
+
+
+class ToolManifest:
+    """Fingerprinted schema cache for a set of tools, persisted as JSON."""
+
+    def __init__(self, path: Path | str, expected: Iterable[str] = ()) -> None:
+        self.path = Path(path)
+        self.expected = set(expected)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._entries_fp: Optional[str] = None
+        self._sources: Optional[list] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def fingerprint(self) -> str:
+        if self._sources is None:
+            # Tool modules are not reloaded while the process runs, so sources are hashed once
+            self._sources = _source_signature()
+        try:
+            from config import __version__
+        except Exception:
+            __version__ = ""
+        raw = json.dumps([MANIFEST_VERSION, __version__, self._sources, schema_environment()], default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _sync(self, fp: str) -> None:
+        """Switch to the entries for fp, loading them from the file. Caller holds the lock.
+
+        The file is read again whenever the fingerprint changes: tools are registered before
+        providers are configured, and only the configured fingerprint matches a warm manifest.
+        """
+        if self._entries_fp == fp:
+            return
+        self._entries = {}
+        self._entries_fp = fp
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("fingerprint") == fp and isinstance(data.get("tools"), dict):
+                self._entries = data["tools"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug("ignoring unreadable tool manifest %s: %s", self.path, e)
+
+    def get(self, key: str) -> Optional[dict]:
+        fp = self.fingerprint()
+        with self._lock:
+            self._sync(fp)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        fp = self.fingerprint()
+        with self._lock:
+            self._sync(fp)
+            self._entries[key] = entry
+            if not self.expected or not self.expected.issubset(self._entries):
+                return
+            data = {"fingerprint": fp, "version": MANIFEST_VERSION, "written_at": time.time(), "tools": self._entries}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data, default=str), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self.writes += 1
+        except Exception as e:
+            logger.debug("tool manifest write failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "entries": len(self._entries),
+            "expected": len(self.expected),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+        }
+
+
+def _is_workflow(tool: Any) -> bool:
+    try:
+        from tools.workflow.base import WorkflowTool
+
+        return isinstance(tool, WorkflowTool)
+    except Exception:
+        return False
+
+
+def describe_tool(tool: Any) -> dict:
+    """Manifest entry for a constructed tool."""
+    return {
+        "name": tool.name,
+        "description": tool.description,
+        "input_schema": tool.get_input_schema(),
+        "annotations": tool.get_annotations(),
+        "workflow": _is_workflow(tool),
+    }
+
+
+class LazyTool:
+    """Placeholder for a tool instance; imports and constructs the tool on first real use.
+
+    name, description, get_input_schema() and get_annotations() are served from the
+    manifest while it is current, and class_name from the registry entry. Any other
+    attribute loads the tool and delegates to it. isinstance() sees the proxy; callers that
+    need the tool class check load().
+    """
+
+    def __init__(self, key: str, module_path: str, class_name: str, manifest: Optional[ToolManifest] = None) -> None:
+        self._key = key
+        self._module_path = module_path
+        self._class_name = class_name
+        self._manifest = manifest
+        self._instance: Any = None
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._error
+
+    def load(self) -> Any:
+        inst = self._instance
+        if inst is not None:
+            return inst
+        with self._lock:
+            if self._instance is None:
+                if self._error is not None:
+                    raise RuntimeError(f"Tool '{self._key}' failed to load: {self._error}")
+                try:
+                    t0 = time.perf_counter()
+                    module = importlib.import_module(self._module_path)
+                    t1 = time.perf_counter()
+                    inst = getattr(module, self._class_name)()
+                    record_tool_load(self._key, t1 - t0, time.perf_counter() - t1)
+                except Exception as e:
+                    self._error = str(e)
+                    if self._manifest is not None:
+                        # Remembered under the same fingerprint, so the next start skips this tool
+                        self._manifest.put(self._key, {"error": self._error})
+                    raise RuntimeError(f"Tool '{self._key}' failed to load: {e}") from e
+                self._instance = inst
+            return self._instance
+
+    def _entry(self) -> Optional[dict]:
+        """Manifest entry, or None once the tool is loaded (live values win)."""
+        if self._instance is not None or self._manifest is None:
+            return None
+        entry = self._manifest.get(self._key)
+        if entry is not None and "error" in entry:
+            self._error = str(entry["error"])
+            raise RuntimeError(f"Tool '{self._key}' failed to load: {self._error}")
+        if entry is None:
+            entry = describe_tool(self.load())
+            self._manifest.put(self._key, entry)
+            return None
+        return entry
+
+    @property
+    def name(self) -> str:
+        entry = self._entry()
+        return entry["name"] if entry is not None else self.load().name
+
+    @property
+    def description(self) -> str:
+        entry = self._entry()
+        return entry["description"] if entry is not None else self.load().description
+
+    def get_name(self) -> str:
+        return self.name
+
+    def get_description(self) -> str:
+        entry = self._entry()
+        return entry["description"] if entry is not None else self.load().get_description()
+
+    def get_input_schema(self) -> dict:
+        entry = self._entry()
+        # Callers own the returned schema, as with a freshly generated one
+        return copy.deepcopy(entry["input_schema"]) if entry is not None else self.load().get_input_schema()
+
+    def get_annotations(self) -> Optional[dict]:
+        entry = self._entry()
+        return copy.deepcopy(entry["annotations"]) if entry is not None else self.load().get_annotations()
+
+    @property
+    def class_name(self) -> str:
+        return self._class_name
+
+    @property
+    def is_workflow(self) -> bool:
+        entry = self._entry()
+        if entry is not None:
+            return bool(entry.get("workflow"))
+        return _is_workflow(self.load())
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("__") or attr in ("_key", "_instance", "_manifest", "_lock", "_error"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._instance is not None else "lazy"
+        return f"<LazyTool {self._key} ({self._module_path}.{self._class_name}, {state})>"
+
+
+def tool_class_name(tool: Any) -> str:
+    """Class name of a registered tool (for logs) without importing a lazy one."""
+    return tool.class_name if isinstance(tool, LazyTool) else type(tool).__name__
@@ -31,6 +31,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_BALANCED
 from systemprompts import PLANNER_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import step_scoped
 
 from .workflow.base import WorkflowTool
 
@@ -124,6 +125,9 @@ class PlannerTool(WorkflowTool):
     - Self-contained operation (no expert analysis)
     """
 
+    branches = step_scoped(factory=dict)
+    initial_planning_description = step_scoped()
+
     def __init__(self):
         super().__init__()
         self.branches = {}
@@ -176,7 +176,14 @@ class KimiChatWithToolsTool(BaseTool):
             norm_msgs = [{"role": "user", "content": str(raw_msgs)}]
 
         import asyncio as _aio
-        stream_flag = bool(arguments.get("stream", os.getenv("KIMI_CHAT_STREAM_DEFAULT", "false").strip().lower() == "true"))
+
+        from utils.cancellation import CallCancelled, is_cancelled, on_cancel, raise_if_cancelled
+        from utils.token_stream import emit_token, get_token_stream, record_stream_usage
+        # Stream when asked explicitly, when the transport opted into token streaming, or by env default
+        _stream_default = (get_token_stream() is not None) or (
+            os.getenv("KIMI_CHAT_STREAM_DEFAULT", "false").strip().lower() == "true"
+        )
+        stream_flag = bool(arguments.get("stream", _stream_default))
         model_used = requested_model
 
         if stream_flag:
@@ -188,6 +195,7 @@ class KimiChatWithToolsTool(BaseTool):
                 def _stream_call():
                     content_parts = []
                     raw_items = []
+                    usage = None
                     try:
                         # Streaming: fall back to direct client but include extra headers for idempotency/cache when possible
                         extra_headers = {}
@@ -209,7 +217,7 @@ class KimiChatWithToolsTool(BaseTool):
                                     extra_headers["Msh-Context-Cache-Token"] = t
                         except Exception:
                             pass
-                        for evt in prov.client.chat.completions.create(
+                        response = prov.client.chat.completions.create(
                             model=model_used,
                             messages=norm_msgs,
                             tools=tools,
@@ -217,29 +225,49 @@ class KimiChatWithToolsTool(BaseTool):
                             temperature=float(arguments.get("temperature", 0.6)),
                             stream=True,
                             extra_headers=extra_headers or None,
-                        ):
-                            raw_items.append(evt)
-                            try:
-                                ch = getattr(evt, "choices", None) or []
-                                if ch:
-                                    delta = getattr(ch[0], "delta", None)
-                                    if delta:
-                                        piece = getattr(delta, "content", None)
-                                        if piece:
-                                            content_parts.append(str(piece))
-                            except Exception:
-                                pass
+                        )
+                        close = getattr(response, "close", None)
+                        # Closing the response on cancel unblocks this worker thread mid-stream
+                        with on_cancel(close if callable(close) else (lambda: None)):
+                            for evt in response:
+                                if is_cancelled():
+                                    break
+                                raw_items.append(evt)
+                                try:
+                                    ch = getattr(evt, "choices", None) or []
+                                    if ch:
+                                        delta = getattr(ch[0], "delta", None)
+                                        if delta:
+                                            piece = getattr(delta, "content", None)
+                                            if piece:
+                                                content_parts.append(str(piece))
+                                                emit_token(str(piece))
+                                        # Moonshot reports usage on the final choice chunk
+                                        u = getattr(ch[0], "usage", None) or getattr(evt, "usage", None)
+                                        if u:
+                                            usage = u if isinstance(u, dict) else getattr(u, "model_dump", lambda: None)()
+                                except Exception:
+                                    pass
                     except Exception as e:
+                        if is_cancelled():
+                            raise CallCancelled("cancelled by client") from e
                         raise e
-                    return ("".join(content_parts), raw_items)
+                    raise_if_cancelled()
+                    if usage:
+                        record_stream_usage({
+                            "input_tokens": int(usage.get("prompt_tokens", 0) or 0),
+                            "output_tokens": int(usage.get("completion_tokens", 0) or 0),
+                            "total_tokens": int(usage.get("total_tokens", 0) or 0),
+                        })
+                    return ("".join(content_parts), raw_items, usage)
 
-                content_text, raw_stream = await _aio.to_thread(_stream_call)
+                content_text, raw_stream, stream_usage = await _aio.to_thread(_stream_call)
                 normalized = {
                     "provider": "KIMI",
                     "model": model_used,
                     "content": content_text,
                     "tool_calls": None,
-                    "usage": None,
+                    "usage": stream_usage,
                     "raw": {"stream": True, "items": [str(it) for it in raw_stream[:10]]},
                 }
                 return [TextContent(type="text", text=json.dumps(normalized, ensure_ascii=False))]
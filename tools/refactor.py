@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import REFACTOR_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import step_scoped
 
 from .workflow.base import WorkflowTool
 
@@ -181,6 +182,8 @@ class RefactorTool(WorkflowTool):
     opportunities, and organization improvements.
     """
 
+    refactor_config = step_scoped(factory=dict)
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
@@ -4,6 +4,9 @@ Build the tool set once at server startup, honoring env flags:
 - LEAN_MODE=true|false (default false)
 - LEAN_TOOLS=comma,list (when LEAN_MODE=true, overrides default lean set)
 - DISABLED_TOOLS=comma,list (always excluded)
+- EXAI_LAZY_TOOLS=true|false (default true): register LazyTool placeholders that import
+  their module on first use; list_tools is served from the schema manifest
+- EXAI_TOOL_MANIFEST=path (default logs/tool_manifest.json; "off" disables the manifest)
 
 Always expose light utility tools (listmodels, version) for diagnostics.
 Provide helpful error if a disabled tool is invoked.
@@ -11,7 +14,12 @@ Provide helpful error if a disabled tool is invoked.
 from __future__ import annotations
 
 import os
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from tools.lazy import LazyTool, ToolManifest
+
+_DEFAULT_MANIFEST = Path(__file__).resolve().parents[1] / "logs" / "tool_manifest.json"
 
 # Map tool names to import paths (module, class)
 TOOL_MAP: Dict[str, tuple[str, str]] = {
@@ -121,9 +129,20 @@ class ToolRegistry:
     def __init__(self) -> None:
         self._tools: Dict[str, Any] = {}
         self._errors: Dict[str, str] = {}
+        self._manifest: Optional[ToolManifest] = None
+        self._lazy = os.getenv("EXAI_LAZY_TOOLS", "true").strip().lower() == "true"
 
     def _load_tool(self, name: str) -> None:
         module_path, class_name = TOOL_MAP[name]
+        if self._lazy:
+            # A failure remembered by the manifest is reported like an eager load error;
+            # otherwise import errors surface on first use as "Tool 'x' failed to load: ..."
+            entry = self._manifest.get(name) if self._manifest is not None else None
+            if entry is not None and "error" in entry:
+                self._errors[name] = str(entry["error"])
+                return
+            self._tools[name] = LazyTool(name, module_path, class_name, self._manifest)
+            return
         try:
             module = __import__(module_path, fromlist=[class_name])
             cls = getattr(module, class_name)
@@ -151,6 +170,10 @@ class ToolRegistry:
         if os.getenv("DIAGNOSTICS", "false").strip().lower() != "true":
             active.discard("self-check")
 
+        manifest_path = os.getenv("EXAI_TOOL_MANIFEST", str(_DEFAULT_MANIFEST)).strip()
+        if self._lazy and manifest_path.lower() not in ("", "off", "false", "0"):
+            self._manifest = ToolManifest(manifest_path, expected=active)
+
         # Web tools removed; no gating needed
         for name in sorted(active):
             self._load_tool(name)
@@ -167,6 +190,17 @@ class ToolRegistry:
     def list_tools(self) -> Dict[str, Any]:
         return dict(self._tools)
 
+    def load_stats(self) -> Dict[str, Any]:
+        """How many registered tools have been imported, plus schema manifest counters."""
+        lazy = {n: t for n, t in self._tools.items() if isinstance(t, LazyTool)}
+        return {
+            "lazy": self._lazy,
+            "registered": len(self._tools),
+            "loaded": len(self._tools) - sum(1 for t in lazy.values() if not t.loaded),
+            "failed": sorted(set(self._errors) | {n for n, t in lazy.items() if t.error}),
+            "manifest": self._manifest.stats() if self._manifest is not None else None,
+        }
+
     def list_descriptors(self) -> Dict[str, Any]:
         """Return machine-readable descriptors for all loaded tools (MVP)."""
         descs: Dict[str, Any] = {}
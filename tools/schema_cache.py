@@ -0,0 +1,115 @@
+"""
+Versioned cache of list_tools results.
+
+Building the tool list calls get_input_schema() for every tool, which for model-aware tools
+walks the provider and OpenRouter registries. The result only depends on a few inputs, so it
+is built once per combination of:
+- the registered tools (names and instances)
+- the provider configuration: the model -> provider index and schema-relevant env
+  (DEFAULT_MODEL, OpenRouter/custom endpoints, router sentinels, locale)
+- the restriction policy (*_ALLOWED_MODELS as loaded by the restriction service)
+- the client profile (allow/deny lists and schema flags), supplied by the caller
+
+schema_fingerprint() hashes the first three; the version of an entry is a prefix of its key
+hash, so transports can hand it to clients and skip resending unchanged lists.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Mapping, Optional
+
+# Environment that changes generated schemas (model field enum/description, locale)
+SCHEMA_ENV = ("DEFAULT_MODEL", "HIDDEN_MODEL_ROUTER_ENABLED", "ROUTER_SENTINEL_MODELS", "LOCALE", "CUSTOM_API_URL")
+
+
+def schema_environment() -> list:
+    """Provider configuration and restriction policy that generated schemas depend on."""
+    env = [(k, os.getenv(k)) for k in SCHEMA_ENV]
+    env += sorted((k, v) for k, v in os.environ.items() if k.endswith("_ALLOWED_MODELS"))
+    key = os.getenv("OPENROUTER_API_KEY")
+    env.append(("OPENROUTER", bool(key and key != "your_openrouter_api_key_here")))
+    try:
+        from src.providers.registry import ModelProviderRegistry
+
+        models = sorted((m, getattr(p, "value", str(p))) for m, p in ModelProviderRegistry.get_model_index().items())
+    except Exception:
+        models = []
+    try:
+        from utils.model_restrictions import get_restriction_service
+
+        policy = sorted(
+            (getattr(p, "value", str(p)), sorted(allowed))
+            for p, allowed in get_restriction_service().restrictions.items()
+        )
+    except Exception:
+        policy = []
+    return [env, models, policy]
+
+
+def schema_fingerprint(tools: Mapping[str, Any]) -> str:
+    # Instances are compared by identity: a re-registered tool (e.g. Auggie wrappers) is a new schema
+    raw = json.dumps([sorted((name, id(tool)) for name, tool in tools.items()), schema_environment()], default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CachedSchemas:
+    __slots__ = ("version", "value")
+
+    def __init__(self, version: str, value: Any) -> None:
+        self.version = version
+        self.value = value
+
+
+class SchemaCache:
+    """Small LRU of built tool lists keyed by (fingerprint, client profile)."""
+
+    def __init__(self, max_entries: int = 16) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[tuple, CachedSchemas]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+
+    def get(self, tools: Mapping[str, Any], profile: Hashable, build: Callable[[str], Any]) -> CachedSchemas:
+        """Cached entry for this tool set and client profile; build(version) runs only on a miss."""
+        key = (schema_fingerprint(tools), profile)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        # Built outside the lock: schema generation may import tool modules
+        version = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        entry = CachedSchemas(version, build(version))
+        with self._lock:
+            self.builds += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "builds": self.builds}
+
+
+_default: Optional[SchemaCache] = None
+
+
+def get_schema_cache() -> SchemaCache:
+    global _default
+    if _default is None:
+        _default = SchemaCache()
+    return _default
@@ -9,6 +9,7 @@ common functionality for request validation, error handling, model management,
 conversation handling, file processing, and response formatting.
 """
 
+import inspect
 import logging
 import os
 from abc import ABC, abstractmethod
@@ -29,6 +30,8 @@ from utils.conversation_memory import (
 )
 from utils.file_utils import read_file_content, read_files
 
+from .execution_context import call_scoped, run_in_call_context
+
 # Import models from tools.models for compatibility
 try:
     from tools.models import SPECIAL_STATUS_MODELS, ContinuationOffer, ToolOutput
@@ -77,11 +80,31 @@ class BaseTool(ABC):
     2. Implement all abstract methods
     3. Define a request model that inherits from ToolRequest
     4. Register the tool in server.py's TOOLS dictionary
+
+    CONCURRENT CALLS:
+    One instance serves every call of a tool. State a call keeps on ``self`` must be declared
+    with call_scoped()/step_scoped() (tools/shared/execution_context.py); every execute()
+    override runs in its own call context, so concurrent calls never share those values.
     """
 
     # Class-level cache for OpenRouter registry to avoid multiple loads
     _openrouter_registry_cache = None
 
+    # Per-call state (see CONCURRENT CALLS above)
+    _current_arguments = call_scoped()
+    _model_context = call_scoped()
+    _current_model_name = call_scoped()
+    _actually_processed_files = call_scoped()
+    _embedded_file_content = call_scoped()
+    _file_reference_note = call_scoped()
+    _referenced_files = call_scoped()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        execute = cls.__dict__.get("execute")
+        if inspect.iscoroutinefunction(execute) and not getattr(execute, "__call_context__", False):
+            cls.execute = run_in_call_context(execute)
+
     @classmethod
     def _get_openrouter_registry(cls):
         """Get cached OpenRouter registry instance, creating if needed."""
@@ -1156,11 +1179,13 @@ class BaseTool(ABC):
                     f"[FILES] {self.name}: Expanded {len(files_to_embed)} paths to {len(expanded_files)} individual files"
                 )
 
+                # Already expanded; only an empty expansion goes back through read_files for its note
                 file_content = read_files(
-                    files_to_embed,
+                    expanded_files or files_to_embed,
                     max_tokens=effective_max_tokens + reserve_tokens,
                     reserve_tokens=reserve_tokens,
                     include_line_numbers=self.wants_line_numbers_by_default(),
+                    expand=not expanded_files,
                 )
                 self._validate_token_limit(file_content, context_description)
                 content_parts.append(file_content)
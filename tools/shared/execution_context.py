@@ -0,0 +1,216 @@
+"""
+Per-call execution state for tool instances.
+
+TOOLS holds one instance per tool and the WS daemon runs calls concurrently, so anything a
+call stores on ``self`` would be visible to (and overwritten by) every other call of the same
+tool. Attributes declared with the descriptors below live in the current call's CallContext,
+held in a ContextVar, instead of on the instance:
+- call_scoped: scratch state of one call (arguments, resolved model context, embedded files)
+- step_scoped: workflow state carried from step to step. WorkflowMixin restores it per
+  continuation_id at the start of a step and StepStateCache keeps it between steps
+- BaseTool runs every execute() in a fresh CallContext. Nested execute() calls in the same
+  task share it, and worker threads started with to_thread/copy_context see it too
+- Outside a call (direct method use in tests and scripts) both behave like plain instance
+  attributes. When a call ends its step_scoped values are published to the instance as the
+  "latest" state, which steps sent without a continuation_id fall back to
+- detach_call_context() copies one instance's values out of the running call for a background
+  task that outlives it (step state deep-copied, so later steps cannot change what it sees)
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+_MISSING = object()
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+class CallContext:
+    """Values of call-scoped attributes for one tool call, keyed by (instance id, attribute)."""
+
+    def __init__(self) -> None:
+        self.task = _current_task()
+        self.values: dict[tuple[int, str], Any] = {}
+        self.owners: dict[int, Any] = {}
+        self._on_exit: list[Callable[[], Any]] = []
+
+    def on_exit(self, fn: Callable[[], Any]) -> None:
+        """Run fn when the call ends; an awaitable it returns is awaited before the call returns."""
+        self._on_exit.append(fn)
+
+    def has(self, obj: Any, name: str) -> bool:
+        return (id(obj), name) in self.values
+
+    def get(self, obj: Any, name: str, default: Any = None) -> Any:
+        return self.values.get((id(obj), name), default)
+
+    def set(self, obj: Any, name: str, value: Any) -> None:
+        self.values[(id(obj), name)] = value
+        self.owners[id(obj)] = obj
+
+    async def close(self) -> None:
+        for fn in self._on_exit:
+            try:
+                result = fn()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                pass
+        # Publish workflow state as the instances' latest state (see step_scoped)
+        for (oid, name), value in self.values.items():
+            owner = self.owners.get(oid)
+            if owner is not None and isinstance(getattr(type(owner), name, None), step_scoped):
+                owner.__dict__[name] = value
+
+
+_context_var: ContextVar[Optional[CallContext]] = ContextVar("tool_call_context", default=None)
+
+
+def current_call_context() -> Optional[CallContext]:
+    return _context_var.get()
+
+
+def detach_call_context(obj: Any) -> CallContext:
+    """New CallContext holding a snapshot of obj's values in the running call."""
+    source = _context_var.get()
+    ctx = CallContext()
+    ctx.task = None
+    if source is not None:
+        for (oid, name), value in list(source.values.items()):
+            if oid == id(obj):
+                if isinstance(getattr(type(obj), name, None), step_scoped):
+                    value = copy.deepcopy(value)
+                ctx.set(obj, name, value)
+    return ctx
+
+
+def enter_call_context(ctx: CallContext) -> None:
+    """Make ctx the current call context of the running task (which owns its context copy)."""
+    ctx.task = _current_task()
+    _context_var.set(ctx)
+
+
+def run_in_call_context(fn: Callable) -> Callable:
+    """Wrap an async execute() so each call gets its own CallContext."""
+
+    @functools.wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        ctx = _context_var.get()
+        if ctx is not None and ctx.task is _current_task():
+            return await fn(self, *args, **kwargs)
+        ctx = CallContext()
+        token = _context_var.set(ctx)
+        try:
+            return await fn(self, *args, **kwargs)
+        finally:
+            _context_var.reset(token)
+            await ctx.close()
+
+    wrapper.__call_context__ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class call_scoped:
+    """Attribute whose value belongs to the running call (plain instance attribute otherwise).
+
+    Without a default an unset attribute raises AttributeError, exactly like an attribute that
+    was never assigned, so ``getattr(self, name, fallback)`` keeps working.
+    """
+
+    def __init__(self, default: Any = _MISSING, factory: Optional[Callable[[], Any]] = None) -> None:
+        self.default = default
+        self.factory = factory
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def initial(self) -> Any:
+        if self.factory is not None:
+            return self.factory()
+        if self.default is _MISSING:
+            raise AttributeError(self.name)
+        return self.default
+
+    def __get__(self, obj: Any, objtype: Optional[type] = None) -> Any:
+        if obj is None:
+            return self
+        ctx = _context_var.get()
+        if ctx is None:
+            try:
+                return obj.__dict__[self.name]
+            except KeyError:
+                value = obj.__dict__[self.name] = self.initial()
+                return value
+        key = (id(obj), self.name)
+        try:
+            return ctx.values[key]
+        except KeyError:
+            value = self.initial()
+            ctx.set(obj, self.name, value)
+            return value
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        ctx = _context_var.get()
+        if ctx is None:
+            obj.__dict__[self.name] = value
+        else:
+            ctx.set(obj, self.name, value)
+
+    def __delete__(self, obj: Any) -> None:
+        ctx = _context_var.get()
+        if ctx is None:
+            obj.__dict__.pop(self.name, None)
+        else:
+            ctx.values.pop((id(obj), self.name), None)
+
+
+class step_scoped(call_scoped):
+    """call_scoped workflow state that is saved per conversation between steps.
+
+    Declare on the tool class whatever a later step needs from an earlier one (plans, consulted
+    models, branches). The values of a step are stored under its continuation_id when the call
+    ends and restored before the next step with that id runs; step_fields() lists them.
+    """
+
+
+def step_fields(cls: type) -> list[str]:
+    return sorted({n for klass in cls.__mro__ for n, v in vars(klass).items() if isinstance(v, step_scoped)})
+
+
+class StepStateCache:
+    """In-process step state per continuation_id (bounded, least recently used evicted)."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                self._entries.move_to_end(key)
+            return state
+
+    def put(self, key: str, state: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
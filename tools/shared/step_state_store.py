@@ -0,0 +1,229 @@
+"""
+Workflow step state persisted in the conversation storage backend.
+
+StepStateCache alone only lets a multi-step workflow continue in the process that ran the
+previous step. StepStateStore also writes each conversation's step_scoped state to the storage
+backend (in-memory, or Redis with REDIS_URL) under its continuation_id, so any worker, or the
+same worker after a restart, can run the next step:
+- a snapshot of the full state and then one compact delta per step (lists that grew store only
+  the appended items, changed dict entries store only themselves); every
+  EXAI_WORKFLOW_STATE_SNAPSHOT_EVERY steps a new snapshot bounds how many deltas a load replays
+- a small head record {gen, seq, snap} names the latest state. A process keeps the decoded
+  state in its StepStateCache and reuses it while the head still matches, so the usual step
+  costs one head read plus one delta and head write
+- values are stored as JSON: pydantic models by field, sets as sorted lists. A field that
+  cannot be encoded stays in-process only
+
+EXAI_WORKFLOW_STATE_PERSIST=false keeps the in-process behaviour.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import uuid
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+
+from .execution_context import StepStateCache
+
+logger = logging.getLogger(__name__)
+
+_REPLACE, _APPEND, _TRUNCATE, _DICT, _REMOVE = "=", "a", "t", "d", "r"
+_ABSENT = object()
+
+
+def to_jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return {name: to_jsonable(getattr(value, name)) for name in type(value).model_fields}
+    if isinstance(value, (set, frozenset)):
+        return sorted((to_jsonable(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"cannot persist {type(value).__name__}")
+
+
+def diff(old: Any, new: Any) -> Optional[dict]:
+    """Delta turning old into new (None when equal)."""
+    if old == new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = {k: d for k, v in new.items() if (d := diff(old.get(k, _ABSENT), v)) is not None}
+        removed = [k for k in old if k not in new]
+        out: dict = {}
+        if changed:
+            out[_DICT] = changed
+        if removed:
+            out[_REMOVE] = removed
+        return out
+    if isinstance(old, list) and isinstance(new, list):
+        keep = 0
+        for a, b in zip(old, new):
+            if a != b:
+                break
+            keep += 1
+        out = {_APPEND: new[keep:]}
+        if keep < len(old):
+            out[_TRUNCATE] = keep
+        return out
+    return {_REPLACE: new}
+
+
+def apply(old: Any, delta: Optional[dict]) -> Any:
+    if delta is None:
+        return old
+    if _REPLACE in delta:
+        return delta[_REPLACE]
+    if _APPEND in delta:
+        base = list(old) if isinstance(old, list) else []
+        return base[: delta.get(_TRUNCATE, len(base))] + list(delta[_APPEND])
+    out = dict(old) if isinstance(old, dict) else {}
+    for k in delta.get(_REMOVE, ()):
+        out.pop(k, None)
+    for k, d in delta.get(_DICT, {}).items():
+        out[k] = apply(out.get(k), d)
+    return out
+
+
+class StepStateStore:
+    """Step state of one workflow tool per continuation_id, in process and in conversation storage."""
+
+    def __init__(
+        self,
+        tool_name: str,
+        descriptors: dict[str, Any],
+        cache: Optional[StepStateCache] = None,
+        storage: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self.tool_name = tool_name
+        self.descriptors = descriptors
+        self.cache = cache or StepStateCache()
+        self._storage = storage
+        self.persist = os.getenv("EXAI_WORKFLOW_STATE_PERSIST", "true").strip().lower() == "true"
+        self.snapshot_every = max(1, int(os.getenv("EXAI_WORKFLOW_STATE_SNAPSHOT_EVERY", "8")))
+
+    # Storage access -------------------------------------------------------------
+
+    def _backend(self):
+        if self._storage is not None:
+            return self._storage()
+        from utils.conversation_memory import get_storage
+
+        return get_storage()
+
+    def _ttl(self) -> int:
+        from utils.conversation_memory import CONVERSATION_TIMEOUT_SECONDS
+
+        return CONVERSATION_TIMEOUT_SECONDS
+
+    def _key(self, continuation_id: str, suffix: str = "") -> str:
+        return f"workflow_state:{self.tool_name}:{continuation_id}{suffix}"
+
+    def _read(self, storage, key: str) -> Any:
+        raw = storage.get(key)
+        return json.loads(raw) if raw else None
+
+    # Encoding ----------------------------------------------------------------------
+
+    def encode(self, values: dict[str, Any]) -> dict[str, Any]:
+        out = {}
+        for name, value in values.items():
+            try:
+                out[name] = to_jsonable(value)
+            except TypeError as e:
+                logger.debug(f"[STEP_STATE] {self.tool_name}.{name} kept in process only: {e}")
+        return out
+
+    def decode(self, encoded: dict[str, Any]) -> dict[str, Any]:
+        out = {}
+        for name, value in encoded.items():
+            descriptor = self.descriptors.get(name)
+            if descriptor is None:
+                continue
+            try:
+                default = descriptor.initial()
+            except AttributeError:
+                default = None
+            if isinstance(default, BaseModel):
+                value = type(default).model_validate(value)
+            elif isinstance(default, set):
+                value = set(value)
+            out[name] = value
+        return out
+
+    # Public API ---------------------------------------------------------------------
+
+    def load(self, continuation_id: str) -> Optional[dict[str, Any]]:
+        """State saved by the last step of this conversation in any process, or None if unknown."""
+        entry = self.cache.get(continuation_id)
+        if not self.persist or (entry and entry.get("unsynced")):
+            return entry["values"] if entry else None
+        try:
+            storage = self._backend()
+            head = self._read(storage, self._key(continuation_id))
+            if head is None:
+                return entry["values"] if entry else None
+            if entry and (entry["gen"], entry["seq"]) == (head["gen"], head["seq"]):
+                return entry["values"]
+            snap = self._read(storage, self._key(continuation_id, ":snap"))
+            if snap is None or snap.get("gen") != head["gen"] or snap["seq"] != head["snap"]:
+                return entry["values"] if entry else None
+            encoded = snap["state"]
+            for seq in range(head["snap"] + 1, head["seq"] + 1):
+                delta = self._read(storage, self._key(continuation_id, f":d:{seq}"))
+                if delta is None or delta.get("gen") != head["gen"]:
+                    logger.warning(f"[STEP_STATE] {self.tool_name}: delta {seq} of {continuation_id} missing")
+                    return entry["values"] if entry else None
+                encoded = apply(encoded, delta["delta"])
+        except Exception as e:
+            logger.warning(f"[STEP_STATE] {self.tool_name}: failed to load {continuation_id}: {e}")
+            return entry["values"] if entry else None
+        # Decoded values are mutated by the next step; the encoded base must stay as loaded
+        values = self.decode(copy.deepcopy(encoded))
+        # Fields that could not be persisted are still available from this process
+        if entry:
+            for name, value in entry["values"].items():
+                values.setdefault(name, value)
+        self.cache.put(
+            continuation_id,
+            {"gen": head["gen"], "seq": head["seq"], "snap": head["snap"], "encoded": encoded, "values": values},
+        )
+        return values
+
+    def save(self, continuation_id: str, values: dict[str, Any], fresh: bool = False) -> None:
+        """Save the state after a step: a delta against the loaded state, or a new snapshot."""
+        entry = None if fresh else self.cache.get(continuation_id)
+        if not self.persist:
+            self.cache.put(continuation_id, {"gen": None, "seq": 0, "snap": 0, "encoded": None, "values": values})
+            return
+        encoded = self.encode(values)
+        if entry is None or entry.get("encoded") is None:
+            gen, seq, snap = uuid.uuid4().hex[:12], 1, 1
+        else:
+            gen, seq, snap = entry["gen"], entry["seq"] + 1, entry["snap"]
+        try:
+            storage = self._backend()
+            ttl = self._ttl()
+            if seq == 1 or seq - snap >= self.snapshot_every:
+                snap = seq
+                record = {"gen": gen, "seq": seq, "state": encoded}
+                storage.setex(self._key(continuation_id, ":snap"), ttl, json.dumps(record, ensure_ascii=False))
+            else:
+                record = {"gen": gen, "seq": seq, "delta": diff(entry["encoded"], encoded)}  # type: ignore[index]
+                storage.setex(self._key(continuation_id, f":d:{seq}"), ttl, json.dumps(record, ensure_ascii=False))
+            # Head last: readers never see a seq whose delta is not stored yet
+            storage.setex(self._key(continuation_id), ttl, json.dumps({"gen": gen, "seq": seq, "snap": snap}))
+        except Exception as e:
+            logger.warning(f"[STEP_STATE] {self.tool_name}: failed to persist {continuation_id}: {e}")
+            # This process holds the newest state; the next save writes a fresh snapshot
+            self.cache.put(continuation_id, {"unsynced": True, "encoded": None, "values": values})
+            return
+        self.cache.put(
+            continuation_id, {"gen": gen, "seq": seq, "snap": snap, "encoded": encoded, "values": values}
+        )
@@ -453,8 +453,15 @@ class SimpleTool(BaseTool):
                 pass
 
             # Generate AI response with fallback (free-first → paid) when applicable
+            import asyncio as _asyncio
             import os as _os
             from src.providers.registry import ModelProviderRegistry as _Registry
+            from utils.cancellation import current_cancel_token
+            from utils.token_stream import get_token_stream
+            # When the transport streams tokens, run the blocking provider call off the event loop
+            # so deltas can be flushed to the client while the model is still generating.
+            # Cancellable calls are offloaded too, so the awaiting task can be cancelled mid-call.
+            _offload = get_token_stream() is not None or current_cancel_token() is not None
             selected_model = self._current_model_name
             tool_call_metadata = []  # collected sanitized tool-call events for UI dropdown
 
@@ -538,7 +545,12 @@ class SimpleTool(BaseTool):
                         hints.append(f"estimated_tokens:{int(raw_tokens)}")
                 except Exception:
                     pass
-                model_response = _Registry.call_with_fallback(tool_category, _call_with_model, hints=hints)
+                if _offload:
+                    model_response = await _asyncio.to_thread(
+                        _Registry.call_with_fallback, tool_category, _call_with_model, hints=hints
+                    )
+                else:
+                    model_response = _Registry.call_with_fallback(tool_category, _call_with_model, hints=hints)
                 # Sync the model context and current name to the selected model
                 self._current_model_name = selected_model
                 self._model_context.model_name = selected_model
@@ -568,7 +580,7 @@ class SimpleTool(BaseTool):
                         provider_kwargs["tool_choice"] = ws.tool_choice
                 except Exception:
                     pass
-                model_response = provider.generate_content(
+                _gen_kwargs = dict(
                     prompt=prompt,
                     model_name=self._current_model_name,
                     system_prompt=system_prompt,
@@ -577,6 +589,10 @@ class SimpleTool(BaseTool):
                     images=images if images else None,
                     **provider_kwargs,
                 )
+                if _offload:
+                    model_response = await _asyncio.to_thread(provider.generate_content, **_gen_kwargs)
+                else:
+                    model_response = provider.generate_content(**_gen_kwargs)
                 # End web tool timing if any
                 try:
                     if 'web_event' in locals() and web_event is not None:
@@ -864,7 +880,12 @@ class SimpleTool(BaseTool):
     # Convenience methods for common tool patterns
 
     def build_standard_prompt(
-        self, system_prompt: str, user_content: str, request, file_context_title: str = "CONTEXT FILES"
+        self,
+        system_prompt: str,
+        user_content: str,
+        request,
+        file_context_title: str = "CONTEXT FILES",
+        websearch_guidance: Optional[str] = None,
     ) -> str:
         """
         Build a standard prompt with system prompt, user content, and optional files.
@@ -880,6 +901,7 @@ class SimpleTool(BaseTool):
             user_content: The main user request/content
             request: The validated request object
             file_context_title: Title for the file context section
+            websearch_guidance: Guidance to use instead of get_websearch_guidance()
 
         Returns:
             Complete formatted prompt ready for the AI model
@@ -904,7 +926,9 @@ class SimpleTool(BaseTool):
         websearch_instruction = ""
         use_websearch = self.get_request_use_websearch(request)
         if use_websearch:
-            websearch_instruction = self.get_websearch_instruction(use_websearch, self.get_websearch_guidance())
+            if websearch_guidance is None:
+                websearch_guidance = self.get_websearch_guidance()
+            websearch_instruction = self.get_websearch_instruction(use_websearch, websearch_guidance)
 
         # Combine system prompt with user content
         full_prompt = f"""{system_prompt}{websearch_instruction}
@@ -1105,14 +1129,7 @@ Please provide a thoughtful, comprehensive response:"""
         # Build standard prompt with Chat-style web search guidance
         websearch_guidance = self.get_chat_style_websearch_guidance()
 
-        # Override the websearch guidance temporarily
-        original_guidance = self.get_websearch_guidance
-        self.get_websearch_guidance = lambda: websearch_guidance
-
-        try:
-            full_prompt = self.build_standard_prompt(system_prompt, user_content, request, "CONTEXT FILES")
-        finally:
-            # Restore original guidance method
-            self.get_websearch_guidance = original_guidance
-
-        return full_prompt
+        # Passed per call: swapping the method on the shared instance would leak into concurrent calls
+        return self.build_standard_prompt(
+            system_prompt, user_content, request, "CONTEXT FILES", websearch_guidance=websearch_guidance
+        )
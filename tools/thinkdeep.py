@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_CREATIVE
 from systemprompts import THINKDEEP_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import step_scoped
 
 from .workflow.base import WorkflowTool
 
@@ -154,6 +155,8 @@ class ThinkDeepTool(WorkflowTool):
         "these tools can provide enhanced capabilities."
     )
 
+    stored_request_params = step_scoped(factory=dict)
+
     def __init__(self):
         """Initialize the ThinkDeep workflow tool"""
         super().__init__()
@@ -561,6 +564,10 @@ but also acknowledge strong insights and valid conclusions.
 
         return actions
 
+    def supports_speculative_expert_analysis(self) -> bool:
+        """Late thinkdeep steps refine conclusions the expert validates anyway, rarely add inputs."""
+        return True
+
     def should_call_expert_analysis(self, consolidated_findings, request=None) -> bool:
         """
         Determine if expert analysis should be called based on confidence and completion.
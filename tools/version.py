@@ -124,6 +124,21 @@ def fetch_github_version() -> Optional[tuple[str, str]]:
         return None
 
 
+def _startup_report() -> dict[str, Any]:
+    """Import profile plus lazy tool/manifest state of the running server (if it was imported)."""
+    from utils import import_profile
+
+    report = import_profile.report()
+    try:
+        server_module = sys.modules.get("server")
+        registry = getattr(server_module, "_tool_registry", None)
+        if registry is not None:
+            report["tools"] = registry.load_stats()
+    except Exception as e:
+        logger.debug(f"Could not read tool load stats: {e}")
+    return report
+
+
 class VersionTool(BaseTool):
     """
     Tool for displaying EX MCP Server version and system information.
@@ -264,6 +279,20 @@ class VersionTool(BaseTool):
 
         output_lines.append("")
 
+        # Startup cost: import phases, lazily loaded tools and (opt-in) slowest imports
+        startup = _startup_report()
+        output_lines.append("## Startup")
+        phases = startup.get("phases_ms", {})
+        for phase, ms in phases.items():
+            output_lines.append(f"- **{phase}**: {ms} ms")
+        tools_state = startup.get("tools") or {}
+        if tools_state:
+            output_lines.append(f"- **Tools loaded**: {tools_state.get('loaded')}/{tools_state.get('registered')}")
+        output_lines.append(f"- **Modules loaded**: {startup.get('modules_loaded')}")
+        for item in startup.get("slowest_imports", [])[:5]:
+            output_lines.append(f"- `{item['module']}`: {item['cumulative_ms']} ms (self {item['self_ms']} ms)")
+        output_lines.append("")
+
         # Format output
         content = "\n".join(output_lines)
 
@@ -277,6 +306,7 @@ class VersionTool(BaseTool):
                 "last_updated": __updated__,
                 "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
                 "platform": f"{platform.system()} {platform.release()}",
+                "startup": startup,
             },
         )
 
@@ -19,10 +19,10 @@ from typing import Any, Optional
 import asyncio
 import json
 import logging
-import os
 
 from tools.shared.base_models import WorkflowRequest
 from tools.shared.base_tool import BaseTool
+from utils.runtime_config import get_config
 
 from .schema_builders import WorkflowSchemaBuilder
 from .workflow_mixin import BaseWorkflowMixin
@@ -512,8 +512,7 @@ class WorkflowTool(BaseTool, BaseWorkflowMixin):
                 use_assistant = self.get_request_use_assistant_model(req) if req is not None else True
             except Exception:
                 # Fallback to env default when request model isn't available
-                _env = (os.getenv("DEFAULT_USE_ASSISTANT_MODEL") or "").strip().lower()
-                use_assistant = _env not in ("false", "0", "no", "off")
+                use_assistant = get_config().default_use_assistant_model
 
             if is_final and use_assistant:
                 # For final expert step: cap by expert budget + buffer, under WS ceiling
@@ -521,14 +520,11 @@ class WorkflowTool(BaseTool, BaseWorkflowMixin):
                     expert_budget = float(self.get_expert_timeout_secs(req))
                 except Exception:
                     expert_budget = 90.0
-                try:
-                    ws_ceiling = float(os.getenv("EXAI_WS_CALL_TIMEOUT", "180"))
-                except Exception:
-                    ws_ceiling = 180.0
+                ws_ceiling = get_config().workflow_call_ceiling_s
                 timeout = max(5.0, min(expert_budget + 30.0, ws_ceiling - 5.0))
             else:
                 # For intermediate steps: use workflow step timeout
-                timeout = float(os.getenv("WORKFLOW_STEP_TIMEOUT_SECS", str(timeout_default)))
+                timeout = get_config().workflow_step_timeout_s
         except Exception:
             timeout = timeout_default
 
@@ -0,0 +1,162 @@
+"""
+Speculative expert analysis for workflow tools.
+
+The expert call normally starts only when the client sends the final step
+(next_step_required=false). For tools whose findings are usually settled one step earlier,
+WorkflowMixin can start it in the background as soon as a step reports enough confidence
+(EXAI_SPECULATIVE_EXPERT=true, threshold EXAI_SPECULATIVE_EXPERT_CONFIDENCE):
+- findings_fingerprint() hashes what the expert analysis depends on: relevant files (with
+  their size and mtime), step findings, relevant context, issues, hypotheses and the call
+  parameters. Step findings count by their text, so a final step that only restates earlier
+  findings still matches while one that adds findings does not
+- SpeculationRegistry keeps at most one running call per continuation_id. The final step
+  takes it and reuses the result if its fingerprint still matches, otherwise it is cancelled
+  (task and CancelToken) and the expert call runs as usual
+- Speculative calls run outside the daemon's admission control (the step that started them
+  has already returned its slot), so SpeculationSlots caps them per provider
+  (EXAI_SPECULATIVE_EXPERT_MAX_INFLIGHT); a step that finds no free slot does not speculate.
+  Cancelling the starting step cancels its speculative call as well
+- State is per process: in multi-worker mode a final step served by another worker does not
+  see the speculative call and runs the expert itself
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+from utils.cancellation import CancelToken
+from utils.file_utils import file_signature
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_ORDER = ("exploring", "low", "medium", "high", "very_high", "almost_certain", "certain")
+
+# Expert results that are not worth reusing; the final step calls the expert again
+FAILED_STATUSES = frozenset({"analysis_error", "analysis_timeout", "analysis_partial", "empty_response"})
+
+
+def confidence_at_least(confidence: Optional[str], threshold: str) -> bool:
+    try:
+        return CONFIDENCE_ORDER.index((confidence or "").lower()) >= CONFIDENCE_ORDER.index(threshold.lower())
+    except ValueError:
+        return False
+
+
+_STEP_PREFIX = re.compile(r"^Step \d+: ")
+
+
+def distinct_step_findings(findings: Iterable[str]) -> list[str]:
+    """Findings text of each step ("Step N: ..." as consolidated), without repeats or blanks."""
+    texts = (_STEP_PREFIX.sub("", str(f)).strip() for f in findings)
+    return sorted({t for t in texts if t})
+
+
+def findings_fingerprint(files: Iterable[str], parts: dict[str, Any]) -> str:
+    payload = {"files": [file_signature(p) for p in sorted(set(files))], **parts}
+    raw = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SpeculationSlots:
+    """Running speculative expert calls per provider (shared by all workflow tools)."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, provider: str, limit: int) -> bool:
+        with self._lock:
+            if self._inflight.get(provider, 0) >= limit:
+                return False
+            self._inflight[provider] = self._inflight.get(provider, 0) + 1
+            return True
+
+    def release(self, provider: str) -> None:
+        with self._lock:
+            left = self._inflight.get(provider, 0) - 1
+            if left > 0:
+                self._inflight[provider] = left
+            else:
+                self._inflight.pop(provider, None)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._inflight)
+
+
+_slots = SpeculationSlots()
+
+
+def get_speculation_slots() -> SpeculationSlots:
+    return _slots
+
+
+class SpeculativeExpertCall:
+    def __init__(
+        self,
+        fingerprint: str,
+        task: "asyncio.Task",
+        token: CancelToken,
+        release: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.fingerprint = fingerprint
+        self.task = task
+        self.token = token
+        self.started = time.monotonic()
+        self._release = release
+        task.add_done_callback(lambda _t: self._release_slot())
+
+    def _release_slot(self) -> None:
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def cancel(self, reason: str) -> None:
+        self.token.cancel(reason)
+        if not self.task.done():
+            self.task.cancel()
+        # The slot is free as soon as the call is abandoned, not when the task gets to finish
+        self._release_slot()
+
+
+class SpeculationRegistry:
+    """Running speculative expert calls per continuation_id (bounded, oldest cancelled first).
+
+    Only touched from the event loop thread.
+    """
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, SpeculativeExpertCall]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[SpeculativeExpertCall]:
+        return self._entries.get(key)
+
+    def put(self, key: str, call: SpeculativeExpertCall) -> None:
+        self.discard(key, "superseded")
+        self._entries[key] = call
+        while len(self._entries) > self.max_entries:
+            _, oldest = self._entries.popitem(last=False)
+            oldest.cancel("evicted")
+
+    def take(self, key: str) -> Optional[SpeculativeExpertCall]:
+        return self._entries.pop(key, None)
+
+    def discard(self, key: str, reason: str, call: Optional[SpeculativeExpertCall] = None) -> None:
+        """Cancel the call for key (only if it is still `call`, when given)."""
+        if call is not None and self._entries.get(key) is not call:
+            return
+        call = self._entries.pop(key, None)
+        if call is not None:
+            call.cancel(reason)
+            logger.debug("speculative expert call for %s cancelled (%s)", key, reason)
+
+    def __len__(self) -> int:
+        return len(self._entries)
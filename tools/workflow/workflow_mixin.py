@@ -24,6 +24,7 @@ import json
 import logging
 import os
 import asyncio
+import contextvars
 import time
 from abc import ABC, abstractmethod
 from typing import Any, Optional
@@ -32,9 +33,33 @@ from mcp.types import TextContent
 from utils.progress import send_progress
 
 from config import MCP_PROMPT_SIZE_LIMIT
+from utils.cancellation import CancelToken, current_cancel_token, start_cancel_scope
 from utils.conversation_memory import add_turn, create_thread
+from utils.expert_cache import cache_disabled_for, expert_cache_key, get_expert_cache
+from utils.progress import start_progress_capture
+from utils.runtime_config import get_config
+from utils.token_stream import start_token_stream
 
 from ..shared.base_models import ConsolidatedFindings
+from ..shared.execution_context import (
+    StepStateCache,
+    call_scoped,
+    current_call_context,
+    detach_call_context,
+    enter_call_context,
+    step_fields,
+    step_scoped,
+)
+from ..shared.step_state_store import StepStateStore
+from .speculation import (
+    FAILED_STATUSES,
+    SpeculationRegistry,
+    SpeculativeExpertCall,
+    confidence_at_least,
+    distinct_step_findings,
+    findings_fingerprint,
+    get_speculation_slots,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -67,11 +92,60 @@ class BaseWorkflowMixin(ABC):
     - _prepare_file_content_for_prompt()
     """
 
+    # Step state: per call while a step runs, kept per continuation_id between steps
+    work_history = step_scoped(factory=list)
+    consolidated_findings = step_scoped(factory=ConsolidatedFindings)
+    initial_request = step_scoped(default=None)
+    initial_issue = step_scoped(default=None)
+    # Expert result cache outcome of the running call, reported in response metadata
+    _expert_cache_info = call_scoped(default=None)
+    # Tools whose hypotheses restate the step findings (see prepare_step_data) set this to
+    # False so the expert fingerprint does not count them twice
+    expert_fingerprint_hypotheses = True
+
     def __init__(self) -> None:
         super().__init__()
         self.work_history: list[dict[str, Any]] = []
         self.consolidated_findings: ConsolidatedFindings = ConsolidatedFindings()
         self.initial_request: Optional[str] = None
+        self._step_states = StepStateCache()
+        self._step_store = StepStateStore(
+            self.get_name(),
+            {name: getattr(type(self), name) for name in step_fields(type(self))},
+            cache=self._step_states,
+        )
+        self._speculations = SpeculationRegistry()
+
+    async def _bind_step_state(self, continuation_id: Optional[str], fresh: bool) -> None:
+        """Load this conversation's step state into the running call and save it when the call ends.
+
+        fresh starts from defaults (step 1). A later step restores the state saved under its
+        continuation_id, by this process or any other (StepStateStore keeps it in the
+        conversation storage backend); without one, or for an unknown conversation, it falls
+        back to the instance's latest state as before. Storage reads and writes run in a worker
+        thread so a slow backend (SQLite lock waits, Redis) does not stall the event loop.
+        """
+        ctx = current_call_context()
+        if ctx is None or ctx.get(self, "_step_state_bound", False):
+            return  # Used outside execute() (state stays on the instance), or already bound
+        ctx.set(self, "_step_state_bound", True)
+        fields = step_fields(type(self))
+        saved: Optional[dict[str, Any]] = {} if fresh else None
+        if saved is None and continuation_id:
+            saved = await asyncio.to_thread(self._step_store.load, continuation_id)
+        if saved is None:
+            saved = {name: self.__dict__[name] for name in fields if name in self.__dict__}
+        for name, value in saved.items():
+            ctx.set(self, name, value)
+        if continuation_id:
+            ctx.on_exit(
+                lambda: asyncio.to_thread(
+                    self._step_store.save,
+                    continuation_id,
+                    {name: ctx.get(self, name) for name in fields if ctx.has(self, name)},
+                    fresh,
+                )
+            )
 
     # ================================================================================
     # Abstract Methods - Required Implementation by BaseTool or Subclasses
@@ -240,29 +314,13 @@ class BaseWorkflowMixin(ABC):
         Default from env EXPERT_ANALYSIS_TIMEOUT_SECS (seconds), fallback 300.
         Tools may override (e.g., thinkdeep) for per-tool tuning.
         """
-        import os
-        try:
-            return float(os.getenv("EXPERT_ANALYSIS_TIMEOUT_SECS", "300"))
-        except Exception:
-            return 300.0
+        return get_config().expert_timeout_s
 
     def get_expert_heartbeat_interval_secs(self, request=None) -> float:
         """Interval in seconds for emitting progress while waiting on expert analysis.
         Priority: EXAI_WS_EXPERT_KEEPALIVE_MS (ms) > EXPERT_HEARTBEAT_INTERVAL_SECS (s) > 10s default.
         """
-        import os
-        try:
-            ms = os.getenv("EXAI_WS_EXPERT_KEEPALIVE_MS", "").strip()
-            if ms:
-                val = float(ms) / 1000.0
-                if val > 0:
-                    return max(0.5, val)
-        except Exception:
-            pass
-        try:
-            return float(os.getenv("EXPERT_HEARTBEAT_INTERVAL_SECS", "10"))
-        except Exception:
-            return 10.0
+        return get_config().expert_heartbeat_s
 
     def get_request_temperature(self, request) -> float:
         """Get temperature from request. Override for custom temperature handling."""
@@ -309,6 +367,14 @@ class BaseWorkflowMixin(ABC):
         """
         return "Please provide expert analysis based on the investigation findings."
 
+    def use_expert_result_cache(self) -> bool:
+        """
+        Whether expert analysis results may be served from the result cache (utils/expert_cache.py).
+        Override to return False for tools whose expert answer must always be fresh;
+        EXAI_EXPERT_CACHE_DISABLE_FOR_TOOLS opts tools out by name.
+        """
+        return True
+
     def get_request_use_assistant_model(self, request) -> bool:
         """
         Get use_assistant_model from request. Override for custom assistant model handling.
@@ -325,11 +391,7 @@ class BaseWorkflowMixin(ABC):
         except AttributeError:
             pass
         # Allow environment default override to make tools fast-by-default when desired
-        import os as _os
-        env = (_os.getenv("DEFAULT_USE_ASSISTANT_MODEL") or "").strip().lower()
-        if env in ("false", "0", "no", "off"):
-            return False
-        return True
+        return get_config().default_use_assistant_model
 
     def get_step_guidance_message(self, request) -> str:
         """
@@ -447,16 +509,16 @@ class BaseWorkflowMixin(ABC):
 
         # Read files directly without conversation history filtering
         logger.debug(f"[WORKFLOW_FILES] {self.get_name()}: Force embedding {len(files)} files for expert analysis")
+        # Expand once: the expanded list is both what gets read and what is tracked
+        processed_files = expand_paths(files)
         file_content = read_files(
-            files,
+            processed_files or files,
             max_tokens=max_tokens,
             reserve_tokens=1000,
             include_line_numbers=self.wants_line_numbers_by_default(),
+            expand=not processed_files,
         )
 
-        # Expand paths to get individual files for tracking
-        processed_files = expand_paths(files)
-
         logger.debug(
             f"[WORKFLOW_FILES] {self.get_name()}: Expert analysis embedding: {len(processed_files)} files, "
             f"{len(file_content):,} characters"
@@ -766,9 +828,12 @@ class BaseWorkflowMixin(ABC):
             if not continuation_id and request.step_number == 1:
                 clean_args = {k: v for k, v in arguments.items() if k not in ["_model_context", "_resolved_model_name"]}
                 continuation_id = create_thread(self.get_name(), clean_args)
+                await self._bind_step_state(continuation_id, fresh=True)
                 self.initial_request = request.step
                 # Allow tools to store initial description for expert analysis
                 self.store_initial_issue(request.step)
+            else:
+                await self._bind_step_state(continuation_id, fresh=request.step_number == 1)
 
             # Handle backtracking if requested
             backtrack_step = self.get_backtrack_step(request)
@@ -804,6 +869,7 @@ class BaseWorkflowMixin(ABC):
             else:
                 # Force Claude to work before calling tool again
                 response_data = self.handle_work_continuation(response_data, request)
+                self._maybe_speculate_expert_analysis(continuation_id, arguments, request)
 
             # Allow tools to customize the final response
             response_data = self.customize_workflow_response(response_data, request)
@@ -1464,9 +1530,11 @@ class BaseWorkflowMixin(ABC):
             # Standard expert analysis path
             response_data["status"] = "calling_expert_analysis"
 
-            # Call expert analysis
-            expert_analysis = await self._call_expert_analysis(arguments, request)
+            # Call expert analysis (or reuse the result started speculatively by an earlier step)
+            expert_analysis = await self._expert_analysis_for_completion(arguments, request, response_data)
             response_data["expert_analysis"] = expert_analysis
+            if self._expert_cache_info:
+                response_data.setdefault("metadata", {})["expert_cache"] = self._expert_cache_info
 
             # Handle special expert analysis statuses
             if isinstance(expert_analysis, dict) and expert_analysis.get("status") in [
@@ -1531,6 +1599,10 @@ class BaseWorkflowMixin(ABC):
                     "and recommendations to the user based on the work results."
                 )
 
+        continuation_id = self.get_request_continuation_id(request)
+        if continuation_id:
+            self._speculations.discard(continuation_id, "not_needed")
+
         return response_data
 
     def handle_work_continuation(self, response_data: dict, request) -> dict:
@@ -1652,6 +1724,144 @@ class BaseWorkflowMixin(ABC):
 
         return "\n".join(summary_parts)
 
+    # ================================================================================
+    # Speculative Expert Analysis
+    # ================================================================================
+
+    def supports_speculative_expert_analysis(self) -> bool:
+        """
+        Whether the expert call may start before the final step (EXAI_SPECULATIVE_EXPERT).
+
+        When enabled, a non-final step that reaches EXAI_SPECULATIVE_EXPERT_CONFIDENCE starts
+        the expert call in the background (see tools/workflow/speculation.py), and the final step
+        reuses its result if get_expert_fingerprint() still matches. Override to return True in
+        tools whose final step usually adds no findings; elsewhere speculation would only spend
+        provider calls on results that get discarded.
+        """
+        return False
+
+    def get_expert_fingerprint_parts(self, request) -> dict[str, Any]:
+        """
+        Expert analysis inputs besides the relevant files. Findings, issues and hypotheses
+        restated by a later step count once, so only a final step that adds to them changes the
+        fingerprint. Override to add or drop inputs (see also expert_fingerprint_hypotheses).
+        """
+        findings = self.consolidated_findings
+        issues = {json.dumps(issue, sort_keys=True, default=str) for issue in findings.issues_found}
+        parts = {
+            "tool": self.get_name(),
+            "initial_request": self.initial_request,
+            "findings": distinct_step_findings(findings.findings),
+            "relevant_context": sorted(findings.relevant_context),
+            "issues_found": sorted(issues),
+            "hypotheses": list(dict.fromkeys(str(h.get("hypothesis")) for h in findings.hypotheses)),
+            "images": sorted(set(findings.images)),
+            "model": getattr(self, "_current_model_name", None) or self.get_request_model_name(request),
+            "thinking_mode": self.get_request_thinking_mode(request),
+            "use_websearch": self.get_request_use_websearch(request),
+            "temperature": self.get_request_temperature(request),
+        }
+        if not self.expert_fingerprint_hypotheses:
+            del parts["hypotheses"]
+        return parts
+
+    def get_expert_fingerprint(self, request) -> str:
+        """Fingerprint of the expert analysis inputs (speculative results are reused only on a match)."""
+        return findings_fingerprint(self.consolidated_findings.relevant_files, self.get_expert_fingerprint_parts(request))
+
+    def _maybe_speculate_expert_analysis(self, continuation_id: Optional[str], arguments: dict, request) -> None:
+        """Start (or keep) a background expert call after a non-final step that is confident enough."""
+        if not continuation_id or not self.supports_speculative_expert_analysis():
+            return
+        cfg = get_config()
+        fingerprint = None
+        try:
+            # The expert sees this step as if it were the final one
+            final = request.model_copy(update={"next_step_required": False})
+            if (
+                cfg.speculative_expert
+                and confidence_at_least(self.get_request_confidence(request), cfg.speculative_expert_confidence)
+                and self.requires_expert_analysis()
+                and not self.should_skip_expert_analysis(final, self.consolidated_findings)
+                and self.should_call_expert_analysis(self.consolidated_findings, final)
+            ):
+                fingerprint = self.get_expert_fingerprint(final)
+        except Exception as e:
+            logger.debug(f"[SPECULATIVE_EXPERT] {self.get_name()}: not started: {e}")
+        running = self._speculations.get(continuation_id)
+        if running is not None and running.fingerprint == fingerprint:
+            return
+        # A stale call for this conversation gives its provider slot back before a new one starts
+        self._speculations.discard(continuation_id, "not_eligible" if fingerprint is None else "superseded")
+        if fingerprint is None:
+            return
+        provider = self._speculation_provider_key(request)
+        slots = get_speculation_slots()
+        if not slots.try_acquire(provider, max(0, cfg.speculative_expert_max_inflight)):
+            logger.debug(f"[SPECULATIVE_EXPERT] {self.get_name()}: no free slot for {provider}; not started")
+            return
+        token = CancelToken()
+        task = asyncio.create_task(
+            self._run_speculative_expert(detach_call_context(self), token, dict(arguments), final)
+        )
+        call = SpeculativeExpertCall(fingerprint, task, token, release=lambda: slots.release(provider))
+        self._speculations.put(continuation_id, call)
+        parent = current_cancel_token()
+        if parent is not None:
+            # Cancelling the step (cancel_tool, call timeout) also stops what it started
+            loop = asyncio.get_running_loop()
+            parent.add_callback(
+                lambda: loop.call_soon_threadsafe(self._speculations.discard, continuation_id, "call_cancelled", call)
+            )
+        logger.info(f"[SPECULATIVE_EXPERT] {self.get_name()}: started for {continuation_id} after step {request.step_number}")
+
+    def _speculation_provider_key(self, request) -> str:
+        try:
+            return self._model_context.provider.get_provider_type().value
+        except Exception:
+            return self.get_request_model_name(request) or "default"
+
+    async def _run_speculative_expert(self, ctx, token: CancelToken, arguments: dict, request) -> dict:
+        # This task runs in its own context copy: bind the detached step state and a private
+        # cancel token, and keep tokens/progress away from the call that started it
+        enter_call_context(ctx)
+        start_cancel_scope(token)
+        start_token_stream(None)  # type: ignore[arg-type]
+        start_progress_capture()
+        return await self._call_expert_analysis(arguments, request)
+
+    async def _expert_analysis_for_completion(self, arguments: dict, request, response_data: dict) -> dict:
+        """Reuse a matching speculative expert result, otherwise call the expert now."""
+        continuation_id = self.get_request_continuation_id(request)
+        speculation = self._speculations.take(continuation_id) if continuation_id else None
+        if speculation is None:
+            return await self._call_expert_analysis(arguments, request)
+
+        head_start = time.monotonic() - speculation.started
+        try:
+            matches = speculation.fingerprint == self.get_expert_fingerprint(request)
+        except Exception:
+            matches = False
+        result = None
+        if matches and not speculation.task.cancelled():
+            try:
+                result = await speculation.task
+            except asyncio.CancelledError:
+                speculation.cancel("call_cancelled")
+                raise
+            outcome = "failed" if isinstance(result, dict) and result.get("status") in FAILED_STATUSES else "reused"
+        else:
+            speculation.cancel("findings_changed")
+            outcome = "discarded"
+        logger.info(f"[SPECULATIVE_EXPERT] {self.get_name()}: {outcome} for {continuation_id}")
+        response_data.setdefault("metadata", {})["expert_speculation"] = {
+            "outcome": outcome,
+            "head_start_s": round(head_start, 3),
+        }
+        if outcome == "reused":
+            return result
+        return await self._call_expert_analysis(arguments, request)
+
     async def _call_expert_analysis(self, arguments: dict, request) -> dict:
         """Call external model for expert analysis with watchdog and graceful degradation.
 
@@ -1720,6 +1930,28 @@ class BaseWorkflowMixin(ABC):
             for warning in temp_warnings:
                 logger.warning(warning)
 
+            # Identical prompt, files and parameters as an earlier run: reuse its result
+            cache = get_expert_cache() if self.use_expert_result_cache() else None
+            cache_key = None
+            if cache is not None and not cache_disabled_for(self.get_name()):
+                cache_key = expert_cache_key(
+                    self.get_name(),
+                    system_prompt,
+                    prompt,
+                    model_name,
+                    validated_temperature,
+                    self.get_request_thinking_mode(request),
+                    self.get_request_use_websearch(request),
+                    self.consolidated_findings.images,
+                )
+                cached = await asyncio.to_thread(cache.get, cache_key)
+                if cached is not None:
+                    result, age = cached
+                    self._expert_cache_info = {"hit": True, "age_s": round(age, 1), "key": cache_key[:16]}
+                    logger.info(f"[EXPERT_CACHE] {self.get_name()}: hit {cache_key[:16]} (age {age:.0f}s)")
+                    return result
+                self._expert_cache_info = {"hit": False, "key": cache_key[:16]}
+
             # Watchdog and soft-deadline setup
             start = time.time()
             try:
@@ -1741,7 +1973,8 @@ class BaseWorkflowMixin(ABC):
                     use_websearch=self.get_request_use_websearch(request),
                     images=list(set(self.consolidated_findings.images)) if self.consolidated_findings.images else None,
                 )
-            task = loop.run_in_executor(None, _invoke_provider)
+            # copy_context() carries per-call ContextVars (e.g. the token stream) into the worker thread
+            task = loop.run_in_executor(None, contextvars.copy_context().run, _invoke_provider)
 
             # Poll until done or deadline; emit progress breadcrumbs so UI stays alive
             hb = max(5.0, self.get_expert_heartbeat_interval_secs(request))
@@ -1757,8 +1990,9 @@ class BaseWorkflowMixin(ABC):
                             allow_fb = _os.getenv("EXPERT_FALLBACK_ON_RATELIMIT", "true").strip().lower() == "true"
                         except Exception:
                             allow_fb = True
-                        err_text = str(e)
-                        is_rate_limited = ("429" in err_text) or ("ReachLimit" in err_text) or ("concurrent" in err_text.lower())
+                        from utils.rate_limit import is_rate_limit_error
+                        # Structured status/SDK error type first (wrapped causes included), message markers last
+                        is_rate_limited = is_rate_limit_error(e)
                         time_left = deadline - time.time()
                         if allow_fb and is_rate_limited and time_left > 3.0:
                             # Try fallback to Kimi provider quickly
@@ -1785,7 +2019,7 @@ class BaseWorkflowMixin(ABC):
                                         use_websearch=self.get_request_use_websearch(request),
                                         images=list(set(self.consolidated_findings.images)) if self.consolidated_findings.images else None,
                                     )
-                                fb_task = loop.run_in_executor(None, _invoke_fb)
+                                fb_task = loop.run_in_executor(None, contextvars.copy_context().run, _invoke_fb)
                                 # Wait within remaining time, emitting heartbeats
                                 while True:
                                     if fb_task.done():
@@ -1807,8 +2041,8 @@ class BaseWorkflowMixin(ABC):
                                         send_progress(f"{self.get_name()}: Waiting on expert analysis (provider=kimi)...")
                                     except Exception:
                                         pass
-                                    # Sleep only up to remaining time
-                                    await asyncio.sleep(min(hb, max(0.1, deadline - now_fb)))
+                                    # Wait only up to remaining time; wakes as soon as the call finishes
+                                    await asyncio.wait({fb_task}, timeout=min(hb, max(0.1, deadline - now_fb)))
                                 break
                         # No fallback or still failing - re-raise to outer handler
                         raise
@@ -1839,20 +2073,23 @@ class BaseWorkflowMixin(ABC):
                     send_progress(f"{self.get_name()}: Waiting on expert analysis (provider={provider.get_provider_type().value})...")
                 except Exception:
                     pass
-                # Sleep only up to remaining time to avoid overshooting deadline
-                await asyncio.sleep(min(hb, max(0.1, deadline - time.time())))
+                # Wait only up to remaining time to avoid overshooting deadline; wakes as soon as the call finishes
+                await asyncio.wait({task}, timeout=min(hb, max(0.1, deadline - time.time())))
 
 
             if model_response.content:
                 try:
                     analysis_result = json.loads(model_response.content.strip())
-                    return analysis_result
                 except json.JSONDecodeError:
-                    return {
+                    analysis_result = {
                         "status": "analysis_complete",
                         "raw_analysis": model_response.content,
                         "parse_error": "Response was not valid JSON",
                     }
+                if cache_key and isinstance(analysis_result, dict):
+                    if analysis_result.get("status") not in FAILED_STATUSES and not analysis_result.get("error"):
+                        await asyncio.to_thread(cache.put, cache_key, analysis_result)
+                return analysis_result
             else:
                 return {"error": "No response from model", "status": "empty_response"}
 
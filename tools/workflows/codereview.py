@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import CODEREVIEW_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import step_scoped
 
 from .workflow.base import WorkflowTool
 
@@ -186,6 +187,9 @@ class CodeReviewTool(WorkflowTool):
     including security audits, performance analysis, architectural review, and maintainability assessment.
     """
 
+    review_config = step_scoped(factory=dict)
+    expert_fingerprint_hypotheses = False
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
@@ -366,6 +370,10 @@ class CodeReviewTool(WorkflowTool):
                 "Focus on areas that haven't been thoroughly examined yet",
             ]
 
+    def supports_speculative_expert_analysis(self) -> bool:
+        """The final review step usually confirms the issues already recorded instead of finding new ones."""
+        return True
+
     def should_call_expert_analysis(self, consolidated_findings, request=None) -> bool:
         """
         Decide when to call external model based on investigation completeness.
@@ -11,13 +11,16 @@ Key features:
 - Context-aware file embedding
 - Support for stance-based analysis (for/against/neutral)
 - Final synthesis combining all perspectives
+- Optional parallel mode: all models consulted concurrently in step 1, with per-model deadlines
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import TYPE_CHECKING, Any
+import time
+from typing import TYPE_CHECKING, Any, Optional
 
 from pydantic import Field, model_validator
 
@@ -29,6 +32,10 @@ from mcp.types import TextContent
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import CONSENSUS_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import step_scoped
+from utils.cancellation import CancelToken, current_cancel_token, reset_cancel_scope, start_cancel_scope
+from utils.runtime_config import get_config
+from utils.token_stream import reset_token_stream, start_token_stream
 
 from .workflow.base import WorkflowTool
 
@@ -81,6 +88,14 @@ CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS = {
         "Optional list of image paths or base64 data URLs for visual context. Useful for UI/UX discussions, "
         "architecture diagrams, mockups, or any visual references that help inform the consensus analysis."
     ),
+    "parallel": (
+        "Step 1 only. When true, ALL models are consulted concurrently and every response is returned in this single "
+        "step (no per-model follow-up steps). Models that fail or miss their deadline are reported individually; "
+        "the other responses are still returned."
+    ),
+    "model_timeout_seconds": (
+        "Parallel mode only: deadline in seconds for each model's response (default CONSENSUS_MODEL_TIMEOUT_SECS)."
+    ),
 }
 
 
@@ -118,6 +133,11 @@ class ConsensusRequest(WorkflowRequest):
     # Optional images for visual debugging
     images: list[str] | None = Field(default=None, description=CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["images"])
 
+    # Parallel fan-out (step 1)
+    parallel: bool | None = Field(default=False, description=CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["parallel"])
+    model_timeout_seconds: float | None = Field(
+        default=None, gt=0, description=CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["model_timeout_seconds"]
+    )
 
     # Override inherited fields to exclude them from schema
     temperature: float | None = Field(default=None, exclude=True)
@@ -170,6 +190,11 @@ class ConsensusTool(WorkflowTool):
     and finally synthesizes all perspectives into a unified recommendation.
     """
 
+    initial_prompt = step_scoped(default=None)
+    original_proposal = step_scoped(default=None)
+    models_to_consult = step_scoped(factory=list)
+    accumulated_responses = step_scoped(factory=list)
+
     def __init__(self):
         super().__init__()
         self.initial_prompt: str | None = None
@@ -304,6 +329,16 @@ of the evidence, even when it strongly points in one direction.""",
                 "items": {"type": "string"},
                 "description": CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["images"],
             },
+            "parallel": {
+                "type": "boolean",
+                "default": False,
+                "description": CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["parallel"],
+            },
+            "model_timeout_seconds": {
+                "type": "number",
+                "exclusiveMinimum": 0,
+                "description": CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["model_timeout_seconds"],
+            },
         }
 
         # Define excluded fields for consensus workflow
@@ -473,6 +508,7 @@ of the evidence, even when it strongly points in one direction.""",
 
         # Validate request
         request = self.get_workflow_request_model()(**arguments)
+        await self._bind_step_state(request.continuation_id, fresh=request.step_number == 1)
 
         # On first step, store the models to consult
         if request.step_number == 1:
@@ -483,6 +519,8 @@ of the evidence, even when it strongly points in one direction.""",
             self.accumulated_responses = []
             # Set total steps: len(models) (each step includes consultation + response)
             request.total_steps = len(self.models_to_consult)
+            if request.parallel:
+                return await self._execute_parallel(request)
 
         # For all steps (1 through total_steps), consult the corresponding model
         if request.step_number <= request.total_steps:
@@ -569,41 +607,39 @@ of the evidence, even when it strongly points in one direction.""",
     async def _consult_model(self, model_config: dict, request) -> dict:
         """Consult a single model and return its response."""
         try:
-            # Get the provider for this model
-            model_name = model_config["model"]
-            provider = self.get_model_provider(model_name)
+            prompt = self._build_consult_prompt(model_config["model"], request)
+        except Exception as e:
+            return self._consult_error(model_config, e)
+        return self._generate_consultation(model_config, prompt, request)
 
-            # Prepare the prompt with any relevant files
-            # Use continuation_id=None for blinded consensus - each model should only see
-            # original prompt + files, not conversation history or other model responses
-            # CRITICAL: Use the original proposal from step 1, NOT what's in request.step for steps 2+!
-            # Steps 2+ contain summaries/notes that must NEVER be sent to other models
-            prompt = self.original_proposal if self.original_proposal else self.initial_prompt
+    def _build_consult_prompt(self, model_name: str, request, file_content: Optional[str] = None) -> str:
+        """Original proposal plus context files, as every model sees it.
 
-            # Inject per-step ModelContext for file prep when running outside server wrapper
-            if request.relevant_files:
-                try:
-                    from utils.model_context import ModelContext
-                    # Create a temporary context only for file prep
-                    _temp_ctx = ModelContext(model_name)
-                    self._model_context = _temp_ctx
-                    file_content, _ = self._prepare_file_content_for_prompt(
-                        request.relevant_files,
-                        None,  # Use None instead of request.continuation_id for blinded consensus
-                        "Context files",
-                    )
-                finally:
-                    # Ensure no leakage across models/steps
-                    try:
-                        del self._model_context
-                    except Exception:
-                        pass
-                    try:
-                        self._model_context = None
-                    except Exception:
-                        pass
-                if file_content:
-                    prompt = f"{prompt}\n\n=== CONTEXT FILES ===\n{file_content}\n=== END CONTEXT ==="
+        Use continuation_id=None for blinded consensus - each model should only see
+        original prompt + files, not conversation history or other model responses.
+        CRITICAL: Use the original proposal from step 1, NOT what's in request.step for steps 2+!
+        Steps 2+ contain summaries/notes that must NEVER be sent to other models.
+        """
+        prompt = self.original_proposal if self.original_proposal else self.initial_prompt
+        if request.relevant_files and file_content is None:
+            from utils.model_context import ModelContext
+
+            # Per-model context only for file prep; passed explicitly so nothing leaks across models/steps
+            file_content, _ = self._prepare_file_content_for_prompt(
+                request.relevant_files,
+                None,  # Use None instead of request.continuation_id for blinded consensus
+                "Context files",
+                model_context=ModelContext(model_name),
+            )
+        if file_content:
+            prompt = f"{prompt}\n\n=== CONTEXT FILES ===\n{file_content}\n=== END CONTEXT ==="
+        return prompt
+
+    def _generate_consultation(self, model_config: dict, prompt: str, request) -> dict:
+        """Call the model (blocking) and shape its response; errors become an error entry."""
+        try:
+            model_name = model_config["model"]
+            provider = self.get_model_provider(model_name)
 
             # Get stance-specific system prompt
             stance = model_config.get("stance", "neutral")
@@ -631,24 +667,150 @@ of the evidence, even when it strongly points in one direction.""",
                 },
             }
         except Exception as e:
-            # Friendly guidance for missing model context during blinded consensus
-            if "Model context not provided" in str(e):
-                return {
-                    "model": model_config.get("model", "unknown"),
-                    "stance": model_config.get("stance", "neutral"),
-                    "status": "error",
-                    "error": (
-                        "Model context not provided for file preparation. "
-                        "Please call this tool through the server wrapper so the model and context are pre-resolved."
-                    ),
-                }
-            logger.exception("Error consulting model %s", model_config)
+            return self._consult_error(model_config, e)
+
+    def _consult_error(self, model_config: dict, e: Exception) -> dict:
+        # Friendly guidance for missing model context during blinded consensus
+        if "Model context not provided" in str(e):
             return {
                 "model": model_config.get("model", "unknown"),
                 "stance": model_config.get("stance", "neutral"),
                 "status": "error",
-                "error": str(e),
+                "error": (
+                    "Model context not provided for file preparation. "
+                    "Please call this tool through the server wrapper so the model and context are pre-resolved."
+                ),
             }
+        logger.exception("Error consulting model %s", model_config)
+        return {
+            "model": model_config.get("model", "unknown"),
+            "stance": model_config.get("stance", "neutral"),
+            "status": "error",
+            "error": str(e),
+        }
+
+    def _prepare_shared_file_content(self, models: list[dict], request) -> list[Optional[str]]:
+        """File content per model, prepared once and reused by every model whose window fits it.
+
+        Content is built for the largest file budget first; a model with a smaller budget reuses
+        it when its token estimate fits, otherwise gets content built for its own budget.
+        """
+        if not request.relevant_files:
+            return [None] * len(models)
+        from utils.model_context import ModelContext
+        from utils.token_utils import estimate_tokens
+
+        contexts = [ModelContext(m["model"]) for m in models]
+        budgets = []
+        for ctx in contexts:
+            try:
+                budgets.append(ctx.calculate_token_allocation().file_tokens)
+            except Exception:
+                budgets.append(100_000)
+        prepared: list[tuple[int, str, int]] = []  # (budget, content, tokens), largest budget first
+        out: list[Optional[str]] = [None] * len(models)
+        for i in sorted(range(len(models)), key=lambda j: budgets[j], reverse=True):
+            reuse = next((c for b, c, t in prepared if b == budgets[i] or t <= budgets[i] - 1_000), None)
+            if reuse is None:
+                reuse, _ = self._prepare_file_content_for_prompt(
+                    request.relevant_files, None, "Context files", model_context=contexts[i]
+                )
+                prepared.append((budgets[i], reuse, estimate_tokens(reuse)))
+            out[i] = reuse
+        logger.debug("consensus parallel: %d model(s) share %d prepared file context(s)", len(models), len(prepared))
+        return out
+
+    async def _consult_models_parallel(self, models: list[dict], request) -> list[dict]:
+        """Consult all models concurrently; a failed or late model yields an error entry, not an exception."""
+        file_contents = await asyncio.to_thread(self._prepare_shared_file_content, models, request)
+        timeout = float(request.model_timeout_seconds or get_config().consensus_model_timeout_s)
+        parent = current_cancel_token()
+
+        async def consult(model_config: dict, file_content: Optional[str]) -> dict:
+            # Child token: the per-model deadline aborts this provider call only; cancelling the
+            # whole tool call still reaches every model
+            token = CancelToken()
+            unlink = parent.add_callback(lambda: token.cancel(parent.reason or "cancelled")) if parent else None
+
+            def run() -> dict:
+                scope = start_cancel_scope(token)
+                # Concurrent outputs would interleave in one token stream; responses arrive in the result
+                stream_scope = start_token_stream(None)  # type: ignore[arg-type]
+                try:
+                    prompt = self._build_consult_prompt(model_config["model"], request, file_content)
+                    return self._generate_consultation(model_config, prompt, request)
+                finally:
+                    reset_token_stream(stream_scope)
+                    reset_cancel_scope(scope)
+
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(asyncio.to_thread(run), timeout)
+            except asyncio.TimeoutError:
+                token.cancel("deadline")
+                result = {
+                    "model": model_config.get("model", "unknown"),
+                    "stance": model_config.get("stance", "neutral"),
+                    "status": "timeout",
+                    "error": f"No response within {timeout:g}s",
+                }
+            finally:
+                if unlink is not None:
+                    unlink()
+            result["elapsed_s"] = round(time.monotonic() - started, 3)
+            return result
+
+        return list(await asyncio.gather(*(consult(m, c) for m, c in zip(models, file_contents))))
+
+    async def _execute_parallel(self, request) -> list:
+        """Step 1 with parallel=true: every model in one step, then straight to synthesis."""
+        started = time.monotonic()
+        responses = await self._consult_models_parallel(self.models_to_consult, request)
+        self.accumulated_responses = responses
+        succeeded = [r for r in responses if r.get("status") == "success"]
+        failed = [r for r in responses if r.get("status") != "success"]
+
+        response_data = {
+            "status": "consensus_workflow_complete" if succeeded else "consensus_failed",
+            "step_number": 1,
+            "total_steps": 1,
+            "next_step_required": False,
+            "parallel": True,
+            "agent_analysis": {"initial_analysis": request.step, "findings": request.findings},
+            "consensus_complete": bool(succeeded),
+            "model_responses": responses,
+            "accumulated_responses": responses,
+            "complete_consensus": {
+                "initial_prompt": self.original_proposal if self.original_proposal else self.initial_prompt,
+                "models_consulted": [f"{m['model']}:{m.get('stance', 'neutral')}" for m in succeeded],
+                "models_failed": [f"{m['model']}:{m.get('stance', 'neutral')}" for m in failed],
+                "total_responses": len(succeeded),
+                "consensus_confidence": "high" if not failed else ("partial" if succeeded else "none"),
+            },
+            "wall_time_s": round(time.monotonic() - started, 3),
+        }
+        if succeeded:
+            response_data["next_steps"] = (
+                "CONSENSUS GATHERING IS COMPLETE. Synthesize all perspectives and present:\n"
+                "1. Key points of AGREEMENT across models\n"
+                "2. Key points of DISAGREEMENT and why they differ\n"
+                "3. Your final consolidated recommendation\n"
+                "4. Specific, actionable next steps for implementation\n"
+                "5. Critical risks or concerns that must be addressed"
+                + (f"\nNote: {len(failed)} model(s) did not respond; see models_failed." if failed else "")
+            )
+        else:
+            response_data["next_steps"] = (
+                "No model returned a response. Check the errors in model_responses, then retry or choose other models."
+            )
+        response_data["metadata"] = {
+            "tool_name": self.get_name(),
+            "workflow_type": "multi_model_consensus",
+            "mode": "parallel",
+            "models_consulted": len(succeeded),
+            "models_failed": len(failed),
+        }
+        return [TextContent(type="text", text=json.dumps(response_data, indent=2, ensure_ascii=False))]
 
     def _preflight_validate_step_one(self, request) -> None:
         """Validate models, steps, and files for consensus step 1.
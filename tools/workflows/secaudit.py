@@ -28,6 +28,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import SECAUDIT_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import step_scoped
 
 from .workflow.base import WorkflowTool
 
@@ -206,6 +207,8 @@ class SecauditTool(WorkflowTool):
     security-specific capabilities.
     """
 
+    security_config = step_scoped(factory=dict)
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
@@ -30,6 +30,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import TRACER_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import step_scoped
 
 from .workflow.base import WorkflowTool
 
@@ -172,6 +173,9 @@ class TracerTool(WorkflowTool):
     both precision tracing (execution flow) and dependencies tracing (structural relationships).
     """
 
+    trace_config = step_scoped(factory=dict)
+    initial_tracing_description = step_scoped()
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
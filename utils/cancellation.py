@@ -0,0 +1,123 @@
+"""
+Per-call cancellation for EX MCP Server.
+
+- A transport (the WS daemon) installs a CancelToken for one tool call via start_cancel_scope()
+- The token lives in a ContextVar, so it follows asyncio tasks and asyncio.to_thread into provider
+  worker threads (use contextvars.copy_context() for run_in_executor), like utils.token_stream
+- Providers call raise_if_cancelled() between attempts and wrap blocking reads in on_cancel(close),
+  so cancelling closes the HTTP response (or connection) and the worker thread stops early
+  instead of running on. Cancellability does not change the request: only a token stream
+  (utils.token_stream) makes a call streamed
+- With no token installed every helper is a cheap no-op
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_cancel_var: ContextVar[Optional["CancelToken"]] = ContextVar("cancel_token", default=None)
+
+
+class CallCancelled(Exception):
+    """Raised inside a provider call after its CancelToken was cancelled."""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with close-on-cancel callbacks."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception as e:
+                logger.debug("cancel callback failed: %s", e)
+
+    def add_callback(self, fn: Callable[[], None]) -> Callable[[], None]:
+        """Run fn on cancel (immediately if already cancelled). Returns a function that unregisters it."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+
+                def _remove() -> None:
+                    with self._lock:
+                        try:
+                            self._callbacks.remove(fn)
+                        except ValueError:
+                            pass
+
+                return _remove
+        fn()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise CallCancelled(self.reason or "cancelled")
+
+
+def start_cancel_scope(token: CancelToken) -> Token:
+    """Install a token for the current context; pass the returned token to reset_cancel_scope()."""
+    return _cancel_var.set(token)
+
+
+def reset_cancel_scope(token: Token) -> None:
+    _cancel_var.reset(token)
+
+
+def current_cancel_token() -> Optional[CancelToken]:
+    return _cancel_var.get()
+
+
+def is_cancelled() -> bool:
+    token = _cancel_var.get()
+    return token is not None and token.cancelled
+
+
+def raise_if_cancelled() -> None:
+    token = _cancel_var.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def cancellable_sleep(seconds: float) -> None:
+    """time.sleep() that returns early if the current call is cancelled (e.g. retry backoff)."""
+    token = _cancel_var.get()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token._event.wait(seconds)
+
+
+@contextmanager
+def on_cancel(fn: Callable[[], None]) -> Iterator[None]:
+    """Call fn (e.g. response.close) if the current call is cancelled while inside the block."""
+    token = _cancel_var.get()
+    if token is None:
+        yield
+        return
+    remove = token.add_callback(fn)
+    try:
+        yield
+    finally:
+        remove()
@@ -25,7 +25,9 @@ The MCP protocol is inherently stateless - each tool request is independent
 with no memory of previous interactions. This module bridges that gap by:
 
 1. Creating persistent conversation threads with unique UUIDs
-2. Storing complete conversation context (turns, files, metadata) in memory
+2. Storing complete conversation context (turns, files, metadata) in memory: a header record
+   (thread:<id>) with the thread metadata, plus an append-only list of turns
+   (thread:<id>:turns) where the backend supports it, so adding a turn writes only that turn
 3. Reconstructing conversation history when tools are called with continuation_id
 4. Supporting cross-tool continuation - seamlessly switch between different tools
    while maintaining full conversation context and file references
@@ -106,7 +108,9 @@ context preservation and natural conversation understanding.
 
 import logging
 import os
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Any, Optional
 
@@ -192,6 +196,7 @@ class ThreadContext(BaseModel):
         initial_context: Original request data that started the conversation
         session_fingerprint: Optional session fingerprint to scope this thread
         client_friendly_name: Optional friendly client name (e.g., "Claude", "VS Code")
+        ancestor_ids: Parent chain at creation time, nearest first (lets a chain be fetched in one batch)
     """
 
     thread_id: str
@@ -203,6 +208,7 @@ class ThreadContext(BaseModel):
     initial_context: dict[str, Any]  # Original request parameters
     session_fingerprint: Optional[str] = None
     client_friendly_name: Optional[str] = None
+    ancestor_ids: list[str] = []
 
 
 def get_storage():
@@ -217,6 +223,118 @@ def get_storage():
     return get_storage_backend()
 
 
+def _thread_key(thread_id: str) -> str:
+    return f"thread:{thread_id}"
+
+
+def _turns_key(thread_id: str) -> str:
+    return f"thread:{thread_id}:turns"
+
+
+def _uses_turn_lists(storage) -> bool:
+    # Explicit flag: backends without list support (or test doubles) keep whole-thread records
+    return getattr(storage, "supports_turn_lists", False) is True
+
+
+# Ancestors recorded on a new thread; deeper chains continue by following parent_thread_id
+MAX_STORED_ANCESTORS = 20
+
+
+class _ThreadCache:
+    """
+    Parsed threads by id for backends with append-only turn lists.
+
+    A header is written once and turns are only appended, so an entry stays valid while the
+    stored header is unchanged; a later read fetches and parses only the turns appended since.
+    The turn list can still vanish or be recreated under an unchanged header (evicted or expired
+    on its own), so the entry keeps the last raw turn it saw and a read starts one item earlier
+    to check that turn is still in place.
+    """
+
+    def __init__(self, max_threads: int) -> None:
+        self.max_threads = max(0, int(max_threads))
+        self._entries: "OrderedDict[str, tuple[str, ThreadContext, list[ConversationTurn], Optional[str]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, thread_id: str, raw_header: str):
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None or entry[0] != raw_header:
+                return None
+            self._entries.move_to_end(thread_id)
+            return entry
+
+    def put(
+        self, thread_id: str, raw_header: str, header: ThreadContext, appended: list, last_raw: Optional[str]
+    ) -> None:
+        if not self.max_threads:
+            return
+        with self._lock:
+            self._entries[thread_id] = (raw_header, header, appended, last_raw)
+            self._entries.move_to_end(thread_id)
+            while len(self._entries) > self.max_threads:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_thread_cache = _ThreadCache(int(os.getenv("EXAI_THREAD_CACHE_SIZE", "512")))
+
+
+def _load_threads(storage, thread_ids: list[str]) -> list[Optional[ThreadContext]]:
+    """
+    Threads for several ids in two batched reads (headers, then new turns), None where missing.
+
+    Only headers that changed and turns appended since the last read are parsed. A turn list
+    that no longer holds the last cached turn is read again whole in one more batched read.
+    """
+    if not thread_ids:
+        return []
+    raw_headers = storage.get_many([_thread_key(t) for t in thread_ids])
+    cached = [_thread_cache.get(t, raw) if raw else None for t, raw in zip(thread_ids, raw_headers)]
+    present = [i for i, raw in enumerate(raw_headers) if raw]
+    # A cached thread re-reads its last known turn along with the new ones
+    checked = {i for i in present if cached[i] and cached[i][2]}
+    starts = [len(cached[i][2]) - 1 if i in checked else 0 for i in present]
+    new_turns = dict(zip(present, storage.get_lists([_turns_key(thread_ids[i]) for i in present], starts)))
+
+    # Turn list shorter than cached or recreated since: read it again from the start
+    stale = [i for i in checked if new_turns[i][:1] != [cached[i][3]]]
+    if stale:
+        reread = storage.get_lists([_turns_key(thread_ids[i]) for i in stale], [0] * len(stale))
+        for i, items in zip(stale, reread):
+            cached[i], new_turns[i] = None, items
+    for i in checked.difference(stale):
+        new_turns[i] = new_turns[i][1:]
+
+    out: list[Optional[ThreadContext]] = [None] * len(thread_ids)
+    for i in present:
+        raw_turns = new_turns[i]
+        try:
+            if cached[i]:
+                _, header, appended, last_raw = cached[i]
+            else:
+                header, appended, last_raw = ThreadContext.model_validate_json(raw_headers[i]), [], None
+            if raw_turns:
+                appended = appended + [ConversationTurn.model_validate_json(t) for t in raw_turns]
+                _thread_cache.put(thread_ids[i], raw_headers[i], header, appended, raw_turns[-1])
+            elif not cached[i]:
+                _thread_cache.put(thread_ids[i], raw_headers[i], header, appended, last_raw)
+        except Exception as e:
+            logger.debug(f"[THREAD] Could not load thread {thread_ids[i]}: {type(e).__name__}")
+            continue
+        # Fresh container per caller; turns come from the header (older threads) then the turn list
+        update: dict[str, Any] = {"turns": list(header.turns) + appended}
+        if appended:
+            update["last_updated_at"] = appended[-1].timestamp
+        out[i] = header.model_copy(update=update)
+    return out
+
+
 def create_thread(
     tool_name: str,
     initial_request: dict[str, Any],
@@ -257,9 +375,18 @@ def create_thread(
         if k not in ["temperature", "thinking_mode", "model", "continuation_id"]
     }
 
+    # Record the whole parent chain so it can later be fetched in one batch
+    storage = get_storage()
+    ancestor_ids: list[str] = []
+    if parent_thread_id:
+        parent = _get_thread_header(storage, parent_thread_id)
+        ancestor_ids = [parent_thread_id] + (list(parent.ancestor_ids) if parent else [])
+        ancestor_ids = ancestor_ids[:MAX_STORED_ANCESTORS]
+
     context = ThreadContext(
         thread_id=thread_id,
         parent_thread_id=parent_thread_id,  # Link to parent for conversation chains
+        ancestor_ids=ancestor_ids,
         created_at=now,
         last_updated_at=now,
         tool_name=tool_name,  # Track which tool initiated this conversation
@@ -270,8 +397,7 @@ def create_thread(
     )
 
     # Store in memory with configurable TTL to prevent indefinite accumulation
-    storage = get_storage()
-    key = f"thread:{thread_id}"
+    key = _thread_key(thread_id)
     storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())
 
     logger.debug(f"[THREAD] Created new thread {thread_id} with parent {parent_thread_id}")
@@ -304,12 +430,11 @@ def get_thread(thread_id: str) -> Optional[ThreadContext]:
 
     try:
         storage = get_storage()
-        key = f"thread:{thread_id}"
-        data = storage.get(key)
-
-        if data:
-            return ThreadContext.model_validate_json(data)
-        return None
+        if _uses_turn_lists(storage):
+            # Header plus appended turns (older threads keep theirs in the header)
+            return _load_threads(storage, [thread_id])[0]
+        data = storage.get(_thread_key(thread_id))
+        return ThreadContext.model_validate_json(data) if data else None
     except Exception:
         # Silently handle errors to avoid exposing storage details
         return None
@@ -361,13 +486,33 @@ def add_turn(
     """
     logger.debug(f"[FLOW] Adding {role} turn to {thread_id} ({tool_name})")
 
-    context = get_thread(thread_id)
-    if not context:
-        logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+    try:
+        storage = get_storage()
+        append_only = _uses_turn_lists(storage)
+    except Exception as e:
+        logger.debug(f"[FLOW] Storage unavailable for turn addition: {type(e).__name__}")
         return False
 
+    if append_only:
+        # Only the header and the turn count are read; existing turns are not parsed or rewritten
+        header = _get_thread_header(storage, thread_id)
+        if not header:
+            logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+            return False
+        try:
+            turn_count = len(header.turns) + storage.list_length(_turns_key(thread_id))
+        except Exception as e:
+            logger.debug(f"[FLOW] Failed to count turns: {type(e).__name__}")
+            return False
+    else:
+        context = get_thread(thread_id)
+        if not context:
+            logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+            return False
+        turn_count = len(context.turns)
+
     # Check turn limit to prevent runaway conversations
-    if len(context.turns) >= MAX_CONVERSATION_TURNS:
+    if turn_count >= MAX_CONVERSATION_TURNS:
         logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS})")
         return False
 
@@ -384,13 +529,15 @@ def add_turn(
         model_metadata=model_metadata,  # Additional model info
     )
 
-    context.turns.append(turn)
-    context.last_updated_at = datetime.now(timezone.utc).isoformat()
-
-    # Save back to storage and refresh TTL
+    # Save to storage and refresh TTL
     try:
-        storage = get_storage()
-        key = f"thread:{thread_id}"
+        key = _thread_key(thread_id)
+        if append_only:
+            storage.append_with_ttl(_turns_key(thread_id), CONVERSATION_TIMEOUT_SECONDS, turn.model_dump_json())
+            storage.expire(key, CONVERSATION_TIMEOUT_SECONDS)  # Header lives as long as its turns
+            return True
+        context.turns.append(turn)
+        context.last_updated_at = datetime.now(timezone.utc).isoformat()
         storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())  # Refresh TTL to configured timeout
         return True
     except Exception as e:
@@ -398,6 +545,17 @@ def add_turn(
         return False
 
 
+def _get_thread_header(storage, thread_id: str) -> Optional[ThreadContext]:
+    """Thread metadata without the appended turns (None if missing or invalid)."""
+    if not thread_id or not _is_valid_uuid(thread_id):
+        return None
+    try:
+        data = storage.get(_thread_key(thread_id))
+        return ThreadContext.model_validate_json(data) if data else None
+    except Exception:
+        return None
+
+
 def get_thread_chain(thread_id: str, max_depth: int = 20) -> list[ThreadContext]:
     """
     Traverse the parent chain to get all threads in conversation sequence.
@@ -405,6 +563,11 @@ def get_thread_chain(thread_id: str, max_depth: int = 20) -> list[ThreadContext]
     Retrieves the complete conversation chain by following parent_thread_id
     links. Returns threads in chronological order (oldest first).
 
+    Threads record their ancestors at creation, so on backends with turn lists
+    the whole chain is fetched in a fixed number of batched reads; parent links
+    are only followed one at a time past the recorded ancestors (threads created
+    by earlier versions, or chains deeper than MAX_STORED_ANCESTORS).
+
     Args:
         thread_id: Starting thread ID
         max_depth: Maximum chain depth to prevent infinite loops
@@ -412,9 +575,37 @@ def get_thread_chain(thread_id: str, max_depth: int = 20) -> list[ThreadContext]
     Returns:
         list[ThreadContext]: All threads in chain, oldest first
     """
-    chain = []
-    current_id = thread_id
-    seen_ids = set()
+    chain: list[ThreadContext] = []
+    seen_ids: set[str] = set()
+    current_id: Optional[str] = thread_id
+
+    try:
+        storage = get_storage()
+        batched = _uses_turn_lists(storage) and _is_valid_uuid(thread_id)
+    except Exception:
+        batched = False
+
+    if batched:
+        leaf = get_thread(thread_id)
+        if leaf:
+            chain.append(leaf)
+            seen_ids.add(thread_id)
+            current_id = leaf.parent_thread_id
+            ancestor_ids = [a for a in leaf.ancestor_ids if _is_valid_uuid(a)][: max(0, max_depth - 1)]
+            for ancestor_id, context in zip(ancestor_ids, _load_threads(storage, ancestor_ids)):
+                if ancestor_id in seen_ids:
+                    logger.warning(f"[THREAD] Circular reference detected in thread chain at {ancestor_id}")
+                    current_id = None
+                    break
+                if context is None:
+                    logger.debug(f"[THREAD] Thread {ancestor_id} not found in chain traversal")
+                    current_id = None
+                    break
+                seen_ids.add(ancestor_id)
+                chain.append(context)
+                current_id = context.parent_thread_id
+        else:
+            current_id = None
 
     # Build chain from current to oldest
     while current_id and len(chain) < max_depth:
@@ -932,34 +1123,18 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
 
     # CRITICAL: Process turns in REVERSE chronological order (newest to oldest)
     # This prioritization strategy ensures recent context is preserved when token budget is tight
+    # Formatted turns and their token counts are memoized per thread; only new or changed turns are formatted
+    from utils.history_render_cache import history_render_cache
+
     for idx in range(len(all_turns) - 1, -1, -1):
         turn = all_turns[idx]
         turn_num = idx + 1
-        role_label = "Claude" if turn.role == "user" else "Gemini"
-
-        # Build the complete turn content
-        turn_parts = []
-
-        # Add turn header with tool attribution for cross-tool tracking
-        turn_header = f"\n--- Turn {turn_num} ({role_label}"
-        if turn.tool_name:
-            turn_header += f" using {turn.tool_name}"
-
-        # Add model info if available
-        if turn.model_provider and turn.model_name:
-            turn_header += f" via {turn.model_provider}/{turn.model_name}"
-
-        turn_header += ") ---"
-        turn_parts.append(turn_header)
-
-        # Get tool-specific formatting if available
-        # This includes file references and the actual content
-        tool_formatted_content = _get_tool_formatted_content(turn)
-        turn_parts.extend(tool_formatted_content)
 
-        # Calculate tokens for this turn
-        turn_content = "\n".join(turn_parts)
-        turn_tokens = model_context.estimate_tokens(turn_content)
+        rendered = history_render_cache.render(
+            context.thread_id, idx, turn, lambda turn=turn, turn_num=turn_num: _format_turn(turn, turn_num)
+        )
+        turn_content = rendered.text
+        turn_tokens = history_render_cache.tokens(rendered, model_context.model_name, model_context.estimate_tokens)
 
         # Check if adding this turn would exceed history budget
         if file_embedding_tokens + total_turn_tokens + turn_tokens > max_history_tokens:
@@ -1027,6 +1202,26 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     return complete_history, total_conversation_tokens
 
 
+def _format_turn(turn: ConversationTurn, turn_num: int) -> str:
+    """Complete history block for one turn: attribution header plus tool-specific content."""
+    role_label = "Claude" if turn.role == "user" else "Gemini"
+
+    # Add turn header with tool attribution for cross-tool tracking
+    turn_header = f"\n--- Turn {turn_num} ({role_label}"
+    if turn.tool_name:
+        turn_header += f" using {turn.tool_name}"
+
+    # Add model info if available
+    if turn.model_provider and turn.model_name:
+        turn_header += f" via {turn.model_provider}/{turn.model_name}"
+
+    turn_header += ") ---"
+
+    # Get tool-specific formatting if available
+    # This includes file references and the actual content
+    return "\n".join([turn_header, *_get_tool_formatted_content(turn)])
+
+
 def _get_tool_formatted_content(turn: ConversationTurn) -> list[str]:
     """
     Get tool-specific formatting for a conversation turn.
@@ -0,0 +1,220 @@
+"""
+Result cache for workflow expert analysis.
+
+Re-running a workflow tool on unchanged files and findings (precommit on the same tree, a client
+retrying codereview) used to repeat the full expert call. Results are cached under a fingerprint
+of everything the provider sees:
+- expert_cache_key() hashes the system prompt, the prompt (expert context with the embedded file
+  content), model, temperature, thinking mode, web search and image file signatures
+- ExpertResultCache keeps entries in memory, bounded by count and UTF-8 bytes (least recently
+  used evicted first) with a TTL. With EXAI_EXPERT_CACHE_PATH set, entries are also written to a
+  SQLite file (WAL) with the same bounds, so they survive restarts and are shared by workers
+- Only usable results are stored: errors, timeouts and partial results are never cached
+
+Env: EXAI_EXPERT_CACHE (default true), EXAI_EXPERT_CACHE_TTL_SECS, EXAI_EXPERT_CACHE_MAX_ENTRIES,
+EXAI_EXPERT_CACHE_MAX_BYTES, EXAI_EXPERT_CACHE_PATH, EXAI_EXPERT_CACHE_DISABLE_FOR_TOOLS
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from utils.file_utils import file_signature
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS expert_results (
+    key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,
+    stored_at REAL NOT NULL, used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS expert_results_used ON expert_results (used_at);
+"""
+
+
+def expert_cache_key(
+    tool: str,
+    system_prompt: str,
+    prompt: str,
+    model: Optional[str],
+    temperature: Any,
+    thinking_mode: Any = None,
+    use_websearch: Any = None,
+    images: Optional[Iterable[str]] = None,
+) -> str:
+    h = hashlib.sha256()
+    header = {
+        "tool": tool,
+        "model": model,
+        "temperature": temperature,
+        "thinking_mode": thinking_mode,
+        "use_websearch": use_websearch,
+        # Data URLs are part of the key as-is, file paths by their size and mtime
+        "images": [
+            img if img.startswith("data:") else file_signature(img) for img in sorted(set(images or []))
+        ],
+    }
+    for part in (json.dumps(header, sort_keys=True, default=str), system_prompt or "", prompt or ""):
+        data = part.encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ExpertResultCache:
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_s: float = 3600.0,
+        path: Optional[str] = None,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl_s = float(ttl_s)
+        self._lock = threading.Lock()
+        # key -> (encoded result, stored_at, UTF-8 size)
+        self._mem: "OrderedDict[str, tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.executescript(_SCHEMA)
+            except Exception as e:
+                logger.warning("expert cache: SQLite store %s unavailable, using memory only: %s", path, e)
+                self._conn = None
+
+    def get(self, key: str) -> Optional[tuple[dict, float]]:
+        """(result, age in seconds) for a live entry, else None."""
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None and now - entry[1] > self.ttl_s:
+                self._drop(key)
+                entry = None
+            if entry is None and self._conn is not None:
+                entry = self._db_get(key, now)
+                if entry is not None:
+                    self._remember(key, entry[0], entry[1], len(entry[0].encode("utf-8")))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._mem.move_to_end(key)
+            self.hits += 1
+        return json.loads(entry[0]), now - entry[1]
+
+    def put(self, key: str, value: dict) -> None:
+        encoded = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(encoded.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, encoded, now, size)
+            self.stores += 1
+            if self._conn is not None:
+                self._db_put(key, encoded, now, size)
+
+    def _remember(self, key: str, encoded: str, stored_at: float, size: int) -> None:
+        self._drop(key)
+        self._mem[key] = (encoded, stored_at, size)
+        self._bytes += size
+        while len(self._mem) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._mem)))
+
+    def _drop(self, key: str) -> None:
+        entry = self._mem.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _db_get(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        try:
+            row = self._conn.execute(  # type: ignore[union-attr]
+                "SELECT value, stored_at FROM expert_results WHERE key=? AND stored_at>?", (key, now - self.ttl_s)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE expert_results SET used_at=? WHERE key=?", (now, key))  # type: ignore[union-attr]
+            return (row[0], row[1]) if row else None
+        except sqlite3.Error as e:
+            logger.debug("expert cache: SQLite read failed: %s", e)
+            return None
+
+    def _db_put(self, key: str, encoded: str, now: float, size: int) -> None:
+        conn = self._conn
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # type: ignore[union-attr]
+            try:
+                conn.execute(  # type: ignore[union-attr]
+                    "INSERT OR REPLACE INTO expert_results (key, value, size, stored_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, encoded, size, now, now),
+                )
+                conn.execute("DELETE FROM expert_results WHERE stored_at<=?", (now - self.ttl_s,))  # type: ignore[union-attr]
+                # Least recently used rows beyond the count/byte bounds
+                conn.execute(  # type: ignore[union-attr]
+                    "DELETE FROM expert_results WHERE key IN (SELECT key FROM (SELECT key, "
+                    "ROW_NUMBER() OVER (ORDER BY used_at DESC) AS n, "
+                    "SUM(size) OVER (ORDER BY used_at DESC ROWS UNBOUNDED PRECEDING) AS total "
+                    "FROM expert_results) WHERE n>? OR total>?)",
+                    (self.max_entries, self.max_bytes),
+                )
+                conn.execute("COMMIT")  # type: ignore[union-attr]
+            except BaseException:
+                conn.execute("ROLLBACK")  # type: ignore[union-attr]
+                raise
+        except sqlite3.Error as e:
+            logger.debug("expert cache: SQLite write failed: %s", e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._mem),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "sqlite": self._conn is not None,
+            }
+
+
+_cache: Optional[ExpertResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def _enabled() -> bool:
+    return os.getenv("EXAI_EXPERT_CACHE", "true").strip().lower() == "true"
+
+
+def get_expert_cache() -> Optional[ExpertResultCache]:
+    """Process-wide cache built from env on first use; None when EXAI_EXPERT_CACHE=false."""
+    global _cache
+    if not _enabled():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExpertResultCache(
+                    max_entries=int(os.getenv("EXAI_EXPERT_CACHE_MAX_ENTRIES", "256")),
+                    max_bytes=int(os.getenv("EXAI_EXPERT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+                    ttl_s=float(os.getenv("EXAI_EXPERT_CACHE_TTL_SECS", "3600")),
+                    path=os.getenv("EXAI_EXPERT_CACHE_PATH", "").strip() or None,
+                )
+    return _cache
+
+
+def cache_disabled_for(tool_name: str) -> bool:
+    raw = os.getenv("EXAI_EXPERT_CACHE_DISABLE_FOR_TOOLS", "")
+    return tool_name.lower() in {t.strip().lower() for t in raw.split(",") if t.strip()}
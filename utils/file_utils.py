@@ -35,11 +35,19 @@ multi-turn file handling:
    - File reading results are used across different tools in conversation chains
    - Consistent file access patterns support conversation continuation scenarios
    - Error handling preserves conversation flow when files become unavailable
+
+4. RENDER CACHE:
+   - read_file_content keeps the formatted (line-numbered) text of recently read files keyed by
+     path, mtime, size and line-number mode, so a workflow's final step, its expert analysis and
+     later re-runs do not re-read and re-render unchanged files
+     (EXAI_FILE_RENDER_CACHE_MAX_BYTES of UTF-8 text, default 64 MB; 0 disables)
 """
 
 import json
 import logging
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional
 
@@ -417,6 +425,50 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
     return expanded_files
 
 
+class _RenderCache:
+    """Formatted file content by (path, mtime, size, line numbers); LRU bounded by UTF-8 bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self._data: "OrderedDict[tuple, tuple[tuple[str, int], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[tuple[str, int]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, value: tuple[str, int]) -> None:
+        size = len(value[0].encode("utf-8", "replace"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+
+_render_cache = _RenderCache(int(os.getenv("EXAI_FILE_RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+
+
 def read_file_content(
     file_path: str, max_size: int = 1_000_000, *, include_line_numbers: Optional[bool] = None
 ) -> tuple[str, int]:
@@ -463,7 +515,8 @@ def read_file_content(
             return content, estimate_tokens(content)
 
         # Check file size to prevent memory exhaustion
-        file_size = path.stat().st_size
+        stat = path.stat()
+        file_size = stat.st_size
         logger.debug(f"[FILES] File size for {file_path}: {file_size:,} bytes")
         if file_size > max_size:
             logger.debug(f"[FILES] File too large: {file_path} ({file_size:,} > {max_size:,} bytes)")
@@ -474,6 +527,13 @@ def read_file_content(
         add_line_numbers = should_add_line_numbers(file_path, include_line_numbers)
         logger.debug(f"[FILES] Line numbers for {file_path}: {'enabled' if add_line_numbers else 'disabled'}")
 
+        # Unchanged since it was last rendered: reuse the formatted text
+        cache_key = (file_path, str(path), stat.st_mtime_ns, file_size, add_line_numbers)
+        cached = _render_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"[FILES] Render cache hit for {file_path}")
+            return cached
+
         # Read the file with UTF-8 encoding, replacing invalid characters
         # This ensures we can handle files with mixed encodings
         logger.debug(f"[FILES] Reading file content for {file_path}")
@@ -498,6 +558,7 @@ def read_file_content(
         formatted = f"\n--- BEGIN FILE: {file_path} ---\n{file_content}\n--- END FILE: {file_path} ---\n"
         tokens = estimate_tokens(formatted)
         logger.debug(f"[FILES] Formatted content for {file_path}: {len(formatted)} chars, {tokens} tokens")
+        _render_cache.put(cache_key, (formatted, tokens))
         return formatted, tokens
 
     except Exception as e:
@@ -515,6 +576,7 @@ def read_files(
     reserve_tokens: int = 50_000,
     *,
     include_line_numbers: bool = False,
+    expand: bool = True,
 ) -> str:
     """
     Read multiple files and optional direct code with smart token management.
@@ -530,6 +592,8 @@ def read_files(
         max_tokens: Maximum tokens to use (defaults to DEFAULT_CONTEXT_WINDOW)
         reserve_tokens: Tokens to reserve for prompt and response (default 50K)
         include_line_numbers: Whether to add line numbers to file content
+        expand: Expand directories with expand_paths; pass False when file_paths already
+            is the output of expand_paths
 
     Returns:
         str: All file contents formatted for AI consumption
@@ -563,7 +627,7 @@ def read_files(
     if file_paths:
         # Expand directories to get all individual files
         logger.debug(f"[FILES] Expanding {len(file_paths)} file paths")
-        all_files = expand_paths(file_paths)
+        all_files = expand_paths(file_paths) if expand else list(file_paths)
         logger.debug(f"[FILES] After expansion: {len(all_files)} individual files")
 
         if not all_files and file_paths:
@@ -732,6 +796,19 @@ def get_file_size(file_path: str) -> int:
         return 0
 
 
+def file_signature(file_path: str) -> list:
+    """
+    [path, size, mtime_ns] of a file ([path, None, None] if it cannot be stat'ed).
+
+    Cache keys and fingerprints include it so an edited file invalidates them.
+    """
+    try:
+        st = os.stat(file_path)
+        return [file_path, st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [file_path, None, None]
+
+
 def ensure_directory_exists(file_path: str) -> bool:
     """
     Ensure the parent directory of a file path exists.
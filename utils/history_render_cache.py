@@ -0,0 +1,83 @@
+"""
+Render cache for conversation history turns.
+
+build_conversation_history re-formats every turn of a thread (tool-specific formatting via
+format_conversation_turn) and re-estimates its tokens on each continuation, although only the
+newest turn is new. This cache keeps the formatted block of each turn per thread:
+- entries are keyed by thread_id and turn index and carry a fingerprint of the turn (its
+  serialized content plus the size and mtime of the files it references). A turn whose content
+  or referenced files changed is formatted again
+- token estimates are kept per model name next to the text, so switching models between
+  continuations only re-counts
+- the number of threads kept is bounded (least recently used dropped first)
+
+Env: EXAI_HISTORY_RENDER_CACHE_THREADS (default 256, 0 disables)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from utils.file_utils import file_signature
+
+
+@dataclass
+class RenderedTurn:
+    fingerprint: str
+    text: str
+    tokens: dict[str, int] = field(default_factory=dict)
+
+
+def turn_fingerprint(turn) -> str:
+    h = hashlib.sha256(turn.model_dump_json().encode("utf-8"))
+    for path in turn.files or ():
+        h.update(b"\0" + json.dumps(file_signature(path)).encode("utf-8"))
+    return h.hexdigest()
+
+
+class HistoryRenderCache:
+    def __init__(self, max_threads: int = 256) -> None:
+        self.max_threads = max(0, int(max_threads))
+        self._threads: "OrderedDict[str, dict[int, RenderedTurn]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, thread_id: str, index: int, turn, format_turn: Callable[[], str]) -> RenderedTurn:
+        """Formatted block of turn `index` in the thread, formatted only when not cached or stale."""
+        fingerprint = turn_fingerprint(turn)
+        with self._lock:
+            turns = self._threads.get(thread_id)
+            cached = turns.get(index) if turns else None
+            if cached is not None and cached.fingerprint == fingerprint:
+                self._threads.move_to_end(thread_id)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        rendered = RenderedTurn(fingerprint, format_turn())
+        if self.max_threads:
+            with self._lock:
+                self._threads.setdefault(thread_id, {})[index] = rendered
+                self._threads.move_to_end(thread_id)
+                while len(self._threads) > self.max_threads:
+                    self._threads.popitem(last=False)
+        return rendered
+
+    def tokens(self, rendered: RenderedTurn, model_name: str, estimate: Callable[[str], int]) -> int:
+        count: Optional[int] = rendered.tokens.get(model_name)
+        if count is None:
+            count = estimate(rendered.text)
+            rendered.tokens[model_name] = count
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._threads.clear()
+
+
+history_render_cache = HistoryRenderCache(int(os.getenv("EXAI_HISTORY_RENDER_CACHE_THREADS", "256")))
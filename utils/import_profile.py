@@ -0,0 +1,117 @@
+"""
+Startup import profile for EX MCP Server.
+
+- mark(phase) records milestones (ms since this module was first imported, which server.py
+  does first thing), e.g. "server_imported" and "tools_registered"
+- record_tool_load() records how long each lazily loaded tool took to import and construct
+- With EXAI_IMPORT_PROFILE=true, enable() installs a meta-path hook that times every module
+  import like ``python -X importtime`` (self and cumulative time per module)
+- report() returns all of the above; the version tool exposes it
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+_T0 = time.perf_counter()
+_lock = threading.Lock()
+_phases: dict[str, float] = {}
+_tool_loads: dict[str, dict[str, float]] = {}
+# module -> (self_s, cumulative_s), filled only while the import hook is installed
+_imports: dict[str, tuple[float, float]] = {}
+_local = threading.local()
+_finder: Optional["_TimingFinder"] = None
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 2)
+
+
+def mark(phase: str) -> None:
+    with _lock:
+        _phases.setdefault(phase, time.perf_counter() - _T0)
+
+
+def record_tool_load(name: str, import_s: float, init_s: float) -> None:
+    with _lock:
+        _tool_loads[name] = {"import_ms": _ms(import_s), "init_ms": _ms(init_s)}
+
+
+class _TimingLoader:
+    """Wraps a spec's loader to time exec_module; everything else is delegated."""
+
+    def __init__(self, loader: Any, fullname: str) -> None:
+        self._loader = loader
+        self._fullname = fullname
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        create = getattr(self._loader, "create_module", None)
+        return create(spec) if create is not None else None
+
+    def exec_module(self, module) -> None:
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - t0
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            with _lock:
+                _imports[self._fullname] = (max(0.0, cumulative - children), cumulative)
+
+
+class _TimingFinder:
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find = getattr(finder, "find_spec", None)
+            if find is None:
+                continue
+            spec = find(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimingLoader(spec.loader, fullname)
+        return spec
+
+
+def enable() -> None:
+    """Time every subsequent module import (idempotent)."""
+    global _finder
+    if _finder is None:
+        _finder = _TimingFinder()
+        sys.meta_path.insert(0, _finder)
+
+
+def enabled() -> bool:
+    return _finder is not None
+
+
+def report(top: int = 15) -> dict:
+    with _lock:
+        phases = {k: _ms(v) for k, v in _phases.items()}
+        tools = dict(_tool_loads)
+        imports = sorted(_imports.items(), key=lambda kv: kv[1][1], reverse=True)[: max(0, int(top))]
+    return {
+        "uptime_ms": _ms(time.perf_counter() - _T0),
+        "phases_ms": phases,
+        "modules_loaded": len(sys.modules),
+        "tool_loads": tools,
+        "import_profile": enabled(),
+        "slowest_imports": [
+            {"module": name, "self_ms": _ms(self_s), "cumulative_ms": _ms(cum_s)} for name, (self_s, cum_s) in imports
+        ],
+    }
@@ -0,0 +1,259 @@
+"""
+Asynchronous logging pipeline for EX MCP Server.
+
+- install_async_logging() moves the handlers of the root and mcp_activity loggers behind one
+  bounded queue. Callers (the event loop, provider worker threads) only enqueue the record; a
+  QueueListener thread formats it and does the file/stderr I/O
+- When the queue is full the record is dropped and counted per logger; the listener reports
+  drops with a WARNING once the queue has room again. ERROR and above wait briefly for room
+- SamplingFilter keeps 1 in N records and/or at most R records per second (token bucket) for
+  noisy loggers: mcp_activity.heartbeat (watchdog heartbeats) and providers.payload (request
+  payload dumps) by default; EX_LOG_SAMPLE / EX_LOG_RATE_LIMITS override per logger
+- LazyJson defers json.dumps of a payload until a handler actually formats the record, so
+  sampled-out or filtered records cost no serialization and kept ones are serialized off
+  the caller's thread
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Optional
+
+HEARTBEAT_LOGGER = "mcp_activity.heartbeat"
+PAYLOAD_LOGGER = "providers.payload"
+
+# records/second (burst = max(1, rate)); 1-in-N sampling is off unless configured
+DEFAULT_RATE_LIMITS = {HEARTBEAT_LOGGER: 1.0, PAYLOAD_LOGGER: 2.0}
+
+
+class LazyJson:
+    """Log argument rendered as JSON only when the record is formatted.
+
+    Top-level dicts and lists are copied so later mutation by the caller (e.g. adding
+    temperature to request params) cannot race the listener thread.
+    """
+
+    __slots__ = ("obj", "transform", "kwargs")
+
+    def __init__(self, obj: Any, transform: Optional[Callable[[Any], Any]] = None, **dumps_kwargs: Any) -> None:
+        if isinstance(obj, dict):
+            obj = dict(obj)
+        elif isinstance(obj, list):
+            obj = list(obj)
+        self.obj = obj
+        self.transform = transform
+        self.kwargs = {"ensure_ascii": False, "default": str, **dumps_kwargs}
+
+    def __str__(self) -> str:
+        try:
+            obj = self.transform(self.obj) if self.transform is not None else self.obj
+            return json.dumps(obj, **self.kwargs)
+        except Exception as e:
+            return f"<unserializable payload: {e}>"
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every Nth record and at most `rate` records per second."""
+
+    def __init__(self, sample_every: int = 1, rate: float = 0.0) -> None:
+        super().__init__()
+        self.sample_every = max(1, int(sample_every))
+        self.rate = max(0.0, float(rate))
+        self._burst = max(1.0, self.rate)
+        self._tokens = self._burst
+        self._last = time.monotonic()
+        self._seen = 0
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            self._seen += 1
+            keep = (self._seen - 1) % self.sample_every == 0
+            if keep and self.rate > 0:
+                now = time.monotonic()
+                self._tokens = min(self._burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                else:
+                    keep = False
+            if not keep:
+                self.suppressed += 1
+            return keep
+
+
+def _parse_map(raw: str) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for item in raw.split(","):
+        name, _, value = item.partition("=")
+        try:
+            if name.strip():
+                out[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return out
+
+
+_filters: dict[str, SamplingFilter] = {}
+
+
+def configure_sampling(sample: Optional[dict] = None, rates: Optional[dict] = None) -> dict[str, SamplingFilter]:
+    """Attach (or replace) SamplingFilters on the configured loggers."""
+    sample = _parse_map(os.getenv("EX_LOG_SAMPLE", "")) if sample is None else sample
+    if rates is None:
+        rates = {**DEFAULT_RATE_LIMITS, **_parse_map(os.getenv("EX_LOG_RATE_LIMITS", ""))}
+    for name in set(sample) | set(rates):
+        log = logging.getLogger(name)
+        old = _filters.pop(name, None)
+        if old is not None:
+            log.removeFilter(old)
+        every, rate = int(sample.get(name, 1) or 1), float(rates.get(name, 0) or 0)
+        if every > 1 or rate > 0:
+            _filters[name] = SamplingFilter(every, rate)
+            log.addFilter(_filters[name])
+    return _filters
+
+
+class _RoutingQueueHandler(QueueHandler):
+    """Enqueues (target handlers, record) without formatting; drops and counts when full."""
+
+    def __init__(self, pipeline: "AsyncLogPipeline", targets: tuple[logging.Handler, ...]) -> None:
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+        self.targets = targets
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting (getMessage, LazyJson, tracebacks) happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        item = (self.targets, record)
+        try:
+            self.queue.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.ERROR:
+            try:
+                self.queue.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                pass
+        self.pipeline.note_drop(record)
+
+
+class _RoutingListener(QueueListener):
+    def __init__(self, pipeline: "AsyncLogPipeline") -> None:
+        super().__init__(pipeline.queue, respect_handler_level=True)
+        self.pipeline = pipeline
+
+    def enqueue_sentinel(self) -> None:
+        # Blocking put: on shutdown the queue may be full and must still drain
+        self.queue.put(self._sentinel)
+
+    def handle(self, item) -> None:
+        targets, record = item
+        self.pipeline.report_drops(targets)
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        self.pipeline.handled += 1
+
+
+class AsyncLogPipeline:
+    def __init__(self, capacity: int = 10000) -> None:
+        self.capacity = max(1, int(capacity))
+        self.queue: "queue.Queue" = queue.Queue(self.capacity)
+        self.listener = _RoutingListener(self)
+        self.handled = 0
+        self.dropped = 0
+        self.dropped_by_logger: dict[str, int] = {}
+        self._unreported = 0
+        self._lock = threading.Lock()
+        self._installed: list[tuple[logging.Logger, list[logging.Handler], logging.Handler]] = []
+
+    def note_drop(self, record: logging.LogRecord) -> None:
+        with self._lock:
+            self.dropped += 1
+            self._unreported += 1
+            self.dropped_by_logger[record.name] = self.dropped_by_logger.get(record.name, 0) + 1
+
+    def report_drops(self, targets: tuple[logging.Handler, ...]) -> None:
+        if not self._unreported:
+            return
+        with self._lock:
+            n, self._unreported = self._unreported, 0
+        record = logging.LogRecord(
+            "log_pipeline", logging.WARNING, __file__, 0,
+            "log queue full: dropped %d record(s) (%d total)", (n, self.dropped), None,
+        )
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def attach(self, log: logging.Logger) -> None:
+        """Route `log`'s current handlers through the queue."""
+        handlers = list(log.handlers)
+        if not handlers:
+            return
+        qh = _RoutingQueueHandler(self, tuple(handlers))
+        for h in handlers:
+            log.removeHandler(h)
+        log.addHandler(qh)
+        self._installed.append((log, handlers, qh))
+
+    def start(self) -> "AsyncLogPipeline":
+        self.listener.start()
+        return self
+
+    def stop(self) -> None:
+        """Drain the queue and put the original handlers back."""
+        try:
+            self.listener.stop()
+        except Exception:
+            pass
+        for log, handlers, qh in self._installed:
+            log.removeHandler(qh)
+            for h in handlers:
+                log.addHandler(h)
+        self._installed.clear()
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "queued": self.queue.qsize(),
+            "handled": self.handled,
+            "dropped": self.dropped,
+            "dropped_by_logger": dict(self.dropped_by_logger),
+            "suppressed_by_logger": {name: f.suppressed for name, f in _filters.items()},
+        }
+
+
+_pipeline: Optional[AsyncLogPipeline] = None
+
+
+def install_async_logging(loggers: tuple[str, ...] = ("", "mcp_activity")) -> Optional[AsyncLogPipeline]:
+    """Configure sampling and, unless EX_LOG_ASYNC=false, queue the given loggers' handlers (once)."""
+    global _pipeline
+    configure_sampling()
+    if _pipeline is not None or os.getenv("EX_LOG_ASYNC", "true").strip().lower() != "true":
+        return _pipeline
+    pipeline = AsyncLogPipeline(int(os.getenv("EX_LOG_QUEUE_SIZE", "10000")))
+    for name in loggers:
+        pipeline.attach(logging.getLogger(name))
+    _pipeline = pipeline.start()
+    atexit.register(pipeline.stop)
+    return _pipeline
+
+
+def pipeline_stats() -> Optional[dict]:
+    return _pipeline.stats() if _pipeline is not None else None
@@ -0,0 +1,93 @@
+"""
+Upstream rate-limit detection and per-call provider feedback for EX MCP Server.
+
+- is_rate_limit_error() classifies provider exceptions by HTTP status / SDK error type first and
+  only falls back to message markers ("429", "ReachLimit", ...) when no structure is available
+- A transport (the WS daemon) installs a CallFeedback for one tool call via start_call_feedback();
+  it lives in a ContextVar, so provider worker threads report into it like utils.token_stream
+- Providers call note_provider_latency() after a successful request and note_rate_limited() when
+  the upstream pushes back; the daemon feeds both into its adaptive concurrency limits
+- With no feedback installed every helper is a cheap no-op
+"""
+from __future__ import annotations
+
+import threading
+from contextvars import ContextVar, Token
+from typing import Optional
+
+_feedback_var: ContextVar[Optional["CallFeedback"]] = ContextVar("call_feedback", default=None)
+
+# Message fallbacks for SDKs/gateways that flatten errors to strings
+_RATE_LIMIT_MARKERS = ("429", "reachlimit", "rate limit", "rate_limit", "too many requests", "concurren")
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for obj in (error, getattr(error, "response", None)):
+        code = getattr(obj, "status_code", None) or getattr(obj, "status", None)
+        try:
+            if code is not None:
+                return int(code)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True if the upstream rejected the call for rate or concurrency reasons.
+
+    Wrapped errors (``raise RuntimeError(...) from sdk_error``) are classified by their cause.
+    """
+    seen = 0
+    exc: Optional[BaseException] = error
+    while exc is not None and seen < 5:
+        code = _status_code(exc)
+        if code is not None:
+            return code == 429
+        if type(exc).__name__ in ("RateLimitError", "APIReachLimitError"):
+            return True
+        exc = exc.__cause__
+        seen += 1
+    text = str(error).lower()
+    return any(marker in text for marker in _RATE_LIMIT_MARKERS)
+
+
+class CallFeedback:
+    """Provider observations collected during one tool call (written from worker threads)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.rate_limited = 0
+        self.latencies_s: list[float] = []
+
+    def note_rate_limited(self) -> None:
+        with self._lock:
+            self.rate_limited += 1
+
+    def note_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies_s.append(float(seconds))
+
+
+def start_call_feedback(feedback: CallFeedback) -> Token:
+    """Install feedback for the current context; pass the returned token to reset_call_feedback()."""
+    return _feedback_var.set(feedback)
+
+
+def reset_call_feedback(token: Token) -> None:
+    _feedback_var.reset(token)
+
+
+def get_call_feedback() -> Optional[CallFeedback]:
+    return _feedback_var.get()
+
+
+def note_rate_limited() -> None:
+    feedback = _feedback_var.get()
+    if feedback is not None:
+        feedback.note_rate_limited()
+
+
+def note_provider_latency(seconds: float) -> None:
+    feedback = _feedback_var.get()
+    if feedback is not None:
+        feedback.note_latency(seconds)
@@ -0,0 +1,283 @@
+"""
+Immutable runtime configuration snapshot for the tool-call hot path.
+
+- RuntimeConfig holds the typed values handle_call_tool used to re-parse from os.environ on
+  every call (timeouts, watchdog thresholds, JSONL mirroring, consensus auto-mode, routing
+  model names, auto-continue). It is built once and replaced as a whole, so a call always
+  reads one consistent version
+- reload_config() re-reads the .env file (override=True), swaps the snapshot and notifies
+  hooks registered with on_config_change(fn); fn(old, new, changed) gets the names of the
+  environment variables that changed, so caches can decide whether they are affected
+- EnvFileWatcher polls the .env file's stat signature from a daemon thread and reloads only
+  when it changed (EX_HOTRELOAD_ENV=true; interval EX_ENV_WATCH_INTERVAL_SECONDS)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, fields
+from typing import Callable, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+_TRUE = {"1", "true", "yes", "on"}
+
+
+def _str(env: Mapping[str, str], key: str, default: Optional[str] = None) -> Optional[str]:
+    value = env.get(key)
+    return value if value else default
+
+
+def _bool(env: Mapping[str, str], key: str, default: bool) -> bool:
+    value = env.get(key)
+    if value is None:
+        return default
+    return value.strip().lower() in _TRUE
+
+
+def _float(env: Mapping[str, str], key: str, default: float) -> float:
+    try:
+        return float(env.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _int(env: Mapping[str, str], key: str, default: int) -> int:
+    try:
+        return int(env.get(key) or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _expert_heartbeat(env: Mapping[str, str]) -> float:
+    # EXAI_WS_EXPERT_KEEPALIVE_MS (ms) wins over EXPERT_HEARTBEAT_INTERVAL_SECS (s)
+    ms = _float(env, "EXAI_WS_EXPERT_KEEPALIVE_MS", 0.0)
+    if ms > 0:
+        return max(0.5, ms / 1000.0)
+    return _float(env, "EXPERT_HEARTBEAT_INTERVAL_SECS", 10.0)
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    version: int = 0
+    # Boundary watchdog
+    tool_timeout_s: float = 120.0
+    heartbeat_s: float = 10.0
+    watchdog_warn_s: float = 30.0
+    watchdog_error_s: float = 90.0
+    mirror_activity_jsonl: bool = False
+    activity_log: bool = True
+    hotreload_env: bool = False
+    # Consensus auto-mode
+    consensus_automode: bool = True
+    min_consensus_models: int = 2
+    max_consensus_models: int = 3
+    # Routing model names (quality/speed tiers are optional, callers apply their own defaults)
+    glm_quality_model: Optional[str] = None
+    kimi_quality_model: Optional[str] = None
+    glm_speed_model: Optional[str] = None
+    kimi_speed_model: Optional[str] = None
+    glm_flash_model: str = "glm-4.5-flash"
+    kimi_default_model: str = "kimi-k2-0711-preview"
+    kimi_thinking_model: str = "kimi-thinking-preview"
+    default_auto_model: str = "glm-4.5-flash"
+    custom_model_name: str = "llama3.2"
+    intelligent_selection: bool = True
+    thinkdeep_override_explicit: bool = True
+    thinkdeep_fast_expert: bool = True
+    # Client defaults and auto-continue
+    client_defaults_use_websearch: bool = False
+    client_default_thinking_mode: str = "medium"
+    autocontinue_workflows: bool = False
+    autocontinue_only_thinkdeep: bool = True
+    autocontinue_max_steps: int = 3
+    client_max_workflow_steps: int = 0
+    # Workflow tools
+    workflow_step_timeout_s: float = 45.0
+    workflow_call_ceiling_s: float = 180.0
+    expert_timeout_s: float = 300.0
+    expert_heartbeat_s: float = 10.0
+    default_use_assistant_model: bool = True
+    consensus_model_timeout_s: float = 120.0
+    speculative_expert: bool = False
+    speculative_expert_confidence: str = "high"
+    speculative_expert_max_inflight: int = 2
+
+    @classmethod
+    def from_env(cls, env: Optional[Mapping[str, str]] = None, version: int = 0) -> "RuntimeConfig":
+        env = os.environ if env is None else env
+        return cls(
+            version=version,
+            tool_timeout_s=_float(env, "EX_TOOL_TIMEOUT_SECONDS", 120.0),
+            heartbeat_s=_float(env, "EX_HEARTBEAT_SECONDS", 10.0),
+            watchdog_warn_s=_float(env, "EX_WATCHDOG_WARN_SECONDS", 30.0),
+            watchdog_error_s=_float(env, "EX_WATCHDOG_ERROR_SECONDS", 90.0),
+            mirror_activity_jsonl=_bool(env, "EX_MIRROR_ACTIVITY_TO_JSONL", False),
+            activity_log=_bool(env, "ACTIVITY_LOG", True),
+            hotreload_env=_bool(env, "EX_HOTRELOAD_ENV", False),
+            consensus_automode=_bool(env, "ENABLE_CONSENSUS_AUTOMODE", True),
+            min_consensus_models=_int(env, "MIN_CONSENSUS_MODELS", 2),
+            max_consensus_models=_int(env, "MAX_CONSENSUS_MODELS", 3),
+            glm_quality_model=_str(env, "GLM_QUALITY_MODEL"),
+            kimi_quality_model=_str(env, "KIMI_QUALITY_MODEL"),
+            glm_speed_model=_str(env, "GLM_SPEED_MODEL"),
+            kimi_speed_model=_str(env, "KIMI_SPEED_MODEL"),
+            glm_flash_model=env.get("GLM_FLASH_MODEL", "glm-4.5-flash"),
+            kimi_default_model=env.get("KIMI_DEFAULT_MODEL", "kimi-k2-0711-preview"),
+            kimi_thinking_model=env.get("KIMI_THINKING_MODEL", "kimi-thinking-preview"),
+            default_auto_model=env.get("DEFAULT_AUTO_MODEL", "glm-4.5-flash"),
+            custom_model_name=env.get("CUSTOM_MODEL_NAME", "llama3.2"),
+            intelligent_selection=_bool(env, "ENABLE_INTELLIGENT_SELECTION", True),
+            thinkdeep_override_explicit=_bool(env, "THINKDEEP_OVERRIDE_EXPLICIT", True),
+            thinkdeep_fast_expert=_bool(env, "THINKDEEP_FAST_EXPERT", True),
+            # Generic client variables first, then the legacy Claude-specific ones
+            client_defaults_use_websearch=_bool(
+                env, "CLIENT_DEFAULTS_USE_WEBSEARCH", _bool(env, "CLAUDE_DEFAULTS_USE_WEBSEARCH", False)
+            ),
+            client_default_thinking_mode=(
+                _str(env, "CLIENT_DEFAULT_THINKING_MODE") or env.get("CLAUDE_DEFAULT_THINKING_MODE", "medium")
+            ).strip().lower(),
+            autocontinue_workflows=_bool(env, "EX_AUTOCONTINUE_WORKFLOWS", False),
+            autocontinue_only_thinkdeep=_bool(env, "EX_AUTOCONTINUE_ONLY_THINKDEEP", True),
+            autocontinue_max_steps=_int(env, "EX_AUTOCONTINUE_MAX_STEPS", 3),
+            client_max_workflow_steps=_int(
+                env, "CLIENT_MAX_WORKFLOW_STEPS", _int(env, "CLAUDE_MAX_WORKFLOW_STEPS", 0)
+            ),
+            workflow_step_timeout_s=_float(env, "WORKFLOW_STEP_TIMEOUT_SECS", 45.0),
+            workflow_call_ceiling_s=_float(env, "EXAI_WS_CALL_TIMEOUT", 180.0),
+            expert_timeout_s=_float(env, "EXPERT_ANALYSIS_TIMEOUT_SECS", 300.0),
+            expert_heartbeat_s=_expert_heartbeat(env),
+            default_use_assistant_model=(env.get("DEFAULT_USE_ASSISTANT_MODEL") or "").strip().lower()
+            not in ("false", "0", "no", "off"),
+            consensus_model_timeout_s=_float(env, "CONSENSUS_MODEL_TIMEOUT_SECS", 120.0),
+            speculative_expert=_bool(env, "EXAI_SPECULATIVE_EXPERT", False),
+            speculative_expert_confidence=(env.get("EXAI_SPECULATIVE_EXPERT_CONFIDENCE") or "high").strip().lower(),
+            speculative_expert_max_inflight=_int(env, "EXAI_SPECULATIVE_EXPERT_MAX_INFLIGHT", 2),
+        )
+
+    def same_values(self, other: "RuntimeConfig") -> bool:
+        return all(getattr(self, f.name) == getattr(other, f.name) for f in fields(self) if f.name != "version")
+
+
+ConfigHook = Callable[[RuntimeConfig, RuntimeConfig, frozenset], None]
+
+_lock = threading.Lock()
+_current: Optional[RuntimeConfig] = None
+_hooks: list[ConfigHook] = []
+
+
+def get_config() -> RuntimeConfig:
+    """Current snapshot (built from os.environ on first use)."""
+    cfg = _current
+    if cfg is None:
+        with _lock:
+            if _current is None:
+                _swap(RuntimeConfig.from_env(version=1))
+            cfg = _current
+    return cfg  # type: ignore[return-value]
+
+
+def _swap(cfg: RuntimeConfig) -> None:
+    global _current
+    _current = cfg
+
+
+def on_config_change(fn: ConfigHook) -> ConfigHook:
+    """Register fn(old, new, changed_env_names); usable as a decorator."""
+    with _lock:
+        if fn not in _hooks:
+            _hooks.append(fn)
+    return fn
+
+
+def reload_config(env_file: Optional[str] = None) -> bool:
+    """Re-read env_file (if given) into os.environ and swap the snapshot. True if anything changed.
+
+    Hooks run when any environment variable changed, not only the ones RuntimeConfig
+    holds: provider keys and URLs invalidate other caches.
+    """
+    with _lock:
+        before = dict(os.environ)
+        if env_file:
+            try:
+                from dotenv import load_dotenv
+
+                load_dotenv(dotenv_path=env_file, override=True)
+            except Exception as e:
+                logger.debug("env reload from %s failed: %s", env_file, e)
+        after = dict(os.environ)
+        changed = frozenset(k for k in before.keys() | after.keys() if before.get(k) != after.get(k))
+        old = _current or RuntimeConfig.from_env(before, version=0)
+        new = RuntimeConfig.from_env(after, version=old.version + 1)
+        if new.same_values(old):
+            new = old  # Unrelated variables changed: keep the version callers already hold
+        _swap(new)
+        hooks = list(_hooks) if changed else []
+    for fn in hooks:
+        try:
+            fn(old, new, changed)
+        except Exception as e:
+            logger.warning("config change hook %r failed: %s", fn, e)
+    if changed:
+        logger.info("runtime config reloaded (version %s, %d env var(s) changed)", new.version, len(changed))
+    return bool(changed)
+
+
+class EnvFileWatcher:
+    """Polls one env file and calls reload_config() when its (mtime, size) changes."""
+
+    def __init__(self, path: str, interval_s: float = 2.0) -> None:
+        self.path = path
+        self.interval_s = max(0.05, float(interval_s))
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check."""
+        sig = self._stat()
+        if sig == self._signature:
+            return False
+        self._signature = sig
+        if sig is not None:
+            reload_config(self.path)
+            self.reloads += 1
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.check()
+            except Exception as e:
+                logger.debug("env watcher check failed: %s", e)
+
+    def start(self) -> "EnvFileWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="env-file-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_watcher: Optional[EnvFileWatcher] = None
+
+
+def start_env_watcher(path: str, interval_s: Optional[float] = None) -> EnvFileWatcher:
+    """Start (once) the process-wide watcher for path."""
+    global _watcher
+    if _watcher is None:
+        if interval_s is None:
+            interval_s = _float(os.environ, "EX_ENV_WATCH_INTERVAL_SECONDS", 2.0)
+        _watcher = EnvFileWatcher(path, interval_s).start()
+    return _watcher
@@ -1,15 +1,17 @@
 """
-In-memory (with optional Redis) storage backend for conversation threads
+In-memory (with optional Redis or SQLite) storage backend for conversation threads
 
 This module provides a thread-safe, in-memory alternative to Redis for storing
 conversation contexts. In production, a Redis backend can be enabled via REDIS_URL
-for persistence across MCP client reconnections. If REDIS_URL is not set or Redis
-is unavailable, the system falls back to in-memory storage.
+for persistence across MCP client reconnections. Without Redis, EXAI_STORAGE_BACKEND=sqlite
+selects an embedded file-backed store (EXAI_STORAGE_SQLITE_PATH) that survives daemon
+restarts and is shared by every process using the same file. Otherwise the system falls
+back to in-memory storage.
 
-⚠️  PROCESS-SPECIFIC STORAGE: This storage is confined to a single Python process.
+⚠️  PROCESS-SPECIFIC STORAGE: The in-memory store is confined to a single Python process.
     Data stored in one process is NOT accessible from other processes or subprocesses.
     This is why simulator tests that run server.py as separate subprocesses cannot
-    share conversation state between tool calls.
+    share conversation state between tool calls (unless they use the SQLite backend).
 
 Key Features:
 - Thread-safe operations using locks
@@ -17,16 +19,27 @@ Key Features:
 - Background cleanup thread for memory management
 - Singleton pattern for consistent state within a single process
 - Drop-in replacement for Redis storage (for single-process scenarios)
+- Append-only lists (append_with_ttl/get_list/list_length, a Redis list on Redis) so a
+  conversation turn is stored by itself instead of rewriting the whole thread
+- Batched reads (get_many/get_lists: MGET and one pipeline on Redis, one locked pass in
+  memory) so a thread chain is fetched in a fixed number of round trips
 """
 
+import heapq
 import logging
 import os
+import sqlite3
 import threading
 import time
+from collections import OrderedDict
+from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Default EXAI_STORAGE_SQLITE_PATH, under the project root regardless of the working directory
+_DEFAULT_SQLITE_PATH = Path(__file__).resolve().parents[1] / ".cache" / "conversations.sqlite3"
+
 try:
     import redis  # type: ignore
     _redis_available = True
@@ -34,78 +47,289 @@ except Exception:
     _redis_available = False
 
 
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value, expires_at: float, size: int) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+# Bookkeeping per entry (key, tuple, heap item) counted against the memory ceiling
+_ENTRY_OVERHEAD = 100
+
+# A conversation is a header key plus its "<key>:turns" list; both live and are evicted together
+_TURNS_SUFFIX = ":turns"
+
+
+def _thread_group(key: str) -> tuple[str, str]:
+    """(header key, turn list key) of the thread a key belongs to."""
+    if key.endswith(_TURNS_SUFFIX):
+        return key[: -len(_TURNS_SUFFIX)], key
+    return key, key + _TURNS_SUFFIX
+
+
+class _Shard:
+    """
+    One lock's worth of keys: entries in least-recently-used order, an expiry heap and a byte count.
+
+    Caller holds self.lock for every method.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.lock = threading.Lock()
+        self.data: "OrderedDict[str, _Entry]" = OrderedDict()
+        # (expires_at, key); an item is stale when the entry's TTL was refreshed or the key removed
+        self.heap: list[tuple[float, str]] = []
+        self.bytes = 0
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.expirations = 0
+
+    def live(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if now >= entry.expires_at:
+            self.remove(key)
+            self.expirations += 1
+            return None
+        self.data.move_to_end(key)
+        return entry
+
+    def remove(self, key: str) -> None:
+        entry = self.data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def store(self, key: str, entry: _Entry) -> None:
+        old = self.data.pop(key, None)
+        if old is not None:
+            self.bytes -= old.size
+        self.data[key] = entry
+        self.bytes += entry.size
+        self.schedule(key, entry.expires_at)
+        self.enforce_ceiling(keep=key)
+
+    def grow(self, key: str, entry: _Entry, delta: int) -> None:
+        entry.size += delta
+        self.bytes += delta
+        self.enforce_ceiling(keep=key)
+
+    def schedule(self, key: str, expires_at: float) -> None:
+        heapq.heappush(self.heap, (expires_at, key))
+        # TTL refreshes leave stale items behind; rebuild before they dominate the heap
+        if len(self.heap) > 2 * len(self.data) + 64:
+            self.heap = [(e.expires_at, k) for k, e in self.data.items()]
+            heapq.heapify(self.heap)
+
+    def enforce_ceiling(self, keep: str) -> None:
+        # Least recently used first, a thread header together with its turn list; the thread just
+        # written stays even if it alone exceeds the shard share
+        kept = _thread_group(keep)
+        while self.bytes > self.max_bytes:
+            victim = next((key for key in self.data if key not in kept), None)
+            if victim is None:
+                break
+            for key in _thread_group(victim):
+                if key in self.data:
+                    self.remove(key)
+                    self.evictions += 1
+
+    def expire_due(self, now: float) -> int:
+        removed = 0
+        while self.heap and self.heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self.heap)
+            entry = self.data.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self.remove(key)
+                removed += 1
+        self.expirations += removed
+        return removed
+
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _size(key: str, value) -> int:
+    if isinstance(value, list):
+        return _utf8_len(key) + _ENTRY_OVERHEAD + sum(_utf8_len(v) for v in value)
+    return _utf8_len(key) + _ENTRY_OVERHEAD + _utf8_len(value)
+
+
 class InMemoryStorage:
-    """Thread-safe in-memory storage for conversation threads"""
-
-    def __init__(self):
-        self._store: dict[str, tuple[str, float]] = {}
-        self._lock = threading.Lock()
-        # Match Redis behavior: cleanup interval based on conversation timeout
-        # Run cleanup at 1/10th of timeout interval (e.g., 18 mins for 3 hour timeout)
-        timeout_hours = int(os.getenv("CONVERSATION_TIMEOUT_HOURS", "3"))
-        self._cleanup_interval = (timeout_hours * 3600) // 10
-        self._cleanup_interval = max(300, self._cleanup_interval)  # Minimum 5 minutes
-        self._shutdown = False
+    """
+    Thread-safe in-memory storage for conversation threads
+
+    - keys are spread over EXAI_STORAGE_MEMORY_SHARDS shards, each with its own lock, so
+      unrelated conversations do not contend
+    - expiry is driven by a per-shard heap: reads drop an expired key on access and the
+      cleanup thread pops only keys that are due (every EXAI_STORAGE_MEMORY_EXPIRE_SECS)
+      instead of scanning every key
+    - total size (UTF-8 bytes of keys and values plus a per-key overhead) is capped at
+      EXAI_STORAGE_MEMORY_MAX_BYTES, split evenly across shards; writes beyond a shard's share
+      evict its least recently used keys. A thread header and its turn list are placed in the
+      same shard and evicted together, so a thread never survives without its turns
+    """
+
+    # Backends with append-only lists; conversation_memory stores turns in them
+    supports_turn_lists = True
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        shards: Optional[int] = None,
+        expire_interval: Optional[float] = None,
+    ):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("EXAI_STORAGE_MEMORY_MAX_BYTES", str(512 * 1024 * 1024)))
+        if shards is None:
+            shards = int(os.getenv("EXAI_STORAGE_MEMORY_SHARDS", "16"))
+        if expire_interval is None:
+            expire_interval = float(os.getenv("EXAI_STORAGE_MEMORY_EXPIRE_SECS", "10"))
+        self.max_bytes = max(1, int(max_bytes))
+        n = max(1, int(shards))
+        self._shards = [_Shard(max(1, self.max_bytes // n)) for _ in range(n)]
+        self._cleanup_interval = max(0.01, expire_interval)
+        self._shutdown = threading.Event()
 
         # Start background cleanup thread
         self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
         self._cleanup_thread.start()
 
         logger.info(
-            f"In-memory storage initialized with {timeout_hours}h timeout, cleanup every {self._cleanup_interval//60}m"
+            f"In-memory storage initialized: {n} shards, {self.max_bytes // (1024 * 1024)} MiB cap, "
+            f"expiry every {self._cleanup_interval:g}s"
         )
 
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(_thread_group(key)[0]) % len(self._shards)]
+
     def set_with_ttl(self, key: str, ttl_seconds: int, value: str) -> None:
         """Store value with expiration time"""
-        with self._lock:
-            expires_at = time.time() + ttl_seconds
-            self._store[key] = (value, expires_at)
-            logger.debug(f"Stored key {key} with TTL {ttl_seconds}s")
+        shard = self._shard(key)
+        with shard.lock:
+            shard.store(key, _Entry(value, time.time() + ttl_seconds, _size(key, value)))
+        logger.debug(f"Stored key {key} with TTL {ttl_seconds}s")
+
+    def _value(self, key: str, now: float) -> Optional[str]:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.live(key, now)
+            if entry is None or isinstance(entry.value, list):
+                return None
+            return entry.value
 
     def get(self, key: str) -> Optional[str]:
         """Retrieve value if not expired"""
-        with self._lock:
-            if key in self._store:
-                value, expires_at = self._store[key]
-                if time.time() < expires_at:
-                    logger.debug(f"Retrieved key {key}")
-                    return value
-                else:
-                    # Clean up expired entry
-                    del self._store[key]
-                    logger.debug(f"Key {key} expired and removed")
-        return None
+        return self._value(key, time.time())
 
     def setex(self, key: str, ttl_seconds: int, value: str) -> None:
         """Redis-compatible setex method"""
         self.set_with_ttl(key, ttl_seconds, value)
 
+    def append_with_ttl(self, key: str, ttl_seconds: int, value: str) -> int:
+        """Append value to the list at key (created if missing), refresh its TTL, return the new length"""
+        shard = self._shard(key)
+        now = time.time()
+        with shard.lock:
+            entry = shard.live(key, now)
+            if entry is None or not isinstance(entry.value, list):
+                entry = _Entry([value], now + ttl_seconds, _size(key, [value]))
+                shard.store(key, entry)
+                return 1
+            entry.value.append(value)
+            entry.expires_at = now + ttl_seconds
+            shard.schedule(key, entry.expires_at)
+            length = len(entry.value)
+            shard.grow(key, entry, _utf8_len(value))
+            return length
+
+    def _list(self, key: str, start: int, now: float) -> list[str]:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.live(key, now)
+            if entry is None or not isinstance(entry.value, list):
+                return []
+            return entry.value[start:]
+
+    def get_list(self, key: str) -> list[str]:
+        """All values of the list at key, oldest first (empty if missing or expired)"""
+        return self._list(key, 0, time.time())
+
+    def list_length(self, key: str) -> int:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.live(key, time.time())
+            return len(entry.value) if entry is not None and isinstance(entry.value, list) else 0
+
+    def get_many(self, keys: list[str]) -> list[Optional[str]]:
+        """Values for several keys (None where missing or expired)"""
+        now = time.time()
+        return [self._value(key, now) for key in keys]
+
+    def get_lists(self, keys: list[str], starts: Optional[list[int]] = None) -> list[list[str]]:
+        """Lists for several keys, each from its start index (default 0)"""
+        now = time.time()
+        return [self._list(key, start, now) for key, start in zip(keys, starts or [0] * len(keys))]
+
+    def expire(self, key: str, ttl_seconds: int) -> None:
+        """Reset the TTL of an existing key"""
+        shard = self._shard(key)
+        now = time.time()
+        with shard.lock:
+            entry = shard.live(key, now)
+            if entry is not None:
+                entry.expires_at = now + ttl_seconds
+                shard.schedule(key, entry.expires_at)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.data.clear()
+                shard.heap.clear()
+                shard.bytes = 0
+
+    def stats(self) -> dict:
+        out = {"backend": "memory", "shards": len(self._shards), "max_bytes": self.max_bytes}
+        totals = {"keys": 0, "bytes": 0, "evictions": 0, "expirations": 0}
+        for shard in self._shards:
+            with shard.lock:
+                totals["keys"] += len(shard.data)
+                totals["bytes"] += shard.bytes
+                totals["evictions"] += shard.evictions
+                totals["expirations"] += shard.expirations
+        out.update(totals)
+        return out
+
     def _cleanup_worker(self):
-        """Background thread that periodically cleans up expired entries"""
-        while not self._shutdown:
-            time.sleep(self._cleanup_interval)
+        """Background thread that periodically removes keys whose TTL is due"""
+        while not self._shutdown.wait(self._cleanup_interval):
             self._cleanup_expired()
 
     def _cleanup_expired(self):
-        """Remove all expired entries"""
-        with self._lock:
-            current_time = time.time()
-            expired_keys = [k for k, (_, exp) in self._store.items() if exp < current_time]
-            for key in expired_keys:
-                del self._store[key]
-
-            if expired_keys:
-                logger.debug(f"Cleaned up {len(expired_keys)} expired conversation threads")
+        """Remove expired entries (only keys due on each shard's heap are visited)"""
+        now = time.time()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += shard.expire_due(now)
+        if removed:
+            logger.debug(f"Cleaned up {removed} expired conversation entries")
 
     def shutdown(self):
         """Graceful shutdown of background thread"""
-        self._shutdown = True
+        self._shutdown.set()
         if self._cleanup_thread.is_alive():
             self._cleanup_thread.join(timeout=1)
 
 
 # Optional Redis storage backend
 class RedisStorage:
+    supports_turn_lists = True
+
     def __init__(self, url: str, ttl_seconds: int):
         self._client = redis.from_url(url, decode_responses=True)
         self._ttl = ttl_seconds
@@ -116,6 +340,268 @@ class RedisStorage:
         return self._client.get(key)
     def setex(self, key: str, ttl_seconds: int, value: str) -> None:
         self.set_with_ttl(key, ttl_seconds, value)
+    def append_with_ttl(self, key: str, ttl_seconds: int, value: str) -> int:
+        pipe = self._client.pipeline()
+        pipe.rpush(key, value)
+        pipe.expire(key, ttl_seconds)
+        length, _ = pipe.execute()
+        return int(length)
+    def get_list(self, key: str) -> list[str]:
+        return self._client.lrange(key, 0, -1)
+    def list_length(self, key: str) -> int:
+        return int(self._client.llen(key))
+    def expire(self, key: str, ttl_seconds: int) -> None:
+        self._client.expire(key, ttl_seconds)
+    def get_many(self, keys: list[str]) -> list:
+        return self._client.mget(keys) if keys else []
+    def stats(self) -> dict:
+        return {"backend": "redis", "keys": self._client.dbsize()}
+    def get_lists(self, keys: list[str], starts: Optional[list[int]] = None) -> list[list[str]]:
+        if not keys:
+            return []
+        pipe = self._client.pipeline()
+        for key, start in zip(keys, starts or [0] * len(keys)):
+            pipe.lrange(key, start, -1)
+        return pipe.execute()
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY, value TEXT, expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at);
+CREATE TABLE IF NOT EXISTS list_items (
+    key TEXT NOT NULL, idx INTEGER NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, idx)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteStorage:
+    """
+    File-backed storage shared by all processes that open the same database.
+
+    - kv holds values and TTLs (a list key has a kv row with a NULL value for its TTL);
+      list items live in list_items, so appending writes one row
+    - WAL journal with a busy timeout: readers never block the writer, and concurrent
+      writers from other processes wait for the lock instead of failing. Writes use
+      BEGIN IMMEDIATE so read-modify-write steps (list append) are atomic across processes
+    - expired rows are invisible to reads (expires_at is checked in every query) and are
+      deleted by a background thread, which also returns free pages (incremental vacuum)
+      and checkpoints the WAL
+    """
+
+    supports_turn_lists = True
+
+    def __init__(self, path: str, cleanup_interval: Optional[float] = None):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        conn = self._conn()
+        # auto_vacuum only takes effect on a database without tables
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.executescript(_SQLITE_SCHEMA)
+        if cleanup_interval is None:
+            cleanup_interval = float(os.getenv("EXAI_STORAGE_SQLITE_CLEANUP_SECS", "300"))
+        self._cleanup_interval = max(1.0, cleanup_interval)
+        self._expirations = 0
+        self._shutdown = threading.Event()
+        self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
+        self._cleanup_thread.start()
+        logger.info(f"SQLite storage initialized at {path}, cleanup every {self._cleanup_interval:.0f}s")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write(self, fn):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _read(self, fn):
+        # One read transaction: a consistent snapshot across the statements in fn
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            return fn(conn)
+        finally:
+            conn.execute("COMMIT")
+
+    def set_with_ttl(self, key: str, ttl_seconds: int, value: str) -> None:
+        def op(conn):
+            conn.execute("DELETE FROM list_items WHERE key=?", (key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+
+        self._write(op)
+
+    def setex(self, key: str, ttl_seconds: int, value: str) -> None:
+        self.set_with_ttl(key, ttl_seconds, value)
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key=? AND expires_at>?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys: list[str]) -> list[Optional[str]]:
+        def op(conn):
+            now = time.time()
+            out = []
+            for key in keys:
+                row = conn.execute("SELECT value FROM kv WHERE key=? AND expires_at>?", (key, now)).fetchone()
+                out.append(row[0] if row else None)
+            return out
+
+        return self._read(op) if keys else []
+
+    def append_with_ttl(self, key: str, ttl_seconds: int, value: str) -> int:
+        def op(conn):
+            now = time.time()
+            row = conn.execute("SELECT expires_at FROM kv WHERE key=?", (key,)).fetchone()
+            if row is not None and row[0] <= now:
+                # Expired list not yet cleaned up: start over
+                conn.execute("DELETE FROM list_items WHERE key=?", (key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, NULL, ?)", (key, now + ttl_seconds)
+            )
+            length = conn.execute(
+                "SELECT COALESCE(MAX(idx) + 1, 0) FROM list_items WHERE key=?", (key,)
+            ).fetchone()[0]
+            conn.execute("INSERT INTO list_items (key, idx, value) VALUES (?, ?, ?)", (key, length, value))
+            return length + 1
+
+        return self._write(op)
+
+    def _list(self, conn, key: str, start: int, now: float) -> list[str]:
+        live = conn.execute("SELECT 1 FROM kv WHERE key=? AND expires_at>?", (key, now)).fetchone()
+        if not live:
+            return []
+        rows = conn.execute(
+            "SELECT value FROM list_items WHERE key=? AND idx>=? ORDER BY idx", (key, start)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def get_list(self, key: str) -> list[str]:
+        return self._read(lambda conn: self._list(conn, key, 0, time.time()))
+
+    def get_lists(self, keys: list[str], starts: Optional[list[int]] = None) -> list[list[str]]:
+        starts = starts or [0] * len(keys)
+
+        def op(conn):
+            now = time.time()
+            return [self._list(conn, key, start, now) for key, start in zip(keys, starts)]
+
+        return self._read(op) if keys else []
+
+    def list_length(self, key: str) -> int:
+        def op(conn):
+            live = conn.execute("SELECT 1 FROM kv WHERE key=? AND expires_at>?", (key, time.time())).fetchone()
+            if not live:
+                return 0
+            return conn.execute("SELECT COALESCE(MAX(idx) + 1, 0) FROM list_items WHERE key=?", (key,)).fetchone()[0]
+
+        return self._read(op)
+
+    def expire(self, key: str, ttl_seconds: int) -> None:
+        now = time.time()
+        self._write(
+            lambda conn: conn.execute(
+                "UPDATE kv SET expires_at=? WHERE key=? AND expires_at>?", (now + ttl_seconds, key, now)
+            )
+        )
+
+    def _cleanup_worker(self):
+        """Background thread that periodically deletes expired entries and compacts the file"""
+        while not self._shutdown.wait(self._cleanup_interval):
+            try:
+                self._cleanup_expired()
+            except Exception as e:
+                logger.debug(f"SQLite storage cleanup failed: {e}")
+
+    def _cleanup_expired(self):
+        """Delete expired keys and their list items, then release free pages and checkpoint the WAL"""
+
+        def op(conn):
+            now = time.time()
+            conn.execute(
+                "DELETE FROM list_items WHERE key IN (SELECT key FROM kv WHERE expires_at<=? AND value IS NULL)",
+                (now,),
+            )
+            return conn.execute("DELETE FROM kv WHERE expires_at<=?", (now,)).rowcount
+
+        removed = self._write(op)
+        self._expirations += removed
+        conn = self._conn()
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        if removed:
+            logger.debug(f"Cleaned up {removed} expired conversation entries")
+
+    def clear(self) -> None:
+        def op(conn):
+            conn.execute("DELETE FROM list_items")
+            conn.execute("DELETE FROM kv")
+
+        self._write(op)
+
+    def stats(self) -> dict:
+        def op(conn):
+            now = time.time()
+            keys, kv_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(key) + COALESCE(LENGTH(value), 0)), 0) FROM kv WHERE expires_at>?",
+                (now,),
+            ).fetchone()
+            item_bytes = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM list_items").fetchone()[0]
+            return keys, kv_bytes + item_bytes
+
+        keys, size = self._read(op)
+        try:
+            file_bytes = os.path.getsize(self.path)
+        except OSError:
+            file_bytes = None
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "keys": keys,
+            "bytes": size,
+            "file_bytes": file_bytes,
+            "evictions": 0,
+            "expirations": self._expirations,
+        }
+
+    def shutdown(self):
+        """Stop the cleanup thread and close connections"""
+        self._shutdown.set()
+        if self._cleanup_thread.is_alive():
+            self._cleanup_thread.join(timeout=1)
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
 
 # Global singleton instance
 _storage_instance = None
@@ -128,9 +614,19 @@ def get_storage_backend():
     if _storage_instance is None:
         with _storage_lock:
             if _storage_instance is None:
-                # Choose Redis when configured and available; else in-memory
+                # Choose Redis when configured and available; else SQLite if selected; else in-memory
                 redis_url = os.getenv("REDIS_URL")
-                if redis_url and _redis_available:
+                backend = os.getenv("EXAI_STORAGE_BACKEND", "memory").strip().lower()
+                if backend == "sqlite" and not (redis_url and _redis_available):
+                    path = os.getenv("EXAI_STORAGE_SQLITE_PATH", "").strip() or str(_DEFAULT_SQLITE_PATH)
+                    try:
+                        _storage_instance = SQLiteStorage(path)
+                        logger.info("Initialized SQLite conversation storage")
+                    except Exception as e:
+                        logger.warning(f"SQLite storage init failed ({e}); falling back to in-memory storage")
+                        _storage_instance = InMemoryStorage()
+                        logger.info("Initialized in-memory conversation storage")
+                elif redis_url and _redis_available:
                     try:
                         timeout_hours = int(os.getenv("CONVERSATION_TIMEOUT_HOURS", "3"))
                         ttl = timeout_hours * 3600
@@ -144,3 +640,12 @@ def get_storage_backend():
                     _storage_instance = InMemoryStorage()
                     logger.info("Initialized in-memory conversation storage")
     return _storage_instance
+
+
+def get_storage_stats() -> dict:
+    """Size and churn of the conversation storage backend, for status reporting"""
+    try:
+        storage = get_storage_backend()
+        return storage.stats()
+    except Exception as e:
+        return {"error": str(e)}
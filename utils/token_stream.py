@@ -0,0 +1,133 @@
+"""
+Per-call token streaming for EX MCP Server.
+
+- A transport (the WS daemon) installs a TokenStream for one tool call via start_token_stream()
+- Providers call emit_token() for each content delta and record_stream_usage() when the stream ends
+- The stream lives in a ContextVar, so it follows asyncio tasks and asyncio.to_thread into
+  provider worker threads (use contextvars.copy_context() for run_in_executor)
+- With no stream installed every helper is a cheap no-op and providers keep their non-streaming paths
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Awaitable, Callable, Optional
+
+_stream_var: ContextVar[Optional["TokenStream"]] = ContextVar("token_stream", default=None)
+
+
+class TokenStream:
+    """Thread-safe buffer between provider threads and an async sender.
+
+    emit() may be called from any thread. pump() runs on the event loop and keeps at most one
+    send in flight: while the client is slow, new deltas coalesce into the next frame instead
+    of queueing without bound or blocking the provider.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._lock = threading.Lock()
+        self._pending: list[str] = []
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._dead = False  # sender failed (client gone); drop further deltas
+        self.usage: Optional[dict] = None
+        self.started_at = time.time()
+        self.first_token_at: Optional[float] = None
+        self.frames_sent = 0
+        self.chars_emitted = 0
+
+    def _wake(self) -> None:
+        try:
+            if threading.get_ident() == self._loop_thread:
+                self._wakeup.set()
+            else:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # Loop already closed; nothing left to deliver to
+            self._dead = True
+
+    def emit(self, text: str) -> None:
+        if not text or self._closed or self._dead:
+            return
+        with self._lock:
+            self._pending.append(text)
+            self.chars_emitted += len(text)
+            if self.first_token_at is None:
+                self.first_token_at = time.time()
+        self._wake()
+
+    def set_usage(self, usage: Optional[dict]) -> None:
+        if usage:
+            self.usage = dict(usage)
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake()
+
+    @property
+    def ttft_s(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return max(0.0, self.first_token_at - self.started_at)
+
+    def _take(self) -> str:
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending.clear()
+            return text
+
+    async def pump(self, send: Callable[[str], Awaitable[bool]]) -> None:
+        """Forward buffered deltas through send() until close() and the buffer is drained."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            text = self._take()
+            if text and not self._dead:
+                if await send(text):
+                    self.frames_sent += 1
+                else:
+                    self._dead = True
+            if self._closed:
+                # Catch anything emitted while the last send was in flight
+                tail = self._take()
+                if tail and not self._dead and await send(tail):
+                    self.frames_sent += 1
+                return
+
+
+def start_token_stream(stream: TokenStream) -> Token:
+    """Install a stream for the current context; pass the returned token to reset_token_stream()."""
+    return _stream_var.set(stream)
+
+
+def reset_token_stream(token: Token) -> None:
+    _stream_var.reset(token)
+
+
+def get_token_stream() -> Optional[TokenStream]:
+    return _stream_var.get()
+
+
+def emit_token(text: Optional[str]) -> bool:
+    """Forward one content delta to the active stream. Returns True if a stream consumed it."""
+    stream = _stream_var.get()
+    if stream is None or not text:
+        return False
+    try:
+        stream.emit(str(text))
+        return True
+    except Exception:
+        return False
+
+
+def record_stream_usage(usage: Optional[dict]) -> None:
+    stream = _stream_var.get()
+    if stream is not None:
+        try:
+            stream.set_usage(usage)
+        except Exception:
+            pass